@@ -0,0 +1,51 @@
+"""Add candidate_summary read model
+
+Revision ID: cs01_candidate_summary
+Revises: pg01_cvs_keyset_index
+Create Date: 2026-02-23
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cs01_candidate_summary'
+down_revision: Union[str, Sequence[str], None] = 'pg01_cvs_keyset_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One prebuilt profiles list item per CV. Populate existing CVs with
+    # scripts/backfill_candidate_summary.py after upgrading.
+    op.create_table(
+        'candidate_summary',
+        sa.Column('cv_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('uploaded_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('experience_years', sa.Integer(), nullable=True),
+        sa.Column('bachelor_year', sa.Integer(), nullable=True),
+        sa.Column('skills', sa.Text(), nullable=True),
+        sa.Column('is_silver_medalist', sa.Boolean(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.PrimaryKeyConstraint('cv_id'),
+    )
+    op.create_index('ix_candidate_summary_company_uploaded_at', 'candidate_summary', ['company_id', 'uploaded_at', 'cv_id'], unique=False)
+    op.create_index('ix_candidate_summary_company_name', 'candidate_summary', ['company_id', 'name', 'cv_id'], unique=False)
+    op.create_index('ix_candidate_summary_company_experience', 'candidate_summary', ['company_id', 'experience_years', 'cv_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_candidate_summary_company_experience', table_name='candidate_summary')
+    op.drop_index('ix_candidate_summary_company_name', table_name='candidate_summary')
+    op.drop_index('ix_candidate_summary_company_uploaded_at', table_name='candidate_summary')
+    op.drop_table('candidate_summary')
@@ -0,0 +1,39 @@
+"""Add full-text search vector to parsed_cvs
+
+Revision ID: hs01_parsed_cv_search_vector
+Revises: se01_parsed_cv_updated_at
+Create Date: 2026-01-26
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'hs01_parsed_cv_search_vector'
+down_revision: Union[str, Sequence[str], None] = 'se01_parsed_cv_updated_at'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Weighted 'simple' tsvector (no stemming, so skills and acronyms match as written),
+    # kept current by Postgres as a stored generated column. Must match
+    # app.services.lexical_search.SEARCH_VECTOR_SQL.
+    op.execute(
+        "ALTER TABLE parsed_cvs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(skills, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(last_job_title, '') || ' ' || coalesce(last_company, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(job_history, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(summary, '')), 'D')"
+        ") STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_parsed_cvs_search_vector ON parsed_cvs USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_parsed_cvs_search_vector")
+    op.execute("ALTER TABLE parsed_cvs DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,55 @@
+"""Add job_candidate_scores read model
+
+Revision ID: mc01_job_candidate_scores
+Revises: hs01_parsed_cv_search_vector
+Create Date: 2026-02-02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'mc01_job_candidate_scores'
+down_revision: Union[str, Sequence[str], None] = 'hs01_parsed_cv_search_vector'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Precomputed job <-> CV match scores. Populate existing open jobs with
+    # scripts/backfill_match_scores.py after upgrading.
+    op.create_table(
+        'job_candidate_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('cv_id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('vector_score', sa.Float(), nullable=True),
+        sa.Column('skills_matched', sa.Text(), nullable=True),
+        sa.Column('is_silver', sa.Boolean(), nullable=True),
+        sa.Column('scored_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('strong_match_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'cv_id', name='uq_job_candidate_scores_job_cv'),
+    )
+    op.create_index(op.f('ix_job_candidate_scores_id'), 'job_candidate_scores', ['id'], unique=False)
+    op.create_index(op.f('ix_job_candidate_scores_cv_id'), 'job_candidate_scores', ['cv_id'], unique=False)
+    op.create_index(op.f('ix_job_candidate_scores_company_id'), 'job_candidate_scores', ['company_id'], unique=False)
+    op.create_index('ix_job_candidate_scores_job_score', 'job_candidate_scores', ['job_id', 'score', 'cv_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_candidate_scores_job_score', table_name='job_candidate_scores')
+    op.drop_index(op.f('ix_job_candidate_scores_company_id'), table_name='job_candidate_scores')
+    op.drop_index(op.f('ix_job_candidate_scores_cv_id'), table_name='job_candidate_scores')
+    op.drop_index(op.f('ix_job_candidate_scores_id'), table_name='job_candidate_scores')
+    op.drop_table('job_candidate_scores')
@@ -0,0 +1,40 @@
+"""Add parse cache columns to parsed_cvs
+
+Revision ID: pc01_parse_cache_columns
+Revises: dc4d379e050b
+Create Date: 2026-01-12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'pc01_parse_cache_columns'
+down_revision: Union[str, Sequence[str], None] = 'dc4d379e050b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Content hashes let duplicate uploads reuse an existing parse instead of calling OpenAI.
+    # Existing rows stay NULL and simply never produce cache hits until they are reprocessed.
+    op.add_column('parsed_cvs', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('parsed_cvs', sa.Column('text_hash', sa.String(length=64), nullable=True))
+    op.add_column('parsed_cvs', sa.Column('parse_version', sa.String(), nullable=True))
+    op.add_column('parsed_cvs', sa.Column('parse_tokens', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_parsed_cvs_content_hash'), 'parsed_cvs', ['content_hash'], unique=False)
+    op.create_index(op.f('ix_parsed_cvs_text_hash'), 'parsed_cvs', ['text_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_parsed_cvs_text_hash'), table_name='parsed_cvs')
+    op.drop_index(op.f('ix_parsed_cvs_content_hash'), table_name='parsed_cvs')
+    op.drop_column('parsed_cvs', 'parse_tokens')
+    op.drop_column('parsed_cvs', 'parse_version')
+    op.drop_column('parsed_cvs', 'text_hash')
+    op.drop_column('parsed_cvs', 'content_hash')
@@ -0,0 +1,29 @@
+"""Add (company_id, uploaded_at, id) index for keyset pagination of profiles
+
+Revision ID: pg01_cvs_keyset_index
+Revises: sk01_candidate_skills
+Create Date: 2026-02-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'pg01_cvs_keyset_index'
+down_revision: Union[str, Sequence[str], None] = 'sk01_candidate_skills'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The profiles list seeks to its cursor (uploaded_at, id) within a company,
+    # forwards for "oldest" and backwards for "newest"
+    op.create_index('ix_cvs_company_uploaded_at_id', 'cvs', ['company_id', 'uploaded_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cvs_company_uploaded_at_id', table_name='cvs')
@@ -0,0 +1,33 @@
+"""Add updated_at watermark column to parsed_cvs
+
+Revision ID: se01_parsed_cv_updated_at
+Revises: pc01_parse_cache_columns
+Create Date: 2026-01-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'se01_parsed_cv_updated_at'
+down_revision: Union[str, Sequence[str], None] = 'pc01_parse_cache_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The embedding sync pages through parsed CVs by (updated_at, id) from a stored
+    # watermark. Existing rows start at their parse time.
+    op.add_column('parsed_cvs', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.execute("UPDATE parsed_cvs SET updated_at = COALESCE(parsed_at, now())")
+    op.create_index('ix_parsed_cvs_updated_at_id', 'parsed_cvs', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_parsed_cvs_updated_at_id', table_name='parsed_cvs')
+    op.drop_column('parsed_cvs', 'updated_at')
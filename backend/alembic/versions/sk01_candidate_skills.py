@@ -0,0 +1,40 @@
+"""Add candidate_skills inverted index
+
+Revision ID: sk01_candidate_skills
+Revises: mc01_job_candidate_scores
+Create Date: 2026-02-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'sk01_candidate_skills'
+down_revision: Union[str, Sequence[str], None] = 'mc01_job_candidate_scores'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Normalized (cv_id, skill) rows. Populate existing CVs with
+    # scripts/backfill_candidate_skills.py after upgrading.
+    op.create_table(
+        'candidate_skills',
+        sa.Column('cv_id', sa.Integer(), nullable=False),
+        sa.Column('skill', sa.String(length=100), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['cv_id'], ['cvs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.PrimaryKeyConstraint('cv_id', 'skill'),
+    )
+    op.create_index('ix_candidate_skills_company_skill', 'candidate_skills', ['company_id', 'skill', 'cv_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_candidate_skills_company_skill', table_name='candidate_skills')
+    op.drop_table('candidate_skills')
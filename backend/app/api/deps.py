@@ -3,8 +3,8 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.models.models import User
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.services import principal_cache
 import logging
 from typing import Optional
 
@@ -28,7 +28,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         logger.warning(f"Token validation failed: {str(e)}")
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    # Cached auth fields; the full row is only loaded if the endpoint reads more
+    user = principal_cache.load(db, email)
     if user is None:
         logger.warning(f"Token validation failed: User {email} not found")
         raise credentials_exception
@@ -68,7 +69,7 @@ def get_current_user_flexible(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    user = principal_cache.load(db, email)
     if user is None:
         raise credentials_exception
     return user
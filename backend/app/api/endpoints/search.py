@@ -1,102 +1,235 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import Dict, List, Optional
+import json
+from app.core.database import get_async_db
 from app.api.deps import get_current_user
-from app.models.models import User, CV
-from app.services.search.factory import get_search_engine
+from app.models.models import User, UserRole, CV, Application, Job, CandidateSummary
+from app.core.config import settings
+from app.services import lexical_search
+from app.services.match_scores import OPEN_STATUS
+from app.services.search.base import where_clause
+from app.services.search.factory import get_job_search_engine, get_search_engine
+from app.services.skills import skills_list
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+def _candidate_results(db: Session, cv_ids: List[int], scores_map: Dict[int, float],
+                       rank_map: Optional[Dict[int, float]] = None) -> List[dict]:
+    """
+    Result items for `cv_ids`, best score first, from their candidate_summary
+    rows in one query. Silver medalists (a past application reached an
+    advanced stage) are boosted 15%. With `rank_map` (fused hybrid ranks) the
+    items are ordered by it instead and carry it as "rank_score".
+    """
+    if not cv_ids:
+        return []
+    rows = db.query(CandidateSummary).filter(CandidateSummary.cv_id.in_(cv_ids)).all()
+    row_map = {row.cv_id: row for row in rows}
+
+    items = []
+    for cv_id in cv_ids:
+        row = row_map.get(cv_id)
+        if not row:
+            continue
+        data = json.loads(row.data)
+        parsed = data["parsed_data"]
+        base_score = scores_map.get(cv_id, 0)
+        is_silver_medalist = bool(row.is_silver_medalist)
+        # Apply 15% boost for silver medalists, capped at 1.0 (unless it was already 1.0)
+        final_score = min(1.0, base_score * 1.15) if is_silver_medalist else base_score
+        item = {
+            "id": cv_id,
+            "filename": data["filename"],
+            "score": final_score,
+            "is_silver_medalist": is_silver_medalist, # Return flag for UI if needed
+            "name": parsed["name"] if parsed else "Unknown",
+            "skills": row.skills if parsed else [],
+            "summary": parsed["summary"] if parsed else "",
+            "last_job_title": parsed["last_job_title"] if parsed else ""
+        }
+        if rank_map is not None:
+            item["rank_score"] = rank_map.get(cv_id, 0)
+        items.append(item)
+    if rank_map is not None:
+        items.sort(key=lambda x: (x["rank_score"], x["score"]), reverse=True)
+        return items
+    # Re-sort by final score descending since boosts might have changed the order
+    items.sort(key=lambda x: x["score"], reverse=True)
+    return items
+
+
 @router.get("/candidates", response_model=List[dict])
 async def search_candidates(
     q: str = Query(..., description="Natural language query (e.g. 'Python developer with AWS')"),
     limit: int = Query(10, le=50),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Semantic search for candidates using Vector DB.
+    Hybrid search for candidates: vector similarity (Vector DB) fused with
+    full-text matches on names, skills, titles and companies using reciprocal
+    rank fusion, so exact skills and acronyms ("K8s", "SAP FICO") are found
+    even when their embeddings are not close to the query.
+
+    Hybrid results are ordered by the fused value, returned as "rank_score".
+    "score" stays the vector similarity, or for full-text-only matches the
+    full-text rank relative to the best full-text match.
     """
     if not q:
         return []
 
     try:
         search_engine = get_search_engine()
-        
-        # Search Vector DB
-        # The search engine handles embedding generation internally for the query if needed, 
-        # but our current interface expects text.
+        # Each ranking contributes a deeper pool than the page so fusion can promote
+        # candidates that are only moderately ranked by either method
+        pool = limit * 3 if settings.HYBRID_SEARCH_ENABLED else limit
+
         results = await search_engine.search(
             query_text=q,
-            n_results=limit,
+            n_results=pool,
             filters={"company_id": current_user.company_id} if current_user.company_id else None
         )
+        semantic_ids = [int(res['id']) for res in results]
+        lexical_ids = []
+        scores_map = {}
+        if settings.HYBRID_SEARCH_ENABLED:
+            lexical = await db.run_sync(lexical_search.search_cv_ids, q, current_user.company_id, pool)
+            lexical_ids = [cv_id for cv_id, _ in lexical]
+            top_rank = lexical[0][1] if lexical else 0
+            if top_rank > 0:
+                scores_map = {cv_id: rank / top_rank for cv_id, rank in lexical}
+        scores_map.update({int(res['id']): res['score'] for res in results})
 
-        if not results:
+        # Normalize so that ranking first in every list scores 1.0
+        rankings = [ranking for ranking in (semantic_ids, lexical_ids) if ranking]
+        if not rankings:
             return []
+        fused = lexical_search.reciprocal_rank_fusion(rankings)
+        best = len(rankings) / (lexical_search.RRF_K + 1)
+        rank_map = {cv_id: score / best for cv_id, score in fused.items()}
+        cv_ids = sorted(rank_map, key=lambda cv_id: -rank_map[cv_id])[:limit]
+        semantic_set, lexical_set = set(semantic_ids), set(lexical_ids)
 
-        # 3. Fetch full CV details from DB
-        cv_ids = [int(res['id']) for res in results]
-        
-        # Preserve order of results
-        # We fetch all and then reorder in python
-        cvs = db.query(CV).filter(CV.id.in_(cv_ids)).all()
-        cv_map = {cv.id: cv for cv in cvs}
-        
-        # Map scores
-        scores_map = {int(res['id']): res['score'] for res in results}
-        
-        # 4. Silver Medalist Logic
-        # Fetch applications for these CVs to identify silver medalists
-        # Silver Medalist = Candidate who reached advanced stages in previous applications
-        from app.models.models import Application
-        advanced_stages = ["Interview", "Offer", "Technical Assessment", "Final Round"]
-        
-        # Find CVs that have ANY application in advanced stages (even if rejected later)
-        # We check for applications associated with these CVs
-        silver_medalist_cv_ids = set()
-        if cv_ids:
-            silver_apps = db.query(Application.cv_id).filter(
-                Application.cv_id.in_(cv_ids),
-                Application.status.in_(advanced_stages)
-            ).all()
-            silver_medalist_cv_ids = {app.cv_id for app in silver_apps}
-
-        ordered_response = []
-        for cv_id in cv_ids:
-            if cv_id in cv_map:
-                cv = cv_map[cv_id]
-                
-                # Calculate final score with boost
-                base_score = scores_map.get(cv.id, 0)
-                is_silver_medalist = cv.id in silver_medalist_cv_ids
-                
-                # Apply 15% boost for silver medalists, capped at 1.0 (unless it was already 1.0)
-                final_score = base_score
-                if is_silver_medalist:
-                    final_score = min(1.0, base_score * 1.15)
-                
-                # Basic info to return
-                item = {
-                    "id": cv.id,
-                    "filename": cv.filename,
-                    "score": final_score,
-                    "is_silver_medalist": is_silver_medalist, # Return flag for UI if needed
-                    "name": cv.parsed_data.name if cv.parsed_data else "Unknown",
-                    "skills": cv.parsed_data.skills if cv.parsed_data else [],
-                    "summary": cv.parsed_data.summary if cv.parsed_data else "",
-                    "last_job_title": cv.parsed_data.last_job_title if cv.parsed_data else ""
-                }
-                ordered_response.append(item)
-        
-        # Re-sort by final score descending since boosts might have changed the order
-        ordered_response.sort(key=lambda x: x["score"], reverse=True)
-                
+        # Pure vector search keeps ordering by (silver-boosted) similarity
+        ordered_response = await db.run_sync(
+            _candidate_results, cv_ids, scores_map, rank_map if settings.HYBRID_SEARCH_ENABLED else None
+        )
+        for item in ordered_response:
+            item["matched_by"] = [source for source, ids in (("semantic", semantic_set), ("lexical", lexical_set)) if item["id"] in ids]
         return ordered_response
 
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/candidates/{cv_id}/similar", response_model=List[dict])
+async def similar_candidates(
+    cv_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    "More like this": nearest candidates of the same company to the stored
+    vector of `cv_id` (the candidate is excluded). No embedding is generated.
+    """
+    cv = await db.scalar(select(CV.id).where(CV.id == cv_id, CV.company_id == current_user.company_id))
+    if not cv:
+        raise HTTPException(404, "Candidate not found")
+
+    search_engine = get_search_engine()
+    company_id = current_user.company_id
+    try:
+        stored = await search_engine.run_blocking(search_engine.get_embeddings, [str(cv_id)], company_id=company_id)
+        vector = stored.get(str(cv_id))
+        if not vector:
+            raise HTTPException(404, "Candidate is not indexed yet")
+        results = await search_engine.run_blocking(
+            search_engine.search_by_vector, vector, limit,
+            {"company_id": company_id} if company_id else None,
+            exclude_ids=[str(cv_id)],
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Similar candidates error for CV {cv_id}: {e!r}")
+        raise HTTPException(status_code=503, detail="Vector search unavailable")
+
+    scores_map = {int(res["id"]): res["score"] for res in results if str(res["id"]).isdigit()}
+    return await db.run_sync(_candidate_results, list(scores_map), scores_map)
+
+
+@router.get("/candidates/{cv_id}/jobs", response_model=List[dict])
+async def recommended_jobs(
+    cv_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Open jobs of the company that best fit a candidate: the candidate's stored
+    vector queried against the job embeddings index (app.services.job_index).
+    Interviewers and hiring managers only see their department's jobs.
+    """
+    cv = await db.scalar(select(CV.id).where(CV.id == cv_id, CV.company_id == current_user.company_id))
+    if not cv:
+        raise HTTPException(404, "Candidate not found")
+
+    search_engine = get_search_engine()
+    job_engine = get_job_search_engine()
+    company_id = current_user.company_id
+    department = None
+    if current_user.role in [UserRole.INTERVIEWER, UserRole.HIRING_MANAGER] and current_user.department:
+        department = current_user.department
+    terms = {}
+    if company_id:
+        terms["company_id"] = company_id
+    if department:
+        # Indexed with the job (app.services.job_index), so the index filters it
+        terms["department"] = department
+    try:
+        stored = await search_engine.run_blocking(search_engine.get_embeddings, [str(cv_id)], company_id=company_id)
+        vector = stored.get(str(cv_id))
+        if not vector:
+            raise HTTPException(404, "Candidate is not indexed yet")
+        results = await job_engine.run_blocking(job_engine.search_by_vector, vector, limit, where_clause(terms))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job recommendations error for CV {cv_id}: {e!r}")
+        raise HTTPException(status_code=503, detail="Vector search unavailable")
+
+    scores_map = {int(res["id"]): res["score"] for res in results if str(res["id"]).isdigit()}
+    if not scores_map:
+        return []
+    # The index drops closed jobs asynchronously; the status check covers the gap
+    query = select(Job).where(
+        Job.id.in_(list(scores_map)), Job.company_id == company_id,
+        Job.is_active.is_(True), Job.status == OPEN_STATUS,
+    )
+    if department:
+        query = query.where(Job.department == department)
+    jobs = (await db.scalars(query)).all()
+    applied = set((await db.scalars(
+        select(Application.job_id).where(Application.cv_id == cv_id, Application.job_id.in_([job.id for job in jobs]))
+    )).all()) if jobs else set()
+
+    items = [{
+        "id": job.id,
+        "title": job.title,
+        "department": job.department,
+        "location": job.location,
+        "employment_type": job.employment_type,
+        "skills_required": skills_list(job.skills_required),
+        "score": scores_map[job.id],
+        "already_applied": job.id in applied,
+    } for job in jobs]
+    items.sort(key=lambda x: x["score"], reverse=True)
+    return items[:limit]
@@ -2129,11 +2129,13 @@ def get_llm_metrics(
 
 @router.post("/sync/embeddings")
 def trigger_embedding_sync(
-    limit: int = Query(500, ge=1, le=2000),
+    limit: int = Query(500, ge=1, le=100000),
+    full: bool = Query(False, description="Start over from the first CV instead of the last sync watermark"),
     current_user: User = Depends(get_current_user)
 ):
     """
     Manually trigger background embedding sync.
+    Continues from where the previous sync stopped unless `full` is set.
     Useful for maintenance or recovery after system restart.
     Super admin only.
     """
@@ -2142,9 +2144,72 @@ def trigger_embedding_sync(
     try:
         from app.services.sync_service import sync_embeddings
         # Run in background
-        asyncio.create_task(sync_embeddings(limit=limit))
+        asyncio.create_task(sync_embeddings(limit=limit, full=full))
         return {"status": "started", "message": f"Embedding sync started for up to {limit} records"}
     except Exception as e:
         logger.error(f"Failed to trigger sync: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+# ==================== Parse Cache Endpoint ====================
+
+@router.get("/parse-cache/stats")
+def get_parse_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Hit/miss counters for the CV parse cache and the LLM tokens it saved.
+    Super admin only.
+    """
+    require_super_admin(current_user)
+
+    from app.services import parse_cache
+    return parse_cache.get_stats()
+
+
+# ==================== CV Pipeline Endpoint ====================
+
+@router.get("/cv-pipeline/stats")
+def get_cv_pipeline_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-stage latency, throughput and queue depth for the staged CV pipeline
+    (extract, parse, embed, index). Super admin only.
+    """
+    require_super_admin(current_user)
+
+    from app.services import cv_pipeline
+    return cv_pipeline.get_stats()
+
+
+# ==================== OpenAI Rate Limiter Endpoint ====================
+
+@router.get("/openai-limiter/stats")
+def get_openai_limiter_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Remaining request/token capacity and waiting callers per priority class
+    for each OpenAI model. Super admin only.
+    """
+    require_super_admin(current_user)
+
+    from app.core import openai_limiter
+    return openai_limiter.get_status()
+
+
+# ==================== Embedding Cache Endpoint ====================
+
+@router.get("/embedding-cache/stats")
+def get_embedding_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Hit/miss counters and size of the embedding cache (in-process LRU and
+    Redis). Super admin only.
+    """
+    require_super_admin(current_user)
+
+    from app.services import embedding_cache
+    return embedding_cache.get_stats()
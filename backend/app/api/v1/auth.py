@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from datetime import datetime, timedelta, timezone
 from app.core.database import get_db
 from app.models.models import User, Company, UserRole, ActivityLog
@@ -112,7 +112,8 @@ async def signup(
 
 @router.post("/login", response_model=Token)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
+    # The login response includes the profile picture, which is deferred otherwise
+    user = db.query(User).options(undefer(User.profile_picture)).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -14,6 +14,7 @@ import json
 import time
 import asyncio
 from app.core.llm_logging import LLMLogger
+from app.core import openai_limiter
 from jose import jwt, JWTError
 from app.core.security import SECRET_KEY, ALGORITHM
 
@@ -379,14 +380,17 @@ async def extract_company_info(
             
             start_time = time.time()
             client = get_openai_client()
-            completion = await client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
+            kwargs = {
+                "model": OPENAI_MODEL,
+                "messages": [
                     {"role": "system", "content": "You are an expert business analyst specializing in company research. You are VERY GOOD at finding founding dates, company sizes, and organizational types from website text. You use inference when needed. Always return valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"}
-            )
+                "response_format": {"type": "json_object"}
+            }
+            reserved = openai_limiter.estimate_chat_tokens(kwargs)
+            await openai_limiter.acquire(OPENAI_MODEL, reserved)
+            completion = await client.chat.completions.create(**kwargs)
             
             # Track token usage
             tokens_used = 0
@@ -396,6 +400,7 @@ async def extract_company_info(
                 tokens_used = completion.usage.total_tokens
                 tokens_input = completion.usage.prompt_tokens
                 tokens_output = completion.usage.completion_tokens
+            await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
             
             result = json.loads(completion.choices[0].message.content)
             
@@ -820,19 +825,23 @@ Website Text:
 
         # Call OpenAI
         client = get_openai_client()
-        completion = await client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
+        kwargs = {
+            "model": OPENAI_MODEL,
+            "messages": [
                 {"role": "system", "content": "You are an expert business analyst. Extract company details from website text. Always return valid JSON with all requested fields."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"}
-        )
+            "response_format": {"type": "json_object"}
+        }
+        reserved = openai_limiter.estimate_chat_tokens(kwargs)
+        await openai_limiter.acquire(OPENAI_MODEL, reserved)
+        completion = await client.chat.completions.create(**kwargs)
 
         if hasattr(completion, 'usage') and completion.usage:
             tokens_used = completion.usage.total_tokens
             tokens_input = completion.usage.prompt_tokens
             tokens_output = completion.usage.completion_tokens
+        await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
 
         result = json.loads(completion.choices[0].message.content)
 
@@ -4,12 +4,13 @@ import uuid
 import aiofiles
 from pathlib import Path
 import os
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_async_db, get_db
 from app.models import models
 from app.models.models import User
 from app.api.deps import get_current_user, get_current_user_flexible
-from app.tasks.cv_tasks import process_cv_task
+from app.tasks.cv_tasks import dispatch_cv_processing
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,7 +23,7 @@ RAW_DIR.mkdir(parents=True, exist_ok=True)
 async def upload_bulk(
     files: List[UploadFile] = File(...),
     job_id: Optional[int] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # Validate file extensions
@@ -47,12 +48,12 @@ async def upload_bulk(
             original_source="manual"  # Track origin
         )
         db.add(cv)
-        db.flush()  # obtain cv.id without committing yet
+        await db.flush()  # obtain cv.id without committing yet
         created_ids.append(cv.id)
 
         # Optional job link per CV - track who assigned
         if job_id:
-            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            job = await db.get(models.Job, job_id)
             if job:
                 app = models.Application(
                     cv_id=cv.id, 
@@ -62,22 +63,21 @@ async def upload_bulk(
                     source="manual"  # Uploaded via UI
                 )
                 db.add(app)
-                db.flush()  # Get app.id for activity log
+                await db.flush()  # Get app.id for activity log
                 
                 # Log activity: candidate added to pipeline
                 from app.api.v1.activity import log_application_activity
-                log_application_activity(
-                    db, app.id, "added_to_pipeline",
+                await db.run_sync(
+                    log_application_activity, app.id, "added_to_pipeline",
                     user_id=current_user.id,
                     company_id=current_user.company_id,
                     details={"job_id": job_id, "job_title": job.title, "source": "manual"}
                 )
 
-    db.commit()  # single commit for all inserts
+    await db.commit()  # single commit for all inserts
 
-    # Queue parsing tasks
-    for cv_id in created_ids:
-        process_cv_task.delay(cv_id)
+    # Queue parsing tasks (batched into the staged pipeline)
+    dispatch_cv_processing(created_ids)
 
     return {"ids": created_ids, "status": "queued", "count": len(created_ids)}
 
@@ -106,19 +106,21 @@ def reprocess_cv(cv_id: int, db: Session = Depends(get_db), current_user: User =
     cv.is_parsed = False
     db.commit()
     
-    process_cv_task.delay(cv.id)
+    dispatch_cv_processing([cv.id])
     return {"status": "re-queued", "id": cv_id}
 
 @router.post("/reprocess_bulk")
 def reprocess_bulk(db: Session = Depends(get_db), cv_ids: List[int] = Body(...), current_user: User = Depends(get_current_user)):
     # Reset parsed flag for each CV
+    queued_ids = []
     for cv_id in cv_ids:
         cv = db.query(models.CV).filter(models.CV.id == cv_id, models.CV.company_id == current_user.company_id).first()
         if cv:
             cv.is_parsed = False
-            process_cv_task.delay(cv.id)
+            queued_ids.append(cv.id)
             
     db.commit()
+    dispatch_cv_processing(queued_ids)
     return {"status": "re-queued", "ids": cv_ids}
 
 @router.get("/status")
@@ -143,10 +145,8 @@ def resume_all_processing(db: Session = Depends(get_db), current_user: User = De
         models.CV.company_id == current_user.company_id
     ).all()
     
-    queued_ids = []
-    for cv in unparsed_cvs:
-        process_cv_task.delay(cv.id)
-        queued_ids.append(cv.id)
+    queued_ids = [cv.id for cv in unparsed_cvs]
+    dispatch_cv_processing(queued_ids)
     
     return {
         "status": "resumed",
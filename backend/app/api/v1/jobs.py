@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Optional, Any, Dict
 import json
-from app.core.database import get_db
-from app.models.models import Job, ParsedCV, User, CV, UserRole, Application, Department
+from app.core.database import get_async_db, get_db
+from app.models.models import Job, ParsedCV, User, CV, UserRole, Application, Department, JobCandidateScore, Company
 from app.api.deps import get_current_user
 from app.services.parser import generate_job_metadata
 from app.services.ai_job_analysis import generate_job_metadata_stream
 from app.services.sync import touch_company_state
-from app.schemas.job import JobCreate, JobUpdate, JobOut, CandidateMatch, BulkAssignRequest
+from app.schemas.job import JobCreate, JobUpdate, JobOut, CandidateMatch, BulkAssignRequest, JobMatchPage
+from app.services.match_scores import job_query_text, score_match
+from app.services.skills import skills_list
+from app.services.job_index import INDEXED_FIELDS
+from app.tasks.match_tasks import queue_job_indexing, queue_job_scoring
 from app.core.logging import jobs_logger
 from app.core.llm_logging import LLMLogger
 from fastapi_cache.decorator import cache
@@ -394,7 +400,7 @@ async def match_candidates_for_new_job(
     job_title: str = Body(..., embed=True),
     required_experience: int = Body(...),
     skills_required: List[str] = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # Semantic Search via SearchEngine
@@ -403,9 +409,7 @@ async def match_candidates_for_new_job(
     search_engine = get_search_engine()
     
     # Construct query from job details
-    query_text = f"Job Title: {job_title}\n"
-    if skills_required:
-        query_text += f"Required Skills: {', '.join(skills_required)}\n"
+    query_text = job_query_text(job_title, skills_required)
     
     # Perform vector search
     # We ask for more results than needed to filter them later
@@ -420,63 +424,38 @@ async def match_candidates_for_new_job(
     
     # Fetch full candidate objects for the top vector results OR fall back to all if no vector results
     # Ideally we only fetch the candidates returned by vector search to save DB resources
+    # Applications are loaded up front for the silver medalist check
+    query = select(ParsedCV).join(ParsedCV.cv).options(joinedload(ParsedCV.cv).selectinload(CV.applications))
     if vector_results:
         candidate_ids = [int(res['id']) for res in vector_results]
-        candidates = db.query(ParsedCV).join(ParsedCV.cv).filter(CV.id.in_(candidate_ids)).options(joinedload(ParsedCV.cv)).all()
+        query = query.where(CV.id.in_(candidate_ids))
     else:
         # Fallback to fetching all if vector search fails or returns nothing (e.g. empty DB)
-        candidates = db.query(ParsedCV).join(ParsedCV.cv).filter(CV.company_id == current_user.company_id).options(joinedload(ParsedCV.cv)).all()
+        query = query.where(CV.company_id == current_user.company_id)
+    candidates = (await db.scalars(query)).all()
 
     matches = []
     req_skills_set = set(s.lower() for s in skills_required)
     
     for cand in candidates:
-        score = 0
-        matched = []
-        
-        # 1. Vector Score (Normalized 0-100)
-        # We give it significant weight
-        v_score = vector_scores.get(str(cand.cv_id), 0) * 100
-        score += v_score * 0.5 # 50% weight to semantic match
-        
-        # 2. Keyword Matching (Existing Logic)
-        cand_skills = []
-        if cand.skills:
-            try:
-                cand_skills = json.loads(cand.skills)
-            except Exception:
-                pass
-            
-        keyword_score = 0
-        for s in cand_skills:
-            if s.lower() in req_skills_set:
-                keyword_score += 10
-                matched.append(s)
-        
-        # Cap keyword score contribution
-        score += min(keyword_score, 40) # Max 40 points from keywords
-        
-        # 3. Experience
-        cand_exp = cand.experience_years or 0
-        if cand_exp >= required_experience:
-            score += 10
-        elif cand_exp >= (required_experience - 1):
-            score += 5
-            
-        is_silver = False
-        for app in cand.cv.applications:
-            if app.status == "Silver Medalist":
-                is_silver = True
-                break
-        
-        if is_silver:
-            score += 5
+        # Skills from a malformed JSON value are ignored
+        try:
+            cand_skills = json.loads(cand.skills) if cand.skills else []
+        except Exception:
+            cand_skills = []
+
+        is_silver = any(app.status == "Silver Medalist" for app in cand.cv.applications)
+        # Same formula as the precomputed job_candidate_scores (app.services.match_scores)
+        score, matched = score_match(
+            req_skills_set, required_experience, cand_skills if isinstance(cand_skills, list) else [],
+            cand.experience_years, vector_scores.get(str(cand.cv_id), 0), is_silver
+        )
         
         if score > 0:
             matches.append({
                 "id": cand.cv_id,
                 "name": cand.name or "Unknown",
-                "score": int(score), # Round to integer
+                "score": score,
                 "skills_matched": matched,
                 "status": "Silver Medalist" if is_silver else "Candidate"
             })
@@ -484,17 +463,56 @@ async def match_candidates_for_new_job(
     matches.sort(key=lambda x: x['score'], reverse=True)
     return matches[:10]
 
+@router.get("/{job_id}/matches", response_model=JobMatchPage)
+def list_job_matches(
+    job_id: int,
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    min_score: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Best candidates for a saved job, from the precomputed job_candidate_scores
+    (kept current as jobs are edited and CVs are processed).
+    """
+    job = db.query(Job).filter(Job.id == job_id, Job.company_id == current_user.company_id).first()
+    if not job:
+        raise HTTPException(404, "Job not found")
+    if current_user.role in [UserRole.INTERVIEWER, UserRole.HIRING_MANAGER] and current_user.department:
+        if job.department != current_user.department:
+            raise HTTPException(403, "Not authorized to view jobs outside your department")
+
+    query = db.query(JobCandidateScore.cv_id, JobCandidateScore.score, JobCandidateScore.skills_matched,
+                     JobCandidateScore.is_silver, ParsedCV.name) \
+        .join(ParsedCV, ParsedCV.cv_id == JobCandidateScore.cv_id) \
+        .filter(JobCandidateScore.job_id == job_id)
+    if min_score:
+        query = query.filter(JobCandidateScore.score >= min_score)
+
+    total = query.count()
+    rows = query.order_by(JobCandidateScore.score.desc(), JobCandidateScore.cv_id) \
+        .offset((page - 1) * limit).limit(limit).all()
+    items = [{
+        "id": row.cv_id,
+        "name": row.name or "Unknown",
+        "score": row.score,
+        "skills_matched": skills_list(row.skills_matched),
+        "status": "Silver Medalist" if row.is_silver else "Candidate",
+    } for row in rows]
+    return {"items": items, "total": total, "page": page, "pages": (total + limit - 1) // limit, "limit": limit}
+
 @router.post("/bulk_assign")
 async def bulk_assign_candidates(
     data: BulkAssignRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role not in [UserRole.ADMIN, UserRole.RECRUITER, UserRole.HIRING_MANAGER]:
         raise HTTPException(403, "Not authorized to assign candidates")
 
     # Verify Job exists and belongs to company
-    job = db.query(Job).filter(Job.id == data.job_id, Job.company_id == current_user.company_id).first()
+    job = await db.scalar(select(Job).where(Job.id == data.job_id, Job.company_id == current_user.company_id))
     if not job:
         raise HTTPException(404, "Job not found")
         
@@ -506,12 +524,12 @@ async def bulk_assign_candidates(
     count = 0
     for cv_id in data.cv_ids:
         # Verify CV belongs to company
-        cv = db.query(CV).filter(CV.id == cv_id, CV.company_id == current_user.company_id).first()
+        cv = await db.scalar(select(CV.id).where(CV.id == cv_id, CV.company_id == current_user.company_id))
         if not cv:
             continue
             
         # Check if already assigned
-        exists = db.query(Application).filter(Application.job_id == data.job_id, Application.cv_id == cv_id).first()
+        exists = await db.scalar(select(Application.id).where(Application.job_id == data.job_id, Application.cv_id == cv_id))
         if not exists:
             app = Application(
                 job_id=data.job_id, 
@@ -521,11 +539,11 @@ async def bulk_assign_candidates(
                 source="bulk_assign"  # Via bulk assign feature
             )
             db.add(app)
-            db.flush()  # Get app.id for activity log
+            await db.flush()  # Get app.id for activity log
             
             # Log activity: candidate added to pipeline
-            log_application_activity(
-                db, app.id, "added_to_pipeline",
+            await db.run_sync(
+                log_application_activity, app.id, "added_to_pipeline",
                 user_id=current_user.id,
                 company_id=current_user.company_id,
                 details={"job_id": data.job_id, "job_title": job.title, "source": "bulk_assign"}
@@ -533,13 +551,13 @@ async def bulk_assign_candidates(
             count += 1
             
     if count > 0:
-        db.commit()
-        touch_company_state(db, current_user.company_id)
+        await db.commit()
+        await db.run_sync(touch_company_state, current_user.company_id)
         
     return {"status": "assigned", "count": count}
 
 @router.post("/", response_model=JobOut)
-async def create_job(job: JobCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_job(job: JobCreate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     if current_user.role not in [UserRole.ADMIN, UserRole.RECRUITER, UserRole.HIRING_MANAGER]:
         raise HTTPException(403, "Not authorized to create jobs")
         
@@ -559,18 +577,20 @@ async def create_job(job: JobCreate, db: Session = Depends(get_db), current_user
     
     new_job = Job(**job_dict, company_id=current_user.company_id, created_by=current_user.id)
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
-    touch_company_state(db, current_user.company_id)
+    await db.commit()
+    await db.refresh(new_job)
+    await db.run_sync(touch_company_state, current_user.company_id)
     
     # Audit log: job created
-    log_system_activity(
-        db, "job_created", current_user.id, current_user.company_id,
+    await db.run_sync(
+        log_system_activity, "job_created", current_user.id, current_user.company_id,
         {"job_id": new_job.id, "title": new_job.title, "department": new_job.department}
     )
     
     # Invalidate cache
     await invalidate_job_cache(current_user.company_id)
+    queue_job_scoring(new_job.id)
+    queue_job_indexing(new_job.id)
     
     # Add user name for response
     new_job.created_by_name = current_user.full_name or current_user.email
@@ -585,24 +605,25 @@ async def invalidate_job_cache(company_id: int):
 async def list_jobs(
     status: Optional[str] = None,
     department: Optional[str] = None,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Job).filter(Job.company_id == current_user.company_id)
+    query = select(Job).where(Job.company_id == current_user.company_id)
     
     # Filter by status if provided
     if status:
-        query = query.filter(Job.status == status)
+        query = query.where(Job.status == status)
         
     # Filter by department if provided (for Admins/Recruiters who want to filter)
     if department:
-        query = query.filter(Job.department == department)
+        query = query.where(Job.department == department)
     
     # If Interviewer or Hiring Manager, filter by department
     if current_user.role in [UserRole.INTERVIEWER, UserRole.HIRING_MANAGER] and current_user.department:
-        query = query.filter(Job.department == current_user.department)
+        query = query.where(Job.department == current_user.department)
         
-    jobs = query.options(joinedload(Job.applications), joinedload(Job.creator), joinedload(Job.modifier)).all()
+    query = query.options(selectinload(Job.applications), joinedload(Job.creator), joinedload(Job.modifier))
+    jobs = (await db.scalars(query)).all()
     results = []
     for j in jobs:
         # Count only active candidates (exclude Rejected/Withdrawn)
@@ -624,11 +645,11 @@ async def list_jobs(
     return results
 
 @router.patch("/{job_id}", response_model=JobOut)
-async def update_job(job_id: int, job_data: JobUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_job(job_id: int, job_data: JobUpdate, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     if current_user.role not in [UserRole.ADMIN, UserRole.RECRUITER, UserRole.HIRING_MANAGER]:
         raise HTTPException(403, "Not authorized to update jobs")
 
-    job = db.query(Job).filter(Job.id == job_id, Job.company_id == current_user.company_id).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.company_id == current_user.company_id))
     if not job:
         raise HTTPException(404, "Job not found")
         
@@ -652,40 +673,46 @@ async def update_job(job_id: int, job_data: JobUpdate, db: Session = Depends(get
     # Set modified_by for audit trail
     job.modified_by = current_user.id
         
-    db.commit()
-    db.refresh(job)
-    touch_company_state(db, current_user.company_id)
+    await db.commit()
+    await db.refresh(job)
+    await db.run_sync(touch_company_state, current_user.company_id)
     
     # Audit log for job update
+    company = await db.get(Company, current_user.company_id) if current_user.company_id else None
     jobs_logger.log_action(
         action="update_job",
         message=f"Job updated: {job.title} (status: {job.status})",
         user_id=current_user.id,
         user_email=current_user.email,
         company_id=current_user.company_id,
-        company_name=current_user.company.name if current_user.company else None,
+        company_name=company.name if company else None,
         job_id=job.id,
         new_status=job.status,
         is_active=job.is_active
     )
     
     # Audit log: job updated (to ActivityLog for user attribution)
-    log_system_activity(
-        db, "job_updated", current_user.id, current_user.company_id,
+    await db.run_sync(
+        log_system_activity, "job_updated", current_user.id, current_user.company_id,
         {"job_id": job.id, "title": job.title, "changes": list(update_data.keys())}
     )
     
     # Invalidate cache
     await invalidate_job_cache(current_user.company_id)
+    # Rescore matches (or drop them if the job was closed)
+    queue_job_scoring(job.id)
+    # Re-embed for candidate -> jobs recommendations (or drop it if closed)
+    if set(update_data) & set(INDEXED_FIELDS):
+        queue_job_indexing(job.id)
     
     return job
 
 @router.delete("/{job_id}")
-async def delete_job(job_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_job(job_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
     if current_user.role not in [UserRole.ADMIN, UserRole.RECRUITER, UserRole.HIRING_MANAGER]:
         raise HTTPException(403, "Not authorized to delete jobs")
 
-    job = db.query(Job).filter(Job.id == job_id, Job.company_id == current_user.company_id).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.company_id == current_user.company_id))
     if not job:
         raise HTTPException(404, "Job not found")
         
@@ -695,17 +722,18 @@ async def delete_job(job_id: int, db: Session = Depends(get_db), current_user: U
              raise HTTPException(403, "Not authorized to delete jobs outside your department")
     
     job_title = job.title
-    db.delete(job)
-    db.commit()
-    touch_company_state(db, current_user.company_id)
+    await db.delete(job)
+    await db.commit()
+    await db.run_sync(touch_company_state, current_user.company_id)
     
     # Audit log: job deleted
-    log_system_activity(
-        db, "job_deleted", current_user.id, current_user.company_id,
+    await db.run_sync(
+        log_system_activity, "job_deleted", current_user.id, current_user.company_id,
         {"job_id": job_id, "title": job_title}
     )
     
     # Invalidate cache
     await invalidate_job_cache(current_user.company_id)
+    queue_job_indexing(job_id, current_user.company_id)
     
     return {"status": "deleted"}
\ No newline at end of file
@@ -1,152 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional
+import json
 from datetime import datetime, timezone
+from app.core import pagination
 from app.core.database import get_db
-from app.models.models import CV, ParsedCV, Application, User, UserRole, Interview, Job
+from app.core.pagination import SortKey
+from app.models.models import CV, ParsedCV, Application, User, UserRole, Interview, Job, CandidateSummary
 from app.api.deps import get_current_user
+from app.services import candidate_summary, lexical_search
+from app.services.skills import has_all_skills, normalize_skills, parse_skill_filter, sync_candidate_skills
 from app.schemas.cv import CVResponse, UpdateProfile, PaginatedResponse
-from sqlalchemy import or_, desc, asc, func, case
+from sqlalchemy import func, case, select
 
 router = APIRouter(prefix="/profiles", tags=["Profiles"])
 
+# Keyset order per sort_by (default: newest first), each served by a
+# (company_id, <key>, cv_id) index on candidate_summary. Unknown upload dates
+# sort as the latest, as PostgreSQL orders NULLs by default, so one index
+# serves both directions.
+PROFILE_SORTS = {
+    "newest": SortKey(CandidateSummary.uploaded_at, CandidateSummary.cv_id, descending=True, nulls_first=True),
+    "oldest": SortKey(CandidateSummary.uploaded_at, CandidateSummary.cv_id),
+    "experience": SortKey(CandidateSummary.experience_years, CandidateSummary.cv_id, descending=True),
+    "name": SortKey(CandidateSummary.name, CandidateSummary.cv_id),
+}
+
 @router.get("/", response_model=PaginatedResponse)
 def get_all_profiles(
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None, description="Comma-separated; candidates must have all of them"),
     sort_by: Optional[str] = Query(None),
     job_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces page-based offsets"),
+    approximate_count: bool = Query(False, description="Estimate large totals instead of counting them"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(CV).options(
-        joinedload(CV.parsed_data),
-        joinedload(CV.uploader),  # Load who uploaded the CV
-        joinedload(CV.applications).joinedload(Application.interviews),
-        joinedload(CV.applications).joinedload(Application.assigner),  # Load who assigned to pipeline
-        joinedload(CV.applications).joinedload(Application.job)  # Load job details
-    ).filter(CV.company_id == current_user.company_id)
-    
-    # Track joins to avoid duplicates
-    joined_application = False
-    joined_parsed_cv = False
+    # Items are prebuilt per CV in candidate_summary (see app.services.candidate_summary)
+    query = db.query(CandidateSummary).filter(CandidateSummary.company_id == current_user.company_id)
+
+    # Role and job filters all apply to the same application, as a semi-join
+    # so a candidate with several matching applications is listed once
+    applications = select(Application.cv_id)
+    filter_applications = False
 
     # --- INTERVIEWER RESTRICTIONS ---
     if current_user.role == UserRole.INTERVIEWER:
         # Only show candidates with assigned interviews
-        query = query.join(Application).join(Interview).filter(Interview.interviewer_id == current_user.id)
-        joined_application = True
+        applications = applications.join(Interview).where(Interview.interviewer_id == current_user.id)
+        filter_applications = True
 
     # --- HIRING MANAGER RESTRICTIONS ---
     if current_user.role == UserRole.HIRING_MANAGER:
         if current_user.department:
-            if not joined_application:
-                query = query.join(Application)
-                joined_application = True
-            query = query.join(Job).filter(Job.department == current_user.department)
+            applications = applications.join(Job).where(Job.department == current_user.department)
+            filter_applications = True
         else:
             # If HM has no department, they see nothing (safe default)
             query = query.filter(False)
     # --- FILTERS ---
     if job_id:
-        if not joined_application:
-            query = query.join(Application)
-            joined_application = True
-        query = query.filter(Application.job_id == job_id)
+        applications = applications.where(Application.job_id == job_id)
+        filter_applications = True
+
+    if filter_applications:
+        query = query.filter(CandidateSummary.cv_id.in_(applications))
 
     if search:
-        search_term = f"%{search}%"
-        if not joined_parsed_cv:
-            query = query.join(ParsedCV)
-            joined_parsed_cv = True
-            
-        query = query.filter(
-            or_(
-                ParsedCV.name.ilike(search_term),
-                ParsedCV.skills.ilike(search_term),
-                ParsedCV.last_job_title.ilike(search_term),
-                ParsedCV.last_company.ilike(search_term)
-            )
-        )
+        # Full-text (GIN-indexed tsvector) on PostgreSQL, ILIKE elsewhere
+        query = query.join(ParsedCV, ParsedCV.cv_id == CandidateSummary.cv_id) \
+            .filter(lexical_search.profile_filter(db, search))
 
-    # --- SORTING ---
-    if sort_by == "oldest":
-        query = query.order_by(asc(CV.uploaded_at))
-    elif sort_by == "experience":
-        if not joined_parsed_cv:
-            query = query.join(ParsedCV)
-            joined_parsed_cv = True
-        query = query.order_by(desc(ParsedCV.experience_years))
-    elif sort_by == "name":
-        if not joined_parsed_cv:
-            query = query.join(ParsedCV)
-            joined_parsed_cv = True
-        query = query.order_by(asc(ParsedCV.name))
-    else:
-        # Default: Newest first
-        query = query.order_by(desc(CV.uploaded_at))
+    if skills:
+        # Aliases resolve to the same index key ("js" finds "JavaScript")
+        skill_keys = parse_skill_filter(skills)
+        if skill_keys:
+            query = query.filter(CandidateSummary.cv_id.in_(has_all_skills(skill_keys, current_user.company_id)))
 
     # --- PAGINATION ---
-    total = query.count()
-    offset = (page - 1) * limit
-    results = query.offset(offset).limit(limit).all()
-    
-    current_year = datetime.now(timezone.utc).year
+    total = pagination.count(query, approximate=approximate_count)
 
-    for cv in results:
-        cv.years_since_upload = 0.0
-        cv.projected_experience = 0
-        cv.is_outdated = False
-        
-        # Add uploaded_by_name for audit attribution
-        if cv.uploader:
-            cv.uploaded_by_name = cv.uploader.full_name or cv.uploader.email
-
-        if cv.uploaded_at:
-            uploaded_at = cv.uploaded_at
-            if uploaded_at.tzinfo is None:
-                uploaded_at = uploaded_at.replace(tzinfo=timezone.utc)
-            
-            delta = datetime.now(timezone.utc) - uploaded_at
-            years_passed = delta.days / 365.25
-            cv.years_since_upload = round(years_passed, 1)
-            if years_passed > 2.0:
-                cv.is_outdated = True
+    sort_name = sort_by if sort_by in PROFILE_SORTS else "newest"
+    sort_key = PROFILE_SORTS[sort_name]
+    query = query.order_by(*sort_key.order_by())
+    if cursor:
+        query = query.filter(sort_key.after(*pagination.decode_cursor(cursor, sort_name, sort_key)))
+        offset = None
+    else:
+        offset = (page - 1) * limit
+        query = query.offset(offset)
+    results = query.limit(limit + 1).all()
 
-            # --- NEW LOGIC: NEGATIVE EXPERIENCE FOR STUDENTS ---
-            grad_year = cv.parsed_data.bachelor_year if (cv.parsed_data and cv.parsed_data.bachelor_year) else None
-            
-            if grad_year and grad_year > current_year:
-                 # Candidate is a student (Graduation in future)
-                 # e.g. Now=2024, Grad=2026 -> Exp = -2
-                 cv.projected_experience = current_year - grad_year
-            else:
-                 # Standard logic
-                 base_exp = cv.parsed_data.experience_years if (cv.parsed_data and cv.parsed_data.experience_years) else 0
-                 base_exp = cv.parsed_data.experience_years if (cv.parsed_data and cv.parsed_data.experience_years) else 0
-                 cv.projected_experience = base_exp + int(years_passed)
+    has_more = len(results) > limit
+    results = results[:limit]
+    if has_more:
+        last = results[-1]
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor(
+            sort_name, getattr(last, sort_key.column.key), last.cv_id
+        )
+    if approximate_count and offset is not None and results:
+        # Keep an estimate consistent with what this page shows
+        total = max(total, offset + len(results)) if has_more else offset + len(results)
 
-        # --- MASK SALARY FOR INTERVIEWERS ---
-        if current_user.role == UserRole.INTERVIEWER:
-            if cv.parsed_data:
-                cv.parsed_data.current_salary = "Confidential"
-                cv.parsed_data.expected_salary = "Confidential"
-            for app in cv.applications:
-                app.current_salary = "Confidential"
-                app.expected_salary = "Confidential"
-        
-        # Add assigned_by_name for each application
-        for app in cv.applications:
-            if app.assigner:
-                app.assigned_by_name = app.assigner.full_name or app.assigner.email
-            if app.job:
-                app.job_title = app.job.title
-                app.job_department = app.job.department
+    # Upload age is computed per request; salaries are masked for interviewers
+    mask_salaries = current_user.role == UserRole.INTERVIEWER
+    items = [candidate_summary.present(row, mask_salaries=mask_salaries) for row in results]
 
     import math
     return {
-        "items": results,
+        "items": items,
         "total": total,
         "page": page,
         "pages": math.ceil(total / limit),
@@ -156,8 +122,7 @@ def get_all_profiles(
 @router.get("/{cv_id}", response_model=CVResponse)
 def get_profile(cv_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     query = db.query(CV).options(
-        joinedload(CV.parsed_data),
-        joinedload(CV.parsed_data),
+        joinedload(CV.parsed_data).undefer(ParsedCV.job_history),
         joinedload(CV.uploader),
         joinedload(CV.applications).joinedload(Application.interviews),
         joinedload(CV.applications).joinedload(Application.assigner),
@@ -237,11 +202,14 @@ def update_profile(cv_id: int, update_data: UpdateProfile, db: Session = Depends
         raise HTTPException(404, "Profile data not found")
 
     update_dict = update_data.model_dump(exclude_unset=True)
+    if "skills" in update_dict:
+        update_dict["skills"] = json.dumps(normalize_skills(update_dict["skills"]))
+        sync_candidate_skills(db, cv.id, cv.company_id, update_dict["skills"])
     for key, value in update_dict.items():
         setattr(parsed_record, key, value)
 
     db.commit()
-    return db.query(CV).filter(CV.id == cv_id).options(joinedload(CV.parsed_data)).first()
+    return db.query(CV).filter(CV.id == cv_id).options(joinedload(CV.parsed_data).undefer(ParsedCV.job_history)).first()
 
 @router.get("/stats/overview")
 def get_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -3,7 +3,8 @@ Public API endpoints for landing pages.
 These endpoints are unauthenticated and allow candidates to view jobs and apply.
 """
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import json
 import os
@@ -11,7 +12,7 @@ import uuid
 from pathlib import Path
 from datetime import datetime, timezone
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.models import Job, CV, Application, ParsedCV, Company
 from pydantic import BaseModel
 
@@ -91,23 +92,23 @@ def extract_tracking_data(request: Request, utm_source: str = None, utm_medium:
 # ============================================================================
 
 @router.get("/jobs/{slug}", response_model=PublicJobOut)
-async def get_public_job(slug: str, db: Session = Depends(get_db)):
+async def get_public_job(slug: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get public job details by landing page slug.
     This endpoint is unauthenticated and returns limited job information.
     """
     # Find job by slug
-    job = db.query(Job).filter(
+    job = await db.scalar(select(Job).where(
         Job.landing_page_slug == slug,
         Job.landing_page_enabled.is_(True),
         Job.is_active.is_(True)
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or landing page not enabled")
     
     # Get company for branding
-    company = db.query(Company).filter(Company.id == job.company_id).first()
+    company = await db.get(Company, job.company_id) if job.company_id else None
     
     return PublicJobOut(
         id=job.id,
@@ -144,18 +145,18 @@ async def apply_to_job(
     utm_term: Optional[str] = Form(None),
     utm_content: Optional[str] = Form(None),
     referrer: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit an application to a job via landing page.
     This endpoint is unauthenticated - candidates can apply directly.
     """
     # Find job by slug
-    job = db.query(Job).filter(
+    job = await db.scalar(select(Job).where(
         Job.landing_page_slug == slug,
         Job.landing_page_enabled.is_(True),
         Job.is_active.is_(True)
-    ).first()
+    ))
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or landing page not enabled")
@@ -192,7 +193,7 @@ async def apply_to_job(
         original_source="landing_page"  # Track origin
     )
     db.add(cv)
-    db.flush()  # Get the CV ID
+    await db.flush()  # Get the CV ID
     
     # Create ParsedCV with basic info from form
     parsed_cv = ParsedCV(
@@ -226,13 +227,13 @@ async def apply_to_job(
     db.add(application)
     
     try:
-        db.commit()
-        db.refresh(application)
+        await db.commit()
+        await db.refresh(application)
         
         # Log activity for timeline
         from app.api.v1.activity import log_application_activity
-        log_application_activity(
-            db, application.id, "added_to_pipeline",
+        await db.run_sync(
+            log_application_activity, application.id, "added_to_pipeline",
             user_id=None,  # No user for public submissions
             company_id=job.company_id,
             details={
@@ -244,7 +245,7 @@ async def apply_to_job(
             }
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # Clean up uploaded file
         if os.path.exists(filepath):
             os.remove(filepath)
@@ -474,10 +474,9 @@ async def upload_avatar(
         base64_str = f"data:image/jpeg;base64,{base64.b64encode(compressed_data).decode('utf-8')}"
         
         # Update DB
-        current_user.profile_picture = base64_str
-        db.add(current_user)
+        user = current_user.user
+        user.profile_picture = base64_str
         db.commit()
-        db.refresh(current_user)
         
         return {"profile_picture": base64_str}
         
@@ -507,16 +506,16 @@ def update_profile(
             detail="Profile editing is not allowed for SSO users"
         )
     
+    user = current_user.user
     # Update full_name if provided
     if data.full_name is not None:
-        current_user.full_name = data.full_name.strip() if data.full_name else None
+        user.full_name = data.full_name.strip() if data.full_name else None
     
-    db.add(current_user)
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user)
     
     return {
-        "full_name": current_user.full_name,
-        "email": current_user.email,
-        "profile_picture": current_user.profile_picture
+        "full_name": user.full_name,
+        "email": user.email,
+        "profile_picture": user.profile_picture
     }
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 
 # Get Redis URL from environment or default to localhost
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -8,7 +9,7 @@ celery_app = Celery(
     "headhunter",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["app.tasks.cv_tasks"]
+    include=["app.tasks.cv_tasks", "app.tasks.match_tasks"]
 )
 
 celery_app.conf.update(
@@ -21,4 +22,41 @@ celery_app.conf.update(
     task_time_limit=300,  # 5 minutes
     task_soft_time_limit=240,  # 4 minutes
     worker_concurrency=5,
+    # Staged CV pipeline: CPU extraction and the I/O stages run on separate
+    # queues so their workers can be scaled independently.
+    task_routes={
+        "app.tasks.cv_tasks.extract_cv_stage_task": {"queue": "cv_extract"},
+        "app.tasks.cv_tasks.parse_cv_stage_task": {"queue": "cv_parse"},
+        "app.tasks.cv_tasks.embed_cv_stage_task": {"queue": "cv_embed"},
+        "app.tasks.cv_tasks.index_cv_stage_task": {"queue": "cv_index"},
+    },
 )
+
+
+# One persistent event loop and keep-alive OpenAI client per worker process
+# (prefork children), instead of a new loop and connection pool per task.
+@worker_process_init.connect
+def start_async_runtime(**kwargs):
+    from app.core import async_runtime, openai_limiter
+    async_runtime.start()
+    # Worker calls (parsing, embeddings) yield OpenAI capacity to interactive requests
+    openai_limiter.set_default_priority(openai_limiter.BACKGROUND)
+
+
+@worker_process_shutdown.connect
+def stop_async_runtime(**kwargs):
+    from app.core import async_runtime
+    async_runtime.stop()
+
+
+# The threads pool (cv_extract worker) runs tasks in the worker's main process
+# and sends no worker_process_init, so the runtime is started for it here.
+@worker_init.connect
+def start_thread_pool_runtime(sender=None, **kwargs):
+    if "thread" in str(getattr(sender, "pool_cls", "")):
+        start_async_runtime()
+
+
+@worker_shutdown.connect
+def stop_thread_pool_runtime(**kwargs):
+    stop_async_runtime()
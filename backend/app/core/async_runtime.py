@@ -0,0 +1,133 @@
+"""
+Long-lived asyncio runtime for Celery worker processes.
+
+Celery tasks are synchronous and used to bridge into the async OpenAI calls with
+asyncio.run(), which creates and tears down an event loop - and with it the
+AsyncOpenAI client's httpx connection pool - for every CV. Each task therefore
+paid for fresh TCP/TLS handshakes to OpenAI, once for the parse and again for
+the embedding.
+
+This module keeps one event loop running in a background thread per worker
+process, plus one keep-alive AsyncOpenAI client bound to that loop. It is started
+from the worker_process_init signal and stopped on worker_process_shutdown (see
+app.celery_app). Outside a worker (API process, scripts, tests) run() falls back
+to asyncio.run() and get_openai_client() returns None.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def start():
+    """Start the background event loop. Safe to call more than once."""
+    global _loop, _thread
+    with _lock:
+        if _loop is not None:
+            return
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=_run_loop, args=(loop,), name="async-runtime", daemon=True)
+        thread.start()
+        _loop, _thread = loop, thread
+    logger.info("Async runtime started")
+
+
+def stop(timeout: float = 10.0):
+    """Close the shared OpenAI client and stop the loop."""
+    global _loop, _thread, _openai_client
+    with _lock:
+        loop, thread, client = _loop, _thread, _openai_client
+        _loop, _thread, _openai_client = None, None, None
+    if loop is None:
+        return
+
+    if client is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error closing shared OpenAI client: {e}")
+
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+    logger.info("Async runtime stopped")
+
+
+def is_running() -> bool:
+    return _loop is not None
+
+
+def run(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Uses the persistent loop when the runtime is started, otherwise asyncio.run().
+    If the caller is interrupted (e.g. Celery's soft time limit), the coroutine is
+    cancelled on the loop rather than left running.
+    """
+    loop = _loop
+    if loop is None:
+        return asyncio.run(coro)
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("async_runtime.run() cannot be called from inside the runtime loop")
+
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def get_openai_client(api_key: str) -> Optional[AsyncOpenAI]:
+    """
+    Shared keep-alive client, or None when not called from the runtime loop.
+
+    httpx pools are bound to the loop they were created on, so the shared client
+    is only handed out to coroutines running on the runtime loop.
+    """
+    global _openai_client
+    if _loop is None:
+        return None
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    if running is not _loop:
+        return None
+
+    # Only ever reached from the loop thread, so no locking needed
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+                )
+            ),
+        )
+        logger.info("Created shared OpenAI client for async runtime")
+    return _openai_client
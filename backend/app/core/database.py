@@ -1,5 +1,7 @@
 import logging
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 
@@ -32,6 +34,45 @@ except Exception as e:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with the async driver: asyncpg for PostgreSQL, aiosqlite for SQLite."""
+    parsed = make_url(url)
+    driver = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    parsed = parsed.set(drivername=driver)
+    if driver == "postgresql+asyncpg" and "sslmode" in parsed.query:
+        # asyncpg takes libpq's sslmode values as "ssl"
+        parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": parsed.query["sslmode"]})
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine for async route handlers, so their queries don't block the event
+# loop. Sync routes keep using SessionLocal on FastAPI's threadpool.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+
+try:
+    if "sqlite" in ASYNC_DATABASE_URL and make_url(ASYNC_DATABASE_URL).database in (None, "", ":memory:"):
+        # One connection holds an in-memory database
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=StaticPool)
+    elif "sqlite" in ASYNC_DATABASE_URL:
+        async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=20,
+            max_overflow=40,
+            pool_timeout=60
+        )
+except Exception as e:
+    logger.critical(f"Failed to create async database engine: {e}")
+    raise
+
+# Objects stay usable after commit: an expired attribute can't be lazy-loaded
+# outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -39,4 +80,13 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Dependency for async routes. Helpers written for a sync Session run on it
+    with `await db.run_sync(helper, ...)`.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
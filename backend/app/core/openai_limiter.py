@@ -0,0 +1,330 @@
+"""
+Shared rate limiter and scheduler for OpenAI calls.
+
+API processes and every Celery worker call OpenAI independently, so a bulk
+upload used to run into 429s, and the Celery retry delay then stalled the whole
+queue. Every call now first takes capacity from a token bucket in Redis, one
+per model, tracking both requests/minute and tokens/minute. Callers that find
+the bucket empty wait for it to refill instead of failing.
+
+Calls belong to a priority class:
+
+  interactive  streaming endpoints a user is watching (ai_feedback, ai_job_analysis)
+  default      other calls made from API requests
+  background   anything running in a Celery worker (CV parsing, embeddings)
+
+A class never takes capacity while a higher class is waiting for it, and
+background calls leave OPENAI_BACKGROUND_RESERVE of each bucket untouched, so
+interactive calls get through even while a bulk parse saturates the limits.
+
+The bucket logic runs as one Lua script using the Redis server clock, so it is
+atomic and consistent across hosts. The Redis client is synchronous, so its
+round-trips run in a worker thread rather than on the caller's event loop. If
+Redis is unreachable the limiter falls back to an in-process bucket (limits
+then only hold per process) and retries Redis after REDIS_RETRY_AFTER seconds.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+DEFAULT = "default"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, DEFAULT, BACKGROUND)
+
+BUCKET_KEY = "openai_rl:{model}"
+WAITERS_KEY = "openai_rl:{model}:waiters:{priority}"
+
+# A waiter that has not polled for this long is considered gone
+WAITER_STALE_S = 5.0
+# Upper bound between two polls of a waiting caller
+MAX_POLL_S = 1.0
+REDIS_RETRY_AFTER = 30.0
+
+# KEYS: bucket, own waiters, waiters of every higher class
+# ARGV: rpm, tpm, cost, reserve fraction, waiter id, waiter staleness (s)
+# Returns 0 when granted, otherwise the suggested wait in milliseconds.
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[4])
+-- A request larger than the usable bucket would otherwise never fit
+local cost = math.min(tonumber(ARGV[3]), tpm * (1 - reserve))
+
+local function wait(ms)
+    redis.call('ZADD', KEYS[2], now, ARGV[5])
+    redis.call('EXPIRE', KEYS[2], 60)
+    return math.max(1, math.ceil(ms))
+end
+
+for i = 3, #KEYS do
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - tonumber(ARGV[6]))
+    if redis.call('ZCARD', KEYS[i]) > 0 then
+        return wait(100)
+    end
+end
+
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok', 'ts')
+local req = tonumber(state[1]) or rpm
+local tok = tonumber(state[2]) or tpm
+local ts = tonumber(state[3]) or now
+local elapsed = math.max(0, now - ts)
+req = math.min(rpm, req + elapsed * rpm / 60)
+tok = math.min(tpm, tok + elapsed * tpm / 60)
+
+local need_req = 1 + reserve * rpm
+local need_tok = cost + reserve * tpm
+if req >= need_req and tok >= need_tok then
+    redis.call('HSET', KEYS[1], 'req', req - 1, 'tok', tok - cost, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+    redis.call('ZREM', KEYS[2], ARGV[5])
+    return 0
+end
+
+redis.call('HSET', KEYS[1], 'req', req, 'tok', tok, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+local ms = math.max((need_req - req) * 60000 / rpm, (need_tok - tok) * 60000 / tpm)
+return wait(ms)
+"""
+
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("openai_priority", default=None)
+_default_priority = DEFAULT
+
+_redis_client = None
+_script = None
+_redis_down_until = 0.0
+
+_local_lock = threading.Lock()
+_local_buckets: Dict[str, Dict[str, float]] = {}
+_local_waiters: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(
+            settings.REDIS_URL, decode_responses=True, socket_connect_timeout=0.5, socket_timeout=0.5
+        )
+    return _redis_client
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        _script = _get_redis().register_script(_ACQUIRE_LUA)
+    return _script
+
+
+def set_default_priority(priority: str) -> None:
+    """Priority for calls made without an explicit one in this process."""
+    global _default_priority
+    _default_priority = priority
+
+
+def current_priority() -> str:
+    return _priority.get() or _default_priority
+
+
+@contextlib.contextmanager
+def priority(value: str):
+    """Run the calls made inside the block with the given priority class."""
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def get_limits(model: str) -> Tuple[int, int]:
+    """(requests/minute, tokens/minute) for a model."""
+    limits = _configured_limits().get(model) or {}
+    return (
+        int(limits.get("rpm", settings.OPENAI_DEFAULT_RPM)),
+        int(limits.get("tpm", settings.OPENAI_DEFAULT_TPM)),
+    )
+
+
+def _configured_limits() -> Dict[str, Dict[str, int]]:
+    if not settings.OPENAI_RATE_LIMITS:
+        return {}
+    try:
+        return json.loads(settings.OPENAI_RATE_LIMITS)
+    except ValueError:
+        logger.warning("OPENAI_RATE_LIMITS is not valid JSON, using the default limits")
+        return {}
+
+
+def _reserve(priority_class: str) -> float:
+    return settings.OPENAI_BACKGROUND_RESERVE if priority_class == BACKGROUND else 0.0
+
+
+def _higher(priority_class: str) -> List[str]:
+    return list(PRIORITIES[:PRIORITIES.index(priority_class)])
+
+
+def estimate_chat_tokens(kwargs: Dict[str, Any]) -> int:
+    """Tokens a chat completion counts against the limit: prompt plus expected completion."""
+    from app.services import token_budget
+
+    model = kwargs.get("model", "")
+    completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or settings.OPENAI_COMPLETION_TOKENS_ESTIMATE
+    return token_budget.count_message_tokens(kwargs.get("messages", []), model) + completion
+
+
+def _try_redis(model: str, tokens: int, priority_class: str, waiter_id: str) -> Optional[float]:
+    """Seconds to wait (0 when granted), or None if Redis is unavailable."""
+    global _redis_down_until
+    if time.monotonic() < _redis_down_until:
+        return None
+    rpm, tpm = get_limits(model)
+    keys = [BUCKET_KEY.format(model=model), WAITERS_KEY.format(model=model, priority=priority_class)]
+    keys += [WAITERS_KEY.format(model=model, priority=p) for p in _higher(priority_class)]
+    try:
+        wait_ms = _get_script()(keys=keys, args=[rpm, tpm, tokens, _reserve(priority_class), waiter_id, WAITER_STALE_S])
+    except Exception as e:
+        logger.warning(f"OpenAI rate limiter cannot reach Redis, limiting per process: {e}")
+        _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        return None
+    return int(wait_ms) / 1000
+
+
+def _try_local(model: str, tokens: int, priority_class: str, waiter_id: str) -> float:
+    """In-process version of the Lua script."""
+    now = time.monotonic()
+    rpm, tpm = get_limits(model)
+    reserve = _reserve(priority_class)
+    cost = min(tokens, tpm * (1 - reserve))
+    with _local_lock:
+        for higher in _higher(priority_class):
+            waiters = _local_waiters.get((model, higher), {})
+            for stale in [w for w, seen in waiters.items() if seen < now - WAITER_STALE_S]:
+                del waiters[stale]
+            if waiters:
+                _local_waiters.setdefault((model, priority_class), {})[waiter_id] = now
+                return 0.1
+
+        bucket = _local_buckets.setdefault(model, {"req": rpm, "tok": tpm, "ts": now})
+        elapsed = max(0.0, now - bucket["ts"])
+        bucket["req"] = min(rpm, bucket["req"] + elapsed * rpm / 60)
+        bucket["tok"] = min(tpm, bucket["tok"] + elapsed * tpm / 60)
+        bucket["ts"] = now
+
+        need_req = 1 + reserve * rpm
+        need_tok = cost + reserve * tpm
+        if bucket["req"] >= need_req and bucket["tok"] >= need_tok:
+            bucket["req"] -= 1
+            bucket["tok"] -= cost
+            _local_waiters.get((model, priority_class), {}).pop(waiter_id, None)
+            return 0.0
+
+        _local_waiters.setdefault((model, priority_class), {})[waiter_id] = now
+        return max((need_req - bucket["req"]) * 60 / rpm, (need_tok - bucket["tok"]) * 60 / tpm, 0.001)
+
+
+def _leave(model: str, priority_class: str, waiter_id: str) -> None:
+    with _local_lock:
+        _local_waiters.get((model, priority_class), {}).pop(waiter_id, None)
+    if time.monotonic() < _redis_down_until:
+        return
+    try:
+        _get_redis().zrem(WAITERS_KEY.format(model=model, priority=priority_class), waiter_id)
+    except Exception as e:
+        logger.debug(f"Could not remove rate limiter waiter: {e}")
+
+
+async def acquire(model: str, tokens: int, priority: Optional[str] = None) -> float:
+    """
+    Wait until `model` has capacity for one request of `tokens` tokens and take
+    it. Returns the seconds spent waiting. After OPENAI_RATE_LIMIT_MAX_WAIT the
+    call proceeds anyway (OpenAI's own 429 handling then applies).
+    """
+    if not settings.OPENAI_RATE_LIMIT_ENABLED:
+        return 0.0
+    priority_class = priority or current_priority()
+    waiter_id = uuid.uuid4().hex
+    start = time.monotonic()
+    deadline = start + settings.OPENAI_RATE_LIMIT_MAX_WAIT
+    try:
+        while True:
+            wait = None
+            if time.monotonic() >= _redis_down_until:
+                wait = await asyncio.to_thread(_try_redis, model, tokens, priority_class, waiter_id)
+            if wait is None:
+                wait = _try_local(model, tokens, priority_class, waiter_id)
+            if wait <= 0:
+                waited = time.monotonic() - start
+                if waited > 1:
+                    logger.info(f"Waited {waited:.1f}s for {model} capacity ({priority_class}, {tokens} tokens)")
+                return waited
+            if time.monotonic() + min(wait, MAX_POLL_S) > deadline:
+                logger.warning(f"Gave up waiting for {model} capacity after {time.monotonic() - start:.0f}s ({priority_class})")
+                return time.monotonic() - start
+            await asyncio.sleep(min(wait, MAX_POLL_S))
+    finally:
+        await asyncio.to_thread(_leave, model, priority_class, waiter_id)
+
+
+def _settle_redis(model: str, delta: float) -> None:
+    try:
+        _get_redis().hincrbyfloat(BUCKET_KEY.format(model=model), "tok", delta)
+    except Exception as e:
+        logger.debug(f"Could not settle rate limiter tokens: {e}")
+
+
+async def settle(model: str, reserved_tokens: int, used_tokens: Optional[int]) -> None:
+    """Return (or charge) the difference once a call reports its real token usage."""
+    if not settings.OPENAI_RATE_LIMIT_ENABLED or not used_tokens:
+        return
+    delta = reserved_tokens - used_tokens
+    if not delta:
+        return
+    with _local_lock:
+        if model in _local_buckets:
+            _local_buckets[model]["tok"] += delta
+    if time.monotonic() < _redis_down_until:
+        return
+    await asyncio.to_thread(_settle_redis, model, delta)
+
+
+def get_status() -> Dict[str, Any]:
+    """Current bucket levels and waiting callers per model (from Redis)."""
+    models = {}
+    try:
+        client = _get_redis()
+        for key in client.scan_iter(match="openai_rl:*", count=100):
+            # Model names may contain ":" (fine-tuned models)
+            model, _, waiting_class = key[len("openai_rl:"):].partition(":waiters:")
+            entry = models.setdefault(model, {"waiting": {p: 0 for p in PRIORITIES}})
+            if not waiting_class:
+                state = client.hgetall(key)
+                rpm, tpm = get_limits(model)
+                entry.update({
+                    "rpm_limit": rpm,
+                    "tpm_limit": tpm,
+                    "requests_available": round(float(state.get("req", rpm)), 1),
+                    "tokens_available": round(float(state.get("tok", tpm))),
+                })
+            elif waiting_class in PRIORITIES:
+                entry["waiting"][waiting_class] = client.zcard(key)
+    except Exception as e:
+        logger.warning(f"Failed to read OpenAI rate limiter status: {e}")
+    return {
+        "enabled": settings.OPENAI_RATE_LIMIT_ENABLED,
+        "background_reserve": settings.OPENAI_BACKGROUND_RESERVE,
+        "models": models,
+    }
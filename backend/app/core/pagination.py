@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination and count helpers for list endpoints.
+
+OFFSET pagination makes the database produce and discard every row before
+the requested page, so deep pages get slower the further a client scrolls.
+A keyset cursor instead records the sort value and id of the last row
+served, and the next page starts right after it with a WHERE clause that an
+index on (sort column, id) can seek to.
+
+Cursors are opaque to clients: urlsafe base64 of a JSON list
+[sort name, last value, last id].
+"""
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+logger = logging.getLogger(__name__)
+
+# Estimated totals below this are replaced by an exact count, which is cheap there
+EXACT_COUNT_BELOW = 10000
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """
+    One sort column plus the id tie-breaker, which runs in the same direction.
+    NULL values sort first or last regardless of direction, identically on
+    PostgreSQL and SQLite, so a cursor can step over them.
+    """
+    column: Any
+    id_column: Any
+    descending: bool = False
+    nulls_first: bool = False
+
+    def order_by(self):
+        column = self.column.desc() if self.descending else self.column.asc()
+        column = column.nulls_first() if self.nulls_first else column.nulls_last()
+        return column, self.id_column.desc() if self.descending else self.id_column.asc()
+
+    def _after(self, column, value):
+        return column < value if self.descending else column > value
+
+    def after(self, value, last_id: int):
+        """Filter for the rows that sort after (value, last_id)."""
+        if value is None:
+            same_value = and_(self.column.is_(None), self._after(self.id_column, last_id))
+            # Past the NULL block at the start, every non-NULL row comes next
+            return or_(same_value, self.column.isnot(None)) if self.nulls_first else same_value
+        later = or_(
+            self._after(self.column, value),
+            and_(self.column == value, self._after(self.id_column, last_id)),
+        )
+        if self.nulls_first:
+            # Redundant bound the planner can turn into an index range
+            bound = self.column <= value if self.descending else self.column >= value
+            return and_(bound, later)
+        return or_(later, self.column.is_(None))
+
+    def parse(self, value):
+        if value is not None and self.column.type.python_type is datetime:
+            return datetime.fromisoformat(value)
+        return value
+
+
+def encode_cursor(sort: str, value, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, key: SortKey) -> Tuple[Any, int]:
+    """(last value, last id) from a cursor issued for the same `sort`; 400 otherwise."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(raw)
+        if cursor_sort != sort or not isinstance(last_id, int):
+            raise ValueError("cursor was issued for another sort order")
+        return key.parse(value), last_id
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise HTTPException(400, f"Invalid cursor: {e}")
+
+
+def estimated_count(query: Query) -> Optional[int]:
+    """
+    The planner's row estimate for `query` (PostgreSQL only, else None).
+    Statistics can be off by a wide margin, so this is for "about N results"
+    displays and page counts, not for anything that must add up.
+    """
+    connection = query.session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+    compiled = query.statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    try:
+        # In a savepoint, so a failed EXPLAIN doesn't abort the request's transaction
+        with connection.begin_nested():
+            plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    except Exception as e:
+        logger.warning(f"Row estimate failed, counting exactly: {e}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count(query: Query, approximate: bool = False) -> int:
+    """Row count of `query`; with `approximate`, the planner's estimate when it is large."""
+    if approximate:
+        estimate = estimated_count(query)
+        if estimate is not None and estimate >= EXACT_COUNT_BELOW:
+            return estimate
+    return query.order_by(None).count()
@@ -24,6 +24,12 @@ async def lifespan(app: FastAPI):
     logger.debug("Initializing database tables and cache...")
     # Ensure database tables are created
     models.Base.metadata.create_all(bind=engine)
+    # Full-text column/index for candidate search (not part of the ORM model)
+    try:
+        from app.services.lexical_search import ensure_search_vector
+        ensure_search_vector(engine)
+    except Exception as e:
+        logger.warning(f"Could not ensure candidate search index: {e}")
     # Initialize Redis Cache
     await init_cache()
     
@@ -35,15 +41,14 @@ async def lifespan(app: FastAPI):
         # 1. Auto-resume interrupted CV processing
         try:
             from app.core.database import SessionLocal
-            from app.tasks.cv_tasks import process_cv_task
+            from app.tasks.cv_tasks import dispatch_cv_processing
             
             db = SessionLocal()
-            unparsed_cvs = db.query(models.CV).filter(models.CV.is_parsed.is_(False)).all()
+            unparsed_cvs = db.query(models.CV.id).filter(models.CV.is_parsed.is_(False)).all()
             
             if unparsed_cvs:
                 logger.info(f"[Startup] Found {len(unparsed_cvs)} unparsed CVs - resuming processing...")
-                for cv in unparsed_cvs:
-                    process_cv_task.delay(cv.id)
+                dispatch_cv_processing([cv.id for cv in unparsed_cvs])
                 logger.info(f"[Startup] Queued {len(unparsed_cvs)} CVs for processing")
             else:
                 logger.info("[Startup] No interrupted CV processing to resume")
@@ -73,6 +78,9 @@ async def lifespan(app: FastAPI):
         logger.info("Log executor shut down gracefully")
     except Exception as e:
         logger.error(f"Error shutting down log executor: {e}")
+    # Close the async routes' pooled connections
+    from app.core.database import async_engine
+    await async_engine.dispose()
 
 # Read version from centralized VERSION file
 def get_app_version():
@@ -103,6 +111,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # Keyset cursor of paginated lists
 )
 
 # Add logging middleware for request/response tracking
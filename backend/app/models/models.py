@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, Float, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from app.core.database import Base
 import enum
 
@@ -75,7 +75,8 @@ class User(Base):
     sso_id = Column(String, nullable=True)
     sso_id = Column(String, nullable=True)
     is_verified = Column(Boolean, default=False)
-    profile_picture = Column(Text, nullable=True) # Base64 encoded or URL
+    # Base64 encoded or URL. Deferred: load with undefer(User.profile_picture) where it is returned
+    profile_picture = deferred(Column(Text, nullable=True))
     feature_flags = Column(Text, nullable=True) # JSON for granular feature toggles
     
     company = relationship("Company", back_populates="users")
@@ -157,6 +158,7 @@ class Job(Base):
     applications = relationship("Application", back_populates="job", cascade="all, delete-orphan")
     creator = relationship("User", foreign_keys=[created_by])
     modifier = relationship("User", foreign_keys=[modified_by])
+    candidate_scores = relationship("JobCandidateScore", back_populates="job", cascade="all, delete-orphan", passive_deletes=True)
 
 class CV(Base):
     __tablename__ = "cvs"
@@ -176,8 +178,14 @@ class CV(Base):
     
     applications = relationship("Application", back_populates="cv", cascade="all, delete-orphan")
     parsed_data = relationship("ParsedCV", back_populates="cv", uselist=False, cascade="all, delete-orphan")
+    skill_index = relationship("CandidateSkill", cascade="all, delete-orphan", passive_deletes=True)
     uploader = relationship("User", foreign_keys=[uploaded_by])
 
+    __table_args__ = (
+        # Keyset pagination of the profiles list (see app.core.pagination)
+        Index("ix_cvs_company_uploaded_at_id", "company_id", "uploaded_at", "id"),
+    )
+
 class Application(Base):
     __tablename__ = "applications"
     id = Column(Integer, primary_key=True, index=True)
@@ -237,7 +245,8 @@ class ParsedCV(Base):
     __tablename__ = "parsed_cvs"
     id = Column(Integer, primary_key=True, index=True)
     cv_id = Column(Integer, ForeignKey("cvs.id", ondelete="CASCADE"), unique=True)
-    raw_text = Column(Text, nullable=True)
+    # Full extracted CV text; only the parse pipeline reads it, so it is deferred
+    raw_text = deferred(Column(Text, nullable=True))
     name = Column(String, nullable=True)
     email = Column(Text, nullable=True) 
     phone = Column(Text, nullable=True)
@@ -251,14 +260,97 @@ class ParsedCV(Base):
     last_company = Column(String, nullable=True)
     social_links = Column(Text, nullable=True)
     education = Column(Text, nullable=True)
-    job_history = Column(Text, nullable=True)
+    # Deferred: only profile responses and embedding text need it, via undefer(ParsedCV.job_history)
+    job_history = deferred(Column(Text, nullable=True))
     skills = Column(Text, nullable=True)
     experience_years = Column(Integer, nullable=True)
     current_salary = Column(String, nullable=True)
     expected_salary = Column(String, nullable=True)
     parsed_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every change; the embedding sync walks rows in (updated_at, id) order
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Parse cache keys (see app.services.parse_cache)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the uploaded file bytes
+    text_hash = Column(String(64), nullable=True, index=True)  # sha256 of the extracted text
+    parse_version = Column(String, nullable=True)  # Prompt/model stamp the fields were produced with
+    parse_tokens = Column(Integer, nullable=True)  # Tokens the LLM parse cost (reported as saved on cache hits)
+
     cv = relationship("CV", back_populates="parsed_data")
 
+    __table_args__ = (
+        Index("ix_parsed_cvs_updated_at_id", "updated_at", "id"),
+    )
+
+class CandidateSkill(Base):
+    """
+    One row per (CV, normalized skill): an inverted index over ParsedCV.skills,
+    kept in sync by app.services.skills, so skill filters run in SQL.
+    """
+    __tablename__ = "candidate_skills"
+    cv_id = Column(Integer, ForeignKey("cvs.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String(100), primary_key=True)  # normalize_text() of the canonical name
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+
+    __table_args__ = (
+        # Serves "has all of [X, Y]": WHERE company_id = ? AND skill IN (...) GROUP BY cv_id
+        Index("ix_candidate_skills_company_skill", "company_id", "skill", "cv_id"),
+    )
+
+class JobCandidateScore(Base):
+    """
+    Precomputed match of a CV against an open job (read model, maintained by
+    app.services.match_scores when jobs are saved and CVs finish processing).
+    Only matches scoring at least MATCH_SCORE_MIN are stored.
+    """
+    __tablename__ = "job_candidate_scores"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    cv_id = Column(Integer, ForeignKey("cvs.id", ondelete="CASCADE"), nullable=False, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
+    score = Column(Integer, nullable=False)  # 0-105, same scale as /jobs/matches
+    vector_score = Column(Float, nullable=True)  # Cosine similarity mapped to 0-1
+    skills_matched = Column(Text, nullable=True)  # JSON list
+    is_silver = Column(Boolean, default=False)
+    scored_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    strong_match_at = Column(DateTime(timezone=True), nullable=True)  # First time score >= MATCH_STRONG_SCORE
+
+    job = relationship("Job", back_populates="candidate_scores")
+    cv = relationship("CV")
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "cv_id", name="uq_job_candidate_scores_job_cv"),
+        # Serves the paginated per-job listing: WHERE job_id = ? ORDER BY score DESC, cv_id
+        Index("ix_job_candidate_scores_job_score", "job_id", "score", "cv_id"),
+    )
+
+class CandidateSummary(Base):
+    """
+    One row per CV with what the profiles list and search results show:
+    denormalized from the CV, its parsed data, uploader and applications
+    (with their jobs, assigners and interviews). Kept current by
+    app.services.candidate_summary on every commit that touches them.
+    """
+    __tablename__ = "candidate_summary"
+    cv_id = Column(Integer, ForeignKey("cvs.id", ondelete="CASCADE"), primary_key=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+    uploaded_at = Column(DateTime(timezone=True), nullable=True)
+    # Sort keys, and the inputs of the upload-age fields computed when served
+    name = Column(String, nullable=True)
+    experience_years = Column(Integer, nullable=True)
+    bachelor_year = Column(Integer, nullable=True)
+    skills = Column(Text, nullable=True)  # As stored in ParsedCV (search results return it raw)
+    is_silver_medalist = Column(Boolean, default=False)  # Any application reached an advanced stage
+    data = Column(Text, nullable=False)  # JSON: the CVResponse item, without salary masks or upload age
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # One per profiles list sort: WHERE company_id = ? ORDER BY <key>, cv_id
+        Index("ix_candidate_summary_company_uploaded_at", "company_id", "uploaded_at", "cv_id"),
+        Index("ix_candidate_summary_company_name", "company_id", "name", "cv_id"),
+        Index("ix_candidate_summary_company_experience", "company_id", "experience_years", "cv_id"),
+    )
+
 class CalendarConnection(Base):
     __tablename__ = "calendar_connections"
     id = Column(Integer, primary_key=True, index=True)
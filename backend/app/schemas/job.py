@@ -100,6 +100,13 @@ class CandidateMatch(BaseModel):
     skills_matched: List[str]
     status: str
     
+class JobMatchPage(BaseModel):
+    items: List[CandidateMatch]
+    total: int
+    page: int
+    pages: int
+    limit: int
+
 class BulkAssignRequest(BaseModel):
     job_id: int
     cv_ids: List[int]
@@ -10,6 +10,7 @@ import os
 import time
 from typing import AsyncGenerator, Dict, Any
 from app.core.logging import get_logger
+from app.core import openai_limiter
 from app.services.parser import get_openai_client
 
 logger = get_logger(__name__)
@@ -129,15 +130,20 @@ Generate comprehensive interview feedback that evaluates the candidate's fit for
         
         # Stream completion
         accumulated_content = ""
-        stream = await client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
+        kwargs = {
+            "model": OPENAI_MODEL,
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            stream=True,
-            temperature=1.0
-        )
+            "stream": True,
+            "stream_options": {"include_usage": True},
+            "temperature": 1.0
+        }
+        # A user is watching this stream: it goes ahead of background parsing
+        reserved = openai_limiter.estimate_chat_tokens(kwargs)
+        await openai_limiter.acquire(OPENAI_MODEL, reserved, openai_limiter.INTERACTIVE)
+        stream = await client.chat.completions.create(**kwargs)
         
         async for chunk in stream:
             if chunk.choices and len(chunk.choices) > 0:
@@ -149,14 +155,16 @@ Generate comprehensive interview feedback that evaluates the candidate's fit for
                         "content": delta.content,
                         "accumulated": accumulated_content
                     }
-                
-                # Track token usage if available
-                if hasattr(chunk, 'usage') and chunk.usage:
-                    tokens_used = chunk.usage.total_tokens
-                    if hasattr(chunk.usage, 'prompt_tokens'):
-                        tokens_input = chunk.usage.prompt_tokens
-                    if hasattr(chunk.usage, 'completion_tokens'):
-                        tokens_output = chunk.usage.completion_tokens
+            
+            # Usage arrives on the final chunk, which has no choices
+            if getattr(chunk, 'usage', None):
+                tokens_used = chunk.usage.total_tokens
+                if hasattr(chunk.usage, 'prompt_tokens'):
+                    tokens_input = chunk.usage.prompt_tokens
+                if hasattr(chunk.usage, 'completion_tokens'):
+                    tokens_output = chunk.usage.completion_tokens
+        # Reconcile the reservation with what the call actually used
+        await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
         
         # Get final token count if not available from chunks
         if tokens_used == 0:
@@ -10,6 +10,7 @@ import os
 import time
 from typing import AsyncGenerator, Dict, Any
 from app.core.logging import get_logger
+from app.core import openai_limiter
 from app.services.parser import get_openai_client
 
 logger = get_logger(__name__)
@@ -150,12 +151,16 @@ Return ONLY valid JSON in this exact format:
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Generate job description for: {title}"}
             ],
-            "stream": True
+            "stream": True,
+            "stream_options": {"include_usage": True}
         }
         if not OPENAI_MODEL.startswith("o1"):
             kwargs["temperature"] = 1.0
             kwargs["response_format"] = {"type": "json_object"}
         
+        # A user is watching this stream: it goes ahead of background parsing
+        reserved = openai_limiter.estimate_chat_tokens(kwargs)
+        await openai_limiter.acquire(OPENAI_MODEL, reserved, openai_limiter.INTERACTIVE)
         stream = await client.chat.completions.create(**kwargs)
         
         # Stream the response
@@ -169,14 +174,16 @@ Return ONLY valid JSON in this exact format:
                         "content": delta.content,
                         "accumulated": accumulated_content
                     }
-                
-                # Track token usage if available
-                if hasattr(chunk, 'usage') and chunk.usage:
-                    tokens_used = chunk.usage.total_tokens
-                    if hasattr(chunk.usage, 'prompt_tokens'):
-                        tokens_input = chunk.usage.prompt_tokens
-                    if hasattr(chunk.usage, 'completion_tokens'):
-                        tokens_output = chunk.usage.completion_tokens
+            
+            # Usage arrives on the final chunk, which has no choices
+            if getattr(chunk, 'usage', None):
+                tokens_used = chunk.usage.total_tokens
+                if hasattr(chunk.usage, 'prompt_tokens'):
+                    tokens_input = chunk.usage.prompt_tokens
+                if hasattr(chunk.usage, 'completion_tokens'):
+                    tokens_output = chunk.usage.completion_tokens
+        # Reconcile the reservation with what the call actually used
+        await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
         
         # Parse the complete JSON
         try:
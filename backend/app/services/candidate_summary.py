@@ -0,0 +1,267 @@
+"""
+Candidate summary read model: one CandidateSummary row per CV.
+
+The profiles list used to load each CV on a page with its parsed data,
+uploader and applications (jobs, assigners, interviews), and then build the
+response item in Python on every request. The item is now built when its
+inputs change and stored in candidate_summary. The profiles list and the
+search results read from that table only.
+
+Rows are rebuilt in the transaction that changes their inputs. At each
+flush, the affected CVs are collected from:
+- new, changed and deleted CV, ParsedCV, Application and Interview rows
+- Users whose name or email changed (uploader and assigner names)
+- Jobs whose title or department changed
+Before the commit, the rows of those CVs are rebuilt.
+
+Writes that bypass the ORM (raw SQL, Query.update) are not seen.
+check_summaries() and scripts/check_candidate_summary.py find such drift,
+and scripts/backfill_candidate_summary.py rebuilds rows.
+
+Fields that depend on the current date (years_since_upload, is_outdated,
+projected_experience) and interviewer salary masks are applied when a row
+is served, by present().
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.models import CV, Application, CandidateSummary, Interview, Job, ParsedCV, User
+from app.schemas.cv import ApplicationOut, CVResponse
+
+logger = logging.getLogger(__name__)
+
+# Statuses that make a candidate a silver medalist in search results
+ADVANCED_STAGES = ["Interview", "Offer", "Technical Assessment", "Final Round"]
+BATCH_SIZE = 500
+# Computed when a row is served, so not stored
+UPLOAD_AGE_FIELDS = ("years_since_upload", "is_outdated", "projected_experience")
+
+# Session.info key of the ids whose CVs' rows are rebuilt on commit, per kind
+_PENDING = "candidate_summary_pending"
+
+
+def _display_name(user: Optional[User]) -> Optional[str]:
+    return (user.full_name or user.email) if user else None
+
+
+def build(cv: CV) -> Dict[str, Any]:
+    """Column values of `cv`'s summary row (relationships as loaded by _load_cvs)."""
+    parsed = cv.parsed_data
+    item = CVResponse.model_validate(cv).model_dump(mode="json")
+    for field in UPLOAD_AGE_FIELDS:
+        item.pop(field)
+    item["uploaded_by_name"] = _display_name(cv.uploader)
+
+    applications = []
+    for application in sorted(cv.applications, key=lambda a: a.id):
+        out = ApplicationOut.model_validate(application).model_dump(mode="json")
+        out["assigned_by_name"] = _display_name(application.assigner)
+        if application.job:
+            out["job_title"] = application.job.title
+            out["job_department"] = application.job.department
+        out["interviews"].sort(key=lambda i: i["id"])
+        applications.append(out)
+    item["applications"] = applications
+
+    return {
+        "company_id": cv.company_id,
+        "uploaded_at": cv.uploaded_at,
+        "name": parsed.name if parsed else None,
+        "experience_years": parsed.experience_years if parsed else None,
+        "bachelor_year": parsed.bachelor_year if parsed else None,
+        "skills": parsed.skills if parsed else None,
+        "is_silver_medalist": any(a.status in ADVANCED_STAGES for a in cv.applications),
+        "data": json.dumps(item),
+    }
+
+
+def present(row: CandidateSummary, mask_salaries: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """The CVResponse item for a summary row, with upload age and salary masks applied."""
+    item = json.loads(row.data)
+    item["years_since_upload"] = 0.0
+    item["projected_experience"] = 0
+    item["is_outdated"] = False
+
+    if row.uploaded_at:
+        now = now or datetime.now(timezone.utc)
+        uploaded_at = row.uploaded_at
+        if uploaded_at.tzinfo is None:
+            uploaded_at = uploaded_at.replace(tzinfo=timezone.utc)
+        years_passed = (now - uploaded_at).days / 365.25
+        item["years_since_upload"] = round(years_passed, 1)
+        item["is_outdated"] = years_passed > 2.0
+
+        # Students (graduating in the future) get negative experience
+        if row.bachelor_year and row.bachelor_year > now.year:
+            item["projected_experience"] = now.year - row.bachelor_year
+        else:
+            item["projected_experience"] = (row.experience_years or 0) + int(years_passed)
+
+    if mask_salaries:
+        for record in filter(None, [item["parsed_data"], *item["applications"]]):
+            record["current_salary"] = "Confidential"
+            record["expected_salary"] = "Confidential"
+    return item
+
+
+def _load_cvs(db: Session, cv_ids: List[int]) -> List[CV]:
+    # populate_existing: collections already loaded in this session may predate the flush
+    return db.query(CV).filter(CV.id.in_(cv_ids)).options(
+        joinedload(CV.parsed_data).undefer(ParsedCV.job_history),
+        joinedload(CV.uploader),
+        selectinload(CV.applications).selectinload(Application.interviews),
+        selectinload(CV.applications).joinedload(Application.assigner),
+        selectinload(CV.applications).joinedload(Application.job),
+    ).populate_existing().all()
+
+
+def _batches(ids: Iterable[int]) -> Iterable[List[int]]:
+    ids = sorted(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def refresh(db: Session, cv_ids: Iterable[int]) -> int:
+    """
+    Rebuild the summary rows of `cv_ids` from the session's current (flushed)
+    data and remove those of deleted CVs. Returns the number of rows written.
+    The caller commits.
+    """
+    written = 0
+    for batch in _batches(set(cv_ids)):
+        existing = {row.cv_id: row for row in db.query(CandidateSummary).filter(CandidateSummary.cv_id.in_(batch))}
+        for cv in _load_cvs(db, batch):
+            try:
+                values = build(cv)
+            except Exception as e:
+                # Leaves the row stale rather than failing the write that triggered it
+                logger.error(f"Candidate summary of CV {cv.id} not rebuilt: {e}")
+                existing.pop(cv.id, None)
+                continue
+            row = existing.pop(cv.id, None)
+            if row is None:
+                row = CandidateSummary(cv_id=cv.id)
+                db.add(row)
+            for column, value in values.items():
+                setattr(row, column, value)
+            written += 1
+        for row in existing.values():
+            db.delete(row)
+    return written
+
+
+def check_summaries(db: Session, cv_ids: Iterable[int]) -> Dict[str, List[int]]:
+    """
+    Compare the stored rows of `cv_ids` with freshly built ones: CVs without
+    a row ("missing"), rows that differ ("stale") and rows whose CV no longer
+    exists ("orphaned").
+    """
+    drift = {"missing": [], "stale": [], "orphaned": []}
+    for batch in _batches(set(cv_ids)):
+        stored = {row.cv_id: row for row in db.query(CandidateSummary).filter(CandidateSummary.cv_id.in_(batch))}
+        for cv in _load_cvs(db, batch):
+            row = stored.pop(cv.id, None)
+            if row is None:
+                drift["missing"].append(cv.id)
+                continue
+            expected = build(cv)
+            if json.loads(row.data) != json.loads(expected.pop("data")) or \
+                    any(getattr(row, column) != value for column, value in expected.items()):
+                drift["stale"].append(cv.id)
+        drift["orphaned"].extend(stored)
+    return drift
+
+
+# ---- maintenance on commit --------------------------------------------------
+
+def _pending(session: Session) -> Dict[str, Set[int]]:
+    return session.info.setdefault(_PENDING, {"cvs": set(), "applications": set(), "users": set(), "jobs": set()})
+
+
+def _changed(obj, *attributes: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _record(session: Session, obj, change: str) -> None:
+    """
+    Note the ids whose CVs' rows `obj` affects. `change` is "new", "dirty",
+    "deleting" (before the flush) or "deleted" (after it).
+    """
+    if change == "deleted":
+        # Rows deleted by cascade can't be loaded any more; they were loaded to be deleted
+        state = inspect(obj)
+        value = state.dict.get
+    else:
+        value = lambda name: getattr(obj, name)  # noqa: E731
+
+    if isinstance(obj, CV):
+        kind, ids = "cvs", [value("id")]
+    elif isinstance(obj, ParsedCV):
+        kind, ids = "cvs", [value("cv_id")]
+    elif isinstance(obj, Application):
+        # A moved application changes its old CV's row too
+        kind, ids = "cvs", [value("cv_id"), *inspect(obj).attrs.cv_id.history.deleted]
+    elif isinstance(obj, Interview):
+        kind, ids = "applications", [value("application_id")]
+    elif isinstance(obj, User) and change == "dirty" and _changed(obj, "full_name", "email"):
+        kind, ids = "users", [value("id")]
+    elif isinstance(obj, Job) and change == "dirty" and _changed(obj, "title", "department"):
+        kind, ids = "jobs", [value("id")]
+    else:
+        return
+    _pending(session)[kind].update(i for i in ids if i is not None)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deletes(session: Session, flush_context, instances) -> None:
+    # Explicitly deleted rows still exist here, so expired attributes can load
+    for obj in session.deleted:
+        _record(session, obj, "deleting")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    # New rows have their ids now; rows deleted by cascade show up only here
+    for obj in session.new:
+        _record(session, obj, "new")
+    for obj in session.dirty:
+        _record(session, obj, "dirty")
+    for obj in session.deleted:
+        _record(session, obj, "deleted")
+
+
+def _affected_cv_ids(session: Session, pending: Dict[str, Set[int]]) -> Set[int]:
+    queries = []
+    if pending["applications"]:
+        queries.append(select(Application.cv_id).where(Application.id.in_(pending["applications"])))
+    if pending["users"]:
+        queries.append(select(CV.id).where(CV.uploaded_by.in_(pending["users"])))
+        queries.append(select(Application.cv_id).where(Application.assigned_by.in_(pending["users"])))
+    if pending["jobs"]:
+        queries.append(select(Application.cv_id).where(Application.job_id.in_(pending["jobs"])))
+    cv_ids = set(pending["cvs"])
+    if queries:
+        cv_ids.update(session.scalars(union(*queries)).all())
+    cv_ids.discard(None)
+    return cv_ids
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_on_commit(session: Session) -> None:
+    # Flush first, so the changes still pending are collected and readable
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        refresh(session, _affected_cv_ids(session, pending))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
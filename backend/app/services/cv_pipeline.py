@@ -0,0 +1,410 @@
+"""
+Staged CV processing pipeline.
+
+A CV moves through four stages, each running on its own Celery queue so that
+CPU-bound extraction and I/O-bound stages can be scaled independently:
+
+  extract  read the file, check the parse cache, persist raw_text   (cv_extract)
+  parse    LLM parse of the persisted raw_text, persist the fields   (cv_parse)
+  embed    embed the persisted fields, hand the vector to index      (cv_embed)
+  index    upsert the vector into ChromaDB                           (cv_index)
+
+Every stage persists its output before the next one is queued: raw_text and the
+parsed fields in Postgres, the embedding in Redis until it has been indexed
+(a PDF's page boundaries, used to strip page headers and footers, go from
+extract to parse through Redis too). A failure therefore only retries the stage
+that failed; a ChromaDB outage retries indexing without paying for the LLM
+parse again.
+
+Stage handlers take one cv_id and return the name of the next stage (or None
+when the CV is done). run_stage() runs a batch of ids concurrently and records
+per-stage latency and throughput (see get_stats()).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import sessionmaker, undefer
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.models import CV, ParsedCV
+from app.services import parse_cache
+from app.services.cv_preextract import page_line_counts
+from app.services.parser import extract_text_pages, parse_cv_with_llm
+from app.services.parse_service import _fetch_cv, _save_parse_result, _clone_cached_parse
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("extract", "parse", "embed", "index")
+STAGE_QUEUES = {stage: f"cv_{stage}" for stage in STAGES}
+
+# Embedding handed from the embed stage to the index stage, kept until indexed
+EMBEDDING_HANDOFF_KEY = "cv_pipeline:embedding:{cv_id}"
+EMBEDDING_HANDOFF_TTL = 7 * 24 * 3600
+# Line count of each extracted page, handed from extract to parse
+PAGE_LINES_HANDOFF_KEY = "cv_pipeline:page_lines:{cv_id}"
+
+STAGE_STATS_KEY = "cv_pipeline:stats:{stage}"
+STAGE_LATENCY_KEY = "cv_pipeline:latency:{stage}"
+STAGE_THROUGHPUT_KEY = "cv_pipeline:throughput:{stage}:{minute}"
+LATENCY_SAMPLES = 500
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+def _session_factory():
+    return sessionmaker(bind=engine)
+
+
+# ==================== Stage Handlers ====================
+
+def _extract(cv_id: int) -> Optional[str]:
+    SessionLocal = _session_factory()
+    cv_info = _fetch_cv(SessionLocal, cv_id)
+    if not cv_info:
+        logger.warning(f"CV with ID {cv_id} not found.")
+        return None
+    cv_filepath, _, company_id, _ = cv_info
+
+    content_hash = parse_cache.hash_file(cv_filepath)
+    if content_hash:
+        cached = _clone_from_cache(SessionLocal, cv_id, company_id, content_hash, None, by_text=False)
+        if cached is not False:
+            return cached
+
+    pages = extract_text_pages(cv_filepath)
+    full_text = "\n".join(pages)
+    if not full_text:
+        logger.warning(f"No text extracted for CV ID {cv_id}.")
+        return None
+
+    text_hash = parse_cache.hash_text(full_text)
+    cached = _clone_from_cache(SessionLocal, cv_id, company_id, content_hash, text_hash, by_text=True)
+    if cached is not False:
+        return cached
+    parse_cache.record_miss()
+
+    db = SessionLocal()
+    try:
+        parsed_record = db.query(ParsedCV).filter(ParsedCV.cv_id == cv_id).first()
+        if not parsed_record:
+            parsed_record = ParsedCV(cv_id=cv_id)
+            db.add(parsed_record)
+        parsed_record.raw_text = full_text
+        parsed_record.content_hash = content_hash
+        parsed_record.text_hash = text_hash
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if len(pages) > 1:
+        _set_page_lines(cv_id, page_line_counts(pages))
+    return "parse"
+
+
+def _set_page_lines(cv_id: int, page_lines: List[int]) -> None:
+    try:
+        _get_redis().set(PAGE_LINES_HANDOFF_KEY.format(cv_id=cv_id), json.dumps(page_lines), ex=EMBEDDING_HANDOFF_TTL)
+    except Exception as e:
+        # Only page header/footer stripping depends on it; the parse treats the text as one page
+        logger.warning(f"CV {cv_id}: failed to hand off page boundaries: {e}")
+
+
+def _get_page_lines(cv_id: int) -> Optional[List[int]]:
+    try:
+        raw = _get_redis().get(PAGE_LINES_HANDOFF_KEY.format(cv_id=cv_id))
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"CV {cv_id}: failed to read page boundaries: {e}")
+        return None
+
+
+def _drop_page_lines(cv_id: int) -> None:
+    try:
+        _get_redis().delete(PAGE_LINES_HANDOFF_KEY.format(cv_id=cv_id))
+    except Exception as e:
+        logger.warning(f"CV {cv_id}: failed to drop page boundaries: {e}")
+
+
+def _clone_from_cache(SessionLocal, cv_id: int, company_id, content_hash, text_hash, by_text: bool):
+    """"embed" on a cache hit, None if the CV vanished, False on a miss."""
+    try:
+        hit = _clone_cached_parse(SessionLocal, cv_id, company_id, content_hash, text_hash, by_text)
+    except Exception as e:
+        logger.error(f"Parse cache lookup failed for CV {cv_id}, falling back to full parse: {e}")
+        return False
+    if hit is None:
+        return False
+    if hit["cv_missing"]:
+        return None
+    parse_cache.record_hit(tokens_saved=hit["tokens_saved"])
+    logger.info(f"CV {cv_id}: parse cache hit (cloned from CV {hit['source_cv_id']}, by {'text' if by_text else 'file'} hash)")
+    return "embed"
+
+
+def _load_for_parse(cv_id: int):
+    db = _session_factory()()
+    try:
+        row = db.query(CV.filename, CV.company_id, CV.uploaded_by, ParsedCV.raw_text, ParsedCV.content_hash, ParsedCV.text_hash) \
+            .join(ParsedCV, ParsedCV.cv_id == CV.id).filter(CV.id == cv_id).first()
+        return tuple(row) if row else None
+    finally:
+        db.close()
+
+
+async def _parse(cv_id: int) -> Optional[str]:
+    row = await asyncio.to_thread(_load_for_parse, cv_id)
+    if not row or not row[3]:
+        logger.warning(f"CV {cv_id}: no extracted text to parse")
+        return None
+    filename, company_id, user_id, raw_text, content_hash, text_hash = row
+
+    page_lines = await asyncio.to_thread(_get_page_lines, cv_id)
+    data = await parse_cv_with_llm(raw_text, filename, cv_id=cv_id, company_id=company_id, user_id=user_id, embed=False,
+                                   page_lines=page_lines)
+    if not data:
+        # parse_cv_with_llm returns {} on any LLM error; fail so this stage is retried
+        raise RuntimeError(f"LLM parse returned no data for CV {cv_id}")
+    saved = await asyncio.to_thread(
+        _save_parse_result, _session_factory(), cv_id, raw_text, data, content_hash, text_hash
+    )
+    if page_lines:
+        await asyncio.to_thread(_drop_page_lines, cv_id)
+    if saved is False:
+        return None
+    return "embed"
+
+
+def _load_for_embedding(cv_id: int):
+    """Rich text to embed, plus a vector already stored for the same text, if any."""
+    from app.services.sync_service import construct_rich_text
+
+    db = _session_factory()()
+    try:
+        row = db.query(ParsedCV, CV).join(CV, ParsedCV.cv_id == CV.id) \
+            .options(undefer(ParsedCV.job_history)).filter(CV.id == cv_id).first()
+        if not row:
+            return None
+        parsed, cv = row
+        if not parsed.parse_version:
+            # Parse failed or never ran; nothing worth indexing
+            return None
+
+        # A duplicate of an already-indexed CV can reuse its vector
+        sibling_ids = []
+        if parsed.text_hash:
+            siblings = db.query(ParsedCV.cv_id).join(CV, ParsedCV.cv_id == CV.id).filter(
+                ParsedCV.text_hash == parsed.text_hash,
+                ParsedCV.parse_version == parsed.parse_version,
+                ParsedCV.cv_id != cv_id,
+                CV.company_id == cv.company_id,
+                CV.is_parsed.is_(True),
+            ).order_by(ParsedCV.parsed_at.desc()).limit(5).all()
+            sibling_ids = [str(s.cv_id) for s in siblings]
+
+        return {
+            "rich_text": construct_rich_text(parsed),
+            "company_id": cv.company_id,
+            "user_id": cv.uploaded_by,
+            "sibling_ids": sibling_ids,
+        }
+    finally:
+        db.close()
+
+
+def _stored_embedding(ids: List[str], company_id: Optional[int]) -> Optional[List[float]]:
+    from app.services.vector_db import vector_db
+    stored = vector_db.get_embeddings(ids, company_id=company_id)
+    for cv_id in ids:
+        if stored.get(cv_id):
+            return stored[cv_id]
+    return None
+
+
+async def _embed(cv_id: int) -> Optional[str]:
+    info = await asyncio.to_thread(_load_for_embedding, cv_id)
+    if not info:
+        return None
+
+    embedding = None
+    if info["sibling_ids"]:
+        embedding = await asyncio.to_thread(_stored_embedding, info["sibling_ids"], info["company_id"])
+    if not embedding:
+        from app.services.embeddings import generate_embedding
+        embedding = await generate_embedding(info["rich_text"], cv_id=cv_id, company_id=info["company_id"], user_id=info["user_id"])
+    if not embedding:
+        raise RuntimeError(f"Embedding service returned no vector for CV {cv_id}")
+
+    payload = json.dumps({"embedding": embedding, "document": info["rich_text"]})
+    await asyncio.to_thread(
+        _get_redis().set, EMBEDDING_HANDOFF_KEY.format(cv_id=cv_id), payload, ex=EMBEDDING_HANDOFF_TTL
+    )
+    return "index"
+
+
+def _index(cv_id: int) -> Optional[str]:
+    from app.services.vector_db import vector_db
+
+    key = EMBEDDING_HANDOFF_KEY.format(cv_id=cv_id)
+    raw = _get_redis().get(key)
+    if not raw:
+        logger.warning(f"CV {cv_id}: embedding hand-off missing, re-embedding")
+        return "embed"
+    payload = json.loads(raw)
+
+    db = _session_factory()()
+    try:
+        row = db.query(ParsedCV, CV).join(CV, ParsedCV.cv_id == CV.id).filter(CV.id == cv_id).first()
+        if not row:
+            _get_redis().delete(key)
+            return None
+        parsed, cv = row
+        metadata = {
+            "name": parsed.name or "Unknown",
+            "email": parsed.email or "[]",
+            "filename": cv.filename,
+            "cv_id": cv_id,
+            "company_id": cv.company_id,
+        }
+    finally:
+        db.close()
+
+    if not vector_db.upsert(
+        ids=[str(cv_id)],
+        documents=[payload["document"]],
+        metadatas=[metadata],
+        embeddings=[payload["embedding"]],
+    ):
+        raise RuntimeError(f"VectorDB upsert failed for CV {cv_id}")
+
+    _get_redis().delete(key)
+    logger.info(f"Successfully upserted CV {cv_id} to VectorDB")
+    return None
+
+
+async def _extract_async(cv_id: int) -> Optional[str]:
+    return await asyncio.to_thread(_extract, cv_id)
+
+
+async def _index_async(cv_id: int) -> Optional[str]:
+    return await asyncio.to_thread(_index, cv_id)
+
+
+_HANDLERS = {
+    "extract": _extract_async,
+    "parse": _parse,
+    "embed": _embed,
+    "index": _index_async,
+}
+
+
+async def run_stage(stage: str, cv_ids: List[int], max_in_flight: Optional[int] = None) -> Tuple[Dict[str, List[int]], List[int]]:
+    """
+    Run one stage for a batch of CVs.
+    Returns ({next_stage: [cv_ids]}, failed_cv_ids). Extraction is CPU-bound and
+    runs one CV at a time by default; the I/O stages run up to
+    CV_BATCH_CONCURRENCY CVs at once.
+    """
+    handler = _HANDLERS[stage]
+    limit = max_in_flight or (1 if stage == "extract" else settings.CV_BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run_one(cv_id: int):
+        async with semaphore:
+            start = time.perf_counter()
+            ok = False
+            try:
+                next_stage = await handler(cv_id)
+                ok = True
+                return next_stage
+            except Exception as e:
+                logger.error(f"CV {cv_id}: {stage} stage failed: {e}")
+                raise
+            finally:
+                await asyncio.to_thread(record_stage, stage, time.perf_counter() - start, ok)
+
+    results = await asyncio.gather(*(run_one(cv_id) for cv_id in cv_ids), return_exceptions=True)
+
+    routed: Dict[str, List[int]] = {}
+    failed: List[int] = []
+    for cv_id, result in zip(cv_ids, results):
+        if isinstance(result, BaseException):
+            failed.append(cv_id)
+        elif result:
+            routed.setdefault(result, []).append(cv_id)
+    return routed, failed
+
+
+# ==================== Stage Metrics ====================
+
+def record_stage(stage: str, duration_s: float, ok: bool = True) -> None:
+    """Count one CV through `stage` and keep a rolling sample of its latency."""
+    try:
+        duration_ms = int(duration_s * 1000)
+        minute = int(time.time() // 60)
+        throughput_key = STAGE_THROUGHPUT_KEY.format(stage=stage, minute=minute)
+        latency_key = STAGE_LATENCY_KEY.format(stage=stage)
+        pipe = _get_redis().pipeline()
+        pipe.hincrby(STAGE_STATS_KEY.format(stage=stage), "processed" if ok else "failed", 1)
+        pipe.hincrby(STAGE_STATS_KEY.format(stage=stage), "total_ms", duration_ms)
+        pipe.lpush(latency_key, duration_ms)
+        pipe.ltrim(latency_key, 0, LATENCY_SAMPLES - 1)
+        pipe.incr(throughput_key)
+        pipe.expire(throughput_key, 3600)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record {stage} stage metrics: {e}")
+
+
+def _percentile(samples: List[int], pct: float) -> int:
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def get_stats() -> Dict[str, Dict]:
+    """Per-stage counters, latency percentiles, recent throughput and queue depth."""
+    now_minute = int(time.time() // 60)
+    stats = {}
+    for stage in STAGES:
+        try:
+            r = _get_redis()
+            raw = r.hgetall(STAGE_STATS_KEY.format(stage=stage)) or {}
+            samples = [int(s) for s in r.lrange(STAGE_LATENCY_KEY.format(stage=stage), 0, -1)]
+            per_minute = r.mget([STAGE_THROUGHPUT_KEY.format(stage=stage, minute=now_minute - i) for i in range(60)])
+            queue_depth = r.llen(STAGE_QUEUES[stage])
+        except Exception as e:
+            logger.warning(f"Failed to read {stage} stage metrics: {e}")
+            raw, samples, per_minute, queue_depth = {}, [], [], None
+
+        processed = int(raw.get("processed", 0))
+        failed = int(raw.get("failed", 0))
+        total = processed + failed
+        counts = [int(c or 0) for c in per_minute]
+        stats[stage] = {
+            "queue": STAGE_QUEUES[stage],
+            "queue_depth": queue_depth,
+            "processed": processed,
+            "failed": failed,
+            "avg_ms": round(int(raw.get("total_ms", 0)) / total, 1) if total else 0.0,
+            "p50_ms": _percentile(samples, 0.5),
+            "p95_ms": _percentile(samples, 0.95),
+            "last_5m": sum(counts[:5]),
+            "last_60m": sum(counts),
+        }
+    return stats
@@ -0,0 +1,263 @@
+"""
+Deterministic pre-extraction for CV text, run before the LLM parse.
+
+Emails, phone numbers, links (including the " [LINK: uri] " markers added by
+PDF extraction), graduation years and section headers are found with rules.
+They are then removed from the text sent to the model, together with page
+furniture ("references available upon request", page numbers and repeated
+header/footer lines), so the prompt only carries what needs judgment.
+
+Page numbers and repeated lines are only removed at page edges, the first and
+last PAGE_EDGE_LINES lines of a page (page boundaries come from PDF extraction
+as line counts, see page_line_counts). Elsewhere the same text is real content:
+three jobs with the same title, or a bare number such as an age.
+
+Contacts found inside a References section belong to referees and are ignored.
+"""
+
+import re
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump when the rules change: pre-extraction output is part of the parse-cache version
+PREEXTRACT_VERSION = "2"
+
+EMAIL_RE = re.compile(r"(?<![\w.+-])[\w.+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+LINK_MARKER_RE = re.compile(r"\s*\[LINK: ([^\]]+)\]\s*")
+URL_RE = re.compile(
+    r"(?:https?://|www\.)[^\s<>\"')\]]+"
+    r"|(?<![\w@.])(?:[a-z]{2,3}\.)?(?:linkedin\.com|github\.com|gitlab\.com|behance\.net|dribbble\.com|stackoverflow\.com)/[^\s<>\"')\]]+",
+    re.IGNORECASE,
+)
+PHONE_RE = re.compile(r"(?<![\w/])(\+?\(?\d[\d\s().-]{6,}\d)(?![\w/])")
+YEAR_RANGE_RE = re.compile(r"^(19|20)\d{2}\s*[-–]\s*(19|20)\d{2}$")
+YEAR_RE = re.compile(r"(?<!\d)(19[5-9]\d|20\d{2})(?!\d)")
+BACHELOR_RE = re.compile(r"\b(bachelor|b\.?\s?sc|b\.?\s?s\b|b\.?\s?a\b|b\.?\s?eng|b\.?\s?tech|b\.?\s?com|licen[cs]e)", re.IGNORECASE)
+
+# Removed at page edges only
+PAGE_NUMBER_RES = [
+    re.compile(r"^\s*page\s+\d+(\s*(of|/)\s*\d+)?\s*$", re.IGNORECASE),
+    re.compile(r"^\s*-?\s*\d{1,3}\s*-?\s*$"),
+]
+BOILERPLATE_RES = [
+    re.compile(r"^\s*(curriculum\s+vitae|resume|résumé|cv)\s*$", re.IGNORECASE),
+    re.compile(r"references?\s+(are\s+)?(available\s+)?(up)?on\s+request", re.IGNORECASE),
+    re.compile(r"^[\s\W_]+$"),
+]
+
+# Canonical section -> header spellings (matched on whole, short lines)
+SECTION_HEADERS = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective", "career objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment history", "work history", "career history", "employment"],
+    "education": ["education", "academic background", "education and training", "academic qualifications", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "competencies", "skills and abilities", "tools and technologies"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "courses", "training", "licenses and certifications"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+    "personal": ["personal information", "personal details", "personal data"],
+    "references": ["references", "referees"],
+    "contact": ["contact", "contact information", "contact details"],
+}
+_HEADER_LOOKUP = {spelling: section for section, spellings in SECTION_HEADERS.items() for spelling in spellings}
+
+REPEATED_LINE_MIN = 3
+PAGE_EDGE_LINES = 2
+
+
+def _header_for(line: str) -> Optional[str]:
+    candidate = line.strip().strip(":").strip()
+    if not candidate or len(candidate) > 40:
+        return None
+    normalized = " ".join(re.sub(r"[&/]", " and ", candidate.lower()).split())
+    return _HEADER_LOOKUP.get(normalized)
+
+
+def _clean_url(url: str) -> str:
+    return url.rstrip(".,;:")
+
+
+def _phone_digits(candidate: str) -> Optional[str]:
+    candidate = candidate.strip()
+    if YEAR_RANGE_RE.match(candidate):
+        return None
+    # Dates such as "03.2015 - 07.2019" are years and months, not a number
+    groups = re.findall(r"\d+", candidate)
+    if any(YEAR_RE.fullmatch(g) for g in groups) and all(YEAR_RE.fullmatch(g) or len(g) <= 2 for g in groups):
+        return None
+    digits = re.sub(r"\D", "", candidate)
+    if candidate.startswith("+") and 8 <= len(digits) <= 15:
+        return candidate
+    if 9 <= len(digits) <= 15:
+        return candidate
+    return None
+
+
+def _add_unique(values: List[str], seen: set, value: str):
+    key = re.sub(r"\s+", "", value.lower())
+    if key and key not in seen:
+        seen.add(key)
+        values.append(value)
+
+
+def split_sections(lines: List[str]) -> List[Tuple[Optional[str], int]]:
+    """Section of each line (None before the first recognised header)."""
+    current = None
+    tagged = []
+    for i, line in enumerate(lines):
+        header = _header_for(line)
+        if header:
+            current = header
+        tagged.append((current, i))
+    return tagged
+
+
+def _graduation_years(lines: List[Tuple[Optional[str], str]]) -> Tuple[List[int], Optional[int]]:
+    """Years mentioned in the Education section, and the one next to a bachelor's degree."""
+    max_year = date.today().year + 6
+    education = [line for section, line in lines if section == "education"]
+    years = sorted({int(y) for line in education for y in YEAR_RE.findall(line) if int(y) <= max_year})
+
+    bachelor_year = None
+    for i, line in enumerate(education):
+        if BACHELOR_RE.search(line):
+            window = " ".join(education[max(0, i - 1):i + 2])
+            nearby = [int(y) for y in YEAR_RE.findall(window) if int(y) <= max_year]
+            if nearby:
+                bachelor_year = max(nearby)
+                break
+    return years, bachelor_year
+
+
+def _page_edges(pages: List[List[str]]) -> List[bool]:
+    """For each line of `pages`, whether it is among its page's first or last non-empty lines."""
+    edges = []
+    for page in pages:
+        filled = [i for i, line in enumerate(page) if line.strip()]
+        edge = set(filled[:PAGE_EDGE_LINES] + filled[-PAGE_EDGE_LINES:])
+        edges.extend(i in edge for i in range(len(page)))
+    return edges
+
+
+def page_line_counts(pages: List[str]) -> List[int]:
+    """Lines on each page, for pages that are joined with newlines into one text."""
+    return [page.count("\n") + 1 for page in pages]
+
+
+def _split_pages(text: str, page_lines: Optional[List[int]]) -> List[List[str]]:
+    lines = text.split("\n")
+    if not page_lines or sum(page_lines) != len(lines):
+        return [lines]
+    pages, start = [], 0
+    for count in page_lines:
+        pages.append(lines[start:start + count])
+        start += count
+    return pages
+
+
+def pre_extract(text: str, page_lines: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Returns the rule-extracted fields plus "text", the CV text with those
+    fields and boilerplate removed, ready for the LLM. `page_lines` gives the
+    line count of each page; without it the text is treated as one page.
+    """
+    emails: List[str] = []
+    phones: List[str] = []
+    links: List[str] = []
+    seen_emails, seen_phones, seen_links = set(), set(), set()
+
+    pages = _split_pages(text, page_lines)
+    raw_lines = [line for page in pages for line in page]
+    sections = split_sections(raw_lines)
+    edges = _page_edges(pages)
+    # A header/footer repeats at the edges of most pages (all of them in a two-page CV)
+    edge_counts = Counter(line.strip() for line, edge in zip(raw_lines, edges) if edge and not _header_for(line))
+    repeated_min = min(REPEATED_LINE_MIN, len(pages)) if len(pages) > 1 else None
+
+    kept_lines: List[Tuple[Optional[str], str]] = []
+    for (section, _), line, edge in zip(sections, raw_lines, edges):
+        stripped = line.strip()
+        if edge and repeated_min and edge_counts[stripped] >= repeated_min and len(stripped) < 120:
+            continue
+        if edge and any(pattern.search(line) for pattern in PAGE_NUMBER_RES):
+            continue
+        if any(pattern.search(line) for pattern in BOILERPLATE_RES):
+            continue
+
+        referee = section == "references"
+
+        def take_marker(match):
+            uri = match.group(1).strip()
+            if uri.lower().startswith("mailto:"):
+                if not referee:
+                    _add_unique(emails, seen_emails, uri[7:].split("?")[0])
+            elif uri.lower().startswith("tel:"):
+                if not referee:
+                    _add_unique(phones, seen_phones, uri[4:])
+            elif not referee:
+                _add_unique(links, seen_links, _clean_url(uri))
+            return " "
+
+        line = LINK_MARKER_RE.sub(take_marker, line)
+
+        for email in EMAIL_RE.findall(line):
+            if not referee:
+                _add_unique(emails, seen_emails, email)
+        line = EMAIL_RE.sub(" ", line)
+
+        for url in URL_RE.findall(line):
+            if not referee:
+                _add_unique(links, seen_links, _clean_url(url))
+        line = URL_RE.sub(" ", line)
+
+        def take_phone(match):
+            phone = _phone_digits(match.group(1))
+            if not phone:
+                return match.group(0)
+            if not referee:
+                _add_unique(phones, seen_phones, phone)
+            return " "
+
+        line = PHONE_RE.sub(take_phone, line)
+
+        if referee:
+            continue  # referee details are not about the candidate
+        line = " ".join(line.split())
+        if line and not re.fullmatch(r"[\W_]+", line):
+            kept_lines.append((section, line))
+
+    graduation_years, bachelor_year = _graduation_years(kept_lines)
+    return {
+        "email": emails,
+        "phone": phones,
+        "social_links": links,
+        "graduation_years": graduation_years,
+        "bachelor_year": bachelor_year,
+        "sections": list(dict.fromkeys(s for s, _ in sections if s)),
+        "text": "\n".join(line for _, line in kept_lines),
+    }
+
+
+def prompt_hints(pre: Dict[str, Any]) -> str:
+    """Facts found by the rules that help the model's judgment calls."""
+    if not pre.get("graduation_years"):
+        return ""
+    years = ", ".join(str(y) for y in pre["graduation_years"])
+    return f"Years found in the Education section: {years}\n"
+
+
+def apply_pre_extracted(pre: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill the rule-extracted fields into the LLM output (rule values first)."""
+    for field, aliases in (("email", ("email", "emails")), ("phone", ("phone", "phones")), ("social_links", ("social_links", "links"))):
+        values, seen = [], set()
+        llm_values = next((data.get(a) for a in aliases if data.get(a)), None) or []
+        if isinstance(llm_values, str):
+            llm_values = [llm_values]
+        for value in list(pre[field]) + list(llm_values):
+            if isinstance(value, str):
+                _add_unique(values, seen, value)
+        data[field] = values
+    if not data.get("bachelor_year") and pre.get("bachelor_year"):
+        data["bachelor_year"] = pre["bachelor_year"]
+    return data
@@ -0,0 +1,208 @@
+"""
+Cache for embedding vectors, shared by generate_embedding and
+generate_embeddings_batch.
+
+Vectors are keyed by (model, dimensions, sha256(text)), so the same rich text
+on reprocess/sync/backfill and the same search query across requests are only
+embedded once. Lookups go to a small in-process LRU first, then to Redis, where
+vectors are stored as packed float32. Redis holds at most
+EMBEDDING_CACHE_MAX_ENTRIES vectors: a sorted set tracks last use and the least
+recently used entries are evicted past that size.
+
+Hits (memory / Redis) and misses are counted in Redis for get_stats(). If Redis
+is unavailable the cache degrades to the in-process LRU and retries Redis after
+REDIS_RETRY_AFTER seconds.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "emb_cache:{model}:{dimensions}:{digest}"
+CACHE_INDEX_KEY = "emb_cache:lru"
+CACHE_STATS_KEY = "emb_cache:stats"
+CACHE_TTL = 30 * 24 * 3600
+REDIS_RETRY_AFTER = 30.0
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, List[float]]" = OrderedDict()
+_redis_client = None
+_redis_down_until = 0.0
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        # Binary-safe client: vectors are stored as raw float32 bytes
+        _redis_client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis_client
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _redis_down_until
+
+
+def _redis_failed(action: str, error: Exception) -> None:
+    global _redis_down_until
+    logger.warning(f"Embedding cache {action} failed, using the in-process cache only: {error}")
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return CACHE_KEY.format(model=model, dimensions=dimensions or "native", digest=digest)
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(data: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(data)
+    return values.tolist()
+
+
+def _remember(key: str, vector: List[float]) -> None:
+    with _lock:
+        _memory[key] = vector
+        _memory.move_to_end(key)
+        while len(_memory) > settings.EMBEDDING_CACHE_LRU_SIZE:
+            _memory.popitem(last=False)
+
+
+def _record(memory_hits: int, redis_hits: int, misses: int) -> None:
+    if not _redis_available():
+        return
+    try:
+        pipe = _get_redis().pipeline()
+        if memory_hits:
+            pipe.hincrby(CACHE_STATS_KEY, "memory_hits", memory_hits)
+        if redis_hits:
+            pipe.hincrby(CACHE_STATS_KEY, "redis_hits", redis_hits)
+        if misses:
+            pipe.hincrby(CACHE_STATS_KEY, "misses", misses)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record embedding cache stats: {e}")
+
+
+def get_many(model: str, dimensions: Optional[int], texts: List[str]) -> Dict[int, List[float]]:
+    """Cached vectors for `texts`, as {position: vector}; misses are absent."""
+    if not settings.EMBEDDING_CACHE_ENABLED or not texts:
+        return {}
+
+    keys = [cache_key(model, dimensions, text) for text in texts]
+    found: Dict[int, List[float]] = {}
+    with _lock:
+        for i, key in enumerate(keys):
+            vector = _memory.get(key)
+            if vector is not None:
+                _memory.move_to_end(key)
+                found[i] = vector
+    memory_hits = len(found)
+
+    pending = [i for i in range(len(keys)) if i not in found]
+    redis_hits = 0
+    if pending and _redis_available():
+        try:
+            client = _get_redis()
+            values = client.mget([keys[i] for i in pending])
+            hit_keys = {}
+            for i, data in zip(pending, values):
+                if data:
+                    vector = _unpack(data)
+                    found[i] = vector
+                    _remember(keys[i], vector)
+                    hit_keys[keys[i]] = time.time()
+            if hit_keys:
+                client.zadd(CACHE_INDEX_KEY, hit_keys)
+            redis_hits = len(hit_keys)
+        except Exception as e:
+            _redis_failed("read", e)
+
+    _record(memory_hits, redis_hits, len(keys) - len(found))
+    return found
+
+
+def get(model: str, dimensions: Optional[int], text: str) -> Optional[List[float]]:
+    return get_many(model, dimensions, [text]).get(0)
+
+
+def put_many(model: str, dimensions: Optional[int], items: Dict[str, List[float]]) -> None:
+    """Store {text: vector} in the LRU and in Redis, evicting past the size limit."""
+    items = {text: vector for text, vector in items.items() if vector}
+    if not settings.EMBEDDING_CACHE_ENABLED or not items:
+        return
+
+    keyed = {cache_key(model, dimensions, text): vector for text, vector in items.items()}
+    for key, vector in keyed.items():
+        _remember(key, vector)
+
+    if not _redis_available():
+        return
+    try:
+        client = _get_redis()
+        now = time.time()
+        pipe = client.pipeline()
+        for key, vector in keyed.items():
+            pipe.set(key, _pack(vector), ex=CACHE_TTL)
+        pipe.zadd(CACHE_INDEX_KEY, {key: now for key in keyed})
+        pipe.zcard(CACHE_INDEX_KEY)
+        size = pipe.execute()[-1]
+
+        excess = size - settings.EMBEDDING_CACHE_MAX_ENTRIES
+        if excess > 0:
+            evicted = [key for key, _ in client.zpopmin(CACHE_INDEX_KEY, excess)]
+            if evicted:
+                client.delete(*evicted)
+                client.hincrby(CACHE_STATS_KEY, "evictions", len(evicted))
+    except Exception as e:
+        _redis_failed("write", e)
+
+
+def put(model: str, dimensions: Optional[int], text: str, vector: List[float]) -> None:
+    put_many(model, dimensions, {text: vector})
+
+
+def clear_memory() -> None:
+    with _lock:
+        _memory.clear()
+
+
+def get_stats() -> Dict[str, float]:
+    """Counters since the last reset, plus the derived hit rate."""
+    raw = {}
+    entries = 0
+    try:
+        client = _get_redis()
+        raw = {k.decode(): int(v) for k, v in (client.hgetall(CACHE_STATS_KEY) or {}).items()}
+        entries = client.zcard(CACHE_INDEX_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to read embedding cache stats: {e}")
+
+    memory_hits = raw.get("memory_hits", 0)
+    redis_hits = raw.get("redis_hits", 0)
+    misses = raw.get("misses", 0)
+    total = memory_hits + redis_hits + misses
+    return {
+        "memory_hits": memory_hits,
+        "redis_hits": redis_hits,
+        "misses": misses,
+        "evictions": raw.get("evictions", 0),
+        "hit_rate": round((memory_hits + redis_hits) / total, 4) if total else 0.0,
+        "redis_entries": entries,
+        "redis_max_entries": settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        "memory_entries": len(_memory),
+        "memory_max_entries": settings.EMBEDDING_CACHE_LRU_SIZE,
+    }
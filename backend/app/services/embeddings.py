@@ -1,34 +1,72 @@
+import asyncio
 import logging
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
 from app.services.parser import get_openai_client
+from app.services import token_budget, embedding_cache
 from app.core.llm_logging import LLMLogger
+from app.core import openai_limiter
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_MAX_TOKENS = 8191
+
+
+def embedding_dimensions(dimensions: Optional[int] = None) -> Optional[int]:
+    """Requested embedding size: `dimensions`, else EMBEDDING_DIMENSIONS; None for the model's native size."""
+    return dimensions or settings.EMBEDDING_DIMENSIONS or None
+
+
+def _dimension_kwargs(dimensions: Optional[int]) -> Dict[str, int]:
+    return {"dimensions": dimensions} if dimensions else {}
+
+
+def project_embedding(vector: List[float], dimensions: int) -> List[float]:
+    """
+    Shorten a stored text-embedding-3 vector to `dimensions`: keep the leading
+    components and re-normalize. The models are trained so that this matches
+    (up to float rounding) asking the API for that many dimensions, so existing
+    vectors can be reduced without re-embedding.
+    """
+    head = list(vector[:dimensions])
+    norm = sum(x * x for x in head) ** 0.5
+    return [x / norm for x in head] if norm else head
+
+
 async def generate_embedding(text: str, cv_id: Optional[int] = None, company_id: Optional[int] = None, user_id: Optional[int] = None) -> List[float]:
     """Generate embedding for a single string."""
     start_time = time.time()
-    model = "text-embedding-3-small"
+    model = EMBEDDING_MODEL
+    dimensions = embedding_dimensions()
     tokens_used = 0
     tokens_input = 0
     tokens_output = 0
 
+    # Same text, same model: reuse the stored vector (see embedding_cache).
+    # The cache's Redis client is synchronous, so lookups run off the event loop.
+    cached = await asyncio.to_thread(embedding_cache.get, model, dimensions, text)
+    if cached is not None:
+        return cached
+
     try:
         client = get_openai_client()
-        # Ensure text is not too long for the model
-        # text-embedding-3-small has 8191 token limit
-        # Simple truncation by chars (approx 4 chars per token -> ~32k chars)
-        truncated_text = text[:32000]
+        # Ensure text is not too long for the model (8191 token limit)
+        truncated_text = token_budget.truncate_to_tokens(text, EMBEDDING_MAX_TOKENS, model)
 
+        reserved = token_budget.count_tokens(truncated_text, model)
+        await openai_limiter.acquire(model, reserved)
         response = await client.embeddings.create(
             input=truncated_text,
-            model=model
+            model=model,
+            **_dimension_kwargs(dimensions)
         )
 
         # Track token usage
         if hasattr(response, 'usage') and response.usage:
             tokens_used = response.usage.total_tokens
+        await openai_limiter.settle(model, reserved, tokens_used)
 
         # For embeddings, input and output are the same
         tokens_input = tokens_used
@@ -50,7 +88,9 @@ async def generate_embedding(text: str, cv_id: Optional[int] = None, company_id:
             metadata={"cv_id": cv_id, "text_length": len(truncated_text), "model": model}
         )
 
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        await asyncio.to_thread(embedding_cache.put, model, dimensions, text, embedding)
+        return embedding
     except Exception as e:
         latency_ms = int((time.time() - start_time) * 1000)
         logger.error(f"Error generating embedding: {e}")
@@ -69,3 +109,114 @@ async def generate_embedding(text: str, cv_id: Optional[int] = None, company_id:
             metadata={"cv_id": cv_id, "text_length": len(text)}
         )
         return []
+
+
+def plan_embedding_batches(texts: List[str], max_tokens: Optional[int] = None, max_inputs: Optional[int] = None) -> List[List[Tuple[int, str, int]]]:
+    """
+    Pack texts into request batches of at most `max_tokens` tokens and
+    `max_inputs` inputs. Each text is truncated to the model limit first.
+    Returns batches of (position, truncated text, tokens); empty texts are skipped.
+    """
+    max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+    max_inputs = max_inputs or settings.EMBEDDING_BATCH_MAX_INPUTS
+    batches: List[List[Tuple[int, str, int]]] = []
+    current: List[Tuple[int, str, int]] = []
+    current_tokens = 0
+    for position, text in enumerate(texts):
+        if not text or not text.strip():
+            continue
+        truncated = token_budget.truncate_to_tokens(text, EMBEDDING_MAX_TOKENS, EMBEDDING_MODEL)
+        tokens = token_budget.count_tokens(truncated, EMBEDDING_MODEL)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((position, truncated, tokens))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _embed_batch(client, batch: List[Tuple[int, str, int]], company_id: Optional[int], user_id: Optional[int],
+                       dimensions: Optional[int] = None) -> Dict[int, List[float]]:
+    """One embeddings request for one batch. Returns position -> vector ({} on error)."""
+    start_time = time.time()
+    model = EMBEDDING_MODEL
+    reserved = sum(tokens for _, _, tokens in batch)
+    tokens_used = 0
+    try:
+        await openai_limiter.acquire(model, reserved)
+        response = await client.embeddings.create(
+            input=[text for _, text, _ in batch], model=model, **_dimension_kwargs(dimensions)
+        )
+        if hasattr(response, 'usage') and response.usage:
+            tokens_used = response.usage.total_tokens
+        await openai_limiter.settle(model, reserved, tokens_used)
+
+        # The API returns one item per input, tagged with the input's index
+        vectors = {batch[item.index][0]: item.embedding for item in response.data}
+
+        LLMLogger.log_llm_operation(
+            action="generate_embeddings_batch",
+            message=f"Generated {len(batch)} embeddings",
+            user_id=user_id,
+            company_id=company_id,
+            model=model,
+            tokens_used=tokens_used,
+            tokens_input=tokens_used,
+            tokens_output=0,
+            latency_ms=int((time.time() - start_time) * 1000),
+            streaming=False,
+            metadata={"inputs": len(batch), "estimated_tokens": reserved, "model": model}
+        )
+        return vectors
+    except Exception as e:
+        logger.error(f"Error generating embedding batch of {len(batch)}: {e}")
+        LLMLogger.log_llm_operation(
+            action="generate_embeddings_batch_error",
+            message=f"Error generating embedding batch: {str(e)}",
+            user_id=user_id,
+            company_id=company_id,
+            model=model,
+            tokens_used=tokens_used,
+            tokens_input=tokens_used,
+            tokens_output=0,
+            latency_ms=int((time.time() - start_time) * 1000),
+            error_type=type(e).__name__,
+            error_message=str(e),
+            metadata={"inputs": len(batch), "estimated_tokens": reserved}
+        )
+        return {}
+
+
+async def generate_embeddings_batch(texts: List[str], company_id: Optional[int] = None, user_id: Optional[int] = None,
+                                    max_in_flight: Optional[int] = None, dimensions: Optional[int] = None) -> List[List[float]]:
+    """
+    Embed many strings with as few requests as possible. Returns one vector per
+    input, in input order; inputs that are empty or whose request failed get []
+    (like generate_embedding), so callers can skip or retry just those.
+    `dimensions` overrides EMBEDDING_DIMENSIONS (used when reindexing).
+    """
+    if not texts:
+        return []
+    dimensions = embedding_dimensions(dimensions)
+    vectors = await asyncio.to_thread(embedding_cache.get_many, EMBEDDING_MODEL, dimensions, texts)
+    missing = [i for i in range(len(texts)) if i not in vectors]
+    batches = plan_embedding_batches([texts[i] for i in missing])
+    if not batches:
+        return [vectors.get(i, []) for i in range(len(texts))]
+
+    client = get_openai_client()
+    semaphore = asyncio.Semaphore(max_in_flight or settings.EMBEDDING_BATCH_CONCURRENCY)
+
+    async def run(batch):
+        async with semaphore:
+            return await _embed_batch(client, batch, company_id, user_id, dimensions)
+
+    fresh: Dict[str, List[float]] = {}
+    for result in await asyncio.gather(*(run(batch) for batch in batches)):
+        for position, vector in result.items():
+            vectors[missing[position]] = vector
+            fresh[texts[missing[position]]] = vector
+    await asyncio.to_thread(embedding_cache.put_many, EMBEDDING_MODEL, dimensions, fresh)
+    return [vectors.get(i, []) for i in range(len(texts))]
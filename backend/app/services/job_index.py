@@ -0,0 +1,121 @@
+"""
+Job embeddings index: open jobs embedded into their own vector index, so
+"which open jobs fit this candidate" is one nearest-neighbour query with the
+candidate's stored vector instead of scoring every job.
+
+Each open job is embedded from its title, required skills, qualifications and
+description (job_embedding_text) and stored under its id with
+{"job_id", "company_id", "department", "embedding_fp"} metadata. index_job()
+is run by a Celery task when a job is created, when an edit touches those
+fields or its status, and when it is deleted:
+
+  job open, text changed     re-embedded and upserted
+  job open, text unchanged   embedding_fp matches: only drifted metadata is rewritten
+  job closed or deleted      removed from the index
+
+The index uses SEARCH_BACKEND like the candidate index (get_job_search_engine).
+scripts/backfill_job_index.py builds it for existing jobs.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.database import SessionLocal
+from app.models.models import Job
+from app.services.embeddings import generate_embedding
+from app.services.match_scores import is_open
+from app.services.search.factory import get_job_search_engine
+from app.services.skills import skills_list
+
+logger = logging.getLogger(__name__)
+
+# Job columns the embedding is built from; edits to these (or to status /
+# is_active, which decide whether the job is indexed at all) trigger a refresh
+EMBEDDED_FIELDS = ("title", "skills_required", "qualifications", "description")
+INDEXED_FIELDS = EMBEDDED_FIELDS + ("status", "is_active", "department")
+
+
+def job_embedding_text(job: Job) -> str:
+    """Text embedded for a job, laid out like the candidate rich text."""
+    text = f"Job Title: {job.title}\n"
+    skills = skills_list(job.skills_required)
+    if skills:
+        text += f"Required Skills: {', '.join(skills)}\n"
+    qualifications = skills_list(job.qualifications)
+    if qualifications:
+        text += f"Qualifications: {'; '.join(qualifications)}\n"
+    if job.description:
+        text += f"Description: {job.description}\n"
+    return text
+
+
+def embedding_fingerprint(text: str) -> str:
+    """Short hash of the embedded text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _job_metadata(job: Job, fingerprint: str) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "company_id": job.company_id,
+        "department": job.department or "",
+        "embedding_fp": fingerprint,
+    }
+
+
+def _load_job(job_id: int) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None
+        text = job_embedding_text(job)
+        return {
+            "company_id": job.company_id,
+            "open": is_open(job),
+            "text": text,
+            "metadata": _job_metadata(job, embedding_fingerprint(text)),
+        }
+    finally:
+        db.close()
+
+
+async def index_job(job_id: int, company_id: Optional[int] = None) -> str:
+    """
+    Bring the index entry of one job up to date. Returns "indexed", "updated"
+    (metadata only), "unchanged" or "removed". `company_id` locates the entry of
+    a deleted job in a partitioned index.
+    """
+    engine = get_job_search_engine()
+    job = await asyncio.to_thread(_load_job, job_id)
+    if job is None or not job["open"]:
+        deleted = await engine.run_blocking(
+            engine.delete_candidate, str(job_id), company_id=job["company_id"] if job else company_id
+        )
+        if not deleted:
+            # A closed job left in the index keeps taking top-k slots; let the task retry
+            raise RuntimeError(f"Failed to remove job {job_id} from the index")
+        return "removed"
+
+    wanted = job["metadata"]
+    stored = await engine.run_blocking(engine.get_metadatas, [str(job_id)], company_id=job["company_id"])
+    if stored is None:
+        raise RuntimeError("Job index unavailable")
+    current = stored.get(str(job_id))
+    if current is not None and current.get("embedding_fp") == wanted["embedding_fp"]:
+        if any(current.get(key) != value for key, value in wanted.items()):
+            await engine.run_blocking(engine.update_metadatas, [str(job_id)], [wanted])
+            return "updated"
+        return "unchanged"
+
+    vector = await generate_embedding(job["text"], company_id=job["company_id"])
+    if not vector:
+        raise RuntimeError(f"Failed to embed job {job_id}")
+    ok = await engine.run_blocking(
+        engine.upsert, ids=[str(job_id)], documents=[job["text"]], metadatas=[wanted], embeddings=[vector]
+    )
+    if not ok:
+        raise RuntimeError(f"Failed to upsert job {job_id}")
+    return "indexed"
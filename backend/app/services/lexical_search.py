@@ -0,0 +1,130 @@
+"""
+Lexical (full-text) candidate search, used alongside vector search.
+
+On PostgreSQL, parsed_cvs.search_vector is a stored generated tsvector over
+name and skills (weight A), last title and company (B), job history (C) and
+summary (D), with a GIN index. It uses the 'simple' configuration (no stemming,
+no stop words) so skill names and acronyms such as "K8s" or "SAP FICO" match
+exactly. The column is added by the hs01 migration, and by
+ensure_search_vector() at startup for databases created with create_all().
+
+Other dialects (SQLite in tests) fall back to ILIKE over the same fields.
+
+Rankings from this module and from the vector index are combined with
+reciprocal_rank_fusion().
+"""
+
+import logging
+import re
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from app.models.models import CV, ParsedCV
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(skills, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(last_job_title, '') || ' ' || coalesce(last_company, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(job_history, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(summary, '')), 'D')"
+)
+SEARCH_INDEX_NAME = "ix_parsed_cvs_search_vector"
+
+# Reciprocal rank fusion constant: larger values flatten the advantage of top ranks
+RRF_K = 60
+
+_search_vector = literal_column("parsed_cvs.search_vector")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_vector(engine) -> None:
+    """Add the generated tsvector column and its GIN index if missing (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"ALTER TABLE parsed_cvs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} ON parsed_cvs USING GIN (search_vector)"
+        ))
+
+
+def is_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def query_terms(query: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(query or "")]
+
+
+def prefix_tsquery(query: str) -> Optional[str]:
+    """to_tsquery input matching every term as a prefix ("pyth aws" -> "pyth:* & aws:*")."""
+    terms = query_terms(query)
+    return " & ".join(f"{t}:*" for t in terms) if terms else None
+
+
+def _ilike_fields(term: str):
+    pattern = f"%{term}%"
+    return [
+        ParsedCV.name.ilike(pattern),
+        ParsedCV.skills.ilike(pattern),
+        ParsedCV.last_job_title.ilike(pattern),
+        ParsedCV.last_company.ilike(pattern),
+    ]
+
+
+def profile_filter(db: Session, search: str):
+    """
+    WHERE clause for the profiles list search box. Every term must match
+    (as a prefix on PostgreSQL, as a substring elsewhere).
+    """
+    if is_supported(db):
+        tsquery = prefix_tsquery(search)
+        if not tsquery:
+            return or_(*_ilike_fields(search))
+        return _search_vector.op("@@")(func.to_tsquery("simple", tsquery))
+    terms = query_terms(search) or [search]
+    return and_(*(or_(*_ilike_fields(term)) for term in terms))
+
+
+def search_cv_ids(db: Session, query: str, company_id: Optional[int], limit: int) -> List[Tuple[int, float]]:
+    """CV ids matching `query` lexically, best first, as (cv_id, rank)."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    if is_supported(db):
+        tsquery = func.plainto_tsquery("simple", query)
+        rank = func.ts_rank_cd(_search_vector, tsquery).label("rank")
+        rows = db.query(ParsedCV.cv_id, rank).join(CV, CV.id == ParsedCV.cv_id)
+        if company_id:
+            rows = rows.filter(CV.company_id == company_id)
+        rows = rows.filter(_search_vector.op("@@")(tsquery)).order_by(rank.desc(), ParsedCV.cv_id).limit(limit)
+        return [(cv_id, float(score)) for cv_id, score in rows.all()]
+
+    # Fallback: rank by how many query terms match any field
+    rows = db.query(ParsedCV.cv_id, ParsedCV.name, ParsedCV.skills, ParsedCV.last_job_title, ParsedCV.last_company) \
+        .join(CV, CV.id == ParsedCV.cv_id) \
+        .filter(or_(*(clause for term in terms for clause in _ilike_fields(term))))
+    if company_id:
+        rows = rows.filter(CV.company_id == company_id)
+    scored = []
+    for cv_id, *fields in rows.all():
+        haystack = " ".join(f for f in fields if f).lower()
+        scored.append((cv_id, float(sum(1 for term in terms if term in haystack))))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> Dict[Hashable, float]:
+    """Fused score per id: the sum of 1 / (k + rank) over the rankings it appears in."""
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return fused
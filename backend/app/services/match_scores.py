@@ -0,0 +1,314 @@
+"""
+job_candidate_scores: precomputed job <-> candidate match scores.
+
+The score is the /jobs/matches formula: half the vector similarity (0-50),
+10 points per required skill the candidate lists (max 40), up to 10 for
+experience and 5 for silver medalists. It is kept current incrementally:
+
+  job created or edited   score_job() rescores the tenant's candidates
+                          (vector similarity from one top-k index search;
+                          candidates outside it are compared with their
+                          stored vectors)
+  CV finished processing  score_cvs() scores it against the company's open jobs
+                          (cosine between the stored CV vector and each job's
+                          query embedding, which the embedding cache keeps)
+  job closed or deleted   its rows are removed
+
+Only matches scoring at least MATCH_SCORE_MIN are stored, so listing a job's
+matches is one indexed query on (job_id, score). When a match first reaches
+MATCH_STRONG_SCORE, a "strong_match" ActivityLog entry is written and the
+company's sync state is touched, so clients can notify on it.
+"""
+
+import asyncio
+import json
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import ActivityLog, Application, CV, Job, JobCandidateScore, ParsedCV
+from app.services.embeddings import generate_embedding, generate_embeddings_batch
+from app.services.skills import skills_list
+from app.services.sync import touch_company_state
+from app.services.vector_db import vector_db
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUS = "Open"
+SILVER_STATUS = "Silver Medalist"
+# Stored vectors fetched per vector store call when scoring outside the search pool
+EMBEDDING_FETCH_BATCH = 500
+
+
+# ---- scoring ---------------------------------------------------------------
+
+def job_query_text(title: str, skills_required: Iterable[str]) -> str:
+    """Text embedded to compare a job with candidates."""
+    query_text = f"Job Title: {title}\n"
+    skills = list(skills_required or [])
+    if skills:
+        query_text += f"Required Skills: {', '.join(skills)}\n"
+    return query_text
+
+
+def score_match(required_skills: Set[str], required_experience: int, candidate_skills: List[str],
+                experience_years: Optional[int], vector_score: float, is_silver: bool) -> Tuple[int, List[str]]:
+    """(score, matched skills) for one candidate; `required_skills` are lower-cased."""
+    score = 0.0
+    matched = []
+
+    # 1. Vector score (normalized 0-100), 50% weight to semantic match
+    score += vector_score * 100 * 0.5
+
+    # 2. Keyword matching, max 40 points
+    keyword_score = 0
+    for skill in candidate_skills:
+        if isinstance(skill, str) and skill.lower() in required_skills:
+            keyword_score += 10
+            matched.append(skill)
+    score += min(keyword_score, 40)
+
+    # 3. Experience
+    candidate_exp = experience_years or 0
+    if candidate_exp >= (required_experience or 0):
+        score += 10
+    elif candidate_exp >= ((required_experience or 0) - 1):
+        score += 5
+
+    if is_silver:
+        score += 5
+    return int(score), matched
+
+
+def cosine_score(a: List[float], b: List[float]) -> float:
+    """Cosine similarity mapped to 0-1, the same scale as vector search scores."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    if not norm:
+        return 0.0
+    return max(0.0, min(1.0, (1.0 + dot / norm) / 2.0))
+
+
+def is_open(job: Job) -> bool:
+    return bool(job.is_active) and job.status == OPEN_STATUS
+
+
+# ---- persistence -----------------------------------------------------------
+
+def _silver_cv_ids(db, cv_ids: List[int]) -> Set[int]:
+    if not cv_ids:
+        return set()
+    rows = db.query(Application.cv_id).filter(
+        Application.cv_id.in_(cv_ids), Application.status == SILVER_STATUS
+    ).distinct().all()
+    return {row.cv_id for row in rows}
+
+
+def _save_scores(db, company_id: Optional[int], scored: Dict[Tuple[int, int], Tuple[int, float, List[str], bool]],
+                 existing: List[JobCandidateScore]) -> Dict[str, int]:
+    """
+    Write `scored` {(job_id, cv_id): (score, vector_score, matched, is_silver)}
+    over the `existing` rows for the same scope: update or insert what scores at
+    least MATCH_SCORE_MIN, delete the rest. Emits strong-match events.
+    """
+    now = datetime.now(timezone.utc)
+    current = {(row.job_id, row.cv_id): row for row in existing}
+    counts = {"stored": 0, "removed": 0, "strong": 0}
+    strong = []
+
+    for key, (score, vector_score, matched, is_silver) in scored.items():
+        row = current.pop(key, None)
+        if score < settings.MATCH_SCORE_MIN:
+            if row is not None:
+                db.delete(row)
+                counts["removed"] += 1
+            continue
+        if row is None:
+            row = JobCandidateScore(job_id=key[0], cv_id=key[1], company_id=company_id)
+            db.add(row)
+        row.score = score
+        row.vector_score = vector_score
+        row.skills_matched = json.dumps(matched)
+        row.is_silver = is_silver
+        row.scored_at = now
+        counts["stored"] += 1
+        if score >= settings.MATCH_STRONG_SCORE and row.strong_match_at is None:
+            row.strong_match_at = now
+            strong.append({"job_id": key[0], "cv_id": key[1], "score": score})
+
+    # Rows in scope that were not rescored (candidate or job gone)
+    for row in current.values():
+        db.delete(row)
+        counts["removed"] += 1
+
+    for event in strong:
+        db.add(ActivityLog(company_id=company_id, action="strong_match", details=json.dumps(event)))
+    counts["strong"] = len(strong)
+    db.commit()
+    if strong:
+        touch_company_state(db, company_id)
+    return counts
+
+
+def clear_job(job_id: int) -> int:
+    db = SessionLocal()
+    try:
+        removed = db.query(JobCandidateScore).filter(JobCandidateScore.job_id == job_id).delete()
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def _load_job(job_id: int):
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            return None
+        return {
+            "id": job.id,
+            "company_id": job.company_id,
+            "open": is_open(job),
+            "query": job_query_text(job.title, skills_list(job.skills_required)),
+            "skills": {s.lower() for s in skills_list(job.skills_required)},
+            "experience": job.required_experience or 0,
+        }
+    finally:
+        db.close()
+
+
+def _company_cv_ids(company_id: Optional[int]) -> List[int]:
+    db = SessionLocal()
+    try:
+        rows = db.query(ParsedCV.cv_id).join(CV, ParsedCV.cv_id == CV.id) \
+            .filter(CV.company_id == company_id).all()
+        return [row.cv_id for row in rows]
+    finally:
+        db.close()
+
+
+def _score_job_rows(job: Dict, vector_scores: Dict[int, float]) -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        candidates = db.query(ParsedCV.cv_id, ParsedCV.skills, ParsedCV.experience_years) \
+            .join(CV, ParsedCV.cv_id == CV.id).filter(CV.company_id == job["company_id"]).all()
+        silver = _silver_cv_ids(db, [c.cv_id for c in candidates])
+        scored = {}
+        for cand in candidates:
+            vector_score = vector_scores.get(cand.cv_id, 0.0)
+            score, matched = score_match(job["skills"], job["experience"], skills_list(cand.skills),
+                                         cand.experience_years, vector_score, cand.cv_id in silver)
+            scored[(job["id"], cand.cv_id)] = (score, vector_score, matched, cand.cv_id in silver)
+        existing = db.query(JobCandidateScore).filter(JobCandidateScore.job_id == job["id"]).all()
+        return _save_scores(db, job["company_id"], scored, existing)
+    finally:
+        db.close()
+
+
+def _load_cvs(cv_ids: List[int]):
+    db = SessionLocal()
+    try:
+        rows = db.query(ParsedCV.cv_id, ParsedCV.skills, ParsedCV.experience_years, CV.company_id) \
+            .join(CV, ParsedCV.cv_id == CV.id).filter(CV.id.in_(cv_ids)).all()
+        company_ids = {row.company_id for row in rows}
+        jobs = db.query(Job).filter(
+            Job.company_id.in_(company_ids), Job.is_active.is_(True), Job.status == OPEN_STATUS
+        ).all() if company_ids else []
+        job_infos = [{
+            "id": job.id,
+            "company_id": job.company_id,
+            "query": job_query_text(job.title, skills_list(job.skills_required)),
+            "skills": {s.lower() for s in skills_list(job.skills_required)},
+            "experience": job.required_experience or 0,
+        } for job in jobs]
+        return [dict(row._mapping) for row in rows], job_infos
+    finally:
+        db.close()
+
+
+def _score_cv_rows(cvs: List[Dict], jobs: List[Dict], cv_vectors: Dict[int, List[float]],
+                   job_vectors: Dict[int, List[float]]) -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        silver = _silver_cv_ids(db, [c["cv_id"] for c in cvs])
+        totals = {"stored": 0, "removed": 0, "strong": 0}
+        for cand in cvs:
+            scored = {}
+            for job in jobs:
+                if job["company_id"] != cand["company_id"]:
+                    continue
+                vector_score = cosine_score(cv_vectors.get(cand["cv_id"]), job_vectors.get(job["id"]))
+                score, matched = score_match(job["skills"], job["experience"], skills_list(cand["skills"]),
+                                             cand["experience_years"], vector_score, cand["cv_id"] in silver)
+                scored[(job["id"], cand["cv_id"])] = (score, vector_score, matched, cand["cv_id"] in silver)
+            existing = db.query(JobCandidateScore).filter(JobCandidateScore.cv_id == cand["cv_id"]).all()
+            for key, value in _save_scores(db, cand["company_id"], scored, existing).items():
+                totals[key] += value
+        return totals
+    finally:
+        db.close()
+
+
+# ---- entry points ----------------------------------------------------------
+
+async def score_job(job_id: int) -> Dict[str, int]:
+    """Rescore every candidate of the job's company against it (or clear a closed job)."""
+    job = await asyncio.to_thread(_load_job, job_id)
+    if job is None or not job["open"]:
+        removed = await asyncio.to_thread(clear_job, job_id)
+        return {"stored": 0, "removed": removed, "strong": 0}
+
+    vector_scores: Dict[int, float] = {}
+    query_vector = await generate_embedding(job["query"], company_id=job["company_id"])
+    if query_vector:
+        results = await vector_db.run_blocking(
+            vector_db.search_by_vector, query_vector, settings.MATCH_SCORE_VECTOR_POOL,
+            {"company_id": job["company_id"]} if job["company_id"] else None,
+        )
+        vector_scores = {int(r["id"]): r["score"] for r in results if str(r["id"]).isdigit()}
+
+        # Candidates outside the search pool: cosine against their stored vectors
+        missing = [cv_id for cv_id in await asyncio.to_thread(_company_cv_ids, job["company_id"])
+                   if cv_id not in vector_scores]
+        for start in range(0, len(missing), EMBEDDING_FETCH_BATCH):
+            ids = [str(cv_id) for cv_id in missing[start:start + EMBEDDING_FETCH_BATCH]]
+            stored = await vector_db.run_blocking(vector_db.get_embeddings, ids, company_id=job["company_id"])
+            for cid, vector in stored.items():
+                vector_scores[int(cid)] = cosine_score(vector, query_vector)
+
+    counts = await asyncio.to_thread(_score_job_rows, job, vector_scores)
+    logger.info(f"Scored job {job_id}: {counts}")
+    return counts
+
+
+async def score_cvs(cv_ids: List[int]) -> Dict[str, int]:
+    """Score processed CVs against their company's open jobs."""
+    if not cv_ids:
+        return {"stored": 0, "removed": 0, "strong": 0}
+    cvs, jobs = await asyncio.to_thread(_load_cvs, cv_ids)
+    if not cvs:
+        return {"stored": 0, "removed": 0, "strong": 0}
+
+    # Job query vectors: one batched request, served from the embedding cache after the first time
+    job_vectors = {}
+    if jobs:
+        vectors = await generate_embeddings_batch([job["query"] for job in jobs])
+        job_vectors = {job["id"]: vector for job, vector in zip(jobs, vectors) if vector}
+
+    cv_vectors: Dict[int, List[float]] = {}
+    by_company: Dict[Optional[int], List[str]] = {}
+    for cand in cvs:
+        by_company.setdefault(cand["company_id"], []).append(str(cand["cv_id"]))
+    for company_id, ids in by_company.items():
+        stored = await vector_db.run_blocking(vector_db.get_embeddings, ids, company_id=company_id)
+        cv_vectors.update({int(cid): vector for cid, vector in stored.items()})
+
+    counts = await asyncio.to_thread(_score_cv_rows, cvs, jobs, cv_vectors, job_vectors)
+    logger.info(f"Scored {len(cvs)} CVs against {len(jobs)} open jobs: {counts}")
+    return counts
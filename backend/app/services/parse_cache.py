@@ -0,0 +1,172 @@
+"""
+Content-addressed cache for CV parse results.
+
+The same CV is often uploaded many times (bulk uploads, landing page re-applies,
+reprocess clicks). Each copy is fingerprinted by the sha256 of its file bytes and
+of its extracted text; when a parsed record with the same fingerprint and the
+same parse version already exists in the company, its fields are cloned and its
+stored vector reused instead of calling OpenAI again.
+
+The parse version is derived from the extraction prompt, the models in use and
+the parse chunk budget, so changing any of them invalidates all previously
+cached results.
+"""
+
+import hashlib
+import logging
+from typing import Optional, Dict
+
+import redis
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.models.models import CV, ParsedCV
+from app.services import cv_preextract
+from app.services.parser import CV_PARSE_SYSTEM_PROMPT, CV_PARSE_JUDGMENT_PROMPT, OPENAI_MODEL
+from app.services.embeddings import EMBEDDING_MODEL
+
+logger = logging.getLogger(__name__)
+
+# Redis hash holding the hit/miss/tokens_saved counters
+PARSE_CACHE_STATS_KEY = "cv_parse_cache:stats"
+
+# ParsedCV columns produced by the LLM parse and copied verbatim on a cache hit.
+# Salary fields are recruiter-entered and deliberately not cloned.
+CLONED_FIELDS = [
+    "raw_text", "name", "email", "phone", "address", "age", "marital_status",
+    "military_status", "bachelor_year", "summary", "last_job_title", "last_company",
+    "social_links", "education", "job_history", "skills", "experience_years",
+]
+
+_redis_client = None
+
+
+def get_parse_version() -> str:
+    """Stamp identifying the prompt and models that produced a parse result."""
+    digest = hashlib.sha256()
+    # The chunk budget decides how long CVs are split, and pre-extraction decides
+    # which prompt is used and what text it sees, so both change results too
+    chunking = f"{settings.CV_PARSE_MAX_INPUT_TOKENS}x{settings.CV_PARSE_MAX_CHUNKS}"
+    if settings.CV_PREEXTRACT_ENABLED:
+        prompt = CV_PARSE_JUDGMENT_PROMPT + cv_preextract.PREEXTRACT_VERSION
+    else:
+        prompt = CV_PARSE_SYSTEM_PROMPT
+    for part in (prompt, OPENAI_MODEL, EMBEDDING_MODEL, chunking):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> Optional[str]:
+    """sha256 of a file's bytes, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError as e:
+        logger.debug(f"Could not hash file {path}: {e}")
+        return None
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """sha256 of the extracted text, ignoring whitespace differences between extractions."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def find_cached_parse(
+    db: Session,
+    company_id: Optional[int],
+    exclude_cv_id: int,
+    content_hash: Optional[str] = None,
+    text_hash: Optional[str] = None,
+) -> Optional[ParsedCV]:
+    """
+    Find a parsed record in the same company with a matching fingerprint and
+    the current parse version. Lookups are scoped to the company so that tenants
+    never share parse results.
+    """
+    if not content_hash and not text_hash:
+        return None
+
+    query = db.query(ParsedCV).join(CV, ParsedCV.cv_id == CV.id).options(
+        # Deferred columns that clone_parsed_fields copies
+        undefer(ParsedCV.raw_text), undefer(ParsedCV.job_history)
+    ).filter(
+        ParsedCV.parse_version == get_parse_version(),
+        ParsedCV.cv_id != exclude_cv_id,
+        CV.is_parsed.is_(True),
+    )
+    if company_id is None:
+        query = query.filter(CV.company_id.is_(None))
+    else:
+        query = query.filter(CV.company_id == company_id)
+
+    if content_hash:
+        query = query.filter(ParsedCV.content_hash == content_hash)
+    else:
+        query = query.filter(ParsedCV.text_hash == text_hash)
+
+    return query.order_by(ParsedCV.parsed_at.desc()).first()
+
+
+def clone_parsed_fields(source: ParsedCV, target: ParsedCV) -> None:
+    """Copy the LLM-produced fields and cache keys from source to target."""
+    for field in CLONED_FIELDS:
+        setattr(target, field, getattr(source, field))
+    target.content_hash = source.content_hash
+    target.text_hash = source.text_hash
+    target.parse_version = source.parse_version
+    target.parse_tokens = source.parse_tokens
+
+
+# ==================== Hit/Miss Counters ====================
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+def record_hit(tokens_saved: Optional[int] = None) -> None:
+    try:
+        pipe = _get_redis().pipeline()
+        pipe.hincrby(PARSE_CACHE_STATS_KEY, "hits", 1)
+        pipe.hincrby(PARSE_CACHE_STATS_KEY, "tokens_saved", int(tokens_saved or 0))
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record parse cache hit: {e}")
+
+
+def record_miss() -> None:
+    try:
+        _get_redis().hincrby(PARSE_CACHE_STATS_KEY, "misses", 1)
+    except Exception as e:
+        logger.warning(f"Failed to record parse cache miss: {e}")
+
+
+def get_stats() -> Dict[str, float]:
+    """Counters since the last reset, plus the derived hit rate."""
+    try:
+        raw = _get_redis().hgetall(PARSE_CACHE_STATS_KEY) or {}
+    except Exception as e:
+        logger.warning(f"Failed to read parse cache stats: {e}")
+        raw = {}
+
+    hits = int(raw.get("hits", 0))
+    misses = int(raw.get("misses", 0))
+    total = hits + misses
+    return {
+        "version": get_parse_version(),
+        "hits": hits,
+        "misses": misses,
+        "tokens_saved": int(raw.get("tokens_saved", 0)),
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
@@ -1,10 +1,16 @@
 import json
 import logging
+import asyncio
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import func
 from app.models.models import CV, ParsedCV
-from app.services.parser import extract_text, parse_cv_with_llm
-import asyncio
+from app.services.parser import extract_text_pages, parse_cv_with_llm
+from app.services import parse_cache
+from app.services.cv_preextract import page_line_counts
+# Registers the commit hooks that rebuild candidate_summary rows as parse results are saved
+from app.services import candidate_summary  # noqa: F401
+from app.services.skills import normalize_skills, sync_candidate_skills
+from app.core import async_runtime
 from app.core.database import engine
 
 logger = logging.getLogger(__name__)
@@ -50,6 +56,15 @@ def process_cv(cv_id: int):
     Synchronous version of CV processing logic.
     Used by Celery tasks.
     """
+    return async_runtime.run(process_cv_async(cv_id))
+
+
+async def process_cv_async(cv_id: int):
+    """
+    Extract -> parse -> embed -> upsert for one CV.
+    Blocking work (file reads, PDF extraction, DB, Chroma) runs in threads so
+    many CVs can wait on the LLM concurrently.
+    """
     SessionLocal = sessionmaker(bind=engine)
     
     try:
@@ -57,109 +72,233 @@ def process_cv(cv_id: int):
         logger.debug(f"CV {cv_id}: Creating database session and fetching CV record")
         
         # STEP 1: Fetch CV data
-        db = SessionLocal()
-        company_id = None
-        user_id = None
-        try:
-            cv = db.query(CV).filter(CV.id == cv_id).first()
-            if not cv:
-                logger.warning(f"CV with ID {cv_id} not found.")
-                return
-            
-            cv_filepath = cv.filepath
-            cv_filename = cv.filename
-            company_id = cv.company_id
-            user_id = cv.uploaded_by
-        finally:
-            db.close()
+        cv_info = await asyncio.to_thread(_fetch_cv, SessionLocal, cv_id)
+        if not cv_info:
+            logger.warning(f"CV with ID {cv_id} not found.")
+            return
+        cv_filepath, cv_filename, company_id, user_id = cv_info
         
-        # STEP 2: Process file (slow I/O and API calls)
+        # STEP 2: Reuse an existing parse of the same file if there is one
+        content_hash = await asyncio.to_thread(parse_cache.hash_file, cv_filepath)
+        if content_hash and await _apply_cached_parse(SessionLocal, cv_id, company_id, user_id, cv_filename, content_hash, by_text=False):
+            return
+
+        # STEP 3: Process file (slow I/O and API calls)
         logger.debug(f"CV {cv_id}: Extracting text from file {cv_filepath}")
-        full_text = extract_text(cv_filepath)
+        pages = await asyncio.to_thread(extract_text_pages, cv_filepath)
+        full_text = "\n".join(pages)
         if not full_text:
             logger.warning(f"No text extracted for CV ID {cv_id}.")
             return
 
-        # Run async parser synchronously
+        # Same text under different bytes (re-exported PDF, DOCX copy) is still a hit
+        text_hash = parse_cache.hash_text(full_text)
+        if await _apply_cached_parse(SessionLocal, cv_id, company_id, user_id, cv_filename, content_hash, text_hash=text_hash, by_text=True):
+            return
+        await asyncio.to_thread(parse_cache.record_miss)
+
         try:
-            data = asyncio.run(parse_cv_with_llm(full_text, cv_filename, cv_id=cv_id, company_id=company_id, user_id=user_id))
+            data = await parse_cv_with_llm(full_text, cv_filename, cv_id=cv_id, company_id=company_id, user_id=user_id,
+                                           page_lines=page_line_counts(pages))
         except Exception as e:
             logger.critical(f"AI service failed for CV {cv_id}: {e}")
             raise
 
         logger.debug(f"Parsed Data for CV {cv_id}: Keys={list(data.keys())}")
 
-        # STEP 3: Save results
-        db = SessionLocal()
-        try:
-            # Re-fetch the CV
-            cv = db.query(CV).filter(CV.id == cv_id).first()
-            if not cv:
-                logger.warning(f"CV {cv_id} disappeared during processing")
-                return
-                
-            parsed_record = db.query(ParsedCV).filter(ParsedCV.cv_id == cv.id).first()
-            if not parsed_record:
-                parsed_record = ParsedCV(cv_id=cv.id)
-                db.add(parsed_record)
-
-            # Populate fields
-            parsed_record.raw_text = full_text
-            parsed_record.name = data.get("name")
-            parsed_record.summary = data.get("summary")
-            parsed_record.email = clean_and_dump(data, ["email", "emails"])
-            parsed_record.phone = clean_and_dump(data, ["phone", "phones"])
-            parsed_record.social_links = clean_and_dump(data, ["social_links", "links"])
-            parsed_record.skills = clean_and_dump(data, ["skills", "tech_stack"])
-            parsed_record.education = json.dumps(data.get("education", []))
-            parsed_record.job_history = json.dumps(data.get("job_history", []))
-            parsed_record.address = data.get("address")
-            parsed_record.age = data.get("age")
-            parsed_record.marital_status = data.get("marital_status")
-            parsed_record.military_status = data.get("military_status")
-            parsed_record.bachelor_year = data.get("bachelor_year")
-            parsed_record.last_job_title = data.get("last_job_title")
-            parsed_record.last_company = data.get("last_company")
-            parsed_record.experience_years = data.get("experience_years")
-            parsed_record.parsed_at = func.now()
-            cv.is_parsed = True
-            
-            db.commit()
-            db.commit()
-            logger.info(f"Finished CV ID {cv_id}")
-
-            # STEP 4: Vector DB Upsert
-            # We do this after commit to ensure DB is consistent.
-            embedding = data.get("_embedding")
-            rich_text = data.get("_rich_text")
-            
-            if embedding and rich_text:
-                try:
-                    from app.services.vector_db import vector_db
-                    logger.info(f"Upserting CV {cv_id} to VectorDB...")
-                    vector_db.upsert(
-                        ids=[str(cv_id)],
-                        documents=[rich_text],
-                        metadatas=[{
-                            "name": data.get("name", "Unknown"),
-                            "email": clean_and_dump(data, ["email", "emails"]),
-                            "filename": cv_filename,
-                            "cv_id": cv_id,
-                            "company_id": cv.company_id
-                        }],
-                        embeddings=[embedding]
-                    )
-                    logger.info(f"Successfully upserted CV {cv_id} to VectorDB")
-                except Exception as e:
-                    logger.error(f"Failed to upsert CV {cv_id} to VectorDB: {e}")
+        # STEP 4: Save results
+        saved_company_id = await asyncio.to_thread(
+            _save_parse_result, SessionLocal, cv_id, full_text, data, content_hash, text_hash
+        )
+        if saved_company_id is False:
+            return
 
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error saving CV {cv_id}: {e}")
-            raise
-        finally:
-            db.close()  # Release connection immediately after save
+        # STEP 5: Vector DB Upsert
+        # We do this after commit to ensure DB is consistent.
+        embedding = data.get("_embedding")
+        rich_text = data.get("_rich_text")
+        
+        if embedding and rich_text:
+            await asyncio.to_thread(
+                _upsert_vector, cv_id, data.get("name", "Unknown"), clean_and_dump(data, ["email", "emails"]),
+                cv_filename, saved_company_id, rich_text, embedding
+            )
             
     except Exception as e:
         logger.error(f"Error processing CV {cv_id}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _fetch_cv(SessionLocal, cv_id: int):
+    db = SessionLocal()
+    try:
+        cv = db.query(CV).filter(CV.id == cv_id).first()
+        if not cv:
+            return None
+        return cv.filepath, cv.filename, cv.company_id, cv.uploaded_by
+    finally:
+        db.close()
+
+
+def _save_parse_result(SessionLocal, cv_id: int, full_text: str, data: dict, content_hash, text_hash):
+    """Persist the LLM output. Returns the CV's company_id, or False if the CV is gone."""
+    db = SessionLocal()
+    try:
+        # Re-fetch the CV
+        cv = db.query(CV).filter(CV.id == cv_id).first()
+        if not cv:
+            logger.warning(f"CV {cv_id} disappeared during processing")
+            return False
+            
+        parsed_record = db.query(ParsedCV).filter(ParsedCV.cv_id == cv.id).first()
+        if not parsed_record:
+            parsed_record = ParsedCV(cv_id=cv.id)
+            db.add(parsed_record)
+
+        # Populate fields
+        parsed_record.raw_text = full_text
+        parsed_record.name = data.get("name")
+        parsed_record.summary = data.get("summary")
+        parsed_record.email = clean_and_dump(data, ["email", "emails"])
+        parsed_record.phone = clean_and_dump(data, ["phone", "phones"])
+        parsed_record.social_links = clean_and_dump(data, ["social_links", "links"])
+        # Aliases mapped to canonical names ("JS" -> "JavaScript"), duplicates dropped
+        skills = normalize_skills(clean_and_dump(data, ["skills", "tech_stack"]))
+        parsed_record.skills = json.dumps(skills)
+        parsed_record.education = json.dumps(data.get("education", []))
+        parsed_record.job_history = json.dumps(data.get("job_history", []))
+        parsed_record.address = data.get("address")
+        parsed_record.age = data.get("age")
+        parsed_record.marital_status = data.get("marital_status")
+        parsed_record.military_status = data.get("military_status")
+        parsed_record.bachelor_year = data.get("bachelor_year")
+        parsed_record.last_job_title = data.get("last_job_title")
+        parsed_record.last_company = data.get("last_company")
+        parsed_record.experience_years = data.get("experience_years")
+        parsed_record.parsed_at = func.now()
+        parsed_record.content_hash = content_hash
+        parsed_record.text_hash = text_hash
+        # Only a successful parse may be served from the cache later
+        parsed_record.parse_version = parse_cache.get_parse_version() if data else None
+        parsed_record.parse_tokens = data.get("_tokens_used")
+        cv.is_parsed = True
+        sync_candidate_skills(db, cv.id, cv.company_id, skills)
+        
+        db.commit()
+        logger.info(f"Finished CV ID {cv_id}")
+        return cv.company_id
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error saving CV {cv_id}: {e}")
+        raise
+    finally:
+        db.close()  # Release connection immediately after save
+
+
+def _upsert_vector(cv_id: int, name, email: str, filename: str, company_id, rich_text: str, embedding):
+    try:
+        from app.services.vector_db import vector_db
+        logger.info(f"Upserting CV {cv_id} to VectorDB...")
+        vector_db.upsert(
+            ids=[str(cv_id)],
+            documents=[rich_text],
+            metadatas=[{
+                "name": name or "Unknown",
+                "email": email,
+                "filename": filename,
+                "cv_id": cv_id,
+                "company_id": company_id
+            }],
+            embeddings=[embedding]
+        )
+        logger.info(f"Successfully upserted CV {cv_id} to VectorDB")
+    except Exception as e:
+        logger.error(f"Failed to upsert CV {cv_id} to VectorDB: {e}")
+
+
+def _clone_cached_parse(SessionLocal, cv_id: int, company_id, content_hash, text_hash, by_text: bool):
+    """
+    DB half of a cache hit: copy the fields of a matching parse onto CV `cv_id`.
+    Returns None on a miss, otherwise a dict describing what was cloned
+    (with "cv_missing" set if the CV was deleted meanwhile).
+    """
+    db = SessionLocal()
+    try:
+        source = parse_cache.find_cached_parse(
+            db, company_id, cv_id,
+            content_hash=None if by_text else content_hash,
+            text_hash=text_hash if by_text else None,
+        )
+        if not source:
+            return None
+
+        cv = db.query(CV).filter(CV.id == cv_id).first()
+        if not cv:
+            logger.warning(f"CV {cv_id} disappeared during processing")
+            return {"cv_missing": True}
+
+        parsed_record = db.query(ParsedCV).filter(ParsedCV.cv_id == cv.id).first()
+        if not parsed_record:
+            parsed_record = ParsedCV(cv_id=cv.id)
+            db.add(parsed_record)
+
+        parse_cache.clone_parsed_fields(source, parsed_record)
+        # Keep our own file hash so the next upload of these exact bytes hits directly
+        parsed_record.content_hash = content_hash or source.content_hash
+        parsed_record.parsed_at = func.now()
+        # The source may predate the skills taxonomy (normalizing is idempotent)
+        parsed_record.skills = json.dumps(normalize_skills(parsed_record.skills))
+        cv.is_parsed = True
+        sync_candidate_skills(db, cv.id, cv.company_id, parsed_record.skills)
+        db.commit()
+
+        from app.services.sync_service import construct_rich_text
+        return {
+            "cv_missing": False,
+            "source_cv_id": source.cv_id,
+            "tokens_saved": source.parse_tokens,
+            "name": parsed_record.name,
+            "email": parsed_record.email or "[]",
+            "company_id": cv.company_id,
+            "rich_text": construct_rich_text(parsed_record),
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _apply_cached_parse(SessionLocal, cv_id: int, company_id, user_id, cv_filename: str,
+                              content_hash, text_hash=None, by_text: bool = False) -> bool:
+    """
+    Fill CV `cv_id` from an existing parse of the same content, if one exists.
+    Looks up by file hash, or by text hash when `by_text` is set.
+    Returns True when the CV was served from the cache.
+    """
+    try:
+        hit = await asyncio.to_thread(_clone_cached_parse, SessionLocal, cv_id, company_id, content_hash, text_hash, by_text)
+    except Exception as e:
+        logger.error(f"Parse cache lookup failed for CV {cv_id}, falling back to full parse: {e}")
+        return False
+    if hit is None:
+        return False
+    if hit["cv_missing"]:
+        return True
+
+    source_cv_id = hit["source_cv_id"]
+    await asyncio.to_thread(parse_cache.record_hit, tokens_saved=hit["tokens_saved"])
+    logger.info(f"CV {cv_id}: parse cache hit (cloned from CV {source_cv_id}, by {'text' if by_text else 'file'} hash)")
+
+    # Reuse the stored vector; only embed (no LLM parse) if the source was never indexed
+    from app.services.vector_db import vector_db
+    stored = await asyncio.to_thread(vector_db.get_embeddings, [str(source_cv_id)], company_id=company_id)
+    embedding = stored.get(str(source_cv_id))
+    if not embedding:
+        from app.services.embeddings import generate_embedding
+        embedding = await generate_embedding(hit["rich_text"], cv_id=cv_id, company_id=company_id, user_id=user_id)
+    if embedding:
+        await asyncio.to_thread(
+            _upsert_vector, cv_id, hit["name"], hit["email"], cv_filename, hit["company_id"], hit["rich_text"], embedding
+        )
+    return True
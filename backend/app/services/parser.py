@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from openai import AsyncOpenAI
@@ -8,6 +9,10 @@ from pypdf import PdfReader
 import docx
 import time
 from app.core.llm_logging import LLMLogger
+from app.core import async_runtime, openai_limiter
+from app.core.config import settings
+from app.services import token_budget, cv_preextract
+from app.services.pdf_extraction import extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
@@ -19,41 +24,38 @@ if not OPENAI_API_KEY:
     logger.warning("OPENAI_API_KEY not set. AI features will fail.")
 
 def get_openai_client() -> AsyncOpenAI:
-    """Create a new OpenAI client for the current event loop."""
+    """Return an OpenAI client usable on the current event loop."""
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY not set. Cannot initialize OpenAI client.")
-    # Do not cache the client globally because we use asyncio.run() which creates/closes loops.
-    # The client's internal httpx session is tied to the loop.
+    # Inside a Celery worker the persistent runtime loop owns one keep-alive client.
+    shared = async_runtime.get_openai_client(OPENAI_API_KEY)
+    if shared is not None:
+        return shared
+    # Elsewhere, do not cache the client globally: asyncio.run() creates/closes loops
+    # and the client's internal httpx session is tied to the loop.
     return AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 def extract_text(path: str) -> str:
+    return "\n".join(extract_text_pages(path))
+
+def extract_text_pages(path: str) -> List[str]:
+    """extract_text() split into pages (a DOCX is one page); joined with newlines they are the text."""
     p = Path(path)
-    text_content = []
     try:
         logger.debug("Extracting text from %s", path)
         if p.suffix.lower() == ".pdf":
             reader = PdfReader(str(path))
             logger.debug("PDF detected with %d pages", len(reader.pages))
-            for page in reader.pages:
-                text_content.append(page.extract_text() or "")
-                if "/Annots" in page:
-                    for annot in page["/Annots"]:
-                        try:
-                            obj = annot.get_object()
-                            if "/A" in obj and "/URI" in obj["/A"]:
-                                uri = obj["/A"]["/URI"]
-                                text_content.append(f" [LINK: {uri}] ")
-                        except Exception:
-                            continue
-            return "\n".join(text_content)
+            return extract_pdf_pages(reader, str(path))
         elif p.suffix.lower() == ".docx":
             logger.debug("DOCX detected, reading paragraphs")
             doc = docx.Document(str(path))
-            return "\n".join([p.text for p in doc.paragraphs if p.text])
-        return ""
+            text = "\n".join([p.text for p in doc.paragraphs if p.text])
+            return [text] if text else []
+        return []
     except Exception as e:
         logger.error("Error reading file %s: %s", path, e)
-        return ""
+        return []
 
 def repair_json(json_str: str) -> str:
     json_str = json_str.strip()
@@ -254,6 +256,8 @@ Return ONLY valid JSON in this exact format:
             
             logger.debug("Generating comprehensive job metadata for '%s' using %s", title, OPENAI_MODEL)
             client = get_openai_client()
+            reserved = openai_limiter.estimate_chat_tokens(kwargs)
+            await openai_limiter.acquire(OPENAI_MODEL, reserved)
             completion = await client.chat.completions.create(**kwargs)
 
             # Track token usage
@@ -261,6 +265,7 @@ Return ONLY valid JSON in this exact format:
                 tokens_used = completion.usage.total_tokens
                 tokens_input = completion.usage.prompt_tokens
                 tokens_output = completion.usage.completion_tokens
+            await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
             
             result = json.loads(completion.choices[0].message.content)
             
@@ -395,6 +400,8 @@ Return ONLY valid JSON in this exact format:
             
             logger.debug("Generating department profile for '%s' using %s", name, OPENAI_MODEL)
             client = get_openai_client()
+            reserved = openai_limiter.estimate_chat_tokens(kwargs)
+            await openai_limiter.acquire(OPENAI_MODEL, reserved)
             completion = await client.chat.completions.create(**kwargs)
 
             # Track token usage
@@ -402,6 +409,7 @@ Return ONLY valid JSON in this exact format:
                 tokens_used = completion.usage.total_tokens
                 tokens_input = completion.usage.prompt_tokens
                 tokens_output = completion.usage.completion_tokens
+            await openai_limiter.settle(OPENAI_MODEL, reserved, tokens_used)
             
             result = json.loads(completion.choices[0].message.content)
             
@@ -445,15 +453,9 @@ Return ONLY valid JSON in this exact format:
     return {}
 
 
-async def parse_cv_with_llm(text: str, filename: str, cv_id: Optional[int] = None, company_id: Optional[int] = None, user_id: Optional[int] = None) -> Dict[str, Any]:
-    truncated_text = text[:25000]
-    logger.debug(
-        "Starting parse for '%s' (original len=%d, truncated len=%d)",
-        filename,
-        len(text),
-        len(truncated_text),
-    )
-    system_prompt = """You are an expert Headhunter. Extract details from the CV below into strict JSON.
+# Prompt used for CV extraction. Part of the parse cache version, so editing it
+# invalidates previously cached parse results (see app.services.parse_cache).
+CV_PARSE_SYSTEM_PROMPT = """You are an expert Headhunter. Extract details from the CV below into strict JSON.
     CRITICAL: Extract 'email' and 'phone' as LISTS of strings.
     Requirements:
     1. **summary**: A short 2-3 sentence professional summary.
@@ -494,36 +496,234 @@ async def parse_cv_with_llm(text: str, filename: str, cv_id: Optional[int] = Non
     }
     """
 
+
+# Used when cv_preextract has already pulled contacts, links and graduation
+# years out of the text: the model is only asked for what needs judgment.
+CV_PARSE_JUDGMENT_PROMPT = """You are an expert Headhunter. Extract details from the CV below into strict JSON.
+    Emails, phones and links have already been extracted and removed from the text; do not return them.
+    Requirements:
+    1. **summary**: A short 2-3 sentence professional summary.
+    2. **job_history**: List of jobs (Title, Company, Duration, Description).
+    3. **bachelor_year**: Year of Bachelor's graduation (Int).
+    4. **experience_years**: Total years of experience, count years from gradutaion (Bsc.) (Int).
+    5. **personal**: Address, Age, Marital Status, Military Status.
+    6. **skills**: Technical & Soft Skills, the key word should not exceed 2 words, extract all of them from CV up to 30 fields.
+    7. **Time projection**: Project the years of experience and age to match today's date.
+    8. **education**: List of educations sorted by year (newest first).
+
+    JSON Structure:
+    {
+      "name": "Name",
+      "summary": "...",
+      "address": "City",
+      "age": 30,
+      "marital_status": "Single / Married / Not Specified",
+      "military_status": "Exempt / Not Specified / To be served",
+      "bachelor_year": 2015,
+      "experience_years": 8,
+      "last_job_title": "Title",
+      "last_company": "Company",
+      "skills": ["Python", "Java"],
+      "education": [{ 
+          "institution": "University Name", 
+          "degree": "Degree (BSc/MSc/PhD) - full description", 
+          "field_of_study": "Computer Science - full description", 
+          "year": "2015", 
+          "grade": "GPA or Honors"
+      }],
+      "job_history": [{ "title": "Dev", "company": "Google", "duration": "2020-Present", "description": "..." }] 
+    }
+    """
+
+def plan_parse_chunks(text: str, filename: str, system_prompt: str = CV_PARSE_SYSTEM_PROMPT) -> List[str]:
+    """
+    Split CV text into the chunks to send to the LLM, measured in real prompt
+    tokens. Short CVs come back as a single chunk with their full text; longer
+    ones are split at line boundaries, up to CV_PARSE_MAX_CHUNKS chunks.
+    """
+    overhead = token_budget.count_message_tokens([
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Filename: {filename}\nCV Text (part 99 of 99):\n"},
+    ], OPENAI_MODEL)
+    chunk_budget = max(settings.CV_PARSE_MAX_INPUT_TOKENS - overhead, 256)
+
+    text_tokens = token_budget.count_tokens(text, OPENAI_MODEL)
+    if text_tokens <= chunk_budget:
+        return [text]
+
+    chunks = token_budget.split_to_token_chunks(text, chunk_budget, OPENAI_MODEL, max_chunks=settings.CV_PARSE_MAX_CHUNKS)
+    kept = sum(len(c) for c in chunks)
+    if kept < len(text.strip()) - len(chunks):
+        logger.warning(
+            "CV '%s' exceeds %d parse chunks (%d tokens); the last %d chars are not parsed",
+            filename, settings.CV_PARSE_MAX_CHUNKS, text_tokens, len(text) - kept,
+        )
+    return chunks
+
+
+def _as_list(value) -> List:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                parsed = json.loads(value)
+                if isinstance(parsed, list):
+                    return parsed
+            except Exception:
+                pass
+        return [value]
+    return [value]
+
+
+def _entry_key(entry: Dict, *field_groups) -> tuple:
+    return tuple(
+        " ".join(str(next((entry.get(f) for f in fields if entry.get(f)), "")).lower().split())
+        for fields in field_groups
+    )
+
+
+def _merge_entries(lists: List[List], *field_groups) -> List[Dict]:
+    """Concatenate in chunk order, dropping repeats of the same entry and filling gaps from them."""
+    merged: Dict[tuple, Dict] = {}
+    for entries in lists:
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            key = _entry_key(entry, *field_groups)
+            if key not in merged:
+                merged[key] = dict(entry)
+                continue
+            kept = merged[key]
+            for field, value in entry.items():
+                if value and not kept.get(field):
+                    kept[field] = value
+    return list(merged.values())
+
+
+def merge_parsed_chunks(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Deterministically merge the raw LLM outputs of consecutive CV chunks.
+
+    Scalars take the first non-empty value in document order (the header chunk
+    holds name, contact and the latest role), except experience_years which takes
+    the maximum. Contact lists and skills are unioned case-insensitively in order
+    of first appearance. job_history and education are concatenated in document
+    order, with entries describing the same role/degree collapsed into one.
+    """
+    merged: Dict[str, Any] = {}
+
+    for field in ("email", "phone", "skills", "social_links"):
+        aliases = {"email": ("email", "emails"), "phone": ("phone", "phones"), "social_links": ("social_links", "links")}.get(field, (field,))
+        seen, values = set(), []
+        for part in parts:
+            for value in _as_list(next((part.get(a) for a in aliases if part.get(a)), None)):
+                marker = str(value).strip().lower()
+                if marker and marker not in seen:
+                    seen.add(marker)
+                    values.append(value)
+        merged[field] = values
+
+    merged["job_history"] = _merge_entries(
+        [_as_list(p.get("job_history")) for p in parts],
+        ("title", "role", "position"), ("company", "organization"), ("duration", "start_date", "start"),
+    )
+    merged["education"] = _merge_entries(
+        [_as_list(p.get("education")) for p in parts],
+        ("school", "institution", "university"), ("degree", "major"), ("year", "end_date", "date"),
+    )
+
+    years = []
+    for part in parts:
+        try:
+            years.append(float(part.get("experience_years")))
+        except (TypeError, ValueError):
+            continue
+    if years:
+        best = max(years)
+        merged["experience_years"] = int(best) if best.is_integer() else best
+
+    skip = {"email", "emails", "phone", "phones", "skills", "social_links", "links", "job_history", "education", "experience_years"}
+    for part in parts:
+        for field, value in part.items():
+            if field in skip or value in (None, "", [], {}):
+                continue
+            merged.setdefault(field, value)
+    return merged
+
+
+async def _parse_chunk(client, chunk: str, filename: str, part: int, total: int,
+                       system_prompt: str = CV_PARSE_SYSTEM_PROMPT, hints: str = ""):
+    """One chat completion for one chunk. Returns (raw data, (total, input, output) tokens)."""
+    header = f"CV Text (part {part} of {total}):" if total > 1 else "CV Text:"
+    kwargs = {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Filename: {filename}\n{hints}{header}\n{chunk}"}
+        ]
+    }
+    if not OPENAI_MODEL.startswith("o1"):
+        kwargs["temperature"] = 1.0
+        kwargs["response_format"] = {"type": "json_object"}
+
+    reserved = openai_limiter.estimate_chat_tokens(kwargs)
+    await openai_limiter.acquire(OPENAI_MODEL, reserved)
+    completion = await client.chat.completions.create(**kwargs)
+    usage = (0, 0, 0)
+    if hasattr(completion, 'usage') and completion.usage:
+        usage = (completion.usage.total_tokens, completion.usage.prompt_tokens, completion.usage.completion_tokens)
+    await openai_limiter.settle(OPENAI_MODEL, reserved, usage[0])
+
+    raw = completion.choices[0].message.content
+    logger.debug("Raw response received for '%s' part %d/%d (%d chars)", filename, part, total, len(raw or ""))
+    return json.loads(repair_json(raw)), usage
+
+
+async def parse_cv_with_llm(text: str, filename: str, cv_id: Optional[int] = None, company_id: Optional[int] = None, user_id: Optional[int] = None, embed: bool = True, page_lines: Optional[List[int]] = None) -> Dict[str, Any]:
     if OPENAI_API_KEY:
         start_time = time.time()
         tokens_used = 0
         tokens_input = 0
         tokens_output = 0
         try:
-            kwargs = {
-                "model": OPENAI_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Filename: {filename}\nCV Text:\n{truncated_text}"}
-                ]
-            }
-            if not OPENAI_MODEL.startswith("o1"):
-                kwargs["temperature"] = 1.0
-                kwargs["response_format"] = {"type": "json_object"}
+            # Contacts, links and graduation years are found locally; the LLM gets the rest
+            pre = cv_preextract.pre_extract(text, page_lines) if settings.CV_PREEXTRACT_ENABLED else None
+            system_prompt = CV_PARSE_JUDGMENT_PROMPT if pre else CV_PARSE_SYSTEM_PROMPT
+            llm_text = pre["text"] if pre else text
+            hints = cv_preextract.prompt_hints(pre) if pre else ""
+
+            chunks = plan_parse_chunks(llm_text, filename, system_prompt)
+            logger.debug(
+                "Starting parse for '%s' (len=%d, sent=%d, %d chunk(s))",
+                filename,
+                len(text),
+                len(llm_text),
+                len(chunks),
+            )
             
             logger.debug("Calling OpenAI for '%s' using model %s", filename, OPENAI_MODEL)
             client = get_openai_client()
-            completion = await client.chat.completions.create(**kwargs)
+            results = await asyncio.gather(*(
+                _parse_chunk(client, chunk, filename, i + 1, len(chunks), system_prompt, hints)
+                for i, chunk in enumerate(chunks)
+            ))
 
             # Track token usage
-            if hasattr(completion, 'usage') and completion.usage:
-                tokens_used = completion.usage.total_tokens
-                tokens_input = completion.usage.prompt_tokens
-                tokens_output = completion.usage.completion_tokens
+            for _, (total, prompt, completion_tokens) in results:
+                tokens_used += total
+                tokens_input += prompt
+                tokens_output += completion_tokens
 
-            raw = completion.choices[0].message.content
-            logger.debug("Raw response received for '%s' (%d chars)", filename, len(raw or ""))
-            data = json.loads(repair_json(raw))
+            if len(results) == 1:
+                data = results[0][0]
+            else:
+                data = merge_parsed_chunks([r[0] for r in results])
+            if pre:
+                data = cv_preextract.apply_pre_extracted(pre, data)
             
             # Normalize Contact
             logger.debug("Normalizing contact info for '%s'", filename)
@@ -554,9 +754,27 @@ async def parse_cv_with_llm(text: str, filename: str, cv_id: Optional[int] = Non
                 tokens_output=tokens_output,
                 latency_ms=latency_ms,
                 streaming=False,
-                metadata={"filename": filename, "cv_id": cv_id, "text_length": len(truncated_text), "keys_extracted": list(data.keys())}
+                metadata={
+                    "filename": filename,
+                    "cv_id": cv_id,
+                    "text_length": len(text),
+                    "prompt_text_length": sum(len(c) for c in chunks),
+                    "chunks": len(chunks),
+                    "prompt": "judgment" if pre else "full",
+                    "pre_extracted": {
+                        "emails": len(pre["email"]),
+                        "phones": len(pre["phone"]),
+                        "links": len(pre["social_links"]),
+                        "bachelor_year": pre["bachelor_year"],
+                        "sections": pre["sections"],
+                    } if pre else None,
+                    "keys_extracted": list(data.keys()),
+                }
             )
             
+            # Return the token cost so duplicate uploads can report what a cache hit saved.
+            data["_tokens_used"] = tokens_used
+
             # --- VECTOR DB INTEGRATION ---
             try:
                 
@@ -584,7 +802,9 @@ async def parse_cv_with_llm(text: str, filename: str, cv_id: Optional[int] = Non
                 # Return the rich text so the caller can index it once they have the ID.
                 data["_rich_text"] = rich_text
                 
-                # Generate embedding for vector search
+                # Generate embedding for vector search (the staged pipeline embeds separately)
+                if not embed:
+                    return data
                 try:
                     from app.services.embeddings import generate_embedding
                     logger.info(f"Generating embedding for CV '{filename}'...")
@@ -0,0 +1,221 @@
+"""
+PDF text extraction with a character budget, a per-document time limit and
+optional page-parallelism.
+
+parse_cv_with_llm only ever sends the first 25,000 characters to the model, so
+walking all 40 pages of a portfolio PDF is mostly wasted work. Pages are read in
+order and extraction stops at the first page boundary past PDF_CHAR_BUDGET, so
+the result is always a page-aligned prefix of the full output: page texts and
+ " [LINK: uri] " markers for annotations, joined with newlines.
+extract_pdf_pages() returns the same text split into pages, so later steps can
+find page boundaries without changing the text itself.
+
+Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into page ranges
+and fanned out to a shared process pool, keeping only a small window of ranges
+in flight so early termination still saves work. With PDF_EXTRACT_IN_POOL every
+document is extracted in the pool, so a worker that runs tasks in threads keeps
+its CPU-bound extraction off the GIL.
+
+Daemonic processes may not have child processes, and Celery prefork children
+are daemonic, so they skip the pool and extract sequentially. The cv_extract
+worker therefore runs the threads pool (see docker-compose.yml): its tasks run
+in the worker's main process, which can start the pool.
+
+When it is exceeded, PDF_EXTRACT_TIME_LIMIT returns the text collected so far.
+Whenever the pool is used it is enforced while waiting on each page range, so a
+pathological page cannot hold the task past the limit. Sequential extraction
+(small documents, daemonic processes, pool failures) reads pages in-process and
+only checks the limit between pages, so there it is best-effort.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Optional
+
+from pypdf import PdfReader
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pages per pool task: large enough to amortise re-opening the file in the worker
+PAGES_PER_TASK = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _page_parts(page) -> List[str]:
+    """Text of one page followed by a marker for each link annotation."""
+    parts = [page.extract_text() or ""]
+    if "/Annots" in page:
+        for annot in page["/Annots"]:
+            try:
+                obj = annot.get_object()
+                if "/A" in obj and "/URI" in obj["/A"]:
+                    uri = obj["/A"]["/URI"]
+                    parts.append(f" [LINK: {uri}] ")
+            except Exception:
+                continue
+    return parts
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[List[str]]:
+    """Pool task: parts for pages [start, stop)."""
+    reader = PdfReader(path)
+    return [_page_parts(reader.pages[i]) for i in range(start, stop)]
+
+
+def _pool_workers() -> int:
+    return settings.PDF_EXTRACT_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = _pool_workers()
+            # spawn: the parent may run other threads (async runtime, logging), which fork does not copy safely
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _can_use_pool() -> bool:
+    return not multiprocessing.current_process().daemon
+
+
+class _Collector:
+    """Accumulates page texts and tracks their joined length against the budget."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.page_texts: List[str] = []
+        self.length = 0
+
+    @property
+    def pages(self) -> int:
+        return len(self.page_texts)
+
+    def add_page(self, parts: List[str]) -> bool:
+        """Add one page; returns True once the budget is reached."""
+        text = "\n".join(parts)
+        self.length += len(text) + (1 if self.page_texts else 0)
+        self.page_texts.append(text)
+        return self.budget > 0 and self.length >= self.budget
+
+
+def _extract_sequential(reader, collector: _Collector, start: int, stop: int, deadline: float) -> bool:
+    """Extract pages [start, stop). Returns True if extraction stopped early (budget or time limit)."""
+    pages = reader.pages
+    for i in range(start, stop):
+        if time.monotonic() > deadline:
+            logger.warning("PDF extraction time limit reached after %d pages", collector.pages)
+            return True
+        if collector.add_page(_page_parts(pages[i])):
+            return True
+    return False
+
+
+def _ranges_needed(collector: _Collector) -> int:
+    """Page ranges likely still needed to fill the budget, judging by the pages seen so far."""
+    if collector.budget <= 0:
+        return 2 * _pool_workers()
+    if not collector.pages:
+        # The first range often fills the budget on its own, and gives a chars-per-page estimate
+        return 1
+    chars_per_page = max(collector.length / collector.pages, 1)
+    pages_needed = (collector.budget - collector.length) / chars_per_page
+    return int(pages_needed // PAGES_PER_TASK) + 1
+
+
+def _extract_parallel(path: str, start_page: int, page_count: int, collector: _Collector, deadline: float) -> Optional[int]:
+    """
+    Fan page ranges out to the pool, consuming results in page order. Only as
+    many ranges as the budget is expected to need are in flight at once.
+    Returns None when done, or the page to resume from sequentially if the pool failed.
+    """
+    pool = _get_pool()
+    ranges = [(s, min(s + PAGES_PER_TASK, page_count)) for s in range(start_page, page_count, PAGES_PER_TASK)]
+    max_window = 2 * _pool_workers()
+    pending = deque()
+    next_range = 0
+    try:
+        while next_range < len(ranges) or pending:
+            window = max(1, min(max_window, _ranges_needed(collector)))
+            while len(pending) < window and next_range < len(ranges):
+                start, stop = ranges[next_range]
+                pending.append(pool.submit(_extract_page_range, path, start, stop))
+                next_range += 1
+
+            future = pending.popleft()
+            remaining = deadline - time.monotonic()
+            try:
+                pages = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                logger.warning("PDF extraction time limit reached after %d pages", collector.pages)
+                return None
+            for parts in pages:
+                if collector.add_page(parts):
+                    return None
+        return None
+    except Exception as e:
+        logger.warning("PDF process pool failed (%s); continuing sequentially", e)
+        _reset_pool()
+        return collector.pages
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def extract_pdf_text(reader: PdfReader, path: str, **kwargs) -> str:
+    """Extract text and link markers from an opened PDF (see extract_pdf_pages)."""
+    return "\n".join(extract_pdf_pages(reader, path, **kwargs))
+
+
+def extract_pdf_pages(
+    reader: PdfReader,
+    path: str,
+    char_budget: Optional[int] = None,
+    time_limit: Optional[float] = None,
+    parallel_min_pages: Optional[int] = None,
+    in_pool: Optional[bool] = None,
+) -> List[str]:
+    """
+    Text and link markers of each extracted page of an opened PDF.
+    Budget, time limit, parallel threshold and in-pool extraction default to
+    the PDF_* settings; a budget of 0 extracts every page.
+    """
+    budget = settings.PDF_CHAR_BUDGET if char_budget is None else char_budget
+    limit = settings.PDF_EXTRACT_TIME_LIMIT if time_limit is None else time_limit
+    min_pages = settings.PDF_PARALLEL_MIN_PAGES if parallel_min_pages is None else parallel_min_pages
+    in_pool = settings.PDF_EXTRACT_IN_POOL if in_pool is None else in_pool
+
+    deadline = time.monotonic() + limit
+    collector = _Collector(budget)
+    page_count = len(reader.pages)
+
+    start = 0
+    if (in_pool or 0 < min_pages <= page_count) and _can_use_pool():
+        # Every page goes through the pool, where the time limit holds mid-page too
+        resume_from = _extract_parallel(path, 0, page_count, collector, deadline)
+        if resume_from is None:
+            return collector.page_texts
+        start = resume_from
+
+    _extract_sequential(reader, collector, start, page_count, deadline)
+    if collector.pages < page_count:
+        logger.debug("Stopped PDF extraction at page %d/%d (%d chars)", collector.pages, page_count, collector.length)
+    return collector.page_texts
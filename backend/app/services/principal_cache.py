@@ -0,0 +1,204 @@
+"""
+Cache of authenticated principals for deps.get_current_user.
+
+Resolving a token used to load the whole users row (base64 profile picture
+and JSON columns included) on every request. Only the fields authorization
+and audit code read, PRINCIPAL_FIELDS, are cached, keyed by the token's
+email, in two tiers: an in-process dict whose entries live
+PRINCIPAL_CACHE_TTL seconds, then Redis (PRINCIPAL_CACHE_REDIS_TTL).
+Endpoints get a Principal, which loads the full ORM User from the request's
+session the first time any other attribute is read.
+
+A committed insert, update or delete of a User row (role, department,
+status, company, profile) drops that user's entries from Redis and from this
+process; other API processes serve their in-process copy until its short TTL
+runs out. If Redis is unavailable the cache degrades to the in-process tier
+and retries Redis after REDIS_RETRY_AFTER seconds.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.models import Company, User
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY = "principal:{email}"
+PRINCIPAL_FIELDS = ("id", "email", "full_name", "company_id", "role", "department", "status", "is_active")
+REDIS_RETRY_AFTER = 30.0
+# Session.info key of emails whose cache entries are dropped on commit
+_PENDING = "principal_cache_invalidate"
+
+_lock = threading.Lock()
+_memory: Dict[str, tuple] = {}
+_redis_client = None
+_redis_down_until = 0.0
+
+
+class Principal:
+    """
+    The authenticated user: PRINCIPAL_FIELDS as attributes, the full ORM row
+    as `user` (loaded on first use), and any other User attribute read
+    through it. Modify `user`, not the principal: setting a public attribute
+    on the principal raises AttributeError instead of being silently lost.
+    """
+
+    def __init__(self, data: Dict[str, Any], db: Session):
+        self.__dict__.update(data)
+        self._db = db
+        self._user: Optional[User] = None
+
+    @property
+    def user(self) -> Optional[User]:
+        if self._user is None:
+            self._user = self._db.get(User, self.id)
+        return self._user
+
+    @property
+    def company(self) -> Optional[Company]:
+        return self._db.get(Company, self.company_id) if self.company_id else None
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes outside the cached projection
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name: str, value: Any):
+        if not name.startswith("_"):
+            raise AttributeError(f"Principal is read-only; set {name!r} on current_user.user")
+        super().__setattr__(name, value)
+
+    def __repr__(self) -> str:
+        return f"<Principal id={self.id} email={self.email!r} role={self.role!r}>"
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True,
+                                       socket_connect_timeout=0.5, socket_timeout=0.5)
+    return _redis_client
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _redis_down_until
+
+
+def _redis_failed(action: str, error: Exception) -> None:
+    global _redis_down_until
+    logger.warning(f"Principal cache {action} failed, using the in-process cache only: {error}")
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+
+def _remember(email: str, data: Dict[str, Any]) -> None:
+    with _lock:
+        _memory[email] = (time.monotonic() + settings.PRINCIPAL_CACHE_TTL, data)
+        if len(_memory) > settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for key in [key for key, (expires, _) in _memory.items() if expires <= now]:
+                del _memory[key]
+            while len(_memory) > settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+                del _memory[next(iter(_memory))]
+
+
+def get(email: str) -> Optional[Dict[str, Any]]:
+    """Cached auth fields of the user with `email`, or None."""
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return None
+    with _lock:
+        entry = _memory.get(email)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    if not _redis_available():
+        return None
+    try:
+        raw = _get_redis().get(PRINCIPAL_KEY.format(email=email))
+    except Exception as e:
+        _redis_failed("read", e)
+        return None
+    if not raw:
+        return None
+    data = json.loads(raw)
+    _remember(email, data)
+    return data
+
+
+def put(email: str, data: Dict[str, Any]) -> None:
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return
+    _remember(email, data)
+    if not _redis_available():
+        return
+    try:
+        _get_redis().set(PRINCIPAL_KEY.format(email=email), json.dumps(data), ex=settings.PRINCIPAL_CACHE_REDIS_TTL)
+    except Exception as e:
+        _redis_failed("write", e)
+
+
+def invalidate(*emails: str) -> None:
+    emails = [email for email in emails if email]
+    if not emails:
+        return
+    with _lock:
+        for email in emails:
+            _memory.pop(email, None)
+    if not settings.PRINCIPAL_CACHE_ENABLED or not _redis_available():
+        return
+    try:
+        _get_redis().delete(*(PRINCIPAL_KEY.format(email=email) for email in emails))
+    except Exception as e:
+        _redis_failed("invalidate", e)
+
+
+def load(db: Session, email: str) -> Optional[Principal]:
+    """The principal for `email`: from the cache, else one narrow users query."""
+    data = get(email)
+    if data is None:
+        row = db.query(*(getattr(User, field) for field in PRINCIPAL_FIELDS)).filter(User.email == email).first()
+        if row is None:
+            return None
+        data = dict(row._mapping)
+        put(email, data)
+    return Principal(data, db)
+
+
+def clear_memory() -> None:
+    with _lock:
+        _memory.clear()
+
+
+# ---- invalidation ----------------------------------------------------------
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    pending: Set[str] = session.info.setdefault(_PENDING, set())
+    pending.add(target.email)
+    # A changed email invalidates the old key too
+    pending.update(inspect(target).attrs.email.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        invalidate(*pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
@@ -1,9 +1,61 @@
+import asyncio
+import functools
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+
+from app.core.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for blocking vector store calls (VECTOR_DB_MAX_WORKERS threads)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.VECTOR_DB_MAX_WORKERS, thread_name_prefix="vector-db"
+                )
+    return _executor
+
+
+def filter_terms(filters: Optional[Dict]) -> Dict[str, Any]:
+    """Equality terms of a where clause: a flat dict or Chroma's {"$and": [{key: value}, ...]}."""
+    terms = {}
+    for key, value in (filters or {}).items():
+        if key == "$and":
+            for clause in value:
+                terms.update(filter_terms(clause))
+        else:
+            terms[key] = value
+    return terms
+
+
+def where_clause(terms: Dict[str, Any]) -> Optional[Dict]:
+    """Chroma where clause for equality terms (several keys must be combined with $and)."""
+    if len(terms) > 1:
+        return {"$and": [{key: value} for key, value in terms.items()]}
+    return dict(terms) or None
+
 
 class SearchEngine(ABC):
     """Abstract base class for search engine implementations."""
 
+    async def run_blocking(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Run a blocking client call on the vector store pool instead of the event
+        loop. Raises asyncio.TimeoutError after `timeout` seconds
+        (VECTOR_DB_TIMEOUT by default); the pool bounds how many calls can be
+        stuck on a slow store at once.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout=timeout or settings.VECTOR_DB_TIMEOUT)
+
     @abstractmethod
     def index_candidate(self, candidate_id: str, text: str, metadata: Dict[str, Any]) -> bool:
         """
@@ -1,33 +1,206 @@
 import chromadb
+import httpx
 import os
 import logging
-from typing import List, Dict, Any, Optional
-from app.services.search.base import SearchEngine
-from app.services.embeddings import generate_embedding
+import re
+from chromadb.config import Settings as ChromaSettings
+from app.core.config import settings
+from typing import List, Dict, Any, Optional, Tuple
+from app.services.search.base import SearchEngine, filter_terms, where_clause
+from app.services.embeddings import generate_embedding, generate_embeddings_batch
 
 logger = logging.getLogger(__name__)
 
+COLLECTION_METADATA = {"hnsw:space": "cosine"} # Use Cosine Similarity
+
+
+def _company_of(metadata: Optional[Dict[str, Any]]) -> Optional[int]:
+    try:
+        return int((metadata or {}).get("company_id"))
+    except (TypeError, ValueError):
+        return None
+
+
 class ChromaSearchEngine(SearchEngine):
-    def __init__(self):
-        self.collection_name = "candidates"
+    """
+    Candidates live in the CHROMA_COLLECTION ("candidates") collection, or, with
+    CHROMA_PARTITIONING set, in one collection per company ("company") or per
+    company_id % CHROMA_PARTITION_SHARDS ("shard"), created on first write.
+    Company-scoped searches then walk only that tenant's HNSW graph. Candidates
+    without a company stay in "candidates". Writes and searches are routed by
+    company_id (metadata / filters); id lookups without a company check every
+    partition. migrate_to_partitions() moves an existing single collection.
+    """
+
+    def __init__(self, collection_name: Optional[str] = None):
+        self.collection_name = collection_name or settings.CHROMA_COLLECTION
+        self.partitioning = settings.CHROMA_PARTITIONING
+        self._partitions_cache: Dict[str, Any] = {}
         
         # Connect to ChromaDB service defined in docker-compose
         chroma_host = os.getenv("CHROMA_HOST", "vector_db")
         chroma_port = os.getenv("CHROMA_PORT", "8000")
         
+        self.chroma_host = chroma_host
+        self.chroma_port = chroma_port
         self.client = None
         self.collection = None
+        self.max_batch_size = None
         
+        self._connect()
+
+    def _connect(self) -> bool:
         try:
-            logger.info(f"Connecting to ChromaDB at {chroma_host}:{chroma_port}")
-            self.client = chromadb.HttpClient(host=chroma_host, port=int(chroma_port))
+            logger.info(f"Connecting to ChromaDB at {self.chroma_host}:{self.chroma_port}")
+            # One pooled HTTP connection per executor thread (see SearchEngine.run_blocking)
+            self.client = chromadb.HttpClient(
+                host=self.chroma_host,
+                port=int(self.chroma_port),
+                settings=ChromaSettings(
+                    chroma_http_max_connections=settings.VECTOR_DB_MAX_WORKERS,
+                    chroma_http_max_keepalive_connections=settings.VECTOR_DB_MAX_WORKERS,
+                ),
+            )
+            self._set_http_timeout()
             self.collection = self.client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"} # Use Cosine Similarity
+                metadata=COLLECTION_METADATA
             )
+            self._partitions_cache = {}
+            try:
+                size = self.client.get_max_batch_size()
+                self.max_batch_size = size if isinstance(size, int) and size > 0 else None
+            except Exception:
+                self.max_batch_size = None
             logger.info(f"Connected to ChromaDB collection: {self.collection_name}")
+            return True
         except Exception as e:
             logger.error(f"Failed to connect to ChromaDB: {e}")
+            return False
+
+    def _set_http_timeout(self):
+        # chromadb's HTTP session has no timeout; bound each request so a hung server
+        # releases the executor thread (run_blocking only stops waiting for it)
+        session = getattr(getattr(self.client, "_server", None), "_session", None)
+        if isinstance(session, httpx.Client):
+            session.timeout = httpx.Timeout(settings.VECTOR_DB_TIMEOUT)
+
+    # ---- tenant partitions -------------------------------------------------
+
+    def partition_name(self, company_id: Optional[int]) -> str:
+        if company_id is None or self.partitioning not in ("company", "shard"):
+            return self.collection_name
+        if self.partitioning == "shard":
+            return f"{self.collection_name}_shard_{company_id % settings.CHROMA_PARTITION_SHARDS}"
+        return f"{self.collection_name}_company_{company_id}"
+
+    def _partition(self, company_id: Optional[int], create: bool = False):
+        """Collection holding `company_id`'s candidates; None if it does not exist yet."""
+        name = self.partition_name(company_id)
+        if name == self.collection_name:
+            return self.collection
+        collection = self._partitions_cache.get(name)
+        if collection is None:
+            try:
+                if create:
+                    collection = self.client.get_or_create_collection(name=name, metadata=COLLECTION_METADATA)
+                else:
+                    collection = self.client.get_collection(name=name)
+            except Exception as e:
+                if create:
+                    raise
+                logger.debug(f"ChromaDB partition {name} not found: {e}")
+                return None
+            self._partitions_cache[name] = collection
+        return collection
+
+    def _all_partitions(self) -> List[Any]:
+        """The default collection plus every tenant partition."""
+        if self.partitioning not in ("company", "shard"):
+            return [self.collection]
+        # Only partition names: other collections may share the prefix (e.g. a reindex target "candidates_512")
+        pattern = re.compile(rf"{re.escape(self.collection_name)}_(company|shard)_\d+")
+        partitions = [self.collection]
+        for collection in self.client.list_collections():
+            name = getattr(collection, "name", collection)
+            if isinstance(name, str) and pattern.fullmatch(name):
+                partitions.append(self._partition_by_name(name))
+        return [p for p in partitions if p is not None]
+
+    def _partition_by_name(self, name: str):
+        if name not in self._partitions_cache:
+            self._partitions_cache[name] = self.client.get_collection(name=name)
+        return self._partitions_cache[name]
+
+    def _group_by_partition(self, metadatas: List[Dict]) -> Dict[Optional[int], List[int]]:
+        """Positions of `metadatas` grouped by the company whose partition they go to."""
+        if self.partitioning not in ("company", "shard"):
+            return {None: list(range(len(metadatas)))}
+        groups: Dict[Optional[int], List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(_company_of(metadata), []).append(i)
+        return groups
+
+    def _lookup_partitions(self, company_id: Optional[int]) -> List[Any]:
+        if company_id is not None:
+            collection = self._partition(company_id)
+            return [collection] if collection is not None else []
+        return self._all_partitions()
+
+    def _route_filters(self, filters: Optional[Dict]) -> Tuple[Optional[Any], Optional[Dict]]:
+        """(collection to query, where clause) for a search."""
+        terms = filter_terms(filters)
+        company_id = _company_of(terms)
+        collection = self._partition(company_id)
+        if filters and self.partitioning == "company" and company_id is not None:
+            # One company per collection: the company filter is implied
+            filters = where_clause({k: v for k, v in terms.items() if k != "company_id"})
+        return collection, filters
+
+    def migrate_to_partitions(self, batch_size: int = 500, delete_source: bool = False) -> Dict[str, int]:
+        """
+        Copy candidates from the single "candidates" collection into their tenant
+        partitions (vectors, documents and metadata as stored; nothing is
+        re-embedded). Candidates without a company stay where they are. With
+        `delete_source`, moved ids are removed from "candidates". Idempotent.
+        """
+        if self.partitioning not in ("company", "shard"):
+            raise ValueError("Set CHROMA_PARTITIONING to 'company' or 'shard' before migrating")
+        if not self.collection and not self._connect():
+            raise RuntimeError("ChromaDB unavailable")
+
+        counts = {"moved": 0, "kept": 0}
+        offset = 0
+        while True:
+            page = self.collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset
+            )
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            metadatas = page.get("metadatas") or [{}] * len(ids)
+            documents = page.get("documents") or [""] * len(ids)
+            embeddings = page.get("embeddings")
+            moving = [i for i, metadata in enumerate(metadatas) if _company_of(metadata) is not None]
+            counts["kept"] += len(ids) - len(moving)
+            if moving:
+                if not self.upsert(
+                    ids=[ids[i] for i in moving],
+                    documents=[documents[i] or "" for i in moving],
+                    metadatas=[metadatas[i] for i in moving],
+                    embeddings=[[float(x) for x in embeddings[i]] for i in moving],
+                ):
+                    raise RuntimeError(f"Failed to write partitions at offset {offset}")
+                counts["moved"] += len(moving)
+                if delete_source:
+                    self.collection.delete(ids=[ids[i] for i in moving])
+            # Deleted rows no longer occupy offsets; kept ones do
+            offset += len(ids) - (len(moving) if delete_source else 0)
+            logger.info(f"Partition migration: {counts['moved']} moved, {counts['kept']} kept")
+        counts["partitions"] = len(self._all_partitions()) - 1
+        return counts
+
+    # ---- writes ----------------------------------------------------------
 
     async def index_candidate(self, candidate_id: str, text: str, metadata: Dict[str, Any]) -> bool:
         if not self.collection:
@@ -43,27 +216,198 @@ class ChromaSearchEngine(SearchEngine):
                 logger.error(f"Failed to generate embedding for candidate {candidate_id}")
                 return False
 
-            self.collection.upsert(
+            return await self.run_blocking(
+                self.upsert,
                 ids=[str(candidate_id)],
                 documents=[text],
                 metadatas=[metadata],
                 embeddings=[embedding]
             )
-            return True
         except Exception as e:
             logger.error(f"Error indexing candidate {candidate_id}: {e}")
             return False
             
+    async def index_candidates(self, candidates: List[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        Index many (candidate_id, text, metadata) at once: embeddings are
+        generated in batched requests and written with multi-id upserts.
+        Returns the number of candidates indexed.
+        """
+        if not candidates:
+            return 0
+        if not self.collection and not self._connect():
+            logger.warning("ChromaDB collection not available.")
+            return 0
+
+        embeddings = await generate_embeddings_batch([text for _, text, _ in candidates])
+        ready = [(c, e) for c, e in zip(candidates, embeddings) if e]
+        for (candidate_id, _, _), embedding in zip(candidates, embeddings):
+            if not embedding:
+                logger.error(f"Failed to generate embedding for candidate {candidate_id}")
+        if not ready:
+            return 0
+
+        try:
+            ok = await self.run_blocking(
+                self.upsert,
+                ids=[str(c[0]) for c, _ in ready],
+                documents=[c[1] for c, _ in ready],
+                metadatas=[c[2] for c, _ in ready],
+                embeddings=[e for _, e in ready],
+            )
+        except Exception as e:
+            logger.error(f"Error upserting to ChromaDB: {e!r}")
+            return 0
+        return len(ready) if ok else 0
+
     def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings: List[List[float]]) -> bool:
-        if not self.collection:
+        # Reconnect if ChromaDB was down when this process started, so retried
+        # index tasks succeed once it is back.
+        if not self.collection and not self._connect():
             return False
         try:
-            self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+            for company_id, positions in self._group_by_partition(metadatas).items():
+                collection = self._partition(company_id, create=True)
+                # Many ids per call, split at the server's maximum batch size
+                step = self.max_batch_size or len(positions) or 1
+                for i in range(0, len(positions), step):
+                    chunk = positions[i:i + step]
+                    collection.upsert(
+                        ids=[ids[j] for j in chunk],
+                        # The rich text can be rebuilt from Postgres; storing it is optional
+                        documents=[documents[j] for j in chunk] if settings.CHROMA_STORE_DOCUMENTS else None,
+                        metadatas=[metadatas[j] for j in chunk],
+                        embeddings=[embeddings[j] for j in chunk],
+                    )
             return True
         except Exception as e:
             logger.error(f"Error upserting to ChromaDB: {e}")
             return False
 
+    def get_embeddings(self, ids: List[str], company_id: Optional[int] = None) -> Dict[str, List[float]]:
+        """
+        Fetch stored vectors by id. Missing ids are simply absent from the result.
+        Passing the candidates' company_id avoids checking every partition.
+        """
+        if not self.collection or not ids:
+            return {}
+        try:
+            found = {}
+            for collection in self._lookup_partitions(company_id):
+                pending = [str(i) for i in ids if str(i) not in found]
+                if not pending:
+                    break
+                results = collection.get(ids=pending, include=["embeddings"])
+                embeddings = results.get("embeddings")
+                if embeddings is None:
+                    continue
+                found.update({
+                    cid: [float(x) for x in emb]
+                    for cid, emb in zip(results["ids"], embeddings)
+                    if emb is not None and len(emb) > 0
+                })
+            return found
+        except Exception as e:
+            logger.error(f"Error fetching embeddings from ChromaDB: {e}")
+            return {}
+
+    def get_metadatas(self, ids: List[str], company_id: Optional[int] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Stored metadata by id, without pulling the vectors. Missing ids are
+        absent from the result; None means ChromaDB could not be read.
+        Passing the candidates' company_id avoids checking every partition.
+        """
+        if not self.collection and not self._connect():
+            return None
+        if not ids:
+            return {}
+        try:
+            found = {}
+            for collection in self._lookup_partitions(company_id):
+                pending = [str(i) for i in ids if str(i) not in found]
+                if not pending:
+                    break
+                results = collection.get(ids=pending, include=["metadatas"])
+                metadatas = results.get("metadatas") or []
+                found.update({
+                    cid: (metadatas[i] if i < len(metadatas) else None) or {}
+                    for i, cid in enumerate(results.get("ids") or [])
+                })
+            return found
+        except Exception as e:
+            logger.error(f"Error fetching metadata from ChromaDB: {e}")
+            return None
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]) -> bool:
+        """
+        Replace the metadata of existing ids, keeping their vectors. A CV's
+        company never changes, so the ids are already in the partition that
+        their metadata routes to.
+        """
+        if not self.collection and not self._connect():
+            return False
+        try:
+            for company_id, positions in self._group_by_partition(metadatas).items():
+                collection = self._partition(company_id, create=True)
+                step = self.max_batch_size or len(positions) or 1
+                for i in range(0, len(positions), step):
+                    chunk = positions[i:i + step]
+                    collection.update(ids=[ids[j] for j in chunk], metadatas=[metadatas[j] for j in chunk])
+            return True
+        except Exception as e:
+            logger.error(f"Error updating metadata in ChromaDB: {e}")
+            return False
+
+    def search_by_vector(self, vector: List[float], n_results: int = 10, filters: Optional[Dict] = None,
+                         exclude_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Nearest stored candidates to a query vector, best first."""
+        if not self.collection:
+            return []
+
+        collection, filters = self._route_filters(filters)
+        if collection is None:
+            # No partition yet: nothing indexed for this company
+            return []
+
+        excluded = {str(cid) for cid in exclude_ids or []}
+        results = collection.query(
+            query_embeddings=[vector],
+            n_results=n_results + len(excluded),
+            where=filters, # ChromaDB supports 'where' clause for filtering
+            include=["metadatas", "distances"]  # documents are not needed, don't transfer them
+        )
+        
+        # Format results
+        formatted_results = []
+        if results and results['ids']:
+            ids = results['ids'][0]
+            metadatas = results['metadatas'][0]
+            distances = results['distances'][0] if 'distances' in results else []
+            
+            for i, cid in enumerate(ids):
+                if cid in excluded:
+                    continue
+                # Chroma returns distance.
+                # If configured as "cosine", it returns Cosine Distance (0 to 2).
+                # If configured as "l2" (default), it returns L2 Distance (0 to 2 for normalized vectors).
+                # In both cases, a distance of ~1.0 means "unrelated".
+                # A distance of > 1.0 means "negatively correlated" or "far apart".
+                # Previous formula (1 - dist) was too harsh for L2/Cosine distance > 1.0.
+                # New formula: Linear mapping from [0, 2] to [1, 0].
+                # 0.0 -> 100%
+                # 1.0 -> 50%
+                # 2.0 -> 0%
+                dist = distances[i] if i < len(distances) else 2.0
+                score = max(0.0, (2.0 - dist) / 2.0)
+                
+                formatted_results.append({
+                    "id": cid,
+                    "metadata": metadatas[i] if i < len(metadatas) else {},
+                    "score": score
+                })
+                
+        return formatted_results[:n_results]
+
     async def search(self, query_text: str, n_results: int = 10, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
         if not self.collection:
             return []
@@ -74,50 +418,18 @@ class ChromaSearchEngine(SearchEngine):
             if not query_embedding:
                 return []
 
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=filters # ChromaDB supports 'where' clause for filtering
-            )
-            
-            # Format results
-            formatted_results = []
-            if results and results['ids']:
-                ids = results['ids'][0]
-                metadatas = results['metadatas'][0]
-                distances = results['distances'][0] if 'distances' in results else []
-                
-                for i, cid in enumerate(ids):
-                    # Chroma returns distance.
-                    # If configured as "cosine", it returns Cosine Distance (0 to 2).
-                    # If configured as "l2" (default), it returns L2 Distance (0 to 2 for normalized vectors).
-                    # In both cases, a distance of ~1.0 means "unrelated".
-                    # A distance of > 1.0 means "negatively correlated" or "far apart".
-                    # Previous formula (1 - dist) was too harsh for L2/Cosine distance > 1.0.
-                    # New formula: Linear mapping from [0, 2] to [1, 0].
-                    # 0.0 -> 100%
-                    # 1.0 -> 50%
-                    # 2.0 -> 0%
-                    dist = distances[i] if i < len(distances) else 2.0
-                    score = max(0.0, (2.0 - dist) / 2.0)
-                    
-                    formatted_results.append({
-                        "id": cid,
-                        "metadata": metadatas[i] if i < len(metadatas) else {},
-                        "score": score
-                    })
-                    
-            return formatted_results
+            return await self.run_blocking(self.search_by_vector, query_embedding, n_results, filters)
         except Exception as e:
-            logger.error(f"Error searching ChromaDB: {e}")
+            logger.error(f"Error searching ChromaDB: {e!r}")
             return []
 
-    def delete_candidate(self, candidate_id: str) -> bool:
+    def delete_candidate(self, candidate_id: str, company_id: Optional[int] = None) -> bool:
         if not self.collection:
             return False
             
         try:
-            self.collection.delete(ids=[str(candidate_id)])
+            for collection in self._lookup_partitions(company_id):
+                collection.delete(ids=[str(candidate_id)])
             return True
         except Exception as e:
             logger.error(f"Error deleting candidate {candidate_id}: {e}")
@@ -1,14 +1,38 @@
+from app.core.config import settings
 from app.services.search.base import SearchEngine
-from app.services.search.chroma import ChromaSearchEngine
 
 _search_engine_instance = None
 
 def get_search_engine() -> SearchEngine:
     """
     Factory function to get the configured search engine instance.
-    Currently returns ChromaSearchEngine.
+    SEARCH_BACKEND selects ChromaSearchEngine ("chroma", the default) or the
+    in-process NumpySearchEngine ("numpy").
     """
     global _search_engine_instance
     if _search_engine_instance is None:
-        _search_engine_instance = ChromaSearchEngine()
+        if settings.SEARCH_BACKEND == "numpy":
+            from app.services.search.numpy_index import NumpySearchEngine
+            _search_engine_instance = NumpySearchEngine()
+        else:
+            from app.services.search.chroma import ChromaSearchEngine
+            _search_engine_instance = ChromaSearchEngine()
     return _search_engine_instance
+
+
+_job_search_engine_instance = None
+
+def get_job_search_engine() -> SearchEngine:
+    """
+    The job embeddings index (see app.services.job_index): the same backend as
+    candidates, in the CHROMA_JOB_COLLECTION collection or under JOB_INDEX_PATH.
+    """
+    global _job_search_engine_instance
+    if _job_search_engine_instance is None:
+        if settings.SEARCH_BACKEND == "numpy":
+            from app.services.search.numpy_index import NumpySearchEngine
+            _job_search_engine_instance = NumpySearchEngine(path=settings.JOB_INDEX_PATH)
+        else:
+            from app.services.search.chroma import ChromaSearchEngine
+            _job_search_engine_instance = ChromaSearchEngine(collection_name=settings.CHROMA_JOB_COLLECTION)
+    return _job_search_engine_instance
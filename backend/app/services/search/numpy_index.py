@@ -0,0 +1,482 @@
+"""
+In-process vector index on a memory-mapped NumPy matrix.
+
+An alternative to ChromaSearchEngine that needs no separate service: for small
+tenants, CI, and latency-sensitive matching. Selected with SEARCH_BACKEND=numpy.
+
+Files under VECTOR_INDEX_PATH:
+
+  index.json     dimension and dtype (float32, float16 or int8) of the matrix
+  vectors.bin    row-major matrix of L2-normalized vectors, opened with
+                 np.memmap, so startup maps the file instead of reading it
+  scales.bin     int8 only: one float32 scale per row (see _quantize)
+  entries.jsonl  append-only log of row assignments, deletions and metadata
+                 (the sidecar id/metadata array), replayed on load
+
+Search is an exact cosine top-k: one matrix-vector product over the candidate
+rows, done in blocks so float16 and int8 matrices are upcast a block at a time
+(int8 scores are multiplied by each row's scale afterwards). A
+company_id array gives a partition mask for the usual company filter; other
+metadata filters are checked on the remaining rows.
+
+Several processes (API workers, Celery index workers) can share one index:
+writers serialize on a file lock and every process tails the log before
+reading, so it sees rows written elsewhere. The log is rewritten (compacted)
+once it holds mostly superseded entries.
+"""
+
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.search.base import SearchEngine, filter_terms
+from app.services.embeddings import generate_embedding, generate_embeddings_batch
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.bin"
+LOG_FILE = "entries.jsonl"
+LOCK_FILE = ".lock"
+SCALES_FILE = "scales.bin"
+
+DTYPES = ("float32", "float16", "int8")
+
+INITIAL_CAPACITY = 1024
+SEARCH_BLOCK_ROWS = 65536
+# Compact the log once it has this many entries more than there are live rows
+COMPACT_SLACK = 1000
+
+NO_COMPANY = -1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization: each row is divided by
+    max(|x|) / 127 and rounded. Returns (int8 rows, float32 scale per row);
+    row * scale recovers the vector to within half a step per component.
+    """
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _company_of(metadata: Optional[Dict[str, Any]]) -> int:
+    try:
+        return int((metadata or {}).get("company_id"))
+    except (TypeError, ValueError):
+        return NO_COMPANY
+
+
+class NumpySearchEngine(SearchEngine):
+    def __init__(self, path: Optional[str] = None, dtype: Optional[str] = None):
+        self.path = path or settings.VECTOR_INDEX_PATH
+        self.dtype = np.dtype(dtype or settings.VECTOR_INDEX_DTYPE)
+        if self.dtype.name not in DTYPES:
+            raise ValueError(f"Unsupported vector index dtype {self.dtype.name}; use one of {', '.join(DTYPES)}")
+        self.dim: Optional[int] = None
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._reset_state()
+
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            self._refresh()
+        logger.info(f"Vector index at {self.path}: {len(self._rows)} vectors")
+
+    # ---- state and files -------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype == np.int8
+
+    def memory_bytes(self) -> int:
+        """Size of the mapped vector files (what the index keeps in the page cache)."""
+        with self._lock:
+            self._refresh()
+            total = 0
+            for name in (VECTORS_FILE, SCALES_FILE):
+                if os.path.exists(self._file(name)):
+                    total += os.path.getsize(self._file(name))
+            return total
+
+    def _reset_state(self):
+        self._ids: List[Optional[str]] = []              # row -> id (None = free)
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}                  # id -> row
+        self._companies = np.full(INITIAL_CAPACITY, NO_COMPANY, dtype=np.int64)
+        self._live = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._log_inode = None
+        self._log_offset = 0
+        self._log_entries = 0
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(self._file(LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_header(self):
+        if self.dim is not None or not os.path.exists(self._file(INDEX_FILE)):
+            return
+        with open(self._file(INDEX_FILE)) as f:
+            header = json.load(f)
+        self.dim = int(header["dim"])
+        stored = np.dtype(header["dtype"])
+        if stored != self.dtype:
+            logger.warning(f"Vector index at {self.path} is {stored}, not {self.dtype}; using {stored}")
+            self.dtype = stored
+
+    def _create(self, dim: int):
+        with open(self._file(INDEX_FILE), "w") as f:
+            json.dump({"dim": dim, "dtype": self.dtype.name}, f)
+        open(self._file(VECTORS_FILE), "ab").close()
+        if self.quantized:
+            open(self._file(SCALES_FILE), "ab").close()
+        self.dim = dim
+
+    def _map(self):
+        """(Re)map vectors.bin if it grew since it was last mapped."""
+        if self.dim is None:
+            return
+        row_bytes = self.dim * self.dtype.itemsize
+        capacity = os.path.getsize(self._file(VECTORS_FILE)) // row_bytes
+        if capacity == 0:
+            self._matrix = self._scales = None
+        elif self._matrix is None or self._matrix.shape[0] != capacity:
+            self._matrix = np.memmap(self._file(VECTORS_FILE), dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+            if self.quantized:
+                self._scales = np.memmap(self._file(SCALES_FILE), dtype=np.float32, mode="r+", shape=(capacity,))
+
+    def _reserve(self, rows: int):
+        """Grow vectors.bin (doubling) so it holds at least `rows` rows. Caller holds the file lock."""
+        current = self._matrix.shape[0] if self._matrix is not None else 0
+        if rows <= current:
+            return
+        capacity = max(INITIAL_CAPACITY, current)
+        while capacity < rows:
+            capacity *= 2
+        with open(self._file(VECTORS_FILE), "r+b") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        if self.quantized:
+            with open(self._file(SCALES_FILE), "r+b") as f:
+                f.truncate(capacity * np.dtype(np.float32).itemsize)
+        self._map()
+
+    def _grow_arrays(self, rows: int):
+        if rows <= self._live.shape[0]:
+            return
+        size = self._live.shape[0]
+        while size < rows:
+            size *= 2
+        companies = np.full(size, NO_COMPANY, dtype=np.int64)
+        live = np.zeros(size, dtype=bool)
+        companies[:self._companies.shape[0]] = self._companies
+        live[:self._live.shape[0]] = self._live
+        self._companies, self._live = companies, live
+
+    def _apply(self, entry: Dict[str, Any]):
+        op = entry["op"]
+        cid = entry["id"]
+        if op == "put":
+            row = entry["row"]
+            previous = self._rows.get(cid)
+            if previous is not None and previous != row:
+                self._free(previous)
+            while len(self._ids) <= row:
+                self._ids.append(None)
+                self._metadatas.append(None)
+            self._grow_arrays(row + 1)
+            self._ids[row] = cid
+            self._rows[cid] = row
+            self._metadatas[row] = entry.get("metadata") or {}
+            self._companies[row] = _company_of(entry.get("metadata"))
+            self._live[row] = True
+        elif op == "meta":
+            row = self._rows.get(cid)
+            if row is not None:
+                self._metadatas[row] = entry.get("metadata") or {}
+                self._companies[row] = _company_of(entry.get("metadata"))
+        elif op == "del":
+            row = self._rows.get(cid)
+            if row is not None:
+                self._free(row)
+        self._log_entries += 1
+
+    def _free(self, row: int):
+        cid = self._ids[row]
+        if cid is not None and self._rows.get(cid) == row:
+            del self._rows[cid]
+        self._ids[row] = None
+        self._metadatas[row] = None
+        self._companies[row] = NO_COMPANY
+        self._live[row] = False
+
+    def _refresh(self):
+        """Apply log entries appended (by any process) since the last look."""
+        self._load_header()
+        try:
+            stat = os.stat(self._file(LOG_FILE))
+        except FileNotFoundError:
+            self._map()
+            return
+        if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+            # First load, or the log was compacted: replay it from the start
+            self._reset_state()
+            self._log_inode = stat.st_ino
+        if stat.st_size > self._log_offset:
+            with open(self._file(LOG_FILE), "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read(stat.st_size - self._log_offset)
+            complete = data.rfind(b"\n") + 1  # a writer may be mid-line
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+            self._log_offset += complete
+        self._map()
+
+    def _append(self, entries: List[Dict[str, Any]]):
+        """Write entries to the log and apply them. Caller holds the file lock, refreshed."""
+        payload = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries).encode("utf-8")
+        with open(self._file(LOG_FILE), "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._log_inode is None:
+            self._log_inode = os.stat(self._file(LOG_FILE)).st_ino
+        for entry in entries:
+            self._apply(entry)
+        self._log_offset += len(payload)
+        if self._log_entries > 2 * len(self._rows) + COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self):
+        tmp = self._file(LOG_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            for cid, row in self._rows.items():
+                entry = {"op": "put", "row": row, "id": cid, "metadata": self._metadatas[row]}
+                f.write((json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(LOG_FILE))
+        stat = os.stat(self._file(LOG_FILE))
+        self._log_inode, self._log_offset, self._log_entries = stat.st_ino, stat.st_size, len(self._rows)
+
+    # ---- writes ----------------------------------------------------------
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings: List[List[float]]) -> bool:
+        """Insert or replace vectors. Documents are not stored (Postgres has the text)."""
+        if not ids:
+            return True
+        try:
+            vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+            with self._lock, self._file_lock():
+                self._refresh()
+                if self.dim is None:
+                    self._create(vectors.shape[1])
+                if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+                    raise ValueError(f"expected {self.dim}-dimensional vectors, got shape {vectors.shape}")
+
+                free = [int(r) for r in np.flatnonzero(~self._live[:len(self._ids)])][::-1]
+                next_row = len(self._ids)
+                assigned: Dict[str, int] = {}
+                entries = []
+                for cid, metadata in zip(ids, metadatas):
+                    cid = str(cid)
+                    row = assigned.get(cid, self._rows.get(cid))
+                    if row is None:
+                        if free:
+                            row = free.pop()
+                        else:
+                            row, next_row = next_row, next_row + 1
+                    assigned[cid] = row
+                    entries.append({"op": "put", "row": row, "id": cid, "metadata": metadata or {}})
+
+                rows = np.fromiter((e["row"] for e in entries), dtype=np.int64, count=len(entries))
+                self._reserve(int(rows.max()) + 1)
+                if self.quantized:
+                    self._matrix[rows], self._scales[rows] = _quantize(vectors)
+                    self._scales.flush()
+                else:
+                    self._matrix[rows] = vectors.astype(self.dtype)
+                self._matrix.flush()
+                self._append(entries)
+            return True
+        except Exception as e:
+            logger.error(f"Error upserting to vector index: {e}")
+            return False
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]) -> bool:
+        """Replace the metadata of existing ids, keeping their vectors."""
+        try:
+            with self._lock, self._file_lock():
+                self._refresh()
+                entries = [
+                    {"op": "meta", "id": str(cid), "metadata": metadata or {}}
+                    for cid, metadata in zip(ids, metadatas) if str(cid) in self._rows
+                ]
+                if entries:
+                    self._append(entries)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating metadata in vector index: {e}")
+            return False
+
+    def delete_candidate(self, candidate_id: str, company_id: Optional[int] = None) -> bool:
+        try:
+            with self._lock, self._file_lock():
+                self._refresh()
+                if str(candidate_id) in self._rows:
+                    self._append([{"op": "del", "id": str(candidate_id)}])
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting candidate {candidate_id}: {e}")
+            return False
+
+    async def index_candidate(self, candidate_id: str, text: str, metadata: Dict[str, Any]) -> bool:
+        embedding = await generate_embedding(
+            text,
+            cv_id=int(candidate_id) if str(candidate_id).isdigit() else None,
+            company_id=metadata.get("company_id"),
+            user_id=metadata.get("user_id"),
+        )
+        if not embedding:
+            logger.error(f"Failed to generate embedding for candidate {candidate_id}")
+            return False
+        return await self.run_blocking(self.upsert, [str(candidate_id)], [text], [metadata], [embedding])
+
+    async def index_candidates(self, candidates: List[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """Index many (candidate_id, text, metadata) with batched embeddings and one write."""
+        if not candidates:
+            return 0
+        embeddings = await generate_embeddings_batch([text for _, text, _ in candidates])
+        ready = [(c, e) for c, e in zip(candidates, embeddings) if e]
+        if not ready:
+            return 0
+        ok = await self.run_blocking(
+            self.upsert,
+            [str(c[0]) for c, _ in ready],
+            [c[1] for c, _ in ready],
+            [c[2] for c, _ in ready],
+            [e for _, e in ready],
+        )
+        return len(ready) if ok else 0
+
+    # ---- reads -----------------------------------------------------------
+
+    def get_embeddings(self, ids: List[str], company_id: Optional[int] = None) -> Dict[str, List[float]]:
+        """
+        Fetch stored vectors by id. Missing ids are simply absent from the result.
+        company_id is accepted for parity with Chroma; rows are found by id alone.
+        """
+        with self._lock:
+            self._refresh()
+            rows = {str(cid): self._rows[str(cid)] for cid in ids if str(cid) in self._rows}
+            return {cid: self._vector(row).tolist() for cid, row in rows.items()}
+
+    def _vector(self, row: int) -> np.ndarray:
+        vector = self._matrix[row].astype(np.float32)
+        if self.quantized:
+            vector *= self._scales[row]
+        return vector
+
+    def get_metadatas(self, ids: List[str], company_id: Optional[int] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            self._refresh()
+            return {str(cid): dict(self._metadatas[self._rows[str(cid)]]) for cid in ids if str(cid) in self._rows}
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def _candidate_rows(self, filters: Optional[Dict]) -> np.ndarray:
+        n = len(self._ids)
+        mask = self._live[:n].copy()
+        filters = filter_terms(filters)
+        if "company_id" in filters:
+            mask &= self._companies[:n] == _company_of({"company_id": filters.pop("company_id")})
+        rows = np.flatnonzero(mask)
+        if filters:
+            rows = np.array([
+                r for r in rows
+                if all(self._metadatas[r].get(key) == value for key, value in filters.items())
+            ], dtype=np.int64)
+        return rows
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of `query` with each of `rows`, a block at a time."""
+        scores = np.empty(rows.shape[0], dtype=np.float32)
+        contiguous = rows.shape[0] and rows[-1] - rows[0] + 1 == rows.shape[0]
+        for start in range(0, rows.shape[0], SEARCH_BLOCK_ROWS):
+            block_rows = rows[start:start + SEARCH_BLOCK_ROWS]
+            if contiguous:
+                block = self._matrix[block_rows[0]:block_rows[-1] + 1]  # a view, no copy
+            else:
+                block = self._matrix[block_rows]
+            block_scores = block.astype(np.float32, copy=False) @ query
+            if self.quantized:
+                block_scores *= self._scales[block_rows]
+            scores[start:start + block_rows.shape[0]] = block_scores
+        return scores
+
+    def search_by_vector(self, vector: List[float], n_results: int = 10, filters: Optional[Dict] = None,
+                         exclude_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Exact cosine top-k for a query vector. Scores use the same 0..1 scale as Chroma."""
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or not self._rows or n_results <= 0:
+                return []
+            rows = self._candidate_rows(filters)
+            if exclude_ids:
+                excluded = [self._rows[str(cid)] for cid in exclude_ids if str(cid) in self._rows]
+                rows = rows[~np.isin(rows, excluded)]
+            if rows.shape[0] == 0:
+                return []
+
+            query = _normalize(np.asarray(vector, dtype=np.float32))
+            scores = self._scores(rows, query)
+            k = min(n_results, rows.shape[0])
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                {
+                    "id": self._ids[rows[i]],
+                    "metadata": dict(self._metadatas[rows[i]]),
+                    # Cosine distance d = 1 - cos mapped like ChromaSearchEngine: (2 - d) / 2
+                    "score": float(max(0.0, (1.0 + scores[i]) / 2.0)),
+                }
+                for i in top
+            ]
+
+    async def search(self, query_text: str, n_results: int = 10, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        try:
+            query_embedding = await generate_embedding(query_text)
+            if not query_embedding:
+                return []
+            return await self.run_blocking(self.search_by_vector, query_embedding, n_results, filters)
+        except Exception as e:
+            logger.error(f"Error searching vector index: {e}")
+            return []
@@ -0,0 +1,25 @@
+"""
+Skills taxonomy: canonical skill names and aliases (taxonomy.py), a matcher
+that maps free-form skills onto them (matcher.py) and the candidate_skills
+inverted index used for skill filters (index.py).
+"""
+
+from app.services.skills.matcher import SkillMatcher, get_matcher, normalize_text
+from app.services.skills.index import has_all_skills, parse_skill_filter, skills_list, sync_candidate_skills
+
+
+def normalize_skills(skills) -> list:
+    """Canonical, de-duplicated display list for a skills list (or its stored JSON string)."""
+    return get_matcher().normalize(skills_list(skills))
+
+
+__all__ = [
+    "SkillMatcher",
+    "get_matcher",
+    "normalize_text",
+    "normalize_skills",
+    "has_all_skills",
+    "parse_skill_filter",
+    "skills_list",
+    "sync_candidate_skills",
+]
@@ -0,0 +1,63 @@
+"""
+candidate_skills: the inverted skill index over ParsedCV.skills.
+
+sync_candidate_skills() rewrites a CV's rows from its skills list whenever the
+list is saved (parse, parse-cache clone, profile edit). has_all_skills() turns
+a "must have X, Y and Z" filter into one indexed GROUP BY over the table.
+"""
+
+import json
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import CandidateSkill
+from app.services.skills.matcher import get_matcher
+
+
+def skills_list(skills) -> List[str]:
+    """A skills value as a list: stored JSON, a comma-separated string (older rows), or a list."""
+    if not skills:
+        return []
+    if isinstance(skills, list):
+        return skills
+    try:
+        value = json.loads(skills)
+    except (TypeError, ValueError):
+        return [s.strip() for s in str(skills).split(",") if s.strip()]
+    return [str(s) for s in value] if isinstance(value, list) else []
+
+
+def sync_candidate_skills(db: Session, cv_id: int, company_id: Optional[int], skills) -> List[str]:
+    """
+    Replace CV `cv_id`'s index rows with the keys of `skills` (a list or the
+    stored JSON string). Does not commit; call it in the transaction that
+    saves the skills.
+    """
+    keys = get_matcher().keys(skills_list(skills))
+    db.query(CandidateSkill).filter(CandidateSkill.cv_id == cv_id).delete(synchronize_session=False)
+    db.add_all(CandidateSkill(cv_id=cv_id, skill=key, company_id=company_id) for key in keys)
+    return keys
+
+
+def parse_skill_filter(value: Optional[str]) -> List[str]:
+    """Index keys for a comma-separated filter ("js, K8s" -> ["javascript", "kubernetes"])."""
+    matcher = get_matcher()
+    keys = []
+    for skill in (value or "").split(","):
+        key = matcher.key(skill)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def has_all_skills(keys: Iterable[str], company_id: Optional[int]):
+    """SELECT of the cv_ids in the company indexed with every one of `keys`."""
+    keys = list(keys)
+    query = select(CandidateSkill.cv_id).where(CandidateSkill.skill.in_(keys))
+    if company_id is None:
+        query = query.where(CandidateSkill.company_id.is_(None))
+    else:
+        query = query.where(CandidateSkill.company_id == company_id)
+    return query.group_by(CandidateSkill.cv_id).having(func.count(CandidateSkill.skill) == len(keys))
@@ -0,0 +1,136 @@
+"""
+Alias matching against the skills taxonomy.
+
+Text is lower-cased and split into tokens that keep the characters skill names
+are made of ("c++", "c#", ".net", "node.js"); "-" and "/" separate tokens,
+so "CI/CD", "ci-cd" and "ci cd" all normalize to "ci cd". Every alias is
+inserted into a token trie, and find() scans text once, taking the longest
+alias starting at each position, so the cost does not grow with the size of
+the dictionary.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from app.services.skills.taxonomy import SKILLS
+
+_TOKEN = re.compile(r"[\w+#.]+")
+# Separators between several skills written as one item ("Python, AWS", "Amazon Web Services (AWS)")
+_ITEM_SPLIT = re.compile(r"[,;|()\[\]]")
+
+# Longest index key stored in candidate_skills.skill
+MAX_KEY_LENGTH = 100
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        # A trailing period ends a sentence, a leading one is part of ".net"
+        token = token.rstrip(".")
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def normalize_text(text: str) -> str:
+    """The comparison form of a skill: "Node.JS " -> "node.js", "CI/CD" -> "ci cd"."""
+    return " ".join(tokenize(text))
+
+
+class SkillMatcher:
+    def __init__(self, skills: Dict[str, Iterable[str]]):
+        self._trie: Dict = {}
+        self._exact: Dict[str, str] = {}
+        for canonical, aliases in skills.items():
+            for alias in [canonical, *aliases]:
+                tokens = tokenize(alias)
+                if not tokens:
+                    continue
+                self._exact.setdefault(" ".join(tokens), canonical)
+                # Very short aliases ("go", "r", "js") are only trusted as a whole
+                # item, not when they turn up inside longer text
+                if len(tokens) == 1 and len(tokens[0]) <= 2:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(None, canonical)
+
+    def canonical(self, text: str) -> Optional[str]:
+        """Canonical name if `text` is exactly a known skill or alias."""
+        return self._exact.get(normalize_text(text))
+
+    def find(self, text: str) -> List[str]:
+        """Canonical skills mentioned anywhere in `text`, in order of first mention."""
+        tokens = tokenize(text)
+        found: List[str] = []
+        i = 0
+        while i < len(tokens):
+            node, match, end = self._trie, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    match, end = node[None], j + 1
+            if match:
+                if match not in found:
+                    found.append(match)
+                i = end
+            else:
+                i += 1
+        return found
+
+    def _parts(self, item: str) -> List[str]:
+        item = item.strip()
+        if self.canonical(item):
+            return [item]
+        return [part for part in _ITEM_SPLIT.split(item) if part and part.strip()]
+
+    def normalize(self, items: Iterable) -> List[str]:
+        """
+        Clean a skills list for display: aliases become canonical names, items
+        listing several skills are split, duplicates are dropped. Unknown skills
+        are kept as written.
+        """
+        result: List[str] = []
+        seen = set()
+        for item in items or []:
+            if not isinstance(item, str):
+                continue
+            for part in self._parts(item):
+                name = self.canonical(part) or part.strip()
+                key = normalize_text(name)
+                if key and key not in seen:
+                    seen.add(key)
+                    result.append(name)
+        return result
+
+    def keys(self, items: Iterable) -> List[str]:
+        """
+        Index keys for a skills list: the normalized canonical name of each skill,
+        plus any known skill mentioned inside an unrecognized one ("Python
+        scripting" also indexes "python").
+        """
+        keys: List[str] = []
+        for item in items or []:
+            if not isinstance(item, str):
+                continue
+            for part in self._parts(item):
+                canonical = self.canonical(part)
+                names = [canonical] if canonical else [part, *self.find(part)]
+                for name in names:
+                    key = normalize_text(name)[:MAX_KEY_LENGTH]
+                    if key and key not in keys:
+                        keys.append(key)
+        return keys
+
+    def key(self, skill: str) -> str:
+        """Index key for one skill name typed in a filter."""
+        return normalize_text(self.canonical(skill) or skill)[:MAX_KEY_LENGTH]
+
+
+@lru_cache(maxsize=1)
+def get_matcher() -> SkillMatcher:
+    return SkillMatcher(SKILLS)
@@ -0,0 +1,161 @@
+"""
+Canonical skill dictionary.
+
+Keys are the display names stored in ParsedCV.skills; values are the aliases
+the LLM (or a recruiter) may write instead. Matching is case-insensitive and
+token based (see matcher.py), so list each spelling once in lower case; the
+canonical name itself always matches. Bump TAXONOMY_VERSION when editing, and
+rebuild the index with scripts/backfill_candidate_skills.py.
+"""
+
+TAXONOMY_VERSION = "1"
+
+SKILLS = {
+    # Languages
+    "JavaScript": ["js", "ecmascript", "es6", "es2015", "vanilla js"],
+    "TypeScript": ["ts"],
+    "Python": ["python3", "python 3", "py"],
+    "Java": ["java se", "java ee", "j2ee", "jee"],
+    "Kotlin": [],
+    "Scala": [],
+    "Go": ["golang", "go lang"],
+    "Rust": [],
+    "C": ["ansi c"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "PHP": [],
+    "Ruby": [],
+    "Swift": [],
+    "Objective-C": ["objective c", "objc"],
+    "Dart": [],
+    "R": ["r language", "r programming"],
+    "MATLAB": [],
+    "Perl": [],
+    "Bash": ["shell scripting", "shell script", "bash scripting", "shell"],
+    "PowerShell": ["power shell"],
+    "SQL": ["structured query language"],
+    "PL/SQL": ["plsql", "pl sql"],
+    "T-SQL": ["tsql", "transact sql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Sass": ["scss"],
+    "VBA": ["excel vba"],
+    "ABAP": ["sap abap"],
+
+    # Frameworks and libraries
+    "Node.js": ["node", "nodejs", "node js"],
+    "React": ["react.js", "reactjs", "react js"],
+    "React Native": ["react-native"],
+    "Angular": ["angularjs", "angular.js", "angular js", "angular 2"],
+    "Vue.js": ["vue", "vuejs", "vue js"],
+    "Next.js": ["nextjs", "next js"],
+    "Svelte": [],
+    "Redux": [],
+    "jQuery": ["jquery.js"],
+    "Express": ["express.js", "expressjs", "express js"],
+    "NestJS": ["nest.js", "nest js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring": ["spring framework"],
+    "Spring Boot": ["springboot"],
+    "Hibernate": [],
+    ".NET": ["dotnet", "dot net", ".net framework"],
+    "ASP.NET": ["asp.net mvc", "asp net", "asp.net core"],
+    ".NET Core": ["dotnet core", ".net 6", ".net 8"],
+    "Laravel": [],
+    "Symfony": [],
+    "Ruby on Rails": ["rails", "ror"],
+    "Flutter": [],
+    "GraphQL": [],
+    "REST APIs": ["rest", "rest api", "restful", "restful apis", "restful api", "restful services"],
+    "gRPC": [],
+    "Microservices": ["microservice", "micro services", "microservices architecture"],
+
+    # Data and ML
+    "Pandas": [],
+    "NumPy": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "TensorFlow": ["tensor flow"],
+    "PyTorch": ["torch"],
+    "Keras": [],
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": [],
+    "Large Language Models": ["llm", "llms"],
+    "Data Analysis": ["data analytics"],
+    "Data Science": [],
+    "Statistics": ["statistical analysis"],
+    "Apache Spark": ["spark", "pyspark"],
+    "Hadoop": ["apache hadoop"],
+    "Apache Kafka": ["kafka"],
+    "Airflow": ["apache airflow"],
+    "dbt": [],
+    "ETL": ["elt", "etl pipelines"],
+    "Power BI": ["powerbi", "power-bi"],
+    "Tableau": [],
+    "Excel": ["ms excel", "microsoft excel", "advanced excel"],
+
+    # Databases
+    "PostgreSQL": ["postgres", "postgre sql", "psql"],
+    "MySQL": ["my sql"],
+    "SQL Server": ["mssql", "ms sql", "microsoft sql server", "ms sql server"],
+    "Oracle Database": ["oracle db", "oracle"],
+    "SQLite": [],
+    "MongoDB": ["mongo", "mongo db"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    "Cassandra": ["apache cassandra"],
+    "DynamoDB": ["dynamo db"],
+    "Snowflake": [],
+    "BigQuery": ["big query", "google bigquery"],
+
+    # Cloud and infrastructure
+    "AWS": ["amazon web services", "amazon aws"],
+    "Azure": ["microsoft azure", "ms azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Docker": ["docker compose", "docker-compose"],
+    "Kubernetes": ["k8s", "kube"],
+    "Helm": [],
+    "Terraform": [],
+    "Ansible": [],
+    "Jenkins": [],
+    "GitHub Actions": ["gh actions"],
+    "GitLab CI": ["gitlab ci/cd", "gitlab-ci"],
+    "CI/CD": ["ci cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Linux": ["unix", "ubuntu", "centos", "redhat", "red hat linux"],
+    "Nginx": [],
+    "Git": ["github", "gitlab", "bitbucket", "version control"],
+    "DevOps": [],
+    "Serverless": ["aws lambda", "lambda"],
+
+    # Practices and tools
+    "Agile": ["agile methodologies", "agile methodology"],
+    "Scrum": [],
+    "Kanban": [],
+    "Jira": ["atlassian jira"],
+    "Unit Testing": ["unit tests"],
+    "Test Automation": ["automation testing", "automated testing"],
+    "Selenium": [],
+    "Cypress": [],
+    "Jest": [],
+    "pytest": ["py.test"],
+    "TDD": ["test driven development", "test-driven development"],
+    "OOP": ["object oriented programming", "object-oriented programming"],
+    "System Design": [],
+    "Figma": [],
+    "UI/UX Design": ["ui/ux", "ux/ui", "ui ux", "ux design", "ui design"],
+
+    # Business
+    "SAP": [],
+    "SAP FICO": ["sap fi/co", "sap fi co"],
+    "Salesforce": ["sfdc"],
+    "Project Management": ["project managment"],
+    "Product Management": [],
+    "Stakeholder Management": [],
+    "Communication": ["communication skills"],
+    "Leadership": ["team leadership", "leadership skills"],
+    "Problem Solving": ["problem-solving"],
+    "Teamwork": ["team work", "team player"],
+}
@@ -1,14 +1,62 @@
+"""
+Incremental sync of parsed CVs into the ChromaDB candidate index.
+
+Rows are walked in keyset order of (ParsedCV.updated_at, ParsedCV.id), starting
+strictly after a high-water mark kept in Redis and advanced after every page, so
+each run picks up where the last one stopped (including after a crash) instead
+of re-checking the same first rows. Rows committed late by long transactions
+can carry an updated_at below the mark; a separate pass re-checks the
+SYNC_WATERMARK_LAG window below it, at most SYNC_LAG_RECHECK_LIMIT rows per run,
+without moving the mark. For each page, Chroma is read once, metadata only, and
+diffed in memory:
+
+  missing from Chroma            embed (batched) and upsert
+  fields changed since indexing  re-embed and upsert
+  metadata drift only            metadata update, no embedding
+
+"Fields changed" is detected with a fingerprint of the embedded fields stored
+in the vector's metadata. Vectors written before fingerprints existed are
+trusted and just get the fingerprint added.
+"""
+
+import hashlib
 import logging
 import json
 import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
+import redis
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import undefer
+
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.models import ParsedCV, CV
 from app.services.vector_db import vector_db
-from app.services.embeddings import generate_embedding
+from app.services.embeddings import generate_embeddings_batch
 
 logger = logging.getLogger(__name__)
 
+SYNC_WATERMARK_KEY = "sync_embeddings:watermark"
+# Each run re-checks rows updated shortly before the mark, so rows committed
+# late by long transactions (with an earlier updated_at) are not missed
+SYNC_WATERMARK_LAG = timedelta(minutes=5)
+# Rows re-checked per run in that window, on top of the run's `limit`
+SYNC_LAG_RECHECK_LIMIT = 500
+
+# ParsedCV fields that go into the embedded text
+FINGERPRINT_FIELDS = ("name", "summary", "skills", "job_history", "education")
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
 def construct_rich_text(parsed: ParsedCV) -> str:
     """Reconstruct rich text for embedding from ParsedCV fields."""
     
@@ -39,108 +87,211 @@ def construct_rich_text(parsed: ParsedCV) -> str:
     """
     return rich_text
 
-async def sync_embeddings(limit: int = 500):
+def embedding_fingerprint(parsed: ParsedCV) -> str:
+    """Short hash of the fields the candidate embedding is built from."""
+    digest = hashlib.sha256()
+    for field in FINGERPRINT_FIELDS:
+        digest.update((getattr(parsed, field) or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _candidate_metadata(parsed: ParsedCV, cv: CV) -> dict:
+    return {
+        "name": parsed.name or "Unknown",
+        "email": parsed.email or "[]",
+        "filename": cv.filename,
+        "cv_id": cv.id,
+        "company_id": cv.company_id,
+        "embedding_fp": embedding_fingerprint(parsed),
+    }
+
+
+def load_watermark() -> Optional[Tuple[datetime, int]]:
+    """(updated_at, id) of the last synced row, or None to start from the beginning."""
+    try:
+        raw = _get_redis().get(SYNC_WATERMARK_KEY)
+    except Exception as e:
+        logger.warning(f"[Sync] Could not read watermark, starting from the beginning: {e}")
+        return None
+    if not raw:
+        return None
+    stamp, _, last_id = raw.rpartition("|")
+    return datetime.fromisoformat(stamp), int(last_id)
+
+
+def save_watermark(updated_at: datetime, last_id: int) -> None:
+    try:
+        _get_redis().set(SYNC_WATERMARK_KEY, f"{updated_at.isoformat()}|{last_id}")
+    except Exception as e:
+        logger.warning(f"[Sync] Could not save watermark: {e}")
+
+
+def reset_watermark() -> None:
+    try:
+        _get_redis().delete(SYNC_WATERMARK_KEY)
+    except Exception as e:
+        logger.warning(f"[Sync] Could not reset watermark: {e}")
+
+
+def _fetch_page(db, after: Optional[Tuple[datetime, int]], page_size: int,
+                until: Optional[Tuple[datetime, int]] = None) -> List[Tuple[ParsedCV, CV]]:
+    """Next page of (ParsedCV, CV) after the (updated_at, id) keyset position, up to `until` if given."""
+    query = db.query(ParsedCV, CV).join(CV, ParsedCV.cv_id == CV.id).options(
+        undefer(ParsedCV.job_history)  # Part of the embedded text
+    ).filter(
+        CV.company_id.isnot(None), ParsedCV.updated_at.isnot(None)
+    )
+    if after:
+        updated_at, last_id = after
+        query = query.filter(or_(
+            ParsedCV.updated_at > updated_at,
+            and_(ParsedCV.updated_at == updated_at, ParsedCV.id > last_id),
+        ))
+    if until:
+        updated_at, last_id = until
+        query = query.filter(or_(
+            ParsedCV.updated_at < updated_at,
+            and_(ParsedCV.updated_at == updated_at, ParsedCV.id <= last_id),
+        ))
+    return query.order_by(ParsedCV.updated_at, ParsedCV.id).limit(page_size).all()
+
+
+def _metadata_drifted(current: dict, wanted: dict) -> bool:
+    return any(str(current.get(key)) != str(value) for key, value in wanted.items())
+
+
+async def _sync_page(rows) -> Dict[str, int]:
+    """
+    Diff one page of (ParsedCV, CV) rows against Chroma (metadata-only reads,
+    one per company on the page), re-embed what changed in batched requests and write the page with
+    one multi-id upsert plus one metadata update. Raises if Chroma cannot be
+    read or written, so the caller keeps its watermark.
+    """
+    # One read per company, so partitioned Chroma is read from the right collection
+    by_company = {}
+    for _, cv in rows:
+        by_company.setdefault(cv.company_id, []).append(str(cv.id))
+    stored = {}
+    for company_id, ids in by_company.items():
+        found = await asyncio.to_thread(vector_db.get_metadatas, ids, company_id=company_id)
+        if found is None:
+            raise RuntimeError("ChromaDB unavailable")
+        stored.update(found)
+
+    to_embed = []     # (parsed, cv)
+    to_relabel = []   # (parsed, cv)
+    counts = {"checked": len(rows), "new": 0, "reembedded": 0, "metadata": 0}
+    for parsed, cv in rows:
+        wanted = _candidate_metadata(parsed, cv)
+        current = stored.get(str(cv.id))
+        if current is None:
+            to_embed.append((parsed, cv))
+            counts["new"] += 1
+        elif current.get("embedding_fp") not in (None, wanted["embedding_fp"]):
+            to_embed.append((parsed, cv))
+            counts["reembedded"] += 1
+        elif _metadata_drifted(current, wanted):
+            to_relabel.append((parsed, cv))
+            counts["metadata"] += 1
+
+    if to_embed:
+        logger.info(f"[Sync] Generating {len(to_embed)} embeddings...")
+        texts = [construct_rich_text(parsed) for parsed, _ in to_embed]
+        vectors = await generate_embeddings_batch(texts)
+        ready = [(row, text, vector) for row, text, vector in zip(to_embed, texts, vectors) if vector]
+        if len(ready) < len(to_embed):
+            raise RuntimeError(f"Failed to generate {len(to_embed) - len(ready)} embeddings")
+        ok = await asyncio.to_thread(
+            vector_db.upsert,
+            ids=[str(cv.id) for (_, cv), _, _ in ready],
+            documents=[text for _, text, _ in ready],
+            metadatas=[_candidate_metadata(parsed, cv) for (parsed, cv), _, _ in ready],
+            embeddings=[vector for _, _, vector in ready]
+        )
+        if not ok:
+            raise RuntimeError(f"Failed to upsert {len(ready)} CVs")
+
+    if to_relabel:
+        ok = await asyncio.to_thread(
+            vector_db.update_metadatas,
+            ids=[str(cv.id) for _, cv in to_relabel],
+            metadatas=[_candidate_metadata(parsed, cv) for parsed, cv in to_relabel],
+        )
+        if not ok:
+            raise RuntimeError(f"Failed to update metadata of {len(to_relabel)} CVs")
+
+    return counts
+
+
+def _add_counts(totals: Dict[str, int], counts: Dict[str, int], checked_key: str = "checked") -> None:
+    totals[checked_key] += counts["checked"]
+    for key in ("new", "reembedded", "metadata"):
+        totals[key] += counts[key]
+
+
+async def _recheck_lag_window(db, watermark: Tuple[datetime, int], page_size: int, totals: Dict[str, int]) -> None:
+    """
+    Re-check the rows in the SYNC_WATERMARK_LAG window up to the mark, oldest
+    first and at most SYNC_LAG_RECHECK_LIMIT of them. The watermark stays put,
+    so a busy window can't hold the main pass back.
+    """
+    position = (watermark[0] - SYNC_WATERMARK_LAG, 0)
+    while totals["rechecked"] < SYNC_LAG_RECHECK_LIMIT:
+        size = min(page_size, SYNC_LAG_RECHECK_LIMIT - totals["rechecked"])
+        rows = await asyncio.to_thread(_fetch_page, db, position, size, watermark)
+        if not rows:
+            break
+        _add_counts(totals, await _sync_page(rows), "rechecked")
+        last = rows[-1][0]
+        position = (last.updated_at, last.id)
+        db.expunge_all()
+        await asyncio.sleep(0.01)
+
+
+async def sync_embeddings(limit: int = 500, page_size: int = 200, full: bool = False) -> Dict[str, int]:
     """
     Synchronizes Postgres ParsedCVs with ChromaDB embeddings.
-    Checks for missing candidates or incorrect metadata and updates them.
+    Checks up to `limit` rows after the watermark, `page_size` at a time, and
+    advances the watermark after every page. Rows in the lag window below the
+    mark are re-checked first and reported as "rechecked", outside `limit`.
+    With `full`, starts over from the first row (e.g. after restoring Chroma).
     Runs non-blocking using asyncio.to_thread for heavy IO.
     """
+    totals = {"checked": 0, "rechecked": 0, "new": 0, "reembedded": 0, "metadata": 0}
+    if full:
+        reset_watermark()
+    watermark = load_watermark()
+
     db = SessionLocal()
     try:
-        # Fetch parsed CVs that have a company_id (Run in thread)
-        def get_cvs():
-            return db.query(ParsedCV, CV).join(CV, ParsedCV.cv_id == CV.id).limit(limit).all()
-            
-        results = await asyncio.to_thread(get_cvs)
-        
-        logger.info(f"[Sync] Found {len(results)} parsed CVs to check.")
-        
-        count_updated = 0
-        count_new = 0
-        
-        for parsed, cv in results:
-            if not cv.company_id:
-                continue
-
-            existing = None
-            try:
-                if hasattr(vector_db, 'collection') and vector_db.collection:
-                    # Check Chroma (Run in thread)
-                    existing = await asyncio.to_thread(
-                        vector_db.collection.get, 
-                        ids=[str(cv.id)], 
-                        include=["embeddings", "metadatas"]
-                    )
-            except Exception as e:
-                logger.warning(f"[Sync] Error reading Chroma for {cv.id}: {e}")
-
-            embedding = None
-            current_metadata = {}
-            needs_update = False
-            needs_new_embedding = False
-            
-            if existing and existing['ids'] and len(existing['ids']) > 0:
-                # Exists
-                has_embedding = existing['embeddings'] is not None and len(existing['embeddings']) > 0
-                if existing['metadatas'] and len(existing['metadatas']) > 0:
-                    current_metadata = existing['metadatas'][0]
-                
-                # Check Metadata
-                if str(current_metadata.get('company_id')) != str(cv.company_id):
-                    needs_update = True
-                
-                # Check Embedding
-                if has_embedding:
-                    embedding = existing['embeddings'][0]
-                else:
-                    needs_new_embedding = True
-            else:
-                needs_new_embedding = True
-                needs_update = True  # It's a new insert
-
-            if not needs_update and not needs_new_embedding:
-                continue
-
-            if needs_new_embedding:
-                logger.info(f"[Sync] Generating new embedding for CV {cv.id}...")
-                rich_text = construct_rich_text(parsed)
-                embedding = await generate_embedding(rich_text, cv_id=cv.id, company_id=cv.company_id, user_id=cv.uploaded_by)
-                if not embedding:
-                    logger.error(f"[Sync] Failed to generate embedding for CV {cv.id}")
-                    continue
-                count_new += 1
-            else:
-                count_updated += 1
-                logger.info(f"[Sync] Updating metadata for CV {cv.id}...")
-
-            # UPSERT
-            metadata = {
-                "name": parsed.name or "Unknown",
-                "email": parsed.email or "[]",
-                "filename": cv.filename,
-                "cv_id": cv.id,
-                "company_id": cv.company_id
-            }
-            
-            try:
-                # Upsert to Chroma (Run in thread)
-                await asyncio.to_thread(
-                    vector_db.upsert,
-                    ids=[str(cv.id)],
-                    documents=[construct_rich_text(parsed)],
-                    metadatas=[metadata],
-                    embeddings=[embedding]
-                )
-            except Exception as e:
-                logger.error(f"[Sync] Failed to upsert CV {cv.id}: {e}")
-
-            # Yield control to event loop after each record to keep API responsive
+        if watermark and SYNC_WATERMARK_LAG:
+            await _recheck_lag_window(db, watermark, page_size, totals)
+
+        position = watermark
+        while totals["checked"] < limit:
+            size = min(page_size, limit - totals["checked"])
+            rows = await asyncio.to_thread(_fetch_page, db, position, size)
+            if not rows:
+                break
+
+            _add_counts(totals, await _sync_page(rows))
+
+            last = rows[-1][0]
+            position = (last.updated_at, last.id)
+            save_watermark(*position)
+            db.expunge_all()
+
+            # Yield control to event loop after each page to keep API responsive
             await asyncio.sleep(0.01)
 
-        logger.info(f"[Sync] Complete. New: {count_new}, Updated: {count_updated}")
+        logger.info(
+            f"[Sync] Complete. Checked: {totals['checked']}, Re-checked: {totals['rechecked']}, New: {totals['new']}, "
+            f"Re-embedded: {totals['reembedded']}, Metadata: {totals['metadata']}"
+        )
 
     except Exception as e:
-        logger.error(f"[Sync] Critical error: {e}")
+        logger.error(f"[Sync] Stopped, will resume from the last synced page: {e}")
     finally:
         db.close()
-
+    return totals
@@ -0,0 +1,111 @@
+"""
+Token counting and budgeting for LLM inputs.
+
+Counts use the model's real tiktoken encoding. If the encoding cannot be loaded
+(tiktoken fetches its BPE files on first use, which fails on air-gapped hosts),
+counts fall back to an estimate of 4 characters per token. The failure is
+cached, so the download is not retried on every call.
+"""
+
+import logging
+import math
+from functools import lru_cache
+from typing import List, Optional
+
+import tiktoken
+from tiktoken.model import encoding_name_for_model
+
+logger = logging.getLogger(__name__)
+
+# gpt-4o family; used for models tiktoken does not know yet
+DEFAULT_ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+# Fixed framing the chat format adds around each message and the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(name: str):
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding '{name}' unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def get_encoding(model: str):
+    """tiktoken encoding for `model`, or None if it cannot be loaded."""
+    try:
+        name = encoding_name_for_model(model)
+    except KeyError:
+        name = DEFAULT_ENCODING
+    return _load_encoding(name)
+
+
+def count_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[dict], model: str) -> int:
+    """Prompt tokens for a chat completion request with these messages."""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_tokens(message.get("content") or "", model)
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Longest prefix of `text` that fits in `max_tokens`."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def split_to_token_chunks(text: str, max_tokens: int, model: str, max_chunks: Optional[int] = None) -> List[str]:
+    """
+    Split `text` into consecutive chunks of at most `max_tokens`, breaking at
+    line boundaries (a single line longer than the budget is cut by tokens).
+    With `max_chunks`, whatever does not fit in that many chunks is dropped.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for line in text.split("\n"):
+        line_tokens = count_tokens(line, model) + 1  # + the newline
+        while line_tokens > max_tokens:
+            flush()
+            head = truncate_to_tokens(line, max_tokens, model)
+            if not head:
+                break
+            chunks.append(head)
+            line = line[len(head):]
+            line_tokens = count_tokens(line, model) + 1
+        if current_tokens + line_tokens > max_tokens:
+            flush()
+        current.append(line)
+        current_tokens += line_tokens
+        if max_chunks and len(chunks) >= max_chunks:
+            break
+    flush()
+
+    if max_chunks and len(chunks) > max_chunks:
+        chunks = chunks[:max_chunks]
+    return chunks
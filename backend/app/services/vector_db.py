@@ -1,4 +1,4 @@
-from app.services.search.chroma import ChromaSearchEngine
+from app.services.search.factory import get_search_engine
 
-# Global instance
-vector_db = ChromaSearchEngine()
+# Global instance (the backend selected by SEARCH_BACKEND)
+vector_db = get_search_engine()
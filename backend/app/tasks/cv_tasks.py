@@ -1,8 +1,13 @@
 import os
 import redis
 import logging
+from typing import List
 from app.celery_app import celery_app
+from app.core import async_runtime
+from app.core.config import settings
+from app.services import cv_pipeline
 from app.services.parse_service import process_cv
+from app.tasks.match_tasks import queue_cv_scoring
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +29,7 @@ def process_cv_task(self, cv_id: int):
         logger.info(msg_start)
         
         process_cv(cv_id)
+        queue_cv_scoring([cv_id])
         
         msg_end = f"✅ [Task] Finished CV {cv_id}"
         logger.info(msg_end)
@@ -35,3 +41,69 @@ def process_cv_task(self, cv_id: int):
         # Always decrement active count
         r.decr("cv_processing_count")
 
+
+# ==================== Staged Pipeline ====================
+# extract -> parse -> embed -> index, each on its own queue (see
+# app.services.cv_pipeline and task_routes in app.celery_app).
+
+def _run_pipeline_stage(task, stage: str, cv_ids: List[int], retry_delay: int = None):
+    """Run one stage, queue the successful ids for their next stage, retry the failed ones."""
+    routed, failed = async_runtime.run(cv_pipeline.run_stage(stage, cv_ids))
+    for next_stage, ids in routed.items():
+        STAGE_TASKS[next_stage].delay(ids)
+    # CVs that left the pipeline (indexed, or nothing left to do) get their job matches scored
+    moved_on = {cv_id for ids in routed.values() for cv_id in ids}
+    queue_cv_scoring([cv_id for cv_id in cv_ids if cv_id not in failed and cv_id not in moved_on])
+
+    logger.info(f"✅ [Task] {stage}: {len(cv_ids) - len(failed)}/{len(cv_ids)} CVs ok")
+    if failed:
+        logger.error(f"❌ [Task] {stage} failed for CVs {failed}")
+        raise task.retry(exc=RuntimeError(f"CV {stage} failures: {failed}"), args=(failed,), countdown=retry_delay)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30, time_limit=600, soft_time_limit=540)
+def extract_cv_stage_task(self, cv_ids: List[int]):
+    """Extract text (CPU-bound) and persist it, or clone a cached parse."""
+    _run_pipeline_stage(self, "extract", cv_ids)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, time_limit=900, soft_time_limit=840)
+def parse_cv_stage_task(self, cv_ids: List[int]):
+    """LLM-parse the persisted text and save the structured fields."""
+    _run_pipeline_stage(self, "parse", cv_ids)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, time_limit=300, soft_time_limit=240)
+def embed_cv_stage_task(self, cv_ids: List[int]):
+    """Embed the saved fields and hand the vectors to the index stage."""
+    _run_pipeline_stage(self, "embed", cv_ids)
+
+
+@celery_app.task(bind=True, max_retries=10, time_limit=300, soft_time_limit=240)
+def index_cv_stage_task(self, cv_ids: List[int]):
+    """Upsert handed-off vectors into ChromaDB. Retried with backoff during outages."""
+    _run_pipeline_stage(self, "index", cv_ids, retry_delay=min(600, 30 * 2 ** self.request.retries))
+
+
+STAGE_TASKS = {
+    "extract": extract_cv_stage_task,
+    "parse": parse_cv_stage_task,
+    "embed": embed_cv_stage_task,
+    "index": index_cv_stage_task,
+}
+
+
+def dispatch_cv_processing(cv_ids: List[int]):
+    """Queue CVs into the staged pipeline in chunks of CV_BATCH_SIZE."""
+    size = max(1, settings.CV_BATCH_SIZE)
+    for i in range(0, len(cv_ids), size):
+        extract_cv_stage_task.delay(cv_ids[i:i + size])
+
+
+@celery_app.task
+def process_cv_batch_task(cv_ids: List[int]):
+    """
+    Batch task from before the staged pipeline, kept so that messages already
+    queued still drain: forwards the ids to the pipeline.
+    """
+    dispatch_cv_processing(cv_ids)
@@ -0,0 +1,67 @@
+import logging
+from typing import List, Optional
+from app.celery_app import celery_app
+from app.core import async_runtime
+from app.core.config import settings
+from app.services import job_index, match_scores
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def score_job_matches_task(self, job_id: int):
+    """Rescore the company's candidates against a created or edited job."""
+    try:
+        async_runtime.run(match_scores.score_job(job_id))
+    except Exception as e:
+        logger.error(f"❌ [Task] Match scoring failed for job {job_id}: {e}")
+        raise self.retry(exc=e)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def score_cv_matches_task(self, cv_ids: List[int]):
+    """Score CVs that finished processing against their company's open jobs."""
+    try:
+        async_runtime.run(match_scores.score_cvs(cv_ids))
+    except Exception as e:
+        logger.error(f"❌ [Task] Match scoring failed for CVs {cv_ids}: {e}")
+        raise self.retry(exc=e)
+
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
+def index_job_task(self, job_id: int, company_id: Optional[int] = None):
+    """Re-embed a created or edited job, or remove a closed or deleted one from the job index."""
+    try:
+        result = async_runtime.run(job_index.index_job(job_id, company_id))
+        logger.info(f"[Task] Job {job_id} index entry {result}")
+    except Exception as e:
+        logger.error(f"❌ [Task] Job indexing failed for job {job_id}: {e}")
+        raise self.retry(exc=e)
+
+
+def queue_job_scoring(job_id: int) -> None:
+    """Queue job rescoring; a broker outage must not fail the request that saved the job."""
+    if not settings.MATCH_SCORES_ENABLED:
+        return
+    try:
+        score_job_matches_task.delay(job_id)
+    except Exception as e:
+        logger.warning(f"Could not queue match scoring for job {job_id}: {e}")
+
+
+def queue_cv_scoring(cv_ids: List[int]) -> None:
+    if not settings.MATCH_SCORES_ENABLED or not cv_ids:
+        return
+    try:
+        score_cv_matches_task.delay(cv_ids)
+    except Exception as e:
+        logger.warning(f"Could not queue match scoring for CVs {cv_ids}: {e}")
+
+
+def queue_job_indexing(job_id: int, company_id: Optional[int] = None) -> None:
+    if not settings.JOB_INDEX_ENABLED:
+        return
+    try:
+        index_job_task.delay(job_id, company_id)
+    except Exception as e:
+        logger.warning(f"Could not queue indexing for job {job_id}: {e}")
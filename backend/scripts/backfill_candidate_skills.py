@@ -0,0 +1,73 @@
+"""
+Rebuild the candidate_skills index (see app.services.skills) from
+ParsedCV.skills. Run after the sk01 migration and whenever the taxonomy
+changes. Safe to re-run.
+
+With --normalize the stored skills lists are also rewritten with canonical
+names. That changes the embedded text, so the next embedding sync re-embeds
+those candidates.
+
+Usage (from backend/):
+    python scripts/backfill_candidate_skills.py
+    python scripts/backfill_candidate_skills.py --normalize --batch-size 1000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.models import CV, ParsedCV
+from app.services.skills import normalize_skills, sync_candidate_skills
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(batch_size: int, normalize: bool):
+    db = SessionLocal()
+    try:
+        last_id, cvs, rows, renamed = 0, 0, 0, 0
+        while True:
+            page = (
+                db.query(ParsedCV, CV.company_id)
+                .join(CV, ParsedCV.cv_id == CV.id)
+                .filter(ParsedCV.id > last_id)
+                .order_by(ParsedCV.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not page:
+                break
+            last_id = page[-1][0].id
+            for parsed, company_id in page:
+                if normalize:
+                    skills = json.dumps(normalize_skills(parsed.skills))
+                    if skills != parsed.skills:
+                        parsed.skills = skills
+                        renamed += 1
+                rows += len(sync_candidate_skills(db, parsed.cv_id, company_id, parsed.skills))
+                cvs += 1
+            db.commit()
+            logger.info(f"Indexed {cvs} CVs ({rows} skill rows)")
+        logger.info(f"Done: {cvs} CVs, {rows} skill rows" + (f", {renamed} skills lists normalized" if normalize else ""))
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--normalize", action="store_true",
+                        help="Also rewrite ParsedCV.skills with canonical skill names")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.normalize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Rebuild the candidate_summary read model (see app.services.candidate_summary)
+that serves the profiles list and search results. Run after the cs01
+migration, and after writes that bypass the ORM (raw SQL, bulk updates).
+Safe to re-run.
+
+Usage (from backend/):
+    python scripts/backfill_candidate_summary.py
+    python scripts/backfill_candidate_summary.py --company-id 3 --batch-size 1000
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.models import CV, CandidateSummary
+from app.services import candidate_summary
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(batch_size: int, company_id=None):
+    db = SessionLocal()
+    try:
+        last_id, rows = 0, 0
+        while True:
+            query = db.query(CV.id).filter(CV.id > last_id)
+            if company_id is not None:
+                query = query.filter(CV.company_id == company_id)
+            ids = [cv_id for (cv_id,) in query.order_by(CV.id).limit(batch_size)]
+            if not ids:
+                break
+            last_id = ids[-1]
+            rows += candidate_summary.refresh(db, ids)
+            db.commit()
+            db.expunge_all()
+            logger.info(f"Rebuilt {rows} summary rows (up to CV {last_id})")
+
+        # Rows whose CV is gone (deleted outside the ORM without the FK cascade)
+        orphans = db.query(CandidateSummary).filter(~CandidateSummary.cv_id.in_(db.query(CV.id)))
+        if company_id is not None:
+            orphans = orphans.filter(CandidateSummary.company_id == company_id)
+        removed = orphans.delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"Done: {rows} summary rows rebuilt, {removed} orphaned rows removed")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--company-id", type=int, help="Only rebuild this company's rows")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.company_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import asyncio
 import os
 import sys
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, joinedload, undefer
 import logging
 
 # Add backend directory to path
@@ -20,20 +20,39 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-async def backfill():
+BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+
+
+async def backfill(batch_size: int = BATCH_SIZE):
     db = SessionLocal()
     search_engine = get_search_engine()
     
     try:
         logger.info("Starting backfill of embeddings...")
         
-        # Fetch all parsed CVs
-        parsed_cvs = db.query(ParsedCV).join(ParsedCV.cv).all()
-        logger.info(f"Found {len(parsed_cvs)} candidates to index.")
+        total = db.query(ParsedCV).join(ParsedCV.cv).count()
+        logger.info(f"Found {total} candidates to index.")
         
         count = 0
-        for pcv in parsed_cvs:
-            try:
+        last_id = 0
+        while True:
+            # Keyset pages of parsed CVs; each page is embedded in batched
+            # requests and written with one multi-id upsert
+            page = (
+                db.query(ParsedCV)
+                .join(ParsedCV.cv)
+                .options(joinedload(ParsedCV.cv), undefer(ParsedCV.job_history))
+                .filter(ParsedCV.id > last_id)
+                .order_by(ParsedCV.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not page:
+                break
+            last_id = page[-1].id
+
+            candidates = []
+            for pcv in page:
                 # Construct rich text
                 rich_text = f"""
                 Name: {pcv.name or ''}
@@ -42,27 +61,23 @@ async def backfill():
                 Job History: {pcv.job_history or ''}
                 Education: {pcv.education or ''}
                 """
-                
-                # Index candidate
                 # We use CV ID as the candidate ID for consistency
-                success = await search_engine.index_candidate(
-                    candidate_id=str(pcv.cv_id),
-                    text=rich_text,
-                    metadata={
-                        "name": pcv.name or "Unknown",
-                        "company_id": pcv.cv.company_id
-                    }
-                )
-                
-                if success:
-                    count += 1
-                    if count % 10 == 0:
-                        logger.info(f"Indexed {count}/{len(parsed_cvs)} candidates.")
-                else:
-                    logger.error(f"Failed to index candidate {pcv.cv_id}")
-                    
+                candidates.append((
+                    str(pcv.cv_id),
+                    rich_text,
+                    {"name": pcv.name or "Unknown", "company_id": pcv.cv.company_id},
+                ))
+
+            try:
+                indexed = await search_engine.index_candidates(candidates)
             except Exception as e:
-                logger.error(f"Error processing candidate {pcv.cv_id}: {e}")
+                logger.error(f"Error indexing candidates {candidates[0][0]}-{candidates[-1][0]}: {e}")
+                indexed = 0
+            if indexed < len(candidates):
+                logger.error(f"Failed to index {len(candidates) - indexed} of {len(candidates)} candidates in this batch")
+            count += indexed
+            logger.info(f"Indexed {count}/{total} candidates.")
+            db.expunge_all()
                 
         logger.info(f"Backfill complete. Successfully indexed {count} candidates.")
         
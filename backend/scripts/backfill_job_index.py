@@ -0,0 +1,64 @@
+"""
+Build the job embeddings index (see app.services.job_index) for existing jobs.
+Created, edited and closed jobs are kept current by the Celery workers; this
+is for the first rollout, or after changing the embedding model or
+EMBEDDING_DIMENSIONS (point CHROMA_JOB_COLLECTION / JOB_INDEX_PATH at a new
+index first). Open jobs whose text is unchanged are skipped and closed jobs
+are removed, so it is safe to re-run.
+
+Usage (from backend/):
+    python scripts/backfill_job_index.py
+    python scripts/backfill_job_index.py --company-id 3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from collections import Counter
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.models import Job
+from app.services import job_index
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(company_id=None):
+    db = SessionLocal()
+    try:
+        query = db.query(Job.id, Job.company_id)
+        if company_id:
+            query = query.filter(Job.company_id == company_id)
+        jobs = query.order_by(Job.id).all()
+    finally:
+        db.close()
+
+    totals = Counter()
+    for i, job in enumerate(jobs, start=1):
+        try:
+            result = await job_index.index_job(job.id, job.company_id)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            totals["failed"] += 1
+            continue
+        totals[result] += 1
+        if i % 100 == 0:
+            logger.info(f"[{i}/{len(jobs)}] {dict(totals)}")
+    logger.info(f"Done: {len(jobs)} jobs, {dict(totals)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", type=int, help="Only this company's jobs")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.company_id))
+
+
+if __name__ == "__main__":
+    main()
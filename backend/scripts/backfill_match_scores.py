@@ -0,0 +1,60 @@
+"""
+Populate job_candidate_scores for existing open jobs (see
+app.services.match_scores). New and edited jobs, and newly processed CVs, are
+scored by the Celery workers; this is for the initial backfill after the mc01
+migration, or to rebuild scores after changing MATCH_SCORE_MIN. Safe to re-run.
+
+Usage (from backend/):
+    python scripts/backfill_match_scores.py
+    python scripts/backfill_match_scores.py --company-id 3
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.models import Job
+from app.services import match_scores
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill(company_id=None):
+    db = SessionLocal()
+    try:
+        query = db.query(Job.id).filter(Job.is_active.is_(True), Job.status == match_scores.OPEN_STATUS)
+        if company_id:
+            query = query.filter(Job.company_id == company_id)
+        job_ids = [row.id for row in query.order_by(Job.id).all()]
+    finally:
+        db.close()
+
+    totals = {"stored": 0, "removed": 0, "strong": 0}
+    for i, job_id in enumerate(job_ids, start=1):
+        try:
+            counts = await match_scores.score_job(job_id)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            continue
+        for key, value in counts.items():
+            totals[key] += value
+        logger.info(f"[{i}/{len(job_ids)}] job {job_id}: {counts}")
+    logger.info(f"Done: {len(job_ids)} jobs, {totals}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", type=int, help="Only this company's jobs")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.company_id))
+
+
+if __name__ == "__main__":
+    main()
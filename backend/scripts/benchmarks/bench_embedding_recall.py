@@ -0,0 +1,203 @@
+"""
+Benchmark: search recall vs. memory for reduced and quantized embeddings.
+
+Every combination of --dims and --dtypes is built as a NumPy vector index
+(the same NumpySearchEngine the app uses, so int8 goes through its real
+quantization). Vectors are shortened with project_embedding(), the way
+scripts/reindex_embeddings.py --mode project does it. For each setting it
+reports bytes per vector, the index size, query latency and:
+
+  overlap@k   share of the full-size float32 top k that the setting also returns
+  recall@k    share of each query's labeled relevant candidates in its top k
+              (only with a labeled sample)
+
+Sample sources:
+  synthetic (default)  clustered vectors whose variance decays along the
+                       dimensions, like text-embedding-3 output; no labels
+  --sample FILE.npz    arrays "vectors" (n x d), "queries" (q x d) and,
+                       optionally, "relevant" (q x m row numbers, -1 padded)
+  --export-sample FILE writes such a file from this deployment: stored candidate
+                       vectors from the live index, and one query per open job
+                       (its title and skills, embedded) labeled with the
+                       candidates in that job's pipeline. Needs the database,
+                       the vector store and OpenAI.
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_embedding_recall.py --size 50000
+    python scripts/benchmarks/bench_embedding_recall.py --export-sample /tmp/sample.npz --limit 20000
+    python scripts/benchmarks/bench_embedding_recall.py --sample /tmp/sample.npz --k 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+UPSERT_CHUNK = 5000
+
+
+def synthetic_sample(n: int, dim: int, queries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # Leading dimensions carry most of the variance (as in Matryoshka-trained models)
+    spectrum = (np.arange(1, dim + 1, dtype=np.float32) ** -0.5)
+    centers = rng.standard_normal((max(n // 200, 1), dim), dtype=np.float32) * spectrum
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32) * spectrum
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    picks = rng.integers(0, n, queries)
+    query_vectors = vectors[picks] + 0.3 * rng.standard_normal((queries, dim), dtype=np.float32) * spectrum
+    return vectors, query_vectors, None
+
+
+def load_sample(path: str):
+    data = np.load(path)
+    relevant = data["relevant"] if "relevant" in data.files else None
+    return data["vectors"].astype(np.float32), data["queries"].astype(np.float32), relevant
+
+
+async def export_sample(path: str, limit: int):
+    """Stored candidate vectors plus job queries labeled with their pipeline candidates."""
+    from app.core.database import SessionLocal
+    from app.models.models import CV, Application, Job
+    from app.services.embeddings import generate_embeddings_batch
+    from app.services.match_scores import OPEN_STATUS, job_query_text
+    from app.services.skills import skills_list
+    from app.services.vector_db import vector_db
+
+    db = SessionLocal()
+    try:
+        cvs = db.query(CV.id, CV.company_id).filter(CV.is_parsed.is_(True)).order_by(CV.id.desc()).limit(limit).all()
+        jobs = db.query(Job).filter(Job.is_active.is_(True), Job.status == OPEN_STATUS).all()
+        pipelines = {
+            job.id: [row.cv_id for row in db.query(Application.cv_id).filter(Application.job_id == job.id).all()]
+            for job in jobs
+        }
+        job_texts = {job.id: job_query_text(job.title, skills_list(job.skills_required)) for job in jobs}
+    finally:
+        db.close()
+
+    ids, vectors = [], []
+    by_company = {}
+    for cv in cvs:
+        by_company.setdefault(cv.company_id, []).append(str(cv.id))
+    for company_id, chunk in by_company.items():
+        for cid, vector in vector_db.get_embeddings(chunk, company_id=company_id).items():
+            ids.append(int(cid))
+            vectors.append(vector)
+    if not vectors:
+        raise SystemExit("No stored vectors found")
+    row_of = {cid: row for row, cid in enumerate(ids)}
+
+    labeled = [(job_id, [row_of[c] for c in members if c in row_of]) for job_id, members in pipelines.items()]
+    labeled = [(job_id, rows) for job_id, rows in labeled if rows]
+    query_vectors = await generate_embeddings_batch([job_texts[job_id] for job_id, _ in labeled])
+    kept = [(rows, q) for (_, rows), q in zip(labeled, query_vectors) if q]
+    width = max((len(rows) for rows, _ in kept), default=1)
+    relevant = np.full((len(kept), width), -1, dtype=np.int64)
+    for i, (rows, _) in enumerate(kept):
+        relevant[i, :len(rows)] = rows
+    np.savez(path, vectors=np.asarray(vectors, dtype=np.float32),
+             queries=np.asarray([q for _, q in kept], dtype=np.float32), relevant=relevant)
+    print(f"Wrote {len(vectors)} candidate vectors and {len(kept)} labeled job queries to {path}")
+
+
+def build_index(path, vectors, dims, dtype):
+    from app.services.search.numpy_index import NumpySearchEngine
+
+    index = NumpySearchEngine(path=path, dtype=dtype)
+    reduced = vectors[:, :dims]  # project_embedding: truncate; the index re-normalizes
+    for lo in range(0, len(reduced), UPSERT_CHUNK):
+        hi = min(lo + UPSERT_CHUNK, len(reduced))
+        index.upsert(ids=[str(i) for i in range(lo, hi)], documents=[""] * (hi - lo),
+                     metadatas=[{}] * (hi - lo), embeddings=reduced[lo:hi])
+    return index
+
+
+def top_k(index, queries, dims, k):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search_by_vector(query[:dims].tolist(), k)
+        samples.append(time.perf_counter() - start)
+        results.append([int(h["id"]) for h in hits])
+    return samples, results
+
+
+def exact_top_k(vectors, queries, k):
+    """Full-size float32 top k for each query (the overlap@k reference)."""
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    results = []
+    for query in queries:
+        scores = normed @ (query / np.linalg.norm(query))
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        results.append(top[np.argsort(-scores[top])].tolist())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic sample size")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic full dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic queries")
+    parser.add_argument("--sample", help=".npz sample (see above)")
+    parser.add_argument("--export-sample", help="Write a labeled sample from this deployment and exit")
+    parser.add_argument("--limit", type=int, default=20000, help="Candidates to export")
+    parser.add_argument("--dims", default="1536,1024,768,512,256")
+    parser.add_argument("--dtypes", default="float32,float16,int8")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    if args.export_sample:
+        asyncio.run(export_sample(args.export_sample, args.limit))
+        return
+
+    if args.sample:
+        vectors, queries, relevant = load_sample(args.sample)
+        source = args.sample
+    else:
+        vectors, queries, relevant = synthetic_sample(args.size, args.dim, args.queries)
+        source = "synthetic"
+    full = vectors.shape[1]
+    dims_list = [d for d in (int(x) for x in args.dims.split(",")) if d <= full]
+    dtypes = args.dtypes.split(",")
+
+    print(f"{len(vectors)} vectors x {full} dims ({source}), {len(queries)} queries, top {args.k}"
+          f"{', labeled' if relevant is not None else ''}\n")
+    header = f"  {'dims':>5} {'dtype':<8} {'bytes/vec':>9} {'index MB':>9} {'p50 ms':>7} {'overlap@k':>10}"
+    print(header + (f" {'recall@k':>9}" if relevant is not None else ""))
+
+    reference = exact_top_k(vectors, queries, args.k)
+    workdir = tempfile.mkdtemp(prefix="bench_embedding_recall_")
+    try:
+        for dims in dims_list:
+            for dtype in dtypes:
+                path = os.path.join(workdir, f"{dims}_{dtype}")
+                index = build_index(path, vectors, dims, dtype)
+                top_k(index, queries[:3], dims, args.k)  # page the matrix in
+                samples, results = top_k(index, queries, dims, args.k)
+                overlap = np.mean([len(set(r) & set(e)) / max(len(e), 1) for r, e in zip(results, reference)])
+                per_vector = dims * np.dtype(dtype).itemsize + (4 if dtype == "int8" else 0)
+                line = (f"  {dims:>5} {dtype:<8} {per_vector:>9} {per_vector * len(vectors) / 2**20:>9.1f} "
+                        f"{np.percentile(np.array(samples) * 1000, 50):>7.2f} {overlap:>10.3f}")
+                if relevant is not None:
+                    recall = np.mean([
+                        len(set(r) & set(rel[rel >= 0].tolist())) / max(min(args.k, int((rel >= 0).sum())), 1)
+                        for r, rel in zip(results, relevant)
+                    ])
+                    line += f" {recall:>9.3f}"
+                print(line)
+                shutil.rmtree(path, ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
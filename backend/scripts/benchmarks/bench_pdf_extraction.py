@@ -0,0 +1,115 @@
+"""
+Benchmark: full-document PDF extraction vs. the budgeted / page-parallel engine.
+
+Generates a corpus of large synthetic PDFs (text lines plus a link annotation
+per page) and extracts each one
+
+  full (old):        every page, sequentially (PDF_CHAR_BUDGET=0, no pool)
+  full + pool:       every page, fanned out to the process pool
+  budget:            stop at the first page past PDF_CHAR_BUDGET, sequentially
+  budget + pool:     stop at the budget, pool for documents >= --parallel-min-pages
+
+and checks that the text the LLM actually reads (the first 25,000 chars) is
+identical in every mode.
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_pdf_extraction.py --docs 20 --pages 40
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from pypdf import PdfReader, PdfWriter  # noqa: E402
+from pypdf.annotations import Link  # noqa: E402
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject  # noqa: E402
+
+LLM_WINDOW = 25000
+
+
+def make_synthetic_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0):
+    """Write a PDF with `pages` pages of Helvetica text and one link annotation per page."""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for p in range(pages):
+        page = writer.add_blank_page(612, 792)
+        content = "".join(
+            f"BT /F1 9 Tf 40 {760 - i * 18} Td (Doc {seed} page {p} line {i}: led the migration of "
+            f"billing services to Python and PostgreSQL) Tj ET\n"
+            for i in range(lines_per_page)
+        )
+        stream = DecodedStreamObject()
+        stream.set_data(content.encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        writer.add_annotation(page_number=p, annotation=Link(rect=(40, 20, 240, 36), url=f"https://portfolio.example.com/{seed}/{p}"))
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=25000)
+    parser.add_argument("--parallel-min-pages", type=int, default=16)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    from app.services import pdf_extraction
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.docs):
+            path = os.path.join(tmp, f"portfolio_{i}.pdf")
+            make_synthetic_pdf(path, args.pages, seed=i)
+            paths.append(path)
+        print(f"Corpus: {args.docs} PDFs x {args.pages} pages ({os.path.getsize(paths[0]) // 1024} KB each)\n")
+
+        modes = [
+            ("full (old)", 0, 0),
+            ("full + pool", 0, args.parallel_min_pages),
+            ("budget", args.budget, 0),
+            ("budget + pool", args.budget, args.parallel_min_pages),
+        ]
+        # Start the pool up front so its spawn cost is not charged to the first pooled mode
+        pdf_extraction._get_pool().submit(int).result()
+
+        outputs = {}
+        timings = {}
+        for label, budget, min_pages in modes:
+            start = time.perf_counter()
+            outputs[label] = [
+                pdf_extraction.extract_pdf_text(PdfReader(p), p, char_budget=budget, time_limit=300, parallel_min_pages=min_pages)
+                for p in paths
+            ]
+            timings[label] = time.perf_counter() - start
+            chars = sum(len(t) for t in outputs[label]) // len(paths)
+            print(f"{label:<16} {timings[label]:6.2f}s  ({timings[label] / len(paths) * 1000:6.1f} ms/doc, {chars} chars/doc)")
+
+        pdf_extraction._reset_pool()
+
+    reference = outputs["full (old)"]
+    for label, texts in outputs.items():
+        for full, text in zip(reference, texts):
+            assert full.startswith(text), f"{label}: output is not a prefix of the full extraction"
+            assert full[:LLM_WINDOW] == text[:LLM_WINDOW], f"{label}: LLM-visible text differs"
+    print("\nLLM-visible text identical in all modes.")
+    print(f"Speed-up vs full: budget {timings['full (old)'] / timings['budget']:.1f}x, "
+          f"budget + pool {timings['full (old)'] / timings['budget + pool']:.1f}x, "
+          f"full + pool {timings['full (old)'] / timings['full + pool']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
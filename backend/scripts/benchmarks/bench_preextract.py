@@ -0,0 +1,93 @@
+"""
+Benchmark: CV parse prompt size with and without local pre-extraction.
+
+Builds synthetic CVs (contact block, link markers, page footers, experience,
+education, references) and compares the prompt tokens of the full prompt vs.
+the judgment-only prompt sent after app.services.cv_preextract, plus the cost
+of the pre-extraction itself. Completion tokens and latency need a real model:
+compare the "prompt" field of parse_cv LLMLogger entries for those.
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_preextract.py --cvs 200
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def synthetic_cv(seed: int) -> str:
+    rng = random.Random(seed)
+    name = f"Candidate {seed}"
+    lines = [
+        name,
+        "Curriculum Vitae",
+        f"candidate{seed}@example.com | +20 10{rng.randint(10000000, 99999999)} | linkedin.com/in/candidate{seed}",
+        f" [LINK: https://github.com/candidate{seed}] ",
+        "Summary",
+        "Backend engineer focused on distributed systems, APIs and data pipelines.",
+        "Work Experience",
+    ]
+    for job in range(rng.randint(3, 6)):
+        start = 2023 - job * 3
+        lines += [
+            f"Software Engineer {job}, Company {rng.randint(1, 500)} ({start - 3} - {start})",
+            "Designed and operated Python services on AWS; led migrations to PostgreSQL; mentored engineers.",
+            f" [LINK: https://portfolio.example.com/{seed}/{job}] ",
+        ]
+        if job % 2:
+            lines += [f"{name} - Confidential", f"Page {job} of 6"]
+    lines += [
+        "Education",
+        f"B.Sc. Computer Science, University {rng.randint(1, 50)}",
+        f"{2008 + seed % 8} - {2012 + seed % 8}",
+        "Skills",
+        "Python, Go, PostgreSQL, Kubernetes, AWS, Terraform, Kafka",
+        "References",
+        f"Referee {seed}, referee{seed}@example.com, 0101{rng.randint(1000000, 9999999)}",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    from app.services import cv_preextract, token_budget
+    from app.services.parser import CV_PARSE_SYSTEM_PROMPT, CV_PARSE_JUDGMENT_PROMPT, OPENAI_MODEL
+
+    def prompt_tokens(system_prompt: str, text: str) -> int:
+        return token_budget.count_message_tokens([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Filename: cv.pdf\nCV Text:\n{text}"},
+        ], OPENAI_MODEL)
+
+    cvs = [synthetic_cv(i) for i in range(args.cvs)]
+    full_tokens = sum(prompt_tokens(CV_PARSE_SYSTEM_PROMPT, cv) for cv in cvs)
+
+    start = time.perf_counter()
+    pre = [cv_preextract.pre_extract(cv) for cv in cvs]
+    elapsed = time.perf_counter() - start
+    judged_tokens = sum(
+        prompt_tokens(CV_PARSE_JUDGMENT_PROMPT, cv_preextract.prompt_hints(p) + p["text"]) for p in pre
+    )
+
+    exact = "tiktoken" if token_budget.get_encoding(OPENAI_MODEL) else "estimated (tiktoken encoding unavailable)"
+    print(f"{args.cvs} synthetic CVs, prompt tokens {exact}\n")
+    print(f"full prompt:         {full_tokens / args.cvs:8.1f} tokens/CV")
+    print(f"after pre-extract:   {judged_tokens / args.cvs:8.1f} tokens/CV  "
+          f"({(1 - judged_tokens / full_tokens) * 100:.1f}% fewer)")
+    print(f"pre-extract cost:    {elapsed / args.cvs * 1000:8.2f} ms/CV")
+    found = sum(1 for p in pre if p["email"] and p["phone"])
+    print(f"contacts found:      {found}/{args.cvs} CVs with email and phone")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark: memory and latency of the profiles list (GET /profiles/) with the
+heavy text columns loaded vs. deferred.
+
+Seeds a temporary SQLite database with --cvs parsed CVs (raw_text of
+--raw-text-kb, a job history), each with applications and interviews, and
+--users recruiters with base64 profile pictures of --picture-kb as uploaders
+and assigners. Then pages through the list, --limit profiles per page
+following X-Next-Cursor, for each mode:
+
+    loaded    - ParsedCV.raw_text and User.profile_picture loaded with every
+                row, as before they were deferred (emulated by undefer()
+                options added to every ORM query)
+    deferred  - the mapped defaults: only columns a response returns are read
+
+Reported per mode: p50/p99 request latency, and the peak Python memory
+allocated while serving one page (tracemalloc), averaged over pages.
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_profiles_list.py
+    python scripts/benchmarks/bench_profiles_list.py --cvs 5000 --raw-text-kb 40 --picture-kb 200
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+ADMIN_EMAIL = "admin@bench.example"
+
+
+def filler(rng, kb):
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(200)]
+    text, size = [], 0
+    while size < kb * 1024:
+        word = rng.choice(words)
+        text.append(word)
+        size += len(word) + 1
+    return " ".join(text)
+
+
+def seed(args):
+    import base64
+    import json
+    from app.core.database import Base, SessionLocal
+    from app.models.models import Application, CV, Company, Interview, Job, ParsedCV, User, UserRole
+
+    rng = random.Random(0)
+    Base.metadata.create_all(bind=SessionLocal.kw["bind"])
+    db = SessionLocal()
+    try:
+        company = Company(name="Bench", domain="bench.example")
+        db.add(company)
+        db.flush()
+        users = [User(email=ADMIN_EMAIL, hashed_password="x", role=UserRole.ADMIN, company_id=company.id)]
+        users += [User(email=f"recruiter{i}@bench.example", hashed_password="x", role=UserRole.RECRUITER,
+                       company_id=company.id, full_name=f"Recruiter {i}") for i in range(args.users)]
+        for user in users:
+            user.profile_picture = "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(args.picture_kb * 768)).decode()
+        db.add_all(users)
+        jobs = [Job(title=f"Engineer {j}", company_id=company.id, department="Engineering") for j in range(10)]
+        db.add_all(jobs)
+        db.flush()
+
+        history = json.dumps([{"title": "Engineer", "company": "Acme", "description": filler(rng, 1)}
+                              for _ in range(3)])
+        for i in range(args.cvs):
+            uploader = rng.choice(users)
+            cv = CV(filename=f"{i}.pdf", filepath="/dev/null", company_id=company.id, is_parsed=True,
+                    uploaded_by=uploader.id)
+            db.add(cv)
+            db.flush()
+            db.add(ParsedCV(cv_id=cv.id, name=f"Candidate {i}", skills='["Python", "SQL"]',
+                            experience_years=rng.randint(0, 20), raw_text=filler(rng, args.raw_text_kb),
+                            job_history=history))
+            for job in rng.sample(jobs, args.applications):
+                application = Application(cv_id=cv.id, job_id=job.id, status="Screening",
+                                          assigned_by=rng.choice(users).id)
+                db.add(application)
+                db.flush()
+                db.add(Interview(application_id=application.id, interviewer_id=rng.choice(users).id,
+                                 step="Technical", feedback=filler(rng, 1)))
+            if i % 500 == 499:
+                db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+
+def load_heavy_columns():
+    """Add undefer() options for the heavy columns to every top-level ORM query."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import defaultload, undefer
+    from app.core.database import SessionLocal
+    from app.models.models import Application, CV, ParsedCV, User
+
+    options = {
+        CV: [
+            defaultload(CV.parsed_data).undefer(ParsedCV.raw_text),
+            defaultload(CV.uploader).undefer(User.profile_picture),
+            defaultload(CV.applications).defaultload(Application.assigner).undefer(User.profile_picture),
+        ],
+        ParsedCV: [undefer(ParsedCV.raw_text), undefer(ParsedCV.job_history)],
+        User: [undefer(User.profile_picture)],
+    }
+
+    @event.listens_for(SessionLocal, "do_orm_execute")
+    def undefer_heavy_columns(state):
+        if not state.is_select or state.is_relationship_load or state.is_column_load:
+            return
+        entities = [d.get("entity") for d in state.statement.column_descriptions]
+        if len(entities) == 1 and entities[0] in options:
+            state.statement = state.statement.options(*options[entities[0]])
+
+    return undefer_heavy_columns
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from app.api.deps import get_current_user
+    from app.api.v1 import profiles
+    from app.core.database import get_db
+    from app.models.models import User
+
+    app = FastAPI()
+    app.include_router(profiles.router)
+
+    def current_user(db=Depends(get_db)):
+        # The full users row, as get_current_user loaded it before principals were cached
+        return db.query(User).filter(User.email == ADMIN_EMAIL).first()
+
+    app.dependency_overrides[get_current_user] = current_user
+    return app
+
+
+async def run_mode(mode, args):
+    import httpx
+    from sqlalchemy import event
+    from app.core.database import SessionLocal
+
+    listener = load_heavy_columns() if mode == "loaded" else None
+    transport = httpx.ASGITransport(app=build_app())
+    latencies, peaks, rows = [], [], 0
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for _ in range(args.rounds):
+                cursor = None
+                for _ in range(args.pages):
+                    params = {"limit": args.limit, **({"cursor": cursor} if cursor else {})}
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    res = await client.get("/profiles/", params=params)
+                    latencies.append(time.perf_counter() - start)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    res.raise_for_status()
+                    rows += len(res.json()["items"])
+                    cursor = res.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+    finally:
+        if listener:
+            event.remove(SessionLocal, "do_orm_execute", listener)
+
+    ms = np.array(latencies) * 1000
+    print(f"  {mode:<9} {np.percentile(ms, 50):8.1f} {np.percentile(ms, 99):8.1f}   "
+          f"{np.mean(peaks) / 2**20:10.1f}   {rows / len(latencies):6.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=2000)
+    parser.add_argument("--raw-text-kb", type=int, default=20, help="Extracted text per CV")
+    parser.add_argument("--users", type=int, default=20, help="Recruiters with profile pictures")
+    parser.add_argument("--picture-kb", type=int, default=150, help="Base64 profile picture size")
+    parser.add_argument("--applications", type=int, default=2, help="Applications per CV, one interview each")
+    parser.add_argument("--limit", type=int, default=50, help="Profiles per page")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per walk through the list")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix="bench_profiles_list_")
+    # The engine is created from DATABASE_URL when app.core.database is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("LOGS_DATABASE_URL", "sqlite://")
+    try:
+        started = time.perf_counter()
+        seed(args)
+        print(f"{args.cvs} CVs ({args.raw_text_kb} KB raw text) x {args.applications} applications, "
+              f"{args.users} users ({args.picture_kb} KB pictures), seeded in {time.perf_counter() - started:.0f}s; "
+              f"{args.rounds} x {args.pages} pages of {args.limit}\n")
+        print(f"  {'mode':<9} {'p50 ms':>8} {'p99 ms':>8}   {'peak MB/req':>10}   {'rows':>6}")
+        for mode in ("loaded", "deferred"):
+            asyncio.run(run_mode(mode, args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
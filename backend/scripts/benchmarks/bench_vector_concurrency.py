@@ -0,0 +1,141 @@
+"""
+Benchmark: latency of unrelated endpoints while vector searches are running.
+
+Serves a small FastAPI app in-process (one event loop, like one uvicorn
+worker) with two routes: /search, which calls ChromaSearchEngine, and /ping,
+which does no I/O. Concurrent clients hammer /search while another client
+pings, and the ping latency is reported for:
+
+    inline    - the Chroma client called directly on the event loop (the old behaviour)
+    executor  - ChromaSearchEngine.search, which runs the call on the bounded
+                vector DB pool (SearchEngine.run_blocking)
+
+The query embedding is stubbed. Chroma is simulated by a collection whose
+query blocks for --query-ms, unless --chroma-host points at a real server
+(the "candidates" collection should already hold vectors of --dim dims).
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_vector_concurrency.py --searchers 16 --seconds 5
+    python scripts/benchmarks/bench_vector_concurrency.py --chroma-host localhost:8000 --dim 1536
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+class SlowCollection:
+    """Stands in for a Chroma collection: query() blocks like a synchronous HTTP call."""
+
+    def __init__(self, query_ms: float):
+        self.query_s = query_ms / 1000
+
+    def query(self, query_embeddings, n_results, where=None):
+        time.sleep(self.query_s)
+        return {"ids": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+def build_engine(args):
+    from app.services.search.chroma import ChromaSearchEngine
+
+    if args.chroma_host:
+        host, _, port = args.chroma_host.partition(":")
+        os.environ["CHROMA_HOST"], os.environ["CHROMA_PORT"] = host, port or "8000"
+        return ChromaSearchEngine()
+    engine = ChromaSearchEngine.__new__(ChromaSearchEngine)
+    engine.collection = SlowCollection(args.query_ms)
+    return engine
+
+
+def build_app(engine, mode, query_vector):
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/search")
+    async def search():
+        if mode == "inline":
+            return engine.search_by_vector(query_vector, 10)
+        return await engine.search("python developer", 10)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run_mode(engine, mode, query_vector, args):
+    import httpx
+
+    app = build_app(engine, mode, query_vector)
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + args.seconds
+    searches = 0
+    pings = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def searcher():
+            nonlocal searches
+            while time.perf_counter() < deadline:
+                await client.get("/search")
+                searches += 1
+                # ASGITransport never waits on a socket; yield like real network I/O would
+                await asyncio.sleep(0)
+
+        async def pinger():
+            # Latency is measured from when the ping was due, so time spent waiting
+            # for a blocked event loop to run the pinger at all is counted too
+            interval = args.ping_interval_ms / 1000
+            due = time.perf_counter()
+            while due < deadline:
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/ping")
+                done = time.perf_counter()
+                pings.append(done - due)
+                due = max(due + interval, done)
+
+        await asyncio.gather(pinger(), *(searcher() for _ in range(args.searchers)))
+
+    ms = np.array(pings) * 1000
+    print(f"  {mode:<9} /ping p50 {np.percentile(ms, 50):8.2f} ms   p99 {np.percentile(ms, 99):8.2f} ms   "
+          f"max {ms.max():8.2f} ms   ({len(pings)} pings, {searches / args.seconds:6.1f} searches/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searchers", type=int, default=16, help="Concurrent /search clients")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each mode")
+    parser.add_argument("--query-ms", type=float, default=20.0, help="Simulated Chroma query time")
+    parser.add_argument("--ping-interval-ms", type=float, default=5.0)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--chroma-host", help="host[:port] of a Chroma server (default: simulated)")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    from app.core.config import settings
+
+    query_vector = np.random.default_rng(0).standard_normal(args.dim).tolist()
+
+    async def fake_embedding(*_, **__):
+        return query_vector
+
+    engine = build_engine(args)
+    source = args.chroma_host or f"simulated Chroma, {args.query_ms:.0f} ms/query"
+    print(f"{args.searchers} concurrent searchers, {source}, "
+          f"pool of {settings.VECTOR_DB_MAX_WORKERS} threads\n")
+    with patch("app.services.search.chroma.generate_embedding", fake_embedding):
+        for mode in ("inline", "executor"):
+            asyncio.run(run_mode(engine, mode, query_vector, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark: in-process NumPy vector index vs. Chroma.
+
+Builds both indexes from the same random unit vectors (one company per
+candidate, round-robin) and reports build time, reopen time, index size and
+query latency, unfiltered and filtered to one company. Chroma recall@10 is
+measured against the exact NumPy result.
+
+Chroma runs in-process (chromadb.PersistentClient in a temp dir) unless
+--chroma-host points at a server. Random vectors are a worst case for HNSW
+recall; real embeddings cluster and score much higher. 1M x 1536 vectors need
+~6 GB of RAM in float32 (~3 GB in float16) for NumPy alone; pass --skip-chroma
+at that size unless the machine has room for both.
+
+Usage (from backend/):
+    python scripts/benchmarks/bench_vector_index.py --sizes 10000,100000
+    python scripts/benchmarks/bench_vector_index.py --sizes 1000000 --dtype float16 --skip-chroma
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+UPSERT_CHUNK = 5000
+
+
+def random_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):8.2f} ms   p95 {np.percentile(ms, 95):8.2f} ms"
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def timed_queries(search, queries, **kwargs):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query, **kwargs))
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+def bench_numpy(vectors, companies, queries, args, workdir):
+    from app.services.search.numpy_index import NumpySearchEngine
+
+    path = os.path.join(workdir, "numpy")
+    n = len(vectors)
+    start = time.perf_counter()
+    index = NumpySearchEngine(path=path, dtype=args.dtype)
+    for lo in range(0, n, UPSERT_CHUNK):
+        hi = min(lo + UPSERT_CHUNK, n)
+        index.upsert(
+            ids=[str(i) for i in range(lo, hi)],
+            documents=[""] * (hi - lo),
+            metadatas=[{"company_id": int(companies[i])} for i in range(lo, hi)],
+            embeddings=vectors[lo:hi],
+        )
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = NumpySearchEngine(path=path)
+    reopen = time.perf_counter() - start
+
+    def search(q, **kw):
+        return [r["id"] for r in index.search_by_vector(q.tolist(), 10, **kw)]
+
+    timed_queries(search, queries[:3])  # page the matrix in
+    plain, exact = timed_queries(search, queries)
+    filtered, _ = timed_queries(search, queries, filters={"company_id": 0})
+
+    print(f"  numpy ({args.dtype})  build {build:7.1f} s   reopen {reopen * 1000:7.1f} ms   "
+          f"size {dir_size(path) / 2**20:8.1f} MB")
+    print(f"    unfiltered   {percentiles(plain)}")
+    print(f"    company      {percentiles(filtered)}")
+    return exact
+
+
+def bench_chroma(vectors, companies, queries, exact, args, workdir):
+    import chromadb
+
+    if args.chroma_host:
+        host, _, port = args.chroma_host.partition(":")
+        client = chromadb.HttpClient(host=host, port=int(port or 8000))
+    else:
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    name = "bench_vector_index"
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    collection = client.create_collection(name=name, metadata={"hnsw:space": "cosine"})
+
+    n = len(vectors)
+    chunk = min(UPSERT_CHUNK, client.get_max_batch_size())
+    start = time.perf_counter()
+    for lo in range(0, n, chunk):
+        hi = min(lo + chunk, n)
+        collection.upsert(
+            ids=[str(i) for i in range(lo, hi)],
+            embeddings=vectors[lo:hi],
+            metadatas=[{"company_id": int(companies[i])} for i in range(lo, hi)],
+        )
+    build = time.perf_counter() - start
+
+    def search(q, where=None):
+        return collection.query(query_embeddings=[q.tolist()], n_results=10, where=where)["ids"][0]
+
+    timed_queries(search, queries[:3])
+    plain, approx = timed_queries(search, queries)
+    filtered, _ = timed_queries(search, queries, where={"company_id": 0})
+    recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)])
+
+    size = f"size {dir_size(os.path.join(workdir, 'chroma')) / 2**20:8.1f} MB" if not args.chroma_host else ""
+    print(f"  chroma           build {build:7.1f} s   {size}")
+    print(f"    unfiltered   {percentiles(plain)}   recall@10 {recall:.3f}")
+    print(f"    company      {percentiles(filtered)}")
+    client.delete_collection(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated index sizes")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--chroma-host", help="host[:port] of a Chroma server (default: in-process)")
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        vectors = random_vectors(n, args.dim, seed=n)
+        companies = np.arange(n) % args.companies
+        # Queries near stored vectors, as for real "more like this" searches
+        picks = np.random.default_rng(1).integers(0, n, args.queries)
+        queries = random_vectors(args.queries, args.dim, seed=2) * 0.3 + vectors[picks]
+
+        print(f"\n{n} vectors x {args.dim} dims, {args.companies} companies, {args.queries} queries (top 10)")
+        workdir = tempfile.mkdtemp(prefix="bench_vector_index_")
+        try:
+            exact = bench_numpy(vectors, companies, queries, args, workdir)
+            if not args.skip_chroma:
+                bench_chroma(vectors, companies, queries, exact, args, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Minimal local stand-in for the OpenAI API, used by the benchmark scripts.
+
+Serves /v1/chat/completions (a fixed parsed-CV JSON) and /v1/embeddings
+(deterministic vectors) with a configurable artificial latency, over HTTP/1.1
+keep-alive. Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Run standalone:
+    python scripts/benchmarks/fake_openai_server.py --port 8911 --latency-ms 50
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PARSED_CV = {
+    "name": "Jane Doe",
+    "summary": "Backend engineer with 8 years of Python experience.",
+    "email": ["jane@example.com"],
+    "phone": ["+123456789"],
+    "address": "Cairo",
+    "age": 31,
+    "bachelor_year": 2016,
+    "experience_years": 8,
+    "last_job_title": "Senior Backend Engineer",
+    "last_company": "Acme",
+    "social_links": ["https://linkedin.com/in/janedoe"],
+    "skills": ["Python", "FastAPI", "PostgreSQL", "AWS"],
+    "education": [{"institution": "Cairo University", "degree": "BSc", "year": "2016"}],
+    "job_history": [{"title": "Senior Backend Engineer", "company": "Acme", "duration": "2020-Present", "description": "APIs"}],
+}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    latency_s = 0.05
+    dimensions = 1536
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency_s)
+
+        if self.path.endswith("/chat/completions"):
+            self._send_json({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o-mini"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(PARSED_CV)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500},
+            })
+        elif self.path.endswith("/embeddings"):
+            inputs = request.get("input")
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            dims = request.get("dimensions") or self.dimensions
+            data = []
+            for i, text in enumerate(inputs):
+                seed = (hash(text) % 1000) / 1000.0
+                data.append({"object": "embedding", "index": i, "embedding": [seed] * dims})
+            tokens = sum(len(str(t)) // 4 for t in inputs)
+            self._send_json({
+                "object": "list",
+                "data": data,
+                "model": request.get("model", "text-embedding-3-small"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+def start_server(port: int = 0, latency_ms: float = 50.0) -> ThreadingHTTPServer:
+    """Start the fake server in a daemon thread and return it (server.server_port is the bound port)."""
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency_s": latency_ms / 1000.0})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8911)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    srv = start_server(args.port, args.latency_ms)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{srv.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,77 @@
+"""
+Compare the candidate_summary read model with the rows it is built from and
+report drift: CVs without a summary row (missing), rows that differ from a
+fresh build (stale) and rows whose CV no longer exists (orphaned). Drift
+comes from writes that bypass the ORM, which the commit hooks don't see.
+
+With --fix the drifted rows are rebuilt or removed. Exits 1 if drift was
+found and not fixed, so it can run as a scheduled check.
+
+Usage (from backend/):
+    python scripts/check_candidate_summary.py
+    python scripts/check_candidate_summary.py --fix
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.models.models import CV, CandidateSummary
+from app.services import candidate_summary
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 10
+
+
+def check(batch_size: int, fix: bool) -> bool:
+    """True if no drift remains."""
+    db = SessionLocal()
+    try:
+        drift = {"missing": [], "stale": [], "orphaned": []}
+        last_id = 0
+        while True:
+            ids = [cv_id for (cv_id,) in db.query(CV.id).filter(CV.id > last_id).order_by(CV.id).limit(batch_size)]
+            if not ids:
+                break
+            last_id = ids[-1]
+            for kind, cv_ids in candidate_summary.check_summaries(db, ids).items():
+                drift[kind].extend(cv_ids)
+            db.expunge_all()
+        drift["orphaned"].extend(
+            cv_id for (cv_id,) in db.query(CandidateSummary.cv_id).filter(~CandidateSummary.cv_id.in_(db.query(CV.id)))
+        )
+
+        for kind, cv_ids in drift.items():
+            sample = ", ".join(map(str, cv_ids[:SAMPLE_SIZE])) + (" ..." if len(cv_ids) > SAMPLE_SIZE else "")
+            logger.info(f"{kind}: {len(cv_ids)}" + (f" (CV ids {sample})" if cv_ids else ""))
+        if not any(drift.values()):
+            return True
+        if not fix:
+            return False
+
+        # refresh() rebuilds rows of existing CVs and removes those of deleted ones
+        rows = candidate_summary.refresh(db, [cv_id for cv_ids in drift.values() for cv_id in cv_ids])
+        db.commit()
+        logger.info(f"Fixed: {rows} rows rebuilt, {len(drift['orphaned'])} orphaned rows removed")
+        return True
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--fix", action="store_true", help="Rebuild drifted rows and remove orphaned ones")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.batch_size, args.fix) else 1)
+
+
+if __name__ == "__main__":
+    main()
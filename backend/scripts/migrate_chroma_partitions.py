@@ -0,0 +1,51 @@
+"""
+Move candidates from the single "candidates" Chroma collection into
+per-tenant partitions (see ChromaSearchEngine, CHROMA_PARTITIONING).
+
+Stored vectors are copied as-is; nothing is re-embedded. Safe to re-run.
+
+Suggested rollout:
+    1. python scripts/migrate_chroma_partitions.py --mode company
+       (copies; searches keep using "candidates" meanwhile)
+    2. Set CHROMA_PARTITIONING=company and restart the API and workers
+    3. python scripts/migrate_chroma_partitions.py --mode company --delete-source
+       (copies anything indexed in between, then removes moved ids from "candidates")
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.search.chroma import ChromaSearchEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["company", "shard"], default=settings.CHROMA_PARTITIONING,
+                        help="Partitioning to migrate to (default: CHROMA_PARTITIONING)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete-source", action="store_true",
+                        help="Remove moved candidates from the 'candidates' collection")
+    args = parser.parse_args()
+    if args.mode not in ("company", "shard"):
+        parser.error("--mode must be 'company' or 'shard'")
+
+    engine = ChromaSearchEngine()
+    engine.partitioning = args.mode
+    counts = engine.migrate_to_partitions(batch_size=args.batch_size, delete_source=args.delete_source)
+    logger.info(
+        f"Done: {counts['moved']} candidates in {counts['partitions']} partitions, "
+        f"{counts['kept']} without a company left in '{engine.collection_name}'"
+    )
+
+
+if __name__ == "__main__":
+    main()
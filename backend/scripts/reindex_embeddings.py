@@ -0,0 +1,147 @@
+"""
+Copy the candidate index into a new one with a different embedding size
+and/or storage type. Use it to roll out EMBEDDING_DIMENSIONS, int8/float16
+vectors (SEARCH_BACKEND=numpy) or CHROMA_STORE_DOCUMENTS=false.
+
+The current index (SEARCH_BACKEND, CHROMA_COLLECTION / VECTOR_INDEX_PATH) is
+the source and is not modified. Candidates are written to the target as:
+
+  --mode project   stored vectors shortened to --dimensions and re-normalized
+                   (text-embedding-3 vectors keep their meaning when truncated;
+                   no API calls). Candidates missing from the source are embedded.
+  --mode reembed   every candidate embedded again at --dimensions
+
+Rollout (Chroma):
+    python scripts/reindex_embeddings.py --dimensions 512 --target chroma --collection candidates_512
+    then set EMBEDDING_DIMENSIONS=512 CHROMA_COLLECTION=candidates_512 and restart the API and workers.
+Rollout (NumPy index):
+    python scripts/reindex_embeddings.py --dimensions 512 --target numpy --path data/vector_index_512 --dtype int8
+    then set EMBEDDING_DIMENSIONS=512 VECTOR_INDEX_PATH=data/vector_index_512 VECTOR_INDEX_DTYPE=int8.
+Run it once more after switching to pick up CVs indexed in between (it is
+idempotent), then drop the old collection / directory.
+
+Usage (from backend/):
+    python scripts/reindex_embeddings.py --dimensions 512 --target numpy --path data/vector_index_512
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Dict, List
+
+# Add backend directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import CV, ParsedCV
+from app.services.embeddings import generate_embeddings_batch, project_embedding
+from app.services.sync_service import _candidate_metadata, construct_rich_text
+from app.services.vector_db import vector_db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_target(args):
+    if args.target == "numpy":
+        from app.services.search.numpy_index import NumpySearchEngine
+        if os.path.abspath(args.path) == os.path.abspath(settings.VECTOR_INDEX_PATH) and settings.SEARCH_BACKEND == "numpy":
+            raise SystemExit("--path must differ from the live VECTOR_INDEX_PATH")
+        return NumpySearchEngine(path=args.path, dtype=args.dtype)
+    from app.services.search.chroma import ChromaSearchEngine
+    if args.collection == settings.CHROMA_COLLECTION:
+        raise SystemExit("--collection must differ from the live CHROMA_COLLECTION (Chroma fixes a collection's dimension)")
+    return ChromaSearchEngine(collection_name=args.collection)
+
+
+def _fetch_page(last_id: int, batch_size: int):
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ParsedCV, CV)
+            .join(CV, ParsedCV.cv_id == CV.id)
+            .filter(ParsedCV.id > last_id)
+            .order_by(ParsedCV.id)
+            .limit(batch_size)
+            .all()
+        )
+        return [
+            (parsed.id, str(cv.id), cv.company_id, construct_rich_text(parsed), _candidate_metadata(parsed, cv))
+            for parsed, cv in rows
+        ]
+    finally:
+        db.close()
+
+
+async def _stored_vectors(page) -> Dict[str, List[float]]:
+    by_company: Dict = {}
+    for _, cid, company_id, _, _ in page:
+        by_company.setdefault(company_id, []).append(cid)
+    stored: Dict[str, List[float]] = {}
+    for company_id, ids in by_company.items():
+        stored.update(await vector_db.run_blocking(vector_db.get_embeddings, ids, company_id=company_id))
+    return stored
+
+
+async def reindex(args):
+    target = build_target(args)
+    dims = args.dimensions
+    counts = {"projected": 0, "embedded": 0, "failed": 0}
+    last_id = 0
+    while True:
+        page = await asyncio.to_thread(_fetch_page, last_id, args.batch_size)
+        if not page:
+            break
+        last_id = page[-1][0]
+
+        vectors: Dict[str, List[float]] = {}
+        if args.mode == "project":
+            for cid, vector in (await _stored_vectors(page)).items():
+                if dims is None or len(vector) >= dims:
+                    vectors[cid] = project_embedding(vector, dims) if dims else vector
+        missing = [row for row in page if row[1] not in vectors]
+        counts["projected"] += len(vectors)
+        if missing:
+            fresh = await generate_embeddings_batch([row[3] for row in missing], dimensions=dims)
+            for row, vector in zip(missing, fresh):
+                if vector:
+                    vectors[row[1]] = vector
+                    counts["embedded"] += 1
+                else:
+                    counts["failed"] += 1
+
+        ready = [row for row in page if row[1] in vectors]
+        if ready and not target.upsert(
+            ids=[row[1] for row in ready],
+            documents=[row[3] for row in ready],
+            metadatas=[row[4] for row in ready],
+            embeddings=[vectors[row[1]] for row in ready],
+        ):
+            raise RuntimeError(f"Writing to the target index failed after ParsedCV id {last_id}")
+        logger.info(f"Reindex: {counts}")
+    logger.info(f"Done: {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS or None,
+                        help="Target embedding size (default: EMBEDDING_DIMENSIONS, else native)")
+    parser.add_argument("--mode", choices=["project", "reembed"], default="project")
+    parser.add_argument("--target", choices=["numpy", "chroma"], default=settings.SEARCH_BACKEND)
+    parser.add_argument("--path", help="NumPy target directory")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32", help="NumPy target storage")
+    parser.add_argument("--collection", help="Chroma target collection")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    if args.target == "numpy" and not args.path:
+        parser.error("--path is required with --target numpy")
+    if args.target == "chroma" and not args.collection:
+        parser.error("--collection is required with --target chroma")
+    asyncio.run(reindex(args))
+
+
+if __name__ == "__main__":
+    main()
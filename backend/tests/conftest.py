@@ -1,5 +1,6 @@
 # backend/tests/conftest.py
 import os
+import asyncio
 import pytest
 
 # Set environment variables for testing before importing app components
@@ -8,24 +9,30 @@ os.environ["LOGS_DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["ALLOW_MISSING_LOGS_DB"] = "true"
 os.environ["TESTING"] = "true"
+# No Celery broker in tests: don't queue match scoring or job indexing from job/CV hooks
+os.environ["MATCH_SCORES_ENABLED"] = "false"
+os.environ["JOB_INDEX_ENABLED"] = "false"
 
 # Monkey patch JSONB to be JSON for SQLite compatibility (SystemLog/LLMLog use JSONB)
 import sqlalchemy.dialects.postgresql
 from sqlalchemy.types import JSON
 sqlalchemy.dialects.postgresql.JSONB = JSON
 
+import aiosqlite  # noqa: E402
 from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
 from sqlalchemy.orm import sessionmaker  # noqa: E402
 from sqlalchemy.pool import StaticPool  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 from app.main import app  # noqa: E402
-from app.core.database import get_db, Base  # noqa: E402
+from app.core.database import get_db, get_async_db, Base  # noqa: E402
 from app.core.database_logs import engine_logs  # noqa: E402
 from app.models.log_models import LogBase  # noqa: E402
 from app.models.models import User, Company, UserRole  # noqa: E402
 from app.core.security import get_password_hash, create_access_token  # noqa: E402
 from fastapi_cache import FastAPICache  # noqa: E402
 from fastapi_cache.backends.inmemory import InMemoryBackend  # noqa: E402
+from app.services import embedding_cache, principal_cache  # noqa: E402
 
 # In-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -37,9 +44,45 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+async def _connect_shared():
+    # Async routes run on the sync engine's sqlite3 connection, so they see the
+    # same in-memory database (and, like routes sharing the `db` session did,
+    # its uncommitted rows)
+    return await aiosqlite.Connection(lambda: engine.pool.connection.dbapi_connection, 64)
+
+
+async_engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    async_creator=_connect_shared,
+    poolclass=StaticPool,
+    pool_reset_on_return=None
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(autouse=True)
+def async_db():
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def close_async_engine():
+    yield
+    # Stops the aiosqlite worker thread (and closes the shared connection)
+    asyncio.run(async_engine.dispose())
+
 @pytest.fixture(autouse=True)
 def init_test_cache():
     FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+    embedding_cache.clear_memory()
+    principal_cache.clear_memory()
     yield
 
 @pytest.fixture(scope="function")
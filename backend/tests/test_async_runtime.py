@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.core import async_runtime
+
+
+@pytest.fixture
+def runtime():
+    async_runtime.start()
+    yield async_runtime
+    async_runtime.stop()
+
+
+def test_run_falls_back_to_asyncio_run_when_not_started():
+    async def add(a, b):
+        return a + b
+
+    assert not async_runtime.is_running()
+    assert async_runtime.run(add(1, 2)) == 3
+
+
+def test_run_reuses_one_loop(runtime):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = runtime.run(current_loop())
+    second = runtime.run(current_loop())
+    assert first is second
+    assert not first.is_closed()
+
+
+def test_shared_openai_client_only_on_runtime_loop(runtime):
+    async def get_client():
+        return runtime.get_openai_client("sk-test")
+
+    first = runtime.run(get_client())
+    second = runtime.run(get_client())
+    assert first is not None
+    assert first is second
+
+    # Other loops (e.g. the API's) must build their own client
+    assert asyncio.run(get_client()) is None
+
+
+def test_run_propagates_exceptions(runtime):
+    async def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        runtime.run(boom())
+
+
+def test_stop_is_idempotent():
+    async_runtime.start()
+    async_runtime.stop()
+    async_runtime.stop()
+    assert not async_runtime.is_running()
+
+
+def test_runtime_started_for_thread_pool_workers_only():
+    from app.celery_app import start_thread_pool_runtime
+    from app.core import openai_limiter
+    from celery.concurrency.prefork import TaskPool as PreforkPool
+    from celery.concurrency.thread import TaskPool as ThreadPool
+
+    try:
+        start_thread_pool_runtime(sender=SimpleNamespace(pool_cls=PreforkPool))
+        assert not async_runtime.is_running()
+        start_thread_pool_runtime(sender=SimpleNamespace(pool_cls=ThreadPool))
+        assert async_runtime.is_running()
+    finally:
+        async_runtime.stop()
+        openai_limiter.set_default_priority(openai_limiter.DEFAULT)
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from app.api.endpoints.search import _candidate_results
+from app.models.models import CV, Application, CandidateSummary, Interview, Job, ParsedCV, User, UserRole
+from app.services import candidate_summary
+
+
+def _summary(db, cv_id):
+    db.expire_all()
+    row = db.get(CandidateSummary, cv_id)
+    return json.loads(row.data) if row else None
+
+
+def test_summary_follows_committed_changes(authenticated_client, db):
+    recruiter = User(email="rec@test.com", hashed_password="pw", role=UserRole.RECRUITER, company_id=1,
+                     full_name="Rita Recruiter")
+    job = Job(title="Backend Dev", company_id=1, department="Engineering")
+    db.add_all([recruiter, job])
+    db.commit()
+
+    cv = CV(filename="summary.pdf", filepath="/tmp/s.pdf", company_id=1, uploaded_by=recruiter.id,
+            uploaded_at=datetime.now(timezone.utc) - timedelta(days=1200))
+    db.add(cv)
+    db.commit()
+    data = _summary(db, cv.id)
+    assert data["parsed_data"] is None and data["uploaded_by_name"] == "Rita Recruiter"
+
+    db.add(ParsedCV(cv_id=cv.id, name="Sam Summary", skills='["Python"]', experience_years=4))
+    application = Application(cv_id=cv.id, job_id=job.id, status="Interview", assigned_by=recruiter.id)
+    db.add(application)
+    db.commit()
+    db.add(Interview(application_id=application.id, step="Technical", outcome="Passed"))
+    recruiter.full_name = "Rita R."
+    job.title = "Platform Dev"
+    db.commit()
+
+    data = _summary(db, cv.id)
+    assert data["parsed_data"]["name"] == "Sam Summary"
+    assert data["uploaded_by_name"] == "Rita R."
+    [app_data] = data["applications"]
+    assert app_data["job_title"] == "Platform Dev" and app_data["assigned_by_name"] == "Rita R."
+    assert [i["step"] for i in app_data["interviews"]] == ["Technical"]
+    assert db.get(CandidateSummary, cv.id).is_silver_medalist
+
+    # Upload age is computed when the row is served
+    item = authenticated_client.get("/profiles/").json()["items"][0]
+    assert item["id"] == cv.id and item["is_outdated"] and item["projected_experience"] == 7
+
+    [result] = _candidate_results(db, [cv.id], {cv.id: 0.5})
+    assert result["name"] == "Sam Summary" and result["score"] == 0.5 * 1.15
+
+    db.delete(cv)
+    db.commit()
+    assert db.get(CandidateSummary, cv.id) is None
+
+
+def test_check_and_refresh_repair_drift(db):
+    cv = CV(filename="drift.pdf", filepath="/tmp/d.pdf", company_id=1)
+    db.add(cv)
+    db.commit()
+    db.add(ParsedCV(cv_id=cv.id, name="Before", skills='["SQL"]'))
+    db.commit()
+
+    # Writes that bypass the ORM are not seen by the commit hooks
+    db.execute(text("UPDATE parsed_cvs SET name = 'After' WHERE cv_id = :id"), {"id": cv.id})
+    db.commit()
+    assert _summary(db, cv.id)["parsed_data"]["name"] == "Before"
+    assert candidate_summary.check_summaries(db, [cv.id]) == {"missing": [], "stale": [cv.id], "orphaned": []}
+
+    candidate_summary.refresh(db, [cv.id])
+    db.commit()
+    assert _summary(db, cv.id)["parsed_data"]["name"] == "After"
+    assert candidate_summary.check_summaries(db, [cv.id]) == {"missing": [], "stale": [], "orphaned": []}
+
+    db.execute(text("DELETE FROM candidate_summary WHERE cv_id = :id"), {"id": cv.id})
+    db.commit()
+    assert candidate_summary.check_summaries(db, [cv.id])["missing"] == [cv.id]
+
+
+def test_interviewer_sees_masked_salaries(db):
+    cv = CV(filename="salary.pdf", filepath="/tmp/m.pdf", company_id=1)
+    db.add(cv)
+    db.commit()
+    db.add(ParsedCV(cv_id=cv.id, name="Paid", current_salary="10k", expected_salary="12k"))
+    db.commit()
+
+    row = db.get(CandidateSummary, cv.id)
+    assert candidate_summary.present(row)["parsed_data"]["current_salary"] == "10k"
+    masked = candidate_summary.present(row, mask_salaries=True)["parsed_data"]
+    assert masked["current_salary"] == masked["expected_salary"] == "Confidential"
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from app.services.search.chroma import ChromaSearchEngine
 
 @pytest.fixture
@@ -96,3 +96,131 @@ def test_upsert_success(mock_chroma_client):
     result = engine.upsert(["1"], ["doc"], [{}], [[0.1]])
     assert result is True
     engine.collection.upsert.assert_called_once()
+
+def test_get_embeddings(mock_chroma_client):
+    """Test fetching stored vectors by id."""
+    engine = ChromaSearchEngine()
+    engine.collection.get.return_value = {"ids": ["1", "2"], "embeddings": [[0.1, 0.2], []]}
+    result = engine.get_embeddings(["1", "2"])
+    assert result == {"1": [0.1, 0.2]}
+    engine.collection.get.assert_called_once_with(ids=["1", "2"], include=["embeddings"])
+
+def test_upsert_splits_at_max_batch_size(mock_chroma_client):
+    """Multi-id upserts are split at the server's batch limit."""
+    mock_chroma_client.return_value.get_max_batch_size.return_value = 2
+    engine = ChromaSearchEngine()
+    ids = ["1", "2", "3", "4", "5"]
+    assert engine.upsert(ids, ["doc"] * 5, [{}] * 5, [[0.1]] * 5) is True
+    calls = engine.collection.upsert.call_args_list
+    assert [c.kwargs["ids"] for c in calls] == [["1", "2"], ["3", "4"], ["5"]]
+
+@pytest.mark.asyncio
+async def test_index_candidates_batches_embeddings(mock_chroma_client):
+    """Batch indexing embeds all texts in one call and skips failed ones."""
+    engine = ChromaSearchEngine()
+    with patch("app.services.search.chroma.generate_embeddings_batch", new_callable=AsyncMock) as mock_batch:
+        mock_batch.return_value = [[0.1], [], [0.3]]
+        indexed = await engine.index_candidates([("1", "a", {}), ("2", "b", {}), ("3", "c", {})])
+
+    assert indexed == 2
+    mock_batch.assert_awaited_once_with(["a", "b", "c"])
+    engine.collection.upsert.assert_called_once()
+    assert engine.collection.upsert.call_args.kwargs["ids"] == ["1", "3"]
+
+@pytest.mark.asyncio
+async def test_search_runs_off_the_event_loop(mock_chroma_client, mock_generate_embedding):
+    """Chroma queries run on the vector DB pool, not the event loop thread."""
+    import threading
+    engine = ChromaSearchEngine()
+    mock_generate_embedding.return_value = [0.1]
+    threads = []
+
+    def query(**kwargs):
+        threads.append(threading.current_thread().name)
+        return {"ids": [["1"]], "metadatas": [[{}]], "distances": [[0.2]]}
+
+    engine.collection.query.side_effect = query
+    results = await engine.search("query")
+
+    assert results[0]["id"] == "1"
+    assert threads[0].startswith("vector-db")
+
+@pytest.mark.asyncio
+async def test_search_timeout_returns_empty(mock_chroma_client, mock_generate_embedding):
+    """A slow Chroma call is abandoned after VECTOR_DB_TIMEOUT."""
+    import time
+    engine = ChromaSearchEngine()
+    mock_generate_embedding.return_value = [0.1]
+    engine.collection.query.side_effect = lambda **kwargs: time.sleep(0.5)
+
+    with patch("app.services.search.base.settings.VECTOR_DB_TIMEOUT", 0.05):
+        start = time.perf_counter()
+        assert await engine.search("query") == []
+    assert time.perf_counter() - start < 0.4
+
+def test_partitioned_upsert_and_search_route_by_company(mock_chroma_client):
+    """With per-company partitions, writes and company searches hit that company's collection."""
+    client = mock_chroma_client.return_value
+    collections = {}
+    client.get_or_create_collection.side_effect = lambda name, metadata=None: collections.setdefault(name, MagicMock(name=name))
+    client.get_collection.side_effect = lambda name: collections[name]
+
+    with patch("app.services.search.chroma.settings.CHROMA_PARTITIONING", "company"):
+        engine = ChromaSearchEngine()
+    assert engine.upsert(["1", "2", "3"], ["a", "b", "c"],
+                         [{"company_id": 7}, {"company_id": 8}, {}], [[0.1], [0.2], [0.3]])
+
+    assert collections["candidates_company_7"].upsert.call_args.kwargs["ids"] == ["1"]
+    assert collections["candidates_company_8"].upsert.call_args.kwargs["ids"] == ["2"]
+    assert engine.collection.upsert.call_args.kwargs["ids"] == ["3"]
+
+    collections["candidates_company_7"].query.return_value = {"ids": [["1"]], "metadatas": [[{}]], "distances": [[0.0]]}
+    results = engine.search_by_vector([0.1], 5, {"company_id": 7})
+    assert results[0]["id"] == "1"
+    # The company filter is implied by the collection
+    assert collections["candidates_company_7"].query.call_args.kwargs["where"] is None
+    engine.collection.query.assert_not_called()
+
+    engine.search_by_vector([0.1], 5, {"$and": [{"company_id": 7}, {"department": "Sales"}]})
+    assert collections["candidates_company_7"].query.call_args.kwargs["where"] == {"department": "Sales"}
+
+def test_partitioned_search_without_partition_is_empty(mock_chroma_client):
+    client = mock_chroma_client.return_value
+    client.get_collection.side_effect = Exception("Collection does not exist")
+    with patch("app.services.search.chroma.settings.CHROMA_PARTITIONING", "shard"), \
+         patch("app.services.search.chroma.settings.CHROMA_PARTITION_SHARDS", 4):
+        engine = ChromaSearchEngine()
+        assert engine.partition_name(6) == "candidates_shard_2"
+        assert engine.search_by_vector([0.1], 5, {"company_id": 6}) == []
+
+def test_migrate_to_partitions_copies_stored_vectors(mock_chroma_client):
+    client = mock_chroma_client.return_value
+    partition = MagicMock()
+    client.get_or_create_collection.side_effect = lambda name, metadata=None: (
+        partition if name == "candidates_company_5" else client.default_collection)
+    client.list_collections.return_value = []
+    with patch("app.services.search.chroma.settings.CHROMA_PARTITIONING", "company"):
+        engine = ChromaSearchEngine()
+    engine.collection.get.side_effect = [
+        {"ids": ["1", "2"], "documents": ["a", "b"], "metadatas": [{"company_id": 5}, {}], "embeddings": [[0.1], [0.2]]},
+        {"ids": []},
+    ]
+
+    counts = engine.migrate_to_partitions(batch_size=2, delete_source=True)
+
+    assert counts["moved"] == 1 and counts["kept"] == 1
+    assert partition.upsert.call_args.kwargs["ids"] == ["1"]
+    assert partition.upsert.call_args.kwargs["embeddings"] == [[0.1]]
+    engine.collection.delete.assert_called_once_with(ids=["1"])
+    # Only the kept row still occupies an offset
+    assert engine.collection.get.call_args.kwargs["offset"] == 1
+
+def test_cross_company_search_only_reads_partitions(mock_chroma_client):
+    client = mock_chroma_client.return_value
+    client.list_collections.return_value = ["candidates", "candidates_company_5", "candidates_shard_1", "candidates_512"]
+    with patch("app.services.search.chroma.settings.CHROMA_PARTITIONING", "company"):
+        engine = ChromaSearchEngine()
+        engine._all_partitions()
+
+    opened = [c.kwargs.get("name", c.args[0] if c.args else None) for c in client.get_collection.call_args_list]
+    assert opened == ["candidates_company_5", "candidates_shard_1"]
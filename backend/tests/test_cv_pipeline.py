@@ -0,0 +1,159 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.models.models import CV, ParsedCV, Company
+from app.services import cv_pipeline
+
+
+class FakeRedis:
+    """Just enough of redis-py for the embedding hand-off."""
+
+    def __init__(self):
+        self.store = {}
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def pipeline_env(db):
+    fake_redis = FakeRedis()
+    with patch("app.services.cv_pipeline.engine", db.get_bind()), \
+         patch("app.services.parse_service.engine", db.get_bind()), \
+         patch("app.services.cv_pipeline._get_redis", return_value=fake_redis), \
+         patch("app.services.cv_pipeline.record_stage"), \
+         patch("app.services.cv_pipeline.parse_cache.record_miss"), \
+         patch("app.services.vector_db.vector_db") as mock_vector_db:
+        mock_vector_db.get_embeddings.return_value = {}
+        yield fake_redis, mock_vector_db
+
+
+@pytest.fixture
+def uploaded_cv(db, tmp_path):
+    company = Company(name="Pipeline Co", domain="pipeline.com")
+    db.add(company)
+    db.commit()
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(b"%PDF-1.4 pipeline")
+    cv = CV(filename="cv.pdf", filepath=str(path), company_id=company.id, is_parsed=False)
+    db.add(cv)
+    db.commit()
+    return cv
+
+
+async def test_stages_run_in_order_and_persist(db, pipeline_env, uploaded_cv):
+    fake_redis, mock_vector_db = pipeline_env
+    cv_id = uploaded_cv.id
+
+    with patch("app.services.cv_pipeline.extract_text_pages", return_value=["Jane Doe", "Python"]), \
+         patch("app.services.cv_pipeline.parse_cv_with_llm", new_callable=AsyncMock) as mock_parse, \
+         patch("app.services.embeddings.generate_embedding", new_callable=AsyncMock) as mock_embed:
+        mock_parse.return_value = {"name": "Jane Doe", "skills": ["Python"]}
+        mock_embed.return_value = [0.1, 0.2]
+
+        assert await cv_pipeline.run_stage("extract", [cv_id]) == ({"parse": [cv_id]}, [])
+        db.expire_all()
+        assert db.query(ParsedCV).filter(ParsedCV.cv_id == cv_id).first().raw_text == "Jane Doe\nPython"
+
+        assert fake_redis.get(f"cv_pipeline:page_lines:{cv_id}") == "[1, 1]"
+
+        assert await cv_pipeline.run_stage("parse", [cv_id]) == ({"embed": [cv_id]}, [])
+        assert mock_parse.call_args.kwargs["embed"] is False
+        # Page boundaries reach the parse separately; the stored text has none
+        assert mock_parse.call_args.kwargs["page_lines"] == [1, 1]
+        assert fake_redis.get(f"cv_pipeline:page_lines:{cv_id}") is None
+
+        assert await cv_pipeline.run_stage("embed", [cv_id]) == ({"index": [cv_id]}, [])
+        assert fake_redis.get(f"cv_pipeline:embedding:{cv_id}")
+
+        assert await cv_pipeline.run_stage("index", [cv_id]) == ({}, [])
+
+    upsert_kwargs = mock_vector_db.upsert.call_args.kwargs
+    assert upsert_kwargs["ids"] == [str(cv_id)]
+    assert upsert_kwargs["embeddings"] == [[0.1, 0.2]]
+    assert upsert_kwargs["metadatas"][0]["name"] == "Jane Doe"
+    # Hand-off is dropped once indexed
+    assert fake_redis.get(f"cv_pipeline:embedding:{cv_id}") is None
+    db.expire_all()
+    assert db.query(CV).filter(CV.id == cv_id).first().is_parsed is True
+
+
+async def test_empty_parse_fails_the_stage(db, pipeline_env, uploaded_cv):
+    db.add(ParsedCV(cv_id=uploaded_cv.id, raw_text="Jane Doe Python"))
+    db.commit()
+
+    with patch("app.services.cv_pipeline.parse_cv_with_llm", new_callable=AsyncMock, return_value={}):
+        assert await cv_pipeline.run_stage("parse", [uploaded_cv.id]) == ({}, [uploaded_cv.id])
+
+    # Nothing is saved, so the retry parses again
+    db.expire_all()
+    assert db.query(CV).filter(CV.id == uploaded_cv.id).first().is_parsed is False
+
+
+async def test_index_failure_keeps_handoff_for_retry(db, pipeline_env, uploaded_cv):
+    fake_redis, mock_vector_db = pipeline_env
+    key = f"cv_pipeline:embedding:{uploaded_cv.id}"
+    db.add(ParsedCV(cv_id=uploaded_cv.id, name="Jane Doe"))
+    db.commit()
+    fake_redis.set(key, '{"embedding": [0.3], "document": "Jane"}')
+
+    mock_vector_db.upsert.return_value = False
+    assert await cv_pipeline.run_stage("index", [uploaded_cv.id]) == ({}, [uploaded_cv.id])
+    assert fake_redis.get(key)
+
+    # ChromaDB is back: the retry succeeds without re-parsing or re-embedding
+    mock_vector_db.upsert.return_value = True
+    assert await cv_pipeline.run_stage("index", [uploaded_cv.id]) == ({}, [])
+    assert fake_redis.get(key) is None
+
+
+async def test_index_without_handoff_goes_back_to_embed(pipeline_env, uploaded_cv):
+    assert await cv_pipeline.run_stage("index", [uploaded_cv.id]) == ({"embed": [uploaded_cv.id]}, [])
+
+
+async def test_run_stage_bounds_concurrency(pipeline_env):
+    in_flight = 0
+    peak = 0
+
+    async def fake_parse(cv_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if cv_id == 3:
+            raise RuntimeError("parse failed")
+        return "embed"
+
+    with patch.dict(cv_pipeline._HANDLERS, {"parse": fake_parse}), \
+         patch("app.services.cv_pipeline.settings.CV_BATCH_CONCURRENCY", 3):
+        routed, failed = await cv_pipeline.run_stage("parse", list(range(10)))
+
+    assert peak == 3
+    assert failed == [3]
+    assert routed == {"embed": [i for i in range(10) if i != 3]}
+
+
+def test_get_stats_reports_every_stage():
+    r = MagicMock()
+    r.hgetall.return_value = {"processed": "3", "failed": "1", "total_ms": "400"}
+    r.lrange.return_value = ["100", "200", "50"]
+    r.mget.return_value = ["2", None, "1"] + [None] * 57
+    r.llen.return_value = 7
+
+    with patch("app.services.cv_pipeline._get_redis", return_value=r):
+        stats = cv_pipeline.get_stats()
+
+    assert set(stats) == {"extract", "parse", "embed", "index"}
+    parse = stats["parse"]
+    assert parse["queue"] == "cv_parse"
+    assert parse["queue_depth"] == 7
+    assert parse["avg_ms"] == 100.0
+    assert parse["p50_ms"] == 100
+    assert parse["last_5m"] == 3
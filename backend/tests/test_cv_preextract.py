@@ -0,0 +1,112 @@
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.cv_preextract import pre_extract, apply_pre_extracted, prompt_hints, page_line_counts
+from app.services.parser import parse_cv_with_llm, CV_PARSE_JUDGMENT_PROMPT
+
+CV_PAGES = ["""Jane Doe
+Curriculum Vitae
+jane.doe@example.com | +20 100 123 4567 | linkedin.com/in/janedoe
+ [LINK: https://github.com/jane]
+ [LINK: mailto:jane.work@example.com]
+Summary
+Backend engineer.
+Work Experience
+Senior Engineer, Acme (03.2015 - 07.2019)
+2019 - 2023 Lead at Initech
+Page 1 of 2""", """Education
+B.Sc. Computer Science, Cairo University
+2012 - 2016
+Skills
+Python, AWS
+References
+John Smith, john@ref.com, 01012345678
+"""]
+CV_TEXT = "\n".join(CV_PAGES)
+CV_PAGE_LINES = page_line_counts(CV_PAGES)
+
+
+def test_pre_extract_contacts_and_links():
+    pre = pre_extract(CV_TEXT)
+    assert pre["email"] == ["jane.doe@example.com", "jane.work@example.com"]
+    assert pre["phone"] == ["+20 100 123 4567"]
+    assert pre["social_links"] == ["linkedin.com/in/janedoe", "https://github.com/jane"]
+
+
+def test_pre_extract_ignores_referees_and_dates():
+    pre = pre_extract(CV_TEXT)
+    assert "john@ref.com" not in pre["email"]
+    assert "01012345678" not in pre["phone"]
+    # Employment dates are left in the text, not taken for phone numbers
+    assert "(03.2015 - 07.2019)" in pre["text"]
+    assert "2019 - 2023 Lead at Initech" in pre["text"]
+
+
+def test_pre_extract_years_sections_and_boilerplate():
+    pre = pre_extract(CV_TEXT, CV_PAGE_LINES)
+    assert pre["graduation_years"] == [2012, 2016]
+    assert pre["bachelor_year"] == 2016
+    assert pre["sections"] == ["summary", "experience", "education", "skills", "references"]
+    for removed in ("Curriculum Vitae", "Page 1 of 2", "jane.doe@example.com", "[LINK:", "John Smith"):
+        assert removed not in pre["text"]
+    assert "Jane Doe" in pre["text"]
+    assert "Years found in the Education section: 2012, 2016" in prompt_hints(pre)
+
+
+def test_repeated_page_header_and_footer_are_stripped():
+    pages = [f"Jane Doe - Confidential\nExperience\nBuilt APIs\nShipped search\n- {n} -" for n in (1, 2, 3)]
+    pre = pre_extract("\n".join(pages), page_line_counts(pages))
+    assert "Confidential" not in pre["text"]
+    assert "- 2 -" not in pre["text"]
+    assert pre["text"].count("Built APIs") == 3
+
+
+def test_repeated_job_titles_are_kept():
+    text = "\n".join([
+        "Jane Doe", "Experience",
+        "Software Engineer", "Acme, 2020 - 2023", "Built billing APIs",
+        "Software Engineer", "Initech, 2017 - 2020", "Ran the data pipeline",
+        "Software Engineer", "Globex, 2014 - 2017", "Wrote the mobile app",
+        "Skills", "Python",
+    ])
+    assert pre_extract(text)["text"].count("Software Engineer") == 3
+
+
+def test_numeric_fields_are_kept_away_from_page_edges():
+    text = "Jane Doe\nPersonal Details\nAge\n30\nNationality\nEgyptian\nSkills\nPython\nGo\n1\nExperience\nLead"
+    lines = pre_extract(text, [10, 2])["text"].split("\n")
+    assert "30" in lines
+    # The "1" closing the first page is its page number
+    assert "1" not in lines
+
+
+def test_apply_pre_extracted_keeps_rule_values_first():
+    pre = pre_extract(CV_TEXT)
+    data = apply_pre_extracted(pre, {"email": ["JANE.DOE@example.com", "other@example.com"], "bachelor_year": None})
+    assert data["email"] == ["jane.doe@example.com", "jane.work@example.com", "other@example.com"]
+    assert data["bachelor_year"] == 2016
+
+
+async def test_parse_uses_judgment_prompt_and_fills_contacts():
+    mock_client = MagicMock()
+    completion = MagicMock()
+    completion.choices = [MagicMock(message=MagicMock(content=json.dumps({"name": "Jane Doe", "skills": ["Python"]})))]
+    completion.usage = MagicMock(total_tokens=100, prompt_tokens=80, completion_tokens=20)
+    mock_client.chat.completions.create = AsyncMock(return_value=completion)
+
+    with patch("app.services.parser.OPENAI_API_KEY", "sk-test"), \
+         patch("app.services.parser.get_openai_client", return_value=mock_client), \
+         patch("app.services.parser.LLMLogger.log_llm_operation") as mock_log:
+        data = await parse_cv_with_llm(CV_TEXT, "cv.pdf", embed=False, page_lines=CV_PAGE_LINES)
+
+    messages = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert messages[0]["content"] == CV_PARSE_JUDGMENT_PROMPT
+    assert "jane.doe@example.com" not in messages[1]["content"]
+    assert "Page 1 of 2" not in messages[1]["content"]
+    assert json.loads(data["email"]) == ["jane.doe@example.com", "jane.work@example.com"]
+    assert json.loads(data["phone"]) == ["+20 100 123 4567"]
+    assert data["bachelor_year"] == 2016
+
+    metadata = mock_log.call_args.kwargs["metadata"]
+    assert metadata["prompt"] == "judgment"
+    assert metadata["prompt_text_length"] < metadata["text_length"]
+    assert metadata["pre_extracted"]["emails"] == 2
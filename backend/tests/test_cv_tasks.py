@@ -1,6 +1,6 @@
 import pytest
-from unittest.mock import patch
-from app.tasks.cv_tasks import process_cv_task
+from unittest.mock import patch, AsyncMock
+from app.tasks.cv_tasks import process_cv_task, process_cv_batch_task, dispatch_cv_processing, parse_cv_stage_task
 
 @patch("app.tasks.cv_tasks.r")
 @patch("app.tasks.cv_tasks.process_cv")
@@ -39,3 +39,31 @@ def test_process_cv_task_failure(mock_retry, mock_process_cv, mock_redis):
     mock_process_cv.assert_called_once_with(123)
     mock_retry.assert_called()
     mock_redis.decr.assert_called_with("cv_processing_count")
+
+@patch("app.tasks.cv_tasks.extract_cv_stage_task.delay")
+def test_dispatch_cv_processing_chunks(mock_delay):
+    with patch("app.tasks.cv_tasks.settings.CV_BATCH_SIZE", 2):
+        dispatch_cv_processing([1, 2, 3, 4, 5])
+
+    assert [c.args[0] for c in mock_delay.call_args_list] == [[1, 2], [3, 4], [5]]
+
+@patch("app.tasks.cv_tasks.extract_cv_stage_task.delay")
+def test_process_cv_batch_task_forwards_to_pipeline(mock_delay):
+    """Batch messages queued before the staged pipeline still drain through it."""
+    process_cv_batch_task(cv_ids=[1, 2, 3])
+    mock_delay.assert_called_once_with([1, 2, 3])
+
+@patch("app.tasks.cv_tasks.cv_pipeline.run_stage", new_callable=AsyncMock)
+@patch("app.tasks.cv_tasks.embed_cv_stage_task.delay")
+@patch("app.tasks.cv_tasks.parse_cv_stage_task.retry")
+def test_stage_task_forwards_ok_ids_and_retries_failed(mock_retry, mock_next, mock_run_stage):
+    """Successful CVs move to the next stage; only failed CVs retry this stage."""
+    mock_run_stage.return_value = ({"embed": [1, 3]}, [2])
+    mock_retry.side_effect = Exception("Retry raised")
+
+    with pytest.raises(Exception, match="Retry raised"):
+        parse_cv_stage_task(cv_ids=[1, 2, 3])
+
+    mock_run_stage.assert_awaited_once_with("parse", [1, 2, 3])
+    mock_next.assert_called_once_with([1, 3])
+    assert mock_retry.call_args.kwargs["args"] == ([2],)
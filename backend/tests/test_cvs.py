@@ -6,7 +6,7 @@ def test_cv_upload_and_process(authenticated_client, db):
     
     # Mock aiofiles and celery task
     with patch("aiofiles.open") as mock_open, \
-         patch("app.tasks.cv_tasks.process_cv_task.delay") as mock_task:
+         patch("app.tasks.cv_tasks.extract_cv_stage_task.delay") as mock_batch:
         
         # Mock file write (Async Context Manager + Async Write)
         mock_f = AsyncMock()
@@ -21,7 +21,8 @@ def test_cv_upload_and_process(authenticated_client, db):
         assert res.status_code == 200
         data = res.json()
         assert len(data["ids"]) == 2
-        assert mock_task.call_count == 2
+        # Both uploads enter the pipeline as one batch
+        mock_batch.assert_called_once_with(data["ids"])
         
         cv_id = data["ids"][0]
         
@@ -42,6 +43,7 @@ def test_cv_upload_and_process(authenticated_client, db):
         # 4. Reprocess Bulk
         res = client.post("/cv/reprocess_bulk", json=[cv_id])
         assert res.status_code == 200
+        mock_batch.assert_called_with([cv_id])
 
 def test_cv_download_and_delete(authenticated_client, db):
     client = authenticated_client
@@ -0,0 +1,10 @@
+import pytest
+from app.core.database import async_database_url
+
+
+def test_async_database_url_swaps_driver():
+    assert async_database_url("postgresql://u:p@db:5432/headhunter") == "postgresql+asyncpg://u:p@db:5432/headhunter"
+    assert async_database_url("postgresql+psycopg2://u:p@db/hh?sslmode=require") == "postgresql+asyncpg://u:p@db/hh?ssl=require"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/hh")
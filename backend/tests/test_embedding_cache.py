@@ -0,0 +1,164 @@
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.services import embedding_cache
+from app.services.embeddings import generate_embedding, generate_embeddings_batch, EMBEDDING_MODEL
+
+
+class FakeRedis:
+    """Just enough of redis-py (binary client) for the embedding cache."""
+
+    def __init__(self):
+        self.values = {}
+        self.index = {}
+        self.stats = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def mget(self, keys):
+        return [self.values.get(k) for k in keys]
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def zadd(self, key, mapping):
+        self.index.update(mapping)
+
+    def zcard(self, key):
+        return len(self.index)
+
+    def zpopmin(self, key, count):
+        oldest = sorted(self.index.items(), key=lambda kv: kv[1])[:count]
+        for k, _ in oldest:
+            del self.index[k]
+        return oldest
+
+    def delete(self, *keys):
+        for k in keys:
+            self.values.pop(k, None)
+
+    def hincrby(self, key, field, amount):
+        self.stats[field] = self.stats.get(field, 0) + amount
+
+    def hgetall(self, key):
+        return {k.encode(): str(v).encode() for k, v in self.stats.items()}
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    client = FakeRedis()
+    with patch("app.services.embedding_cache._get_redis", return_value=client), \
+         patch.object(embedding_cache, "_redis_down_until", 0.0):
+        yield client
+
+
+def _mock_client(vector=None):
+    client = AsyncMock()
+    response = MagicMock()
+    response.data = [MagicMock(index=0, embedding=vector or [0.5, 0.25])]
+    response.usage.total_tokens = 3
+    client.embeddings.create.return_value = response
+    return client
+
+
+async def test_repeated_query_skips_openai(fake_redis):
+    client = _mock_client()
+    with patch("app.services.embeddings.get_openai_client", return_value=client):
+        first = await generate_embedding("Python developer")
+        second = await generate_embedding("Python developer")
+
+    assert first == second == [0.5, 0.25]
+    assert client.embeddings.create.call_count == 1
+    stats = embedding_cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+async def test_redis_hit_after_process_restart(fake_redis):
+    embedding_cache.put(EMBEDDING_MODEL, None, "Python developer", [0.5, 0.25])
+    embedding_cache.clear_memory()
+
+    client = _mock_client()
+    with patch("app.services.embeddings.get_openai_client", return_value=client):
+        assert await generate_embedding("Python developer") == [0.5, 0.25]
+
+    client.embeddings.create.assert_not_called()
+    assert embedding_cache.get_stats()["redis_hits"] == 1
+
+
+async def test_batch_only_embeds_uncached_texts(fake_redis):
+    embedding_cache.put(EMBEDDING_MODEL, None, "cached", [1.0])
+    client = _mock_client([2.0])
+    with patch("app.services.embeddings.get_openai_client", return_value=client):
+        vectors = await generate_embeddings_batch(["cached", "new"])
+
+    assert vectors == [[1.0], [2.0]]
+    assert client.embeddings.create.call_args.kwargs["input"] == ["new"]
+    assert embedding_cache.get(EMBEDDING_MODEL, None, "new") == [2.0]
+
+
+def test_key_includes_model_and_dimensions():
+    keys = {
+        embedding_cache.cache_key("text-embedding-3-small", None, "x"),
+        embedding_cache.cache_key("text-embedding-3-small", 512, "x"),
+        embedding_cache.cache_key("text-embedding-3-large", None, "x"),
+    }
+    assert len(keys) == 3
+
+
+def test_size_based_eviction(fake_redis):
+    with patch("app.services.embedding_cache.settings.EMBEDDING_CACHE_MAX_ENTRIES", 2), \
+         patch("app.services.embedding_cache.settings.EMBEDDING_CACHE_LRU_SIZE", 2):
+        for i, text in enumerate(["a", "b", "c"]):
+            with patch("app.services.embedding_cache.time.time", return_value=float(i)):
+                embedding_cache.put(EMBEDDING_MODEL, None, text, [float(i)])
+
+        assert len(fake_redis.values) == 2
+        assert fake_redis.stats["evictions"] == 1
+        assert len(embedding_cache._memory) == 2
+        embedding_cache.clear_memory()
+        assert embedding_cache.get(EMBEDDING_MODEL, None, "a") is None
+        assert embedding_cache.get(EMBEDDING_MODEL, None, "c") == [2.0]
+
+
+def test_redis_outage_keeps_memory_cache():
+    broken = MagicMock()
+    broken.mget.side_effect = ConnectionError("down")
+    broken.pipeline.side_effect = ConnectionError("down")
+    with patch("app.services.embedding_cache._get_redis", return_value=broken), \
+         patch.object(embedding_cache, "_redis_down_until", 0.0):
+        embedding_cache.put(EMBEDDING_MODEL, None, "text", [0.1])
+        assert embedding_cache.get(EMBEDDING_MODEL, None, "text") == [0.1]
+        assert embedding_cache.get(EMBEDDING_MODEL, None, "other") is None
+
+
+async def test_cache_lookups_run_off_the_event_loop(fake_redis):
+    threads = []
+    real_get = embedding_cache.get
+
+    def record(*args):
+        threads.append(threading.current_thread())
+        return real_get(*args)
+
+    with patch("app.services.embeddings.embedding_cache.get", side_effect=record), \
+         patch("app.services.embeddings.get_openai_client", return_value=_mock_client()):
+        await generate_embedding("Python developer")
+
+    assert threads and threading.current_thread() not in threads
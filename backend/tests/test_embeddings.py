@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.services.embeddings import generate_embedding
+from app.services.embeddings import generate_embedding, generate_embeddings_batch, plan_embedding_batches, project_embedding, EMBEDDING_MODEL, EMBEDDING_MAX_TOKENS
+from app.services import token_budget
 
 @pytest.mark.asyncio
 async def test_generate_embedding_success():
@@ -28,14 +29,16 @@ async def test_generate_embedding_truncation():
     mock_response.usage.total_tokens = 10
     mock_client.embeddings.create.return_value = mock_response
     
-    long_text = "a" * 40000 # > 32000
+    long_text = "word " * 20000 # > 8191 tokens
     
     with patch("app.services.embeddings.get_openai_client", return_value=mock_client):
         await generate_embedding(long_text)
         
-        # Verify truncation
+        # Verify truncation to the model's token limit
         call_args = mock_client.embeddings.create.call_args
-        assert len(call_args.kwargs["input"]) == 32000
+        sent = call_args.kwargs["input"]
+        assert len(sent) < len(long_text)
+        assert token_budget.count_tokens(sent, EMBEDDING_MODEL) <= EMBEDDING_MAX_TOKENS
 
 @pytest.mark.asyncio
 async def test_generate_embedding_error():
@@ -45,3 +48,63 @@ async def test_generate_embedding_error():
     with patch("app.services.embeddings.get_openai_client", return_value=mock_client):
         embedding = await generate_embedding("test")
         assert embedding == []
+
+def _batch_response(inputs, start=0):
+    response = MagicMock()
+    # Returned out of order on purpose: items carry the input index
+    response.data = [MagicMock(index=i, embedding=[float(start + i)]) for i in reversed(range(len(inputs)))]
+    response.usage.total_tokens = 5 * len(inputs)
+    return response
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_keeps_order_and_packs_inputs():
+    mock_client = AsyncMock()
+    sent = []
+
+    async def create(input, model):
+        sent.append(list(input))
+        return _batch_response(input, start=sum(len(s) for s in sent[:-1]))
+
+    mock_client.embeddings.create.side_effect = create
+    texts = [f"text {i}" for i in range(5)]
+
+    with patch("app.services.embeddings.get_openai_client", return_value=mock_client), \
+         patch("app.services.embeddings.settings.EMBEDDING_BATCH_MAX_INPUTS", 2), \
+         patch("app.services.embeddings.settings.EMBEDDING_BATCH_CONCURRENCY", 1):
+        vectors = await generate_embeddings_batch(texts)
+
+    assert [len(s) for s in sent] == [2, 2, 1]
+    assert vectors == [[0.0], [1.0], [2.0], [3.0], [4.0]]
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch_skips_empty_and_isolates_failures():
+    mock_client = AsyncMock()
+    mock_client.embeddings.create.side_effect = [_batch_response(["a"]), Exception("API Error")]
+
+    with patch("app.services.embeddings.get_openai_client", return_value=mock_client), \
+         patch("app.services.embeddings.settings.EMBEDDING_BATCH_MAX_INPUTS", 1), \
+         patch("app.services.embeddings.settings.EMBEDDING_BATCH_CONCURRENCY", 1):
+        vectors = await generate_embeddings_batch(["a", "", "b"])
+
+    assert vectors == [[0.0], [], []]
+    assert mock_client.embeddings.create.call_count == 2
+
+def test_plan_embedding_batches_respects_token_budget():
+    texts = ["word " * 1000, "word " * 1000, "word " * 10]
+    batches = plan_embedding_batches(texts, max_tokens=1500, max_inputs=100)
+    assert [[position for position, _, _ in batch] for batch in batches] == [[0], [1, 2]]
+
+@pytest.mark.asyncio
+async def test_embedding_dimensions_are_requested():
+    mock_client = AsyncMock()
+    mock_client.embeddings.create.side_effect = lambda **kwargs: _batch_response(kwargs["input"])
+
+    with patch("app.services.embeddings.get_openai_client", return_value=mock_client), \
+         patch("app.services.embeddings.settings.EMBEDDING_DIMENSIONS", 256):
+        await generate_embeddings_batch(["a"])
+        assert mock_client.embeddings.create.call_args.kwargs["dimensions"] == 256
+        await generate_embeddings_batch(["b"], dimensions=512)
+        assert mock_client.embeddings.create.call_args.kwargs["dimensions"] == 512
+
+def test_project_embedding_truncates_and_renormalizes():
+    assert project_embedding([3.0, 4.0, 12.0], 2) == pytest.approx([0.6, 0.8])
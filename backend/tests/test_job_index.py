@@ -0,0 +1,146 @@
+import pytest
+import json
+import numpy as np
+from unittest.mock import patch, AsyncMock
+from sqlalchemy.orm import sessionmaker
+from app.models.models import CV, User, UserRole, Application, Job
+from app.services import job_index
+from app.services.search.numpy_index import NumpySearchEngine
+
+
+def _vector(*components):
+    vector = np.zeros(8)
+    vector[:len(components)] = components
+    return vector.tolist()
+
+
+async def test_index_job_follows_job_lifecycle(db, tmp_path):
+    index = NumpySearchEngine(path=str(tmp_path / "jobs"), dtype="float32")
+    job = Job(title="Backend Engineer", skills_required=json.dumps(["Python"]),
+              qualifications=json.dumps(["BSc Computer Science"]), description="APIs", status="Open")
+    db.add(job)
+    db.commit()
+
+    embed = AsyncMock(return_value=_vector(1.0))
+    with patch("app.services.job_index.SessionLocal", sessionmaker(bind=db.get_bind())), \
+         patch("app.services.job_index.get_job_search_engine", return_value=index), \
+         patch("app.services.job_index.generate_embedding", embed):
+        assert await job_index.index_job(job.id) == "indexed"
+        text = embed.call_args.args[0]
+        assert "Backend Engineer" in text and "Python" in text and "BSc Computer Science" in text and "APIs" in text
+
+        assert await job_index.index_job(job.id) == "unchanged"
+        job.department = "Platform"
+        db.commit()
+        assert await job_index.index_job(job.id) == "updated"
+        assert index.get_metadatas([str(job.id)])[str(job.id)]["department"] == "Platform"
+        assert embed.await_count == 1
+
+        job.description = "APIs and data pipelines"
+        db.commit()
+        assert await job_index.index_job(job.id) == "indexed"
+        assert embed.await_count == 2
+
+        job.status = "Closed"
+        db.commit()
+        assert await job_index.index_job(job.id) == "removed"
+    assert index.count() == 0
+
+
+async def test_failed_removal_raises_for_retry(db, tmp_path):
+    index = NumpySearchEngine(path=str(tmp_path / "jobs"), dtype="float32")
+    job = Job(title="Backend Engineer", status="Closed")
+    db.add(job)
+    db.commit()
+
+    with patch("app.services.job_index.SessionLocal", sessionmaker(bind=db.get_bind())), \
+         patch("app.services.job_index.get_job_search_engine", return_value=index), \
+         patch.object(index, "delete_candidate", return_value=False):
+        with pytest.raises(RuntimeError):
+            await job_index.index_job(job.id)
+
+
+def test_recommended_jobs_for_candidate(authenticated_client, db, tmp_path):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    company_id = user.company_id
+    candidates = NumpySearchEngine(path=str(tmp_path / "index"), dtype="float32")
+    jobs = NumpySearchEngine(path=str(tmp_path / "jobs"), dtype="float32")
+
+    cv = CV(filename="a.pdf", filepath="/tmp/a.pdf", company_id=company_id, is_parsed=True)
+    db.add(cv)
+    db.commit()
+    candidates.upsert([str(cv.id)], [""], [{"company_id": company_id}], [_vector(1.0)])
+
+    best = Job(title="Best fit", company_id=company_id, skills_required=json.dumps(["Python"]))
+    good = Job(title="Good fit", company_id=company_id)
+    closed = Job(title="Closed", company_id=company_id, status="Closed")
+    foreign = Job(title="Other company", company_id=company_id + 1)
+    db.add_all([best, good, closed, foreign])
+    db.commit()
+    db.add(Application(cv_id=cv.id, job_id=good.id, status="New"))
+    db.commit()
+    for job, vector in [(best, _vector(1.0, 0.1)), (good, _vector(1.0, 1.0)),
+                        (closed, _vector(1.0)), (foreign, _vector(1.0))]:
+        jobs.upsert([str(job.id)], [""], [{"job_id": job.id, "company_id": job.company_id}], [vector])
+
+    embed = AsyncMock()
+    with patch("app.api.endpoints.search.get_search_engine", return_value=candidates), \
+         patch("app.api.endpoints.search.get_job_search_engine", return_value=jobs), \
+         patch("app.services.search.numpy_index.generate_embedding", embed):
+        res = authenticated_client.get(f"/search/candidates/{cv.id}/jobs")
+
+    assert res.status_code == 200
+    data = res.json()
+    embed.assert_not_called()
+    assert [item["id"] for item in data] == [best.id, good.id]
+    assert data[0]["skills_required"] == ["Python"]
+    assert [item["already_applied"] for item in data] == [False, True]
+
+
+def test_recommended_jobs_filters_department_in_the_index(authenticated_client, db, tmp_path):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    user.role = UserRole.HIRING_MANAGER
+    user.department = "Platform"
+    db.commit()
+    company_id = user.company_id
+    candidates = NumpySearchEngine(path=str(tmp_path / "index"), dtype="float32")
+    jobs = NumpySearchEngine(path=str(tmp_path / "jobs"), dtype="float32")
+
+    cv = CV(filename="a.pdf", filepath="/tmp/a.pdf", company_id=company_id, is_parsed=True)
+    db.add(cv)
+    db.commit()
+    candidates.upsert([str(cv.id)], [""], [{"company_id": company_id}], [_vector(1.0)])
+
+    other = Job(title="Sales fit", company_id=company_id, department="Sales")
+    own = Job(title="Platform fit", company_id=company_id, department="Platform")
+    db.add_all([other, own])
+    db.commit()
+    for job, vector in [(other, _vector(1.0)), (own, _vector(1.0, 1.0))]:
+        jobs.upsert([str(job.id)], [""], [{"job_id": job.id, "company_id": company_id,
+                                           "department": job.department}], [vector])
+
+    with patch("app.api.endpoints.search.get_search_engine", return_value=candidates), \
+         patch("app.api.endpoints.search.get_job_search_engine", return_value=jobs), \
+         patch.object(jobs, "search_by_vector", wraps=jobs.search_by_vector) as search:
+        res = authenticated_client.get(f"/search/candidates/{cv.id}/jobs?limit=1")
+
+    assert res.status_code == 200
+    # The better-scoring job of another department does not take the only slot
+    assert [item["id"] for item in res.json()] == [own.id]
+    assert search.call_args.args[1:] == (
+        1, {"$and": [{"company_id": company_id}, {"department": "Platform"}]},
+    )
+
+
+def test_job_edits_queue_indexing_only_for_indexed_fields(authenticated_client, db):
+    res = authenticated_client.post("/jobs/", json={"title": "Data Engineer"})
+    job_id = res.json()["id"]
+
+    with patch("app.api.v1.jobs.queue_job_indexing") as queue:
+        authenticated_client.patch(f"/jobs/{job_id}", json={"landing_page_enabled": True})
+        queue.assert_not_called()
+        authenticated_client.patch(f"/jobs/{job_id}", json={"skills_required": ["Spark"]})
+        queue.assert_called_once_with(job_id)
+        authenticated_client.delete(f"/jobs/{job_id}")
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    assert queue.call_args.args == (job_id, user.company_id)
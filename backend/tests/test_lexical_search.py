@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from app.models.models import CV, ParsedCV, Company
+from app.services import lexical_search
+
+
+def _candidates(db, company_id):
+    rows = [
+        ("Alice", '["Python", "AWS"]', "Backend Engineer", "Acme"),
+        ("Bob", '["K8s", "Terraform"]', "DevOps Engineer", "Cloudy"),
+        ("Carol", '["SAP FICO"]', "SAP Consultant", "Ledger"),
+    ]
+    ids = []
+    for name, skills, title, company in rows:
+        cv = CV(filename=f"{name}.pdf", filepath=f"/tmp/{name}.pdf", company_id=company_id, is_parsed=True)
+        db.add(cv)
+        db.commit()
+        db.add(ParsedCV(cv_id=cv.id, name=name, skills=skills, last_job_title=title, last_company=company))
+        db.commit()
+        ids.append(cv.id)
+    return ids
+
+
+def test_reciprocal_rank_fusion():
+    fused = lexical_search.reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60)
+    assert fused[3] == 1 / 63 + 1 / 61
+    assert sorted(fused, key=lambda i: -fused[i]) == [3, 1, 2, 4]
+
+
+def test_prefix_tsquery():
+    assert lexical_search.prefix_tsquery("SAP FICO") == "sap:* & fico:*"
+    assert lexical_search.prefix_tsquery("C++ K8s") == "c:* & k8s:*"
+    assert lexical_search.prefix_tsquery("  ") is None
+
+
+def test_profile_filter_uses_tsvector_on_postgres(db):
+    with patch("app.services.lexical_search.is_supported", return_value=True):
+        clause = lexical_search.profile_filter(db, "k8s")
+    sql = str(clause.compile(dialect=postgresql.dialect()))
+    assert "parsed_cvs.search_vector @@ to_tsquery" in sql
+    assert "ILIKE" not in sql.upper()
+
+
+def test_fallback_search_ranks_by_matched_terms(db):
+    company = Company(name="Lex Co", domain="lex.com")
+    other = Company(name="Other Co", domain="other.com")
+    db.add_all([company, other])
+    db.commit()
+    alice, bob, carol = _candidates(db, company.id)
+    _candidates(db, other.id)
+
+    assert lexical_search.search_cv_ids(db, "K8s", company.id, 10) == [(bob, 1.0)]
+    assert [cv_id for cv_id, _ in lexical_search.search_cv_ids(db, "SAP FICO", company.id, 10)] == [carol]
+    ranked = lexical_search.search_cv_ids(db, "python engineer", company.id, 10)
+    assert ranked[0] == (alice, 2.0)
+    assert {cv_id for cv_id, _ in ranked} == {alice, bob}
+
+
+def test_search_candidates_fuses_lexical_hits(authenticated_client, db):
+    from app.models.models import User
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    alice, bob, _ = _candidates(db, user.company_id)
+
+    engine = MagicMock()
+    # The embedding ranks Alice first and misses Bob entirely
+    engine.search = AsyncMock(return_value=[{"id": str(alice), "score": 0.8, "metadata": {}}])
+    with patch("app.api.endpoints.search.get_search_engine", return_value=engine):
+        res = authenticated_client.get("/search/candidates?q=K8s&limit=5")
+
+    assert res.status_code == 200
+    data = res.json()
+    assert {item["id"] for item in data} == {alice, bob}
+    by_id = {item["id"]: item for item in data}
+    assert by_id[bob]["matched_by"] == ["lexical"]
+    assert by_id[alice]["matched_by"] == ["semantic"]
+    # Top of one of two rankings: half the best possible fused score
+    assert by_id[bob]["rank_score"] == pytest.approx(0.5)
+    assert by_id[alice]["rank_score"] == pytest.approx(0.5)
+    # score is the vector similarity, or the relative full-text rank for lexical-only hits
+    assert by_id[alice]["score"] == pytest.approx(0.8)
+    assert by_id[bob]["score"] == pytest.approx(1.0)
+    assert engine.search.call_args.kwargs["n_results"] == 15
@@ -0,0 +1,150 @@
+import json
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from sqlalchemy.orm import sessionmaker
+from app.models.models import ActivityLog, Application, Company, CV, Job, JobCandidateScore, ParsedCV, User
+from app.services import match_scores
+
+
+@pytest.fixture
+def scoring(db):
+    """Point match_scores at the test database and stub the embedding/vector calls."""
+    vector_db = MagicMock()
+    vector_db.search_by_vector = MagicMock(return_value=[])
+    vector_db.get_embeddings = MagicMock(return_value={})
+
+    async def run_blocking(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    vector_db.run_blocking = run_blocking
+    with patch("app.services.match_scores.SessionLocal", sessionmaker(bind=db.get_bind())), \
+         patch("app.services.match_scores.vector_db", vector_db), \
+         patch("app.services.match_scores.generate_embedding", AsyncMock(return_value=[1.0, 0.0])), \
+         patch("app.services.match_scores.generate_embeddings_batch", AsyncMock(return_value=[[1.0, 0.0]])):
+        yield vector_db
+
+
+def _setup(db, company_id):
+    job = Job(title="Backend Engineer", skills_required='["Python", "AWS", "Docker", "SQL"]',
+              required_experience=3, company_id=company_id, status="Open", is_active=True)
+    db.add(job)
+    db.commit()
+    cvs = []
+    for name, skills, years in [("Alice", '["Python", "AWS", "Docker", "SQL"]', 5),
+                                ("Bob", '["Python"]', 1),
+                                ("Carol", '["Excel"]', 0)]:
+        cv = CV(filename=f"{name}.pdf", filepath=f"/tmp/{name}.pdf", company_id=company_id, is_parsed=True)
+        db.add(cv)
+        db.commit()
+        db.add(ParsedCV(cv_id=cv.id, name=name, skills=skills, experience_years=years))
+        db.commit()
+        cvs.append(cv.id)
+    return job, cvs
+
+
+def test_score_match_formula():
+    score, matched = match_scores.score_match({"python", "aws"}, 3, ["Python", "Go", "AWS"], 2, 0.8, True)
+    # 40 (vector) + 20 (skills) + 5 (experience within a year) + 5 (silver)
+    assert score == 70
+    assert matched == ["Python", "AWS"]
+    assert match_scores.cosine_score([1.0, 0.0], [1.0, 0.0]) == 1.0
+    assert match_scores.cosine_score([1.0, 0.0], []) == 0.0
+
+
+async def test_score_job_stores_scores_above_threshold(db, scoring):
+    user = User(email="m@test.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    job, (alice, bob, carol) = _setup(db, None)
+    scoring.search_by_vector.return_value = [{"id": str(alice), "score": 0.9, "metadata": {}}]
+
+    counts = await match_scores.score_job(job.id)
+
+    rows = {row.cv_id: row for row in db.query(JobCandidateScore).all()}
+    # Alice: 45 + 40 + 10, Bob: 10 (below MATCH_SCORE_MIN), Carol: 0
+    assert set(rows) == {alice}
+    assert rows[alice].score == 95
+    assert json.loads(rows[alice].skills_matched) == ["Python", "AWS", "Docker", "SQL"]
+    assert counts["strong"] == 1
+    logs = db.query(ActivityLog).filter(ActivityLog.action == "strong_match").all()
+    assert len(logs) == 1 and json.loads(logs[0].details)["cv_id"] == alice
+
+    # Rescoring keeps the row but does not announce the strong match again
+    await match_scores.score_job(job.id)
+    db.expire_all()
+    assert db.query(ActivityLog).filter(ActivityLog.action == "strong_match").count() == 1
+
+    # Closing the job removes its scores
+    job.status = "Closed"
+    db.commit()
+    counts = await match_scores.score_job(job.id)
+    assert counts["removed"] == 1
+    assert db.query(JobCandidateScore).count() == 0
+
+
+async def test_score_job_uses_stored_vectors_outside_search_pool(db, scoring):
+    job, (alice, bob, carol) = _setup(db, None)
+    scoring.search_by_vector.return_value = [{"id": str(alice), "score": 0.9, "metadata": {}}]
+    scoring.get_embeddings.return_value = {str(bob): [1.0, 0.0]}
+
+    await match_scores.score_job(job.id)
+
+    # Only the candidates the search did not return are looked up
+    ids = scoring.get_embeddings.call_args.args[0]
+    assert sorted(ids) == sorted([str(bob), str(carol)])
+    rows = {row.cv_id: row for row in db.query(JobCandidateScore).all()}
+    # Bob: 50 (same direction as the job query) + 10
+    assert set(rows) == {alice, bob}
+    assert rows[bob].score == 60
+    assert rows[bob].vector_score == 1.0
+
+
+async def test_score_cvs_against_open_jobs(db, scoring):
+    company = Company(name="Match Co", domain="match.com")
+    db.add(company)
+    db.commit()
+    job, (alice, bob, _) = _setup(db, company.id)
+    closed = Job(title="Old role", skills_required='["Python"]', status="Closed", is_active=True,
+                 company_id=company.id)
+    db.add(closed)
+    db.commit()
+    db.add(Application(cv_id=bob, job_id=closed.id, status="Silver Medalist"))
+    db.commit()
+    scoring.get_embeddings.return_value = {str(alice): [1.0, 0.0], str(bob): [0.0, 1.0]}
+
+    counts = await match_scores.score_cvs([alice, bob])
+
+    rows = {(row.job_id, row.cv_id): row for row in db.query(JobCandidateScore).all()}
+    # Only the open job is scored; Bob: 25 (orthogonal vector) + 10 + 5 (silver)
+    assert set(rows) == {(job.id, alice), (job.id, bob)}
+    assert rows[(job.id, alice)].score == 100
+    assert rows[(job.id, bob)].score == 40
+    assert rows[(job.id, bob)].is_silver
+    assert counts["stored"] == 2
+
+
+def test_list_job_matches(authenticated_client, db):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    job, (alice, bob, carol) = _setup(db, user.company_id)
+    for cv_id, score in [(alice, 90), (bob, 60), (carol, 35)]:
+        db.add(JobCandidateScore(job_id=job.id, cv_id=cv_id, company_id=user.company_id, score=score,
+                                 skills_matched='["Python"]', is_silver=cv_id == bob))
+    db.commit()
+
+    res = authenticated_client.get(f"/jobs/{job.id}/matches?limit=2")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total"] == 3 and data["pages"] == 2
+    assert [item["id"] for item in data["items"]] == [alice, bob]
+    assert data["items"][1]["status"] == "Silver Medalist"
+    assert data["items"][0]["skills_matched"] == ["Python"]
+
+    res = authenticated_client.get(f"/jobs/{job.id}/matches?page=2&limit=2")
+    assert [item["name"] for item in res.json()["items"]] == ["Carol"]
+    res = authenticated_client.get(f"/jobs/{job.id}/matches?min_score=50")
+    assert res.json()["total"] == 2
+
+    other = Job(title="Elsewhere", company_id=None)
+    db.add(other)
+    db.commit()
+    assert authenticated_client.get(f"/jobs/{other.id}/matches").status_code == 404
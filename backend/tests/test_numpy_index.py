@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.services.search import numpy_index
+from app.services.search.numpy_index import NumpySearchEngine
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return NumpySearchEngine(path=str(tmp_path / "index"), dtype="float32")
+
+
+def _fill(index, n=20, companies=2):
+    vectors = _vectors(n)
+    ok = index.upsert(
+        ids=[str(i) for i in range(n)],
+        documents=[""] * n,
+        metadatas=[{"name": f"C{i}", "company_id": i % companies} for i in range(n)],
+        embeddings=vectors.tolist(),
+    )
+    assert ok
+    return vectors
+
+
+def test_exact_top_k_matches_brute_force(index):
+    vectors = _fill(index)
+    query = vectors[3] + 0.01
+
+    results = index.search_by_vector(query.tolist(), n_results=5)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]
+    assert [r["id"] for r in results] == [str(i) for i in expected]
+    assert results[0]["id"] == "3"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-3)
+    assert results[0]["metadata"]["name"] == "C3"
+
+
+def test_company_partition_and_metadata_filters(index):
+    vectors = _fill(index)
+    results = index.search_by_vector(vectors[3].tolist(), n_results=20, filters={"company_id": 0})
+    assert len(results) == 10
+    assert all(int(r["id"]) % 2 == 0 for r in results)
+
+    results = index.search_by_vector(vectors[3].tolist(), n_results=5, filters={"company_id": 1, "name": "C3"})
+    assert [r["id"] for r in results] == ["3"]
+
+
+def test_reload_maps_existing_files(index, tmp_path):
+    vectors = _fill(index)
+    index.delete_candidate("5")
+    index.update_metadatas(["4"], [{"name": "Renamed", "company_id": 9}])
+
+    reloaded = NumpySearchEngine(path=index.path)
+
+    assert isinstance(reloaded._matrix, np.memmap)
+    assert reloaded.count() == 19
+    assert reloaded.get_metadatas(["4", "5"]) == {"4": {"name": "Renamed", "company_id": 9}}
+    assert reloaded.search_by_vector(vectors[4].tolist(), 1, {"company_id": 9})[0]["id"] == "4"
+    stored = reloaded.get_embeddings(["7"])["7"]
+    assert np.allclose(stored, vectors[7] / np.linalg.norm(vectors[7]), atol=1e-6)
+
+
+def test_writes_from_another_process_are_visible(index):
+    other = NumpySearchEngine(path=index.path)
+    vectors = _fill(other)
+    assert index.count() == 20
+    assert index.search_by_vector(vectors[2].tolist(), 1)[0]["id"] == "2"
+
+
+def test_deleted_rows_are_reused_and_upsert_replaces(index):
+    _fill(index)
+    index.delete_candidate("0")
+    new_vector = _vectors(1, seed=9)[0]
+    index.upsert(["new"], [""], [{"company_id": 0}], [new_vector.tolist()])
+    assert index._rows["new"] == 0
+    assert len(index._ids) == 20
+
+    index.upsert(["new"], [""], [{"company_id": 1}], [(-new_vector).tolist()])
+    assert index.count() == 20
+    assert index._rows["new"] == 0
+    assert np.allclose(index.get_embeddings(["new"])["new"], -new_vector / np.linalg.norm(new_vector), atol=1e-6)
+    assert index.get_metadatas(["new"]) == {"new": {"company_id": 1}}
+
+
+def test_float16_matrix(tmp_path):
+    index = NumpySearchEngine(path=str(tmp_path / "f16"), dtype="float16")
+    vectors = _fill(index)
+    assert index._matrix.dtype == np.float16
+    assert index.search_by_vector(vectors[6].tolist(), 1)[0]["id"] == "6"
+
+
+def test_int8_matrix(tmp_path):
+    index = NumpySearchEngine(path=str(tmp_path / "i8"), dtype="int8")
+    vectors = _fill(index)
+    assert index._matrix.dtype == np.int8
+    assert index.search_by_vector(vectors[6].tolist(), 1)[0]["id"] == "6"
+
+    # Dequantized vectors stay within half a quantization step of the normalized input
+    stored = np.array(index.get_embeddings(["6"])["6"])
+    normed = vectors[6] / np.linalg.norm(vectors[6])
+    assert np.abs(stored - normed).max() <= np.abs(normed).max() / 127
+
+    reloaded = NumpySearchEngine(path=index.path)
+    assert reloaded.quantized
+    assert reloaded.search_by_vector(vectors[6].tolist(), 1)[0]["id"] == "6"
+    float32 = NumpySearchEngine(path=str(tmp_path / "f32"), dtype="float32")
+    _fill(float32)
+    # One byte per component plus a 4-byte scale per row, against four bytes per component
+    assert index.memory_bytes() == float32.memory_bytes() // 4 + index._matrix.shape[0] * 4
+
+
+def test_unknown_dtype_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        NumpySearchEngine(path=str(tmp_path / "bad"), dtype="int16")
+
+
+def test_log_is_compacted(index):
+    with patch.object(numpy_index, "COMPACT_SLACK", 5):
+        for _ in range(5):
+            _fill(index, n=4)
+    assert index._log_entries <= 2 * 4 + 5
+    assert NumpySearchEngine(path=index.path).count() == 4
+
+
+def test_dimension_mismatch_is_rejected(index):
+    _fill(index)
+    assert index.upsert(["x"], [""], [{}], [[0.1, 0.2]]) is False
+
+
+async def test_search_embeds_query(index):
+    vectors = _fill(index)
+    with patch("app.services.search.numpy_index.generate_embedding", new_callable=AsyncMock) as mock_embed:
+        mock_embed.return_value = vectors[8].tolist()
+        results = await index.search("Python developer", n_results=3, filters={"company_id": 0})
+    assert results[0]["id"] == "8"
+    assert len(results) == 3
+
+
+def test_factory_selects_backend(tmp_path):
+    from app.services.search import factory
+    with patch.object(factory, "_search_engine_instance", None), \
+         patch("app.services.search.factory.settings.SEARCH_BACKEND", "numpy"), \
+         patch("app.services.search.numpy_index.settings.VECTOR_INDEX_PATH", str(tmp_path / "factory")):
+        assert isinstance(factory.get_search_engine(), NumpySearchEngine)
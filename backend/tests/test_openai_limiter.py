@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from app.core import openai_limiter
+from app.core.config import settings
+
+
+@pytest.fixture
+def local_limiter():
+    """Limiter running on its in-process buckets, with small limits."""
+    openai_limiter._local_buckets.clear()
+    openai_limiter._local_waiters.clear()
+    with patch("app.core.openai_limiter._try_redis", return_value=None), \
+         patch("app.core.openai_limiter._get_redis", side_effect=ConnectionError("no redis")), \
+         patch.object(settings, "OPENAI_RATE_LIMITS", '{"test-model": {"rpm": 600, "tpm": 6000}}'), \
+         patch.object(settings, "OPENAI_BACKGROUND_RESERVE", 0.2), \
+         patch.object(settings, "OPENAI_RATE_LIMIT_ENABLED", True):
+        yield
+    openai_limiter._local_buckets.clear()
+    openai_limiter._local_waiters.clear()
+
+
+def test_limits_from_settings():
+    with patch.object(settings, "OPENAI_RATE_LIMITS", '{"gpt-4o-mini": {"rpm": 5000}}'), \
+         patch.object(settings, "OPENAI_DEFAULT_TPM", 1234):
+        assert openai_limiter.get_limits("gpt-4o-mini") == (5000, 1234)
+        assert openai_limiter.get_limits("other") == (settings.OPENAI_DEFAULT_RPM, 1234)
+
+
+async def test_waits_for_tokens_instead_of_failing(local_limiter):
+    assert await openai_limiter.acquire("test-model", 6000, openai_limiter.INTERACTIVE) < 0.1
+    # 6000 tokens/min refill at 100/s: 50 tokens take about half a second
+    waited = await openai_limiter.acquire("test-model", 50, openai_limiter.INTERACTIVE)
+    assert 0.3 < waited < 2
+
+
+def test_background_leaves_reserve_for_interactive(local_limiter):
+    # Background may only use 80% of the bucket
+    assert openai_limiter._try_local("test-model", 4800, openai_limiter.BACKGROUND, "bg-1") == 0
+    assert openai_limiter._try_local("test-model", 100, openai_limiter.BACKGROUND, "bg-2") > 0
+    assert openai_limiter._try_local("test-model", 100, openai_limiter.INTERACTIVE, "ui-1") == 0
+
+
+def test_background_yields_to_waiting_interactive(local_limiter):
+    openai_limiter._try_local("test-model", 6000, openai_limiter.INTERACTIVE, "ui-1")
+    # The bucket is empty, so the next interactive call waits...
+    assert openai_limiter._try_local("test-model", 1000, openai_limiter.INTERACTIVE, "ui-2") > 0
+    openai_limiter._local_buckets["test-model"]["tok"] = 6000
+    # ...and background calls do not take capacity while it does
+    assert openai_limiter._try_local("test-model", 10, openai_limiter.BACKGROUND, "bg-1") > 0
+    assert openai_limiter._try_local("test-model", 1000, openai_limiter.INTERACTIVE, "ui-2") == 0
+    assert openai_limiter._try_local("test-model", 10, openai_limiter.BACKGROUND, "bg-1") == 0
+
+
+async def test_settle_returns_unused_tokens(local_limiter):
+    openai_limiter._try_local("test-model", 6000, openai_limiter.INTERACTIVE, "ui-1")
+    await openai_limiter.settle("test-model", 6000, 1000)
+    assert openai_limiter._try_local("test-model", 4000, openai_limiter.INTERACTIVE, "ui-2") == 0
+
+
+async def test_redis_round_trips_run_off_the_event_loop():
+    threads = []
+
+    def record(*args):
+        threads.append(threading.current_thread())
+        return 0.0
+
+    with patch("app.core.openai_limiter._try_redis", side_effect=record), \
+         patch("app.core.openai_limiter._leave", side_effect=record), \
+         patch("app.core.openai_limiter._settle_redis", side_effect=record), \
+         patch.object(openai_limiter, "_redis_down_until", 0.0), \
+         patch.object(settings, "OPENAI_RATE_LIMIT_ENABLED", True):
+        await openai_limiter.acquire("test-model", 100)
+        await openai_limiter.settle("test-model", 100, 40)
+
+    assert len(threads) == 3
+    assert threading.current_thread() not in threads
+
+
+def test_redis_script_gets_higher_class_waiters():
+    script = MagicMock(return_value=250)
+    with patch("app.core.openai_limiter._get_script", return_value=script), \
+         patch.object(openai_limiter, "_redis_down_until", 0.0):
+        wait = openai_limiter._try_redis("gpt-4o-mini", 500, openai_limiter.BACKGROUND, "w1")
+
+    assert wait == 0.25
+    keys = script.call_args.kwargs["keys"]
+    assert keys == [
+        "openai_rl:gpt-4o-mini",
+        "openai_rl:gpt-4o-mini:waiters:background",
+        "openai_rl:gpt-4o-mini:waiters:interactive",
+        "openai_rl:gpt-4o-mini:waiters:default",
+    ]
+    assert script.call_args.kwargs["args"][3] == settings.OPENAI_BACKGROUND_RESERVE
+
+
+def test_redis_outage_falls_back_to_local_buckets():
+    with patch("app.core.openai_limiter._get_script", side_effect=ConnectionError("down")), \
+         patch.object(openai_limiter, "_redis_down_until", 0.0):
+        assert openai_limiter._try_redis("gpt-4o-mini", 10, openai_limiter.DEFAULT, "w1") is None
+        assert openai_limiter._redis_down_until > time.monotonic()
+
+
+def test_priority_context_overrides_process_default():
+    with patch.object(openai_limiter, "_default_priority", openai_limiter.BACKGROUND):
+        assert openai_limiter.current_priority() == openai_limiter.BACKGROUND
+        with openai_limiter.priority(openai_limiter.INTERACTIVE):
+            assert openai_limiter.current_priority() == openai_limiter.INTERACTIVE
+        assert openai_limiter.current_priority() == openai_limiter.BACKGROUND
+
+
+def test_estimate_chat_tokens_includes_completion():
+    kwargs = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello"}], "max_tokens": 50}
+    assert openai_limiter.estimate_chat_tokens(kwargs) > 50
@@ -0,0 +1,128 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.models.models import CV, ParsedCV, Company
+from app.services import parse_cache
+from app.services.parse_service import process_cv
+
+
+@pytest.fixture
+def cached_source(db, tmp_path):
+    """A parsed CV whose file bytes are on disk, stamped with the current parse version."""
+    company = Company(name="Cache Co", domain="cacheco.com")
+    db.add(company)
+    db.commit()
+
+    path = tmp_path / "original.pdf"
+    path.write_bytes(b"%PDF-1.4 same bytes")
+
+    source = CV(filename="original.pdf", filepath=str(path), company_id=company.id, is_parsed=True)
+    db.add(source)
+    db.flush()
+    db.add(ParsedCV(
+        cv_id=source.id,
+        name="Jane Doe",
+        skills='["Python", "AWS"]',
+        raw_text="Jane Doe Python AWS",
+        content_hash=parse_cache.hash_file(str(path)),
+        text_hash=parse_cache.hash_text("Jane Doe Python AWS"),
+        parse_version=parse_cache.get_parse_version(),
+        parse_tokens=1500,
+    ))
+    db.commit()
+    return source
+
+
+def _upload_copy(db, tmp_path, company_id, content=b"%PDF-1.4 same bytes"):
+    path = tmp_path / "copy.pdf"
+    path.write_bytes(content)
+    cv = CV(filename="copy.pdf", filepath=str(path), company_id=company_id)
+    db.add(cv)
+    db.commit()
+    return cv
+
+
+def test_hash_text_ignores_whitespace():
+    assert parse_cache.hash_text("Jane  Doe\nPython") == parse_cache.hash_text("Jane Doe Python")
+
+
+def test_find_cached_parse_scoped_to_company_and_version(db, cached_source):
+    content_hash = cached_source.parsed_data.content_hash
+
+    hit = parse_cache.find_cached_parse(db, cached_source.company_id, exclude_cv_id=-1, content_hash=content_hash)
+    assert hit is not None and hit.cv_id == cached_source.id
+
+    # Other tenants never see the entry
+    assert parse_cache.find_cached_parse(db, cached_source.company_id + 1, exclude_cv_id=-1, content_hash=content_hash) is None
+
+    # A prompt/model change invalidates it
+    with patch("app.services.parse_cache.get_parse_version", return_value="other-version"):
+        assert parse_cache.find_cached_parse(db, cached_source.company_id, exclude_cv_id=-1, content_hash=content_hash) is None
+
+
+def test_process_cv_clones_on_file_hash_hit(db, tmp_path, cached_source):
+    copy = _upload_copy(db, tmp_path, cached_source.company_id)
+
+    with patch("app.services.parse_service.engine", db.get_bind()), \
+         patch("app.services.parse_service.parse_cv_with_llm", new_callable=AsyncMock) as mock_parse, \
+         patch("app.services.parse_service.extract_text_pages") as mock_extract, \
+         patch("app.services.parse_service.parse_cache.record_hit") as mock_hit, \
+         patch("app.services.vector_db.vector_db") as mock_vector_db:
+        mock_vector_db.get_embeddings.return_value = {str(cached_source.id): [0.1, 0.2]}
+
+        process_cv(copy.id)
+
+        mock_parse.assert_not_called()
+        mock_extract.assert_not_called()
+        mock_hit.assert_called_once_with(tokens_saved=1500)
+        upsert_kwargs = mock_vector_db.upsert.call_args.kwargs
+        assert upsert_kwargs["ids"] == [str(copy.id)]
+        assert upsert_kwargs["embeddings"] == [[0.1, 0.2]]
+
+    db.expire_all()
+    parsed = db.query(ParsedCV).filter(ParsedCV.cv_id == copy.id).first()
+    assert parsed.name == "Jane Doe"
+    assert parsed.skills == '["Python", "AWS"]'
+    assert parsed.cv.is_parsed is True
+
+
+def test_process_cv_text_hash_hit_after_reexport(db, tmp_path, cached_source):
+    copy = _upload_copy(db, tmp_path, cached_source.company_id, content=b"%PDF-1.7 re-exported")
+
+    with patch("app.services.parse_service.engine", db.get_bind()), \
+         patch("app.services.parse_service.parse_cv_with_llm", new_callable=AsyncMock) as mock_parse, \
+         patch("app.services.parse_service.extract_text_pages", return_value=["Jane Doe\nPython AWS"]), \
+         patch("app.services.parse_service.parse_cache.record_hit"), \
+         patch("app.services.vector_db.vector_db") as mock_vector_db:
+        mock_vector_db.get_embeddings.return_value = {str(cached_source.id): [0.3]}
+
+        process_cv(copy.id)
+
+        mock_parse.assert_not_called()
+
+    db.expire_all()
+    parsed = db.query(ParsedCV).filter(ParsedCV.cv_id == copy.id).first()
+    assert parsed.name == "Jane Doe"
+    # The copy keeps its own file hash so its exact bytes hit directly next time
+    assert parsed.content_hash == parse_cache.hash_file(copy.filepath)
+
+
+def test_process_cv_miss_stamps_cache_keys(db, tmp_path, cached_source):
+    copy = _upload_copy(db, tmp_path, cached_source.company_id, content=b"%PDF-1.4 different person")
+
+    with patch("app.services.parse_service.engine", db.get_bind()), \
+         patch("app.services.parse_service.parse_cv_with_llm", new_callable=AsyncMock) as mock_parse, \
+         patch("app.services.parse_service.extract_text_pages", return_value=["John Smith Java"]), \
+         patch("app.services.parse_service.parse_cache.record_miss") as mock_miss, \
+         patch("app.services.vector_db.vector_db"):
+        mock_parse.return_value = {"name": "John Smith", "_tokens_used": 900}
+
+        process_cv(copy.id)
+
+        mock_parse.assert_called_once()
+        mock_miss.assert_called_once()
+
+    db.expire_all()
+    parsed = db.query(ParsedCV).filter(ParsedCV.cv_id == copy.id).first()
+    assert parsed.parse_version == parse_cache.get_parse_version()
+    assert parsed.parse_tokens == 900
+    assert parsed.text_hash == parse_cache.hash_text("John Smith Java")
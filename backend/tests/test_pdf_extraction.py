@@ -0,0 +1,118 @@
+import time
+import pytest
+from concurrent.futures import Future
+from unittest.mock import patch, MagicMock
+from pypdf import PdfReader, PdfWriter
+from pypdf.annotations import Link
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+from app.services import pdf_extraction
+from app.services.pdf_extraction import extract_pdf_pages, extract_pdf_text
+
+
+def _make_pdf(path, pages, lines=20):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for p in range(pages):
+        page = writer.add_blank_page(612, 792)
+        stream = DecodedStreamObject()
+        stream.set_data("".join(
+            f"BT /F1 9 Tf 40 {760 - i * 18} Td (Page {p} line {i} Python engineer) Tj ET\n" for i in range(lines)
+        ).encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        writer.add_annotation(page_number=p, annotation=Link(rect=(40, 20, 200, 36), url=f"https://example.com/{p}"))
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+@pytest.fixture
+def large_pdf(tmp_path):
+    return _make_pdf(tmp_path / "portfolio.pdf", pages=20)
+
+
+def _extract(path, **kwargs):
+    kwargs.setdefault("time_limit", 60)
+    kwargs.setdefault("parallel_min_pages", 0)
+    return extract_pdf_text(PdfReader(path), path, **kwargs)
+
+
+def test_full_extraction_includes_every_page_and_link(large_pdf):
+    text = _extract(large_pdf, char_budget=0)
+    assert "Page 19 line 19" in text
+    assert text.count("[LINK: https://example.com/") == 20
+
+
+def test_budget_stops_at_page_boundary_with_same_prefix(large_pdf):
+    full = _extract(large_pdf, char_budget=0)
+    budgeted = _extract(large_pdf, char_budget=2000)
+
+    assert 2000 <= len(budgeted) < len(full)
+    assert full.startswith(budgeted)
+    # Stops right after a page's link marker, never mid-page
+    assert budgeted.endswith("] ")
+
+
+def test_time_limit_returns_partial_text(large_pdf):
+    assert _extract(large_pdf, char_budget=0, time_limit=0) == ""
+
+
+def test_parallel_matches_sequential(large_pdf):
+    sequential = _extract(large_pdf, char_budget=0)
+    try:
+        assert _extract(large_pdf, char_budget=0, parallel_min_pages=8) == sequential
+        assert _extract(large_pdf, char_budget=5000, parallel_min_pages=8) == _extract(large_pdf, char_budget=5000)
+    finally:
+        pdf_extraction._reset_pool()
+
+
+def test_pool_failure_falls_back_to_sequential(large_pdf):
+    broken_pool = MagicMock()
+    broken_pool.submit.side_effect = RuntimeError("pool broken")
+
+    with patch("app.services.pdf_extraction._get_pool", return_value=broken_pool):
+        text = _extract(large_pdf, char_budget=0, parallel_min_pages=8)
+
+    assert text == _extract(large_pdf, char_budget=0)
+
+
+def test_time_limit_holds_while_a_pool_page_is_stuck(large_pdf):
+    stuck_pool = MagicMock()
+    stuck_pool.submit.return_value = Future()  # never completes
+
+    with patch("app.services.pdf_extraction._get_pool", return_value=stuck_pool), \
+         patch("app.services.pdf_extraction._extract_sequential") as mock_sequential:
+        start = time.monotonic()
+        assert _extract(large_pdf, char_budget=0, parallel_min_pages=8, time_limit=0.1) == ""
+    assert time.monotonic() - start < 2
+    mock_sequential.assert_not_called()
+
+
+def test_no_pool_inside_daemonic_process(large_pdf):
+    with patch("app.services.pdf_extraction._can_use_pool", return_value=False), \
+         patch("app.services.pdf_extraction._get_pool") as mock_pool:
+        _extract(large_pdf, char_budget=0, parallel_min_pages=8)
+    mock_pool.assert_not_called()
+
+
+def test_in_pool_extracts_small_documents_in_the_pool(tmp_path):
+    path = _make_pdf(tmp_path / "cv.pdf", pages=2)
+    sequential = _extract(path, char_budget=0)
+    try:
+        with patch("app.services.pdf_extraction._extract_sequential") as mock_sequential:
+            assert _extract(path, char_budget=0, in_pool=True) == sequential
+        mock_sequential.assert_not_called()
+    finally:
+        pdf_extraction._reset_pool()
+
+
+def test_pages_join_to_the_extracted_text(large_pdf):
+    pages = extract_pdf_pages(PdfReader(large_pdf), large_pdf, char_budget=0, time_limit=60, parallel_min_pages=0)
+    assert len(pages) == 20
+    assert pages[1].startswith("Page 1 line 0")
+    assert "\n".join(pages) == _extract(large_pdf, char_budget=0)
+    assert "\f" not in "\n".join(pages)
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event, text
+from app.models.models import User
+from app.services import principal_cache
+
+
+@pytest.fixture
+def user_queries(db):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    yield statements
+    event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+def test_principal_is_cached_and_invalidated_on_user_update(authenticated_client, db, user_queries):
+    statements = user_queries
+    assert authenticated_client.get("/auth/me").json()["role"] == "admin"
+    # Only the auth projection is read, not the profile picture
+    assert len(statements) == 1 and "profile_picture" not in statements[0]
+
+    # A write that bypasses the ORM is not seen while the entry is cached
+    db.execute(text("UPDATE users SET department = 'Sales' WHERE email = 'admin@test.com'"))
+    db.commit()
+    assert authenticated_client.get("/auth/me").json()["department"] is None
+    assert len(statements) == 1
+
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    user.role = "recruiter"
+    db.commit()
+    data = authenticated_client.get("/auth/me").json()
+    assert data["role"] == "recruiter"
+    assert data["department"] == "Sales"
+
+
+def test_principal_loads_full_user_on_demand(authenticated_client, db):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    user.profile_picture = "data:image/jpeg;base64,AAAA"
+    db.commit()
+    db.expunge_all()
+
+    principal = principal_cache.load(db, "admin@test.com")
+    assert principal.role == "admin"
+    assert "profile_picture" not in vars(principal)
+    assert principal.profile_picture == "data:image/jpeg;base64,AAAA"
+    assert principal.company.name == "Test Company"
+    with pytest.raises(AttributeError):
+        principal.full_name = "Lost update"
+    principal.user.full_name = "Ada"
+    assert principal.user.full_name == "Ada"
+    db.rollback()
+
+    res = authenticated_client.patch("/users/me/profile", json={"full_name": "Ada Admin"})
+    assert res.status_code == 200
+    assert principal_cache.load(db, "admin@test.com").full_name == "Ada Admin"
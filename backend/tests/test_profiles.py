@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from sqlalchemy import event
 from app.models.models import CV, ParsedCV, Application, Job, User, UserRole, Interview
 
 def test_profiles_lifecycle(authenticated_client, db):
@@ -113,3 +114,78 @@ def test_interviewer_restrictions(client, db):
     
     res = client.get(f"/profiles/{cv2.id}")
     assert res.status_code == 404
+
+def _walk_cursor(client, url):
+    ids, cursor = [], None
+    while True:
+        res = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert res.status_code == 200
+        ids += [item["id"] for item in res.json()["items"]]
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+def test_profiles_keyset_pagination(authenticated_client, db):
+    client = authenticated_client
+    company_id = db.query(User).filter(User.email == "admin@test.com").first().company_id
+    job = Job(title="Dev Job", company_id=company_id)
+    db.add(job)
+    db.commit()
+
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    cvs = []
+    for i, (name, years) in enumerate([("Cara", 3), ("Abe", None), ("Bea", 3), (None, 10), ("Abe", 1), ("Dan", None), ("Eve", 7)]):
+        # Pairs of CVs share an upload time, so ties are broken by id
+        cv = CV(filename=f"{i}.pdf", filepath="p", company_id=company_id, uploaded_at=base.replace(day=1 + i // 2))
+        db.add(cv)
+        db.commit()
+        db.add(ParsedCV(cv_id=cv.id, name=name, experience_years=years))
+        # Several applications to the same job must not repeat the candidate
+        db.add_all([Application(cv_id=cv.id, job_id=job.id, status="New") for _ in range(2)])
+        db.commit()
+        cvs.append(cv)
+
+    for sort_by in ["newest", "oldest", "experience", "name"]:
+        offset_ids = client.get(f"/profiles/?sort_by={sort_by}&limit=100").json()["items"]
+        offset_ids = [item["id"] for item in offset_ids]
+        assert sorted(offset_ids) == sorted(cv.id for cv in cvs)
+        assert _walk_cursor(client, f"/profiles/?sort_by={sort_by}&limit=2&job_id={job.id}") == offset_ids
+
+    ids = [cv.id for cv in cvs]
+    assert [item["id"] for item in client.get("/profiles/?sort_by=name&limit=100").json()["items"]] == \
+        [ids[1], ids[4], ids[2], ids[0], ids[5], ids[6], ids[3]]
+    assert [item["id"] for item in client.get("/profiles/?sort_by=experience&limit=100").json()["items"]] == \
+        [ids[3], ids[6], ids[2], ids[0], ids[4], ids[5], ids[1]]
+
+    # The first offset page hands over to cursors; page metadata keeps its shape
+    res = client.get(f"/profiles/?limit=3&job_id={job.id}&approximate_count=true")
+    assert res.json()["total"] == 7 and res.json()["pages"] == 3
+    res = client.get(f"/profiles/?limit=3&cursor={res.headers['X-Next-Cursor']}")
+    assert [item["id"] for item in res.json()["items"]] == [ids[3], ids[2], ids[1]]
+    assert set(res.json()) == {"items", "total", "page", "pages", "limit"}
+
+    cursor = client.get("/profiles/?sort_by=name&limit=2").headers["X-Next-Cursor"]
+    assert client.get(f"/profiles/?sort_by=oldest&cursor={cursor}").status_code == 400
+    assert client.get("/profiles/?cursor=not-a-cursor").status_code == 400
+
+def test_profiles_list_skips_heavy_columns(authenticated_client, db):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    user.profile_picture = "data:image/jpeg;base64,AAAA"
+    cv = CV(filename="a.pdf", filepath="p", company_id=user.company_id, uploaded_by=user.id)
+    db.add(cv)
+    db.commit()
+    db.add(ParsedCV(cv_id=cv.id, name="Ann", raw_text="full text", job_history='[{"title": "Engineer"}]'))
+    db.commit()
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        res = authenticated_client.get("/profiles/")
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    assert res.json()["items"][0]["parsed_data"]["job_history"] == [{"title": "Engineer"}]
+    assert res.json()["items"][0]["uploaded_by_name"] == "admin@test.com"
+    assert not any("raw_text" in s or "profile_picture" in s for s in statements)
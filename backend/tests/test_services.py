@@ -84,8 +84,9 @@ def test_clean_and_dump():
 
 def test_process_cv():
     with patch("app.services.parse_service.sessionmaker") as mock_sessionmaker, \
-         patch("app.services.parse_service.extract_text", return_value="Text") as mock_extract, \
+         patch("app.services.parse_service.extract_text_pages", return_value=["Text"]) as mock_extract, \
          patch("app.services.parse_service.parse_cv_with_llm", new_callable=AsyncMock) as mock_parse, \
+         patch("app.services.parse_service.parse_cache.find_cached_parse", return_value=None), \
          patch("app.services.vector_db.vector_db") as mock_vector_db:
         
         # Mock DB Session
@@ -146,3 +147,4 @@ async def test_chroma_engine():
         # Delete
         engine.delete_candidate("1")
         mock_collection.delete.assert_called_once()
+
@@ -0,0 +1,64 @@
+import numpy as np
+from unittest.mock import patch, AsyncMock
+from app.models.models import CV, ParsedCV, User, Application, Job
+from app.services.search.numpy_index import NumpySearchEngine
+
+
+def _setup(db, tmp_path, company_id):
+    index = NumpySearchEngine(path=str(tmp_path / "index"), dtype="float32")
+    base = np.zeros(8)
+    base[0] = 1.0
+    drift = np.zeros(8)
+    drift[1] = 1.0
+    ids = []
+    # Each candidate drifts further from the first one
+    for i, name in enumerate(["Alice", "Bob", "Carol", "Dan"]):
+        cv = CV(filename=f"{name}.pdf", filepath=f"/tmp/{name}.pdf", company_id=company_id, is_parsed=True)
+        db.add(cv)
+        db.commit()
+        db.add(ParsedCV(cv_id=cv.id, name=name, last_job_title="Engineer"))
+        db.commit()
+        vector = base + i * drift
+        index.upsert([str(cv.id)], [""], [{"company_id": company_id}], [vector.tolist()])
+        ids.append(cv.id)
+    # Same vector as Alice, other tenant
+    index.upsert(["999"], [""], [{"company_id": company_id + 1}], [base.tolist()])
+    return index, ids
+
+
+def test_similar_candidates_uses_stored_vector(authenticated_client, db, tmp_path):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    index, (alice, bob, carol, dan) = _setup(db, tmp_path, user.company_id)
+    job = Job(title="Old role", company_id=user.company_id)
+    db.add(job)
+    db.commit()
+    db.add(Application(cv_id=dan, job_id=job.id, status="Offer"))
+    db.commit()
+
+    embed = AsyncMock()
+    with patch("app.api.endpoints.search.get_search_engine", return_value=index), \
+         patch("app.services.search.numpy_index.generate_embedding", embed):
+        res = authenticated_client.get(f"/search/candidates/{alice}/similar?limit=3")
+
+    assert res.status_code == 200
+    data = res.json()
+    embed.assert_not_called()
+    # Dan is furthest from Alice, but his silver medalist boost puts him ahead of Carol
+    assert [item["id"] for item in data] == [bob, dan, carol]
+    assert data[0]["name"] == "Bob"
+    assert next(item for item in data if item["id"] == dan)["is_silver_medalist"]
+
+
+def test_similar_candidates_requires_indexed_own_candidate(authenticated_client, db, tmp_path):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    index, _ = _setup(db, tmp_path, user.company_id)
+    other = CV(filename="x.pdf", filepath="/tmp/x.pdf", company_id=user.company_id + 1)
+    unindexed = CV(filename="y.pdf", filepath="/tmp/y.pdf", company_id=user.company_id)
+    db.add_all([other, unindexed])
+    db.commit()
+
+    with patch("app.api.endpoints.search.get_search_engine", return_value=index):
+        assert authenticated_client.get(f"/search/candidates/{other.id}/similar").status_code == 404
+        res = authenticated_client.get(f"/search/candidates/{unindexed.id}/similar")
+    assert res.status_code == 404
+    assert res.json()["detail"] == "Candidate is not indexed yet"
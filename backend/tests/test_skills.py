@@ -0,0 +1,59 @@
+import json
+from app.models.models import CV, ParsedCV, CandidateSkill, User
+from app.services.skills import get_matcher, normalize_skills, parse_skill_filter, sync_candidate_skills
+
+
+def test_normalize_maps_aliases_and_splits_items():
+    skills = ["JS", "node", "Amazon Web Services (AWS)", "k8s", "ReactJS", "Python scripting", "javascript"]
+    assert normalize_skills(skills) == ["JavaScript", "Node.js", "AWS", "Kubernetes", "React", "Python scripting"]
+    # Stored JSON and plain comma-separated strings are accepted too
+    assert normalize_skills('["golang", "C#"]') == ["Go", "C#"]
+    assert normalize_skills("Python, Go") == ["Python", "Go"]
+
+
+def test_matcher_finds_skills_in_text():
+    matcher = get_matcher()
+    found = matcher.find("Built REST APIs in Node.js, deployed with docker-compose to k8s on AWS")
+    assert found == ["REST APIs", "Node.js", "Docker", "Kubernetes", "AWS"]
+    # Two-letter aliases only count as a whole item
+    assert matcher.find("go-to-market strategy") == []
+    assert matcher.canonical("Go") == "Go"
+    # Unknown skills are indexed as written plus the known skills they mention
+    assert matcher.keys(["Python scripting", "CI/CD pipelines"]) == ["python scripting", "python", "ci cd pipelines", "ci cd"]
+
+
+def _candidate(db, company_id, name, skills):
+    cv = CV(filename=f"{name}.pdf", filepath=f"/tmp/{name}.pdf", company_id=company_id, is_parsed=True)
+    db.add(cv)
+    db.commit()
+    db.add(ParsedCV(cv_id=cv.id, name=name, skills=json.dumps(skills)))
+    sync_candidate_skills(db, cv.id, company_id, skills)
+    db.commit()
+    return cv
+
+
+def test_profiles_filter_by_all_skills(authenticated_client, db):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    alice = _candidate(db, user.company_id, "Alice", ["JavaScript", "Docker", "Kubernetes"])
+    _candidate(db, user.company_id, "Bob", ["JavaScript", "Python"])
+    _candidate(db, None, "Other tenant", ["JavaScript", "Docker", "Kubernetes"])
+
+    assert parse_skill_filter("js, K8s,") == ["javascript", "kubernetes"]
+    res = authenticated_client.get("/profiles/?skills=js,k8s")
+    assert res.status_code == 200
+    assert [item["id"] for item in res.json()["items"]] == [alice.id]
+    assert res.json()["total"] == 1
+
+    res = authenticated_client.get("/profiles/?skills=javascript")
+    assert res.json()["total"] == 2
+
+
+def test_profile_update_reindexes_skills(authenticated_client, db):
+    user = db.query(User).filter(User.email == "admin@test.com").first()
+    cv = _candidate(db, user.company_id, "Carol", ["Excel"])
+
+    res = authenticated_client.patch(f"/profiles/{cv.id}", json={"skills": ["golang", "Postgres"]})
+    assert res.status_code == 200
+    assert json.loads(db.query(ParsedCV).filter(ParsedCV.cv_id == cv.id).first().skills) == ["Go", "PostgreSQL"]
+    rows = db.query(CandidateSkill.skill).filter(CandidateSkill.cv_id == cv.id).all()
+    assert sorted(r.skill for r in rows) == ["go", "postgresql"]
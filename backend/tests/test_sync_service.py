@@ -0,0 +1,109 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+from sqlalchemy.orm import sessionmaker
+from app.models.models import CV, ParsedCV, Company
+from app.services import sync_service
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def sync_env(db):
+    fake_redis = FakeRedis()
+    with patch("app.services.sync_service.SessionLocal", sessionmaker(bind=db.get_bind())), \
+         patch("app.services.sync_service._get_redis", return_value=fake_redis), \
+         patch("app.services.sync_service.SYNC_WATERMARK_LAG", timedelta(0)), \
+         patch("app.services.sync_service.vector_db") as mock_vector_db, \
+         patch("app.services.sync_service.generate_embeddings_batch", new_callable=AsyncMock) as mock_batch:
+        mock_vector_db.get_metadatas.return_value = {}
+        mock_vector_db.upsert.return_value = True
+        mock_vector_db.update_metadatas.return_value = True
+        mock_batch.side_effect = lambda texts: [[0.1] for _ in texts]
+        yield fake_redis, mock_vector_db, mock_batch
+
+
+@pytest.fixture
+def parsed_cvs(db):
+    company = Company(name="Sync Co", domain="sync.com")
+    db.add(company)
+    db.commit()
+    rows = []
+    for i in range(3):
+        cv = CV(filename=f"{i}.pdf", filepath=f"/tmp/{i}.pdf", company_id=company.id, is_parsed=True)
+        db.add(cv)
+        db.commit()
+        # Same timestamp for all rows: the id breaks the tie in the keyset
+        parsed = ParsedCV(cv_id=cv.id, name=f"Candidate {i}", skills='["Python"]', updated_at=datetime(2026, 1, 1))
+        db.add(parsed)
+        db.commit()
+        rows.append((parsed, cv))
+    return rows
+
+
+async def test_sync_resumes_from_watermark(sync_env, parsed_cvs):
+    fake_redis, mock_vector_db, mock_batch = sync_env
+
+    first = await sync_service.sync_embeddings(limit=2, page_size=1)
+    assert first["checked"] == 2 and first["new"] == 2
+    assert fake_redis.get(sync_service.SYNC_WATERMARK_KEY).endswith(f"|{parsed_cvs[1][0].id}")
+
+    second = await sync_service.sync_embeddings(limit=10, page_size=10)
+    assert second["checked"] == 1
+    assert mock_vector_db.get_metadatas.call_args.args[0] == [str(parsed_cvs[2][1].id)]
+
+    # Nothing changed since: nothing left to check
+    assert (await sync_service.sync_embeddings())["checked"] == 0
+    # A full sync starts over
+    assert (await sync_service.sync_embeddings(full=True))["checked"] == 3
+
+
+async def test_lag_recheck_does_not_hold_back_the_watermark(sync_env, parsed_cvs):
+    fake_redis, mock_vector_db, _ = sync_env
+    # Every row is inside the lag window below the mark, and more of them than `limit`
+    with patch("app.services.sync_service.SYNC_WATERMARK_LAG", timedelta(minutes=5)), \
+         patch("app.services.sync_service.SYNC_LAG_RECHECK_LIMIT", 1):
+        runs = [await sync_service.sync_embeddings(limit=1) for _ in range(3)]
+
+    assert [run["checked"] for run in runs] == [1, 1, 1]
+    assert [run["rechecked"] for run in runs] == [0, 1, 1]
+    assert fake_redis.get(sync_service.SYNC_WATERMARK_KEY).endswith(f"|{parsed_cvs[2][0].id}")
+
+
+async def test_sync_diffs_metadata_without_embeddings(sync_env, parsed_cvs):
+    fake_redis, mock_vector_db, mock_batch = sync_env
+    (p0, cv0), (p1, cv1), (p2, cv2) = parsed_cvs
+    in_sync = sync_service._candidate_metadata(p0, cv0)
+    moved = dict(sync_service._candidate_metadata(p1, cv1), company_id=999)
+    edited = dict(sync_service._candidate_metadata(p2, cv2), embedding_fp="stale")
+    mock_vector_db.get_metadatas.return_value = {str(cv0.id): in_sync, str(cv1.id): moved, str(cv2.id): edited}
+
+    counts = await sync_service.sync_embeddings()
+
+    assert counts == {"checked": 3, "rechecked": 0, "new": 0, "reembedded": 1, "metadata": 1}
+    mock_vector_db.get_metadatas.assert_called_once()
+    mock_batch.assert_awaited_once()
+    assert mock_vector_db.upsert.call_args.kwargs["ids"] == [str(cv2.id)]
+    assert mock_vector_db.update_metadatas.call_args.kwargs["ids"] == [str(cv1.id)]
+
+
+async def test_sync_keeps_watermark_when_chroma_is_down(sync_env, parsed_cvs):
+    fake_redis, mock_vector_db, _ = sync_env
+    mock_vector_db.get_metadatas.return_value = None
+
+    counts = await sync_service.sync_embeddings()
+
+    assert counts["checked"] == 0
+    assert sync_service.SYNC_WATERMARK_KEY not in fake_redis.store
@@ -0,0 +1,103 @@
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services import token_budget
+from app.services.parser import merge_parsed_chunks, parse_cv_with_llm, plan_parse_chunks
+
+MODEL = "gpt-4o-mini"
+
+
+def test_fallback_estimate_without_encoding():
+    with patch("app.services.token_budget._load_encoding", return_value=None):
+        assert token_budget.count_tokens("a" * 10, MODEL) == 3
+        assert token_budget.truncate_to_tokens("a" * 100, 5, MODEL) == "a" * 20
+
+
+def test_count_message_tokens_includes_framing():
+    messages = [{"role": "system", "content": "abcd"}, {"role": "user", "content": ""}]
+    with patch("app.services.token_budget._load_encoding", return_value=None):
+        assert token_budget.count_message_tokens(messages, MODEL) == 1 + 2 * token_budget.TOKENS_PER_MESSAGE + token_budget.TOKENS_PER_REPLY
+
+
+def test_split_keeps_order_and_budget():
+    text = "\n".join(f"line {i} " + "x" * 30 for i in range(50))
+    with patch("app.services.token_budget._load_encoding", return_value=None):
+        chunks = token_budget.split_to_token_chunks(text, 60, MODEL)
+        assert all(token_budget.count_tokens(c, MODEL) <= 60 for c in chunks)
+    assert "\n".join(chunks) == text
+
+
+def test_split_hard_cuts_overlong_line_and_caps_chunks():
+    with patch("app.services.token_budget._load_encoding", return_value=None):
+        chunks = token_budget.split_to_token_chunks("y" * 1000, 50, MODEL)
+        assert "".join(chunks) == "y" * 1000
+        assert len(token_budget.split_to_token_chunks("y" * 1000, 50, MODEL, max_chunks=2)) == 2
+
+
+def test_short_cv_is_one_chunk_with_full_text():
+    text = "Jane Doe\nPython developer"
+    assert plan_parse_chunks(text, "cv.pdf") == [text]
+
+
+def test_merge_parsed_chunks_is_deterministic():
+    first = {
+        "name": "Jane Doe",
+        "email": ["jane@example.com"],
+        "skills": ["Python", "AWS"],
+        "experience_years": 6,
+        "last_job_title": "Lead Engineer",
+        "job_history": [{"title": "Lead Engineer", "company": "Acme", "duration": "2020 - Present", "description": ""}],
+        "education": [],
+    }
+    second = {
+        "name": "",
+        "emails": ["JANE@example.com", "j.doe@example.com"],
+        "skills": ["python", "Kubernetes"],
+        "experience_years": "11",
+        "job_history": [
+            {"title": "Lead engineer", "company": "ACME", "duration": "2020 - Present", "description": "Led platform team"},
+            {"title": "Developer", "company": "Initech", "duration": "2013 - 2020"},
+        ],
+        "education": [{"institution": "Cairo University", "degree": "BSc", "year": "2013"}],
+    }
+
+    merged = merge_parsed_chunks([first, second])
+
+    assert merged["name"] == "Jane Doe"
+    assert merged["email"] == ["jane@example.com", "j.doe@example.com"]
+    assert merged["skills"] == ["Python", "AWS", "Kubernetes"]
+    assert merged["experience_years"] == 11
+    assert [j["company"] for j in merged["job_history"]] == ["Acme", "Initech"]
+    assert merged["job_history"][0]["description"] == "Led platform team"
+    assert merged["education"] == [{"institution": "Cairo University", "degree": "BSc", "year": "2013"}]
+    assert merge_parsed_chunks([first, second]) == merged
+
+
+async def test_long_cv_is_parsed_in_chunks_and_merged():
+    responses = [
+        {"name": "Jane Doe", "skills": ["Python"], "job_history": [{"title": "Lead", "company": "Acme"}]},
+        {"skills": ["Go"], "job_history": [{"title": "Dev", "company": "Initech"}]},
+    ]
+    mock_client = MagicMock()
+
+    async def create(**kwargs):
+        part = 0 if "part 1 of" in kwargs["messages"][1]["content"] else 1
+        completion = MagicMock()
+        completion.choices = [MagicMock(message=MagicMock(content=json.dumps(responses[part])))]
+        completion.usage = MagicMock(total_tokens=100, prompt_tokens=80, completion_tokens=20)
+        return completion
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=create)
+    long_text = "\n".join(f"Experience line {i} " + "z" * 80 for i in range(200))
+
+    with patch("app.services.parser.OPENAI_API_KEY", "sk-test"), \
+         patch("app.services.parser.get_openai_client", return_value=mock_client), \
+         patch("app.services.parser.settings.CV_PARSE_MAX_INPUT_TOKENS", 3000), \
+         patch("app.services.parser.settings.CV_PARSE_MAX_CHUNKS", 2), \
+         patch("app.services.token_budget._load_encoding", return_value=None):
+        data = await parse_cv_with_llm(long_text, "long.pdf", embed=False)
+
+    assert mock_client.chat.completions.create.await_count == 2
+    assert data["name"] == "Jane Doe"
+    assert json.loads(data["skills"]) == ["Python", "Go"]
+    assert [j["company"] for j in json.loads(data["job_history"])] == ["Acme", "Initech"]
+    assert data["_tokens_used"] == 200
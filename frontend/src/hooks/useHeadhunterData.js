@@ -34,6 +34,7 @@ export const useHeadhunterData = () => {
     // Pagination State
     const [page, setPage] = useState(1)
     const [hasMore, setHasMore] = useState(true)
+    const nextCursorRef = useRef(null) // Keyset cursor of the next page (X-Next-Cursor)
     const [total, setTotal] = useState(0)
     const [stats, setStats] = useState({ totalCandidates: 0, hired: 0, silver: 0, activeJobs: 0 })
     const [isFetchingMore, setIsFetchingMore] = useState(false)
@@ -99,10 +100,13 @@ export const useHeadhunterData = () => {
                 limit: 50,
                 search: search || undefined,
                 sort_by: sortBy,
-                job_id: selectedJobId || undefined
+                job_id: selectedJobId || undefined,
+                // Later pages continue from the last row instead of an offset
+                cursor: append ? nextCursorRef.current || undefined : undefined
             }
 
             const res = await axios.get('/api/profiles/', { params })
+            nextCursorRef.current = res.headers?.['x-next-cursor'] || null
             const { items, total, pages } = res.data
 
             if (append) {